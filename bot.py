@@ -54,6 +54,8 @@ from dotenv import load_dotenv
 
 from config import Config
 from utils.embeds import ModEmbed
+from utils.async_tasks import DROP_NEWEST, DROP_OLDEST, TaskSupervisor
+from utils.http import close_shared_session, shared_session
 from utils.moderation_settings import moderation_bool
 from utils.components_v2 import ensure_layout_view_action_rows, patch_components_v2
 from utils.server_setup import ensure_private_moderation_logs
@@ -300,7 +302,9 @@ def _install_shutdown_exception_filter() -> None:
 # ==================== IMPORTS ====================
 try:
     from database import Database
-    from utils.cache import SnipeCache, PrefixCache
+    from utils.cache import RecentMessageBuffer, SnipeCache, PrefixCache
+    from utils.audit_log_cache import AuditLogCache
+    from utils.scheduler import Scheduler
     from utils.checks import is_bot_owner_id
     from utils.redis_cache import create_cache_backend
     pass
@@ -631,8 +635,30 @@ class ModBot(commands.Bot):
         self.snipe_cache = SnipeCache(max_age_seconds=300, max_size=500)
         self.edit_snipe_cache = SnipeCache(max_age_seconds=300, max_size=500)
         self.prefix_cache = PrefixCache(ttl=600)
+        self.audit_log_cache = AuditLogCache(max_entries=200, max_age_seconds=300)
+        # Latest gateway messages per channel, so AI context and profiling can
+        # skip channel.history once a channel has been loaded.
+        self.recent_messages = RecentMessageBuffer(per_channel=200, max_channels=256)
         self.caches: dict[str, object] = {}
 
+        # Background side-effects run in bounded lanes so a message flood
+        # queues (and past the limit, drops) work instead of spawning a task
+        # per event.
+        self.tasks = TaskSupervisor()
+        # Moderator-facing follow-ups (DMs, jail notices): refuse new work
+        # when full so accepted notices go out in order.
+        self.tasks.add_lane("notices", concurrency=8, max_queued=500, policy=DROP_NEWEST)
+        # Image screening keeps what it accepted: a flood is exactly when
+        # unsafe uploads arrive, so refused images are reported to staff as
+        # unscreened instead of queued images vanishing unnoticed.
+        self.tasks.add_lane("image_screening", concurrency=4, max_queued=200, policy=DROP_NEWEST)
+        # Attachment capture: under a flood the freshest messages matter.
+        self.tasks.add_lane("attachment_capture", concurrency=4, max_queued=200, policy=DROP_OLDEST)
+
+        # Pooled HTTP session shared by cogs (AI transport, logging media);
+        # opened in setup_hook on the running loop.
+        self.session = None
+
         # Statistics
         self.commands_used: int = 0
         self.messages_seen: int = 0
@@ -647,6 +673,10 @@ class ModBot(commands.Bot):
         self._cache_cleanup_task: Optional[asyncio.Task] = None
         self._dashboard_runner = None
 
+        # Timed items (tempbans, quarantines, giveaways, scheduled tasks);
+        # cogs register handlers, the loop starts once guilds are initialized.
+        self.scheduler = Scheduler()
+
         # Global blacklist cache (set of user IDs)
         self.blacklist_cache: set[int] = set()
         self.before_invoke(self._enforce_prefix_command_config)
@@ -1493,7 +1523,7 @@ class ModBot(commands.Bot):
         if prefix is None:
             # Load from database
             try:
-                settings = await self.db.get_settings(message.guild.id)
+                settings = await self.db.get_settings_view(message.guild.id)
                 prefix = settings.get("prefix") if settings else None
                 if not prefix:
                     prefix = getattr(Config, "PREFIX", ",")
@@ -1809,6 +1839,8 @@ class ModBot(commands.Bot):
             logger.error(f"[ERR] Failed to initialize database pool: {e}")
             raise
 
+        self.session = shared_session()
+
         # Upgrade caches to Redis if REDIS_URL is configured
         try:
             cache_cfg = await create_cache_backend()
@@ -2094,6 +2126,8 @@ class ModBot(commands.Bot):
         if fail_count:
             logger.warning(f"[WARN] {fail_count} guilds failed initialization")
 
+        self.scheduler.start()
+
         # Set presence
         await self.update_presence()
 
@@ -2252,6 +2286,8 @@ class ModBot(commands.Bot):
 
     async def on_message(self, message: discord.Message):
         """Handle incoming messages."""
+        if message.guild:
+            self.recent_messages.add(message)
         if message.author.bot:
             return
 
@@ -2261,7 +2297,7 @@ class ModBot(commands.Bot):
                 prefix = await self.prefix_cache.get(message.guild.id)
                 if prefix is None:
                     try:
-                        guild_settings = await self.db.get_settings(message.guild.id)
+                        guild_settings = await self.db.get_settings_view(message.guild.id)
                         prefix = guild_settings.get("prefix") if isinstance(guild_settings, dict) else None
                         if not prefix:
                             prefix = getattr(Config, "PREFIX", ",")
@@ -2546,6 +2582,12 @@ class ModBot(commands.Bot):
 
     # ─── Snipe Events ─────────────────────────────────────────────────────
 
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        self.recent_messages.remove(payload.channel_id, payload.message_id)
+
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        self.recent_messages.remove(payload.channel_id, payload.message_ids)
+
     async def on_message_delete(self, message: discord.Message):
         """Cache deleted messages for snipe command."""
         if message.author.bot or not message.guild:
@@ -2558,6 +2600,7 @@ class ModBot(commands.Bot):
             {
                 "content": message.content,
                 "author": message.author,
+                "message_id": message.id,
                 "created_at": message.created_at,
                 "attachments": [a.url for a in message.attachments if not a.is_spoiler()],
             },
@@ -2565,6 +2608,7 @@ class ModBot(commands.Bot):
 
     async def on_message_edit(self, before: discord.Message, after: discord.Message):
         """Cache edited messages for editsnipe command."""
+        self.recent_messages.update(after)
         if before.author.bot or not before.guild or before.content == after.content:
             return
         if not before.content and not after.content:
@@ -2581,6 +2625,10 @@ class ModBot(commands.Bot):
             },
         )
 
+    async def on_audit_log_entry_create(self, entry: discord.AuditLogEntry):
+        """Feed the shared audit-log cache used for attribution lookups."""
+        self.audit_log_cache.record(entry)
+
     # ─── Global Error & Cleanup ───────────────────────────────────────────
 
     async def on_error(self, event: str, *args, **kwargs):
@@ -2611,6 +2659,8 @@ class ModBot(commands.Bot):
 
         logger.info("[BYE] Shutting down ModBot...")
 
+        await self.scheduler.stop()
+
         # Cancel cache cleanup task
         if self._cache_cleanup_task:
             self._cache_cleanup_task.cancel()
@@ -2632,10 +2682,30 @@ class ModBot(commands.Bot):
             await self.snipe_cache.clear()
             await self.edit_snipe_cache.clear()
             await self.prefix_cache.clear()
+            self.recent_messages.clear()
             logger.info("[OK] Caches cleared")
         except Exception as e:
             logger.error(f"Error clearing caches: {e}")
 
+        # Let queued background work (DMs, screening) finish while the
+        # session and database are still up.
+        try:
+            if await self.tasks.drain(timeout=15):
+                logger.info("[OK] Background tasks drained")
+        except Exception as e:
+            logger.error(f"Error draining background tasks: {e}")
+
+        # Debounced AI memory turns are written through the database, and cogs
+        # only unload in super().close(), after it has gone.
+        ai_cog = self.get_cog("AIModeration")
+        if ai_cog is not None:
+            try:
+                abandoned = await ai_cog.ai.flush_memory_updates(timeout=30)
+                if not abandoned:
+                    logger.info("[OK] Pending AI memory flushed")
+            except Exception as e:
+                logger.error(f"Error flushing AI memory: {e}")
+
         # Close database — flushes WAL and performs final Supabase sync
         try:
             await self.db.close()
@@ -2644,6 +2714,10 @@ class ModBot(commands.Bot):
             logger.error(f"Error closing database: {e}")
 
         await super().close()
+
+        # After super().close() so unloading cogs can still finish requests
+        self.session = None
+        await close_shared_session()
         logger.info("[OK] Bot shutdown complete")
 
 
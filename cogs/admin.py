@@ -4,7 +4,7 @@ Admin Commands - Bot configuration
 
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 from datetime import datetime, timezone
 from typing import Optional, Literal, Any
 import math
@@ -13,6 +13,7 @@ import logging
 from utils.embeds import ModEmbed
 from utils. checks import is_admin, is_mod
 from utils.time_parser import parse_time
+from utils.scheduler import get_scheduler
 from config import Config
 
 logger = logging.getLogger("ModBot.Admin")
@@ -388,14 +389,11 @@ class Admin(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.bot.add_view(GiveawayInteractionView(self.bot))
-        self._giveaway_watcher.start()
+        get_scheduler(self.bot).register("giveaway", self._on_giveaway_due, self._load_giveaway_jobs)
         self.spam_tasks: dict[int, asyncio.Task] = {}
 
     def cog_unload(self):
-        try:
-            self._giveaway_watcher.cancel()
-        except Exception:
-            pass
+        get_scheduler(self.bot).unregister("giveaway")
         
         for task in self.spam_tasks.values():
             task.cancel()
@@ -568,6 +566,7 @@ class Admin(commands.Cog):
 
         with contextlib.suppress(Exception):
             await self.bot.db.end_giveaway(int(giveaway["id"]))
+        get_scheduler(self.bot).cancel("giveaway", int(giveaway["id"]))
 
         winners_role_id = giveaway.get("winners_role_id")
         if winners_role_id:
@@ -603,13 +602,20 @@ class Admin(commands.Cog):
             else:
                 await message.reply("This giveaway ended with no eligible entries.")
 
-    @tasks.loop(seconds=30)
-    async def _giveaway_watcher(self):
+    async def _load_giveaway_jobs(self):
+        """Scheduler loader: one job per active giveaway."""
+        return [
+            (int(giveaway["id"]), self._parse_db_datetime(giveaway.get("ends_at")), None)
+            for giveaway in await self.bot.db.get_active_giveaways()
+        ]
+
+    async def _on_giveaway_due(self, key, payload) -> None:
+        await self._end_due_giveaways()
+
+    async def _end_due_giveaways(self):
         import contextlib
         import random
 
-        await self.bot.wait_until_ready()
-
         now = datetime.now(timezone.utc)
         active = []
         with contextlib.suppress(Exception):
@@ -991,6 +997,7 @@ class Admin(commands.Cog):
             banner_url=banner,
             dm_winners=dm_winners,
         )
+        get_scheduler(self.bot).schedule("giveaway", int(giveaway_id), ends_at)
 
         await interaction.followup.send(
             embed=ModEmbed.success(
@@ -3,10 +3,11 @@ import json
 import logging
 from datetime import datetime, timezone
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 from cogs.aimoderation.python_runtime import execution_digest, safe_builtins, validate_python_code
 from utils.checks import is_bot_owner_id
+from utils.scheduler import get_scheduler
 
 logger = logging.getLogger("ModBot.AIScheduler")
 
@@ -14,16 +15,24 @@ logger = logging.getLogger("ModBot.AIScheduler")
 class AIScheduler(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self._ready = False
-        self._task_loop.start()
+        get_scheduler(bot).register("ai_task", self._on_task_due, self._load_task_jobs)
 
     def cog_unload(self):
-        self._task_loop.cancel()
+        get_scheduler(self.bot).unregister("ai_task")
 
-    @tasks.loop(seconds=30.0)
-    async def _task_loop(self):
-        if not self._ready:
-            return
+    async def _load_task_jobs(self):
+        """Scheduler loader: one job per pending scheduled task."""
+        async with self.bot.db.get_connection() as db:
+            cursor = await db.execute(
+                "SELECT id, execute_at FROM scheduled_tasks WHERE status = 'pending'"
+            )
+            rows = await cursor.fetchall()
+        return [(int(row[0]), row[1], None) for row in rows]
+
+    async def _on_task_due(self, key, payload) -> None:
+        await self._run_due_tasks()
+
+    async def _run_due_tasks(self):
         try:
             now = datetime.now(timezone.utc).replace(tzinfo=None)
 
@@ -70,7 +79,7 @@ class AIScheduler(commands.Cog):
             # Silently ignore "table does not exist" during early startup
             if "scheduled_tasks" in str(e) and "does not exist" in str(e):
                 return
-            logger.exception("AI Scheduler loop failed")
+            logger.exception("AI Scheduler run failed")
 
     async def _execute_task(self, guild_id: int, task_type: str, payload: dict, author_id: int | None = None):
         guild = self.bot.get_guild(guild_id)
@@ -124,14 +133,6 @@ class AIScheduler(commands.Cog):
                     str(result)[:500] if result is not None else "no return value",
                 )
 
-    @_task_loop.before_loop
-    async def _before_task_loop(self):
-        await self.bot.wait_until_ready()
-        # Wait a bit for guild init to create the scheduled_tasks table
-        await asyncio.sleep(15)
-        self._ready = True
-        logger.info("AI Scheduler is now active.")
-
 
 async def setup(bot):
     await bot.add_cog(AIScheduler(bot))
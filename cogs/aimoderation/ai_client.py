@@ -14,6 +14,7 @@ as a conversation or moderation provider.
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import logging
 import os
@@ -25,7 +26,8 @@ import aiohttp
 import discord
 from discord.ext import commands
 
-from utils.cache import RateLimiter
+from utils.cache import RateLimiter, SingleFlightCache
+from utils.http import shared_session
 from utils.messages import Messages
 
 from .types import (
@@ -45,6 +47,7 @@ from .providers import (
     OpenRouterLaneMixin,
 )
 from .research import RESEARCH_UNAVAILABLE, ResearchGatingMixin
+from .memory_batcher import MemoryTurnBatcher
 
 logger = logging.getLogger("ModBot.AIModeration.Client")
 
@@ -274,6 +277,54 @@ _GOOGLE_CLOUD_VISION_URL: Final[str] = os.getenv(
 _BACKGROUND_CALL_TIMEOUT_SECONDS: Final[float] = 90.0
 
 
+def _positive_int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int((os.getenv(name) or "").strip() or default))
+    except ValueError:
+        return default
+
+
+# Memory scanner limits: guilds curated at once, and the estimated tokens
+# (prompt + completion) all curation calls in one cycle may spend.
+_MEMORY_SCAN_CONCURRENCY: Final[int] = _positive_int_env("AI_MEMORY_SCAN_CONCURRENCY", 4)
+_MEMORY_SCAN_TOKEN_BUDGET: Final[int] = _positive_int_env("AI_MEMORY_SCAN_TOKEN_BUDGET", 200_000)
+
+
+def _user_watermark_scope(guild_id: int) -> str:
+    """Watermark scope for authors in one guild.
+
+    Message ids are global, so a single per-user mark would let the guild
+    scanned first in a cycle hide the author's older messages in the others.
+    """
+    return f"user:{int(guild_id)}"
+
+
+def _reference_id(message: Any) -> Optional[int]:
+    """Id of the message ``message`` replies to, if any."""
+    reference = getattr(message, "reference", None)
+    return getattr(reference, "message_id", None) if reference is not None else None
+
+
+def _estimate_memory_tokens(prompt_chars: int, max_tokens: int) -> int:
+    """Rough token cost of one curation call: ~4 characters per prompt token."""
+    return prompt_chars // 4 + max_tokens
+
+
+class _MemoryScanBudget:
+    """Estimated-token allowance shared by one memory-scanner cycle."""
+
+    def __init__(self, tokens: int) -> None:
+        self.remaining = max(0, int(tokens))
+        self.spent = 0
+
+    def reserve(self, tokens: int) -> bool:
+        if tokens > self.remaining:
+            return False
+        self.remaining -= tokens
+        self.spent += tokens
+        return True
+
+
 def _credential_is_configured(value: str) -> bool:
     """Reject empty and documented placeholder credentials."""
     normalized = (value or "").strip().upper()
@@ -462,6 +513,24 @@ class AIClient(
         # Throttle state for _set_block's WARNING log (see _set_block).
         self._block_log_at: Optional[datetime] = None
         self._block_log_reason: Optional[str] = None
+        # Spam waves and copy-paste raids send the same prompt hundreds of
+        # times in seconds: identical in-flight calls share one request and a
+        # recent answer is reused for a short while.
+        self._intent_cache: SingleFlightCache[str, Dict[str, Any]] = SingleFlightCache(
+            config.decision_cache_size,
+            ttl=config.decision_cache_ttl_seconds,
+        )
+        self._routing_cache: SingleFlightCache[str, str] = SingleFlightCache(
+            config.decision_cache_size,
+            ttl=config.decision_cache_ttl_seconds,
+        )
+        # Conversation turns are summarized into memory per (guild, user) once
+        # the user goes quiet, not once per turn.
+        self._memory_batcher = MemoryTurnBatcher(
+            self._flush_memory_turns,
+            quiet_seconds=config.memory_quiet_seconds,
+            max_turns=config.memory_batch_turns,
+        )
 
     @property
     def is_available(self) -> bool:
@@ -537,9 +606,27 @@ class AIClient(
             f"Image identification evidence: "
             f"{'Google Cloud Vision + Gemini' if _GOOGLE_CLOUD_VISION_API_KEY else 'OpenRouter only'}",
             f"Available now: {'yes' if self.is_available else 'no'}",
+            *(
+                f"{label} cache: {stats['hits']} hits, {stats['coalesced']} coalesced, "
+                f"{stats['misses']} model calls"
+                for label, stats in self.decision_cache_stats().items()
+            ),
             self.availability_message(),
         ]
 
+    def decision_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit and coalescing counters for the intent and routing caches."""
+        return {
+            "Intent": self._intent_cache.get_stats(),
+            "Routing": self._routing_cache.get_stats(),
+        }
+
+    @staticmethod
+    def _decision_cache_key(*parts: Any) -> str:
+        return hashlib.sha256(
+            json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
     @property
     def has_web_search(self) -> bool:
         """Whether a live-search backend is available.
@@ -557,8 +644,15 @@ class AIClient(
     has_openrouter_search = has_web_search
 
     async def close(self) -> None:
-        """Release provider resources. OpenRouter is stateless HTTP, so none."""
-        return None
+        """Write pending memory turns. OpenRouter is stateless HTTP otherwise."""
+        await self.flush_memory_updates()
+
+    async def flush_memory_updates(self, timeout: Optional[float] = None) -> int:
+        """Summarize every batched conversation turn that is still pending.
+
+        Returns how many batches were abandoned when ``timeout`` ran out.
+        """
+        return await self._memory_batcher.close(timeout)
 
     async def prewarm(self) -> None:
         """Warm up provider state. OpenRouter needs no session, so this is a no-op."""
@@ -784,9 +878,15 @@ class AIClient(
         return None
 
     def _get_http_session(self, *, timeout: int) -> Tuple[aiohttp.ClientSession, bool]:
+        """Return the pooled session and whether the caller must close it.
+
+        Always the long-lived, keep-alive session (``bot.session``, or the
+        process-wide one when no bot has opened it), so the flag is False.
+        ``timeout`` is applied per request by the caller.
+        """
         session: Optional[aiohttp.ClientSession] = getattr(self.bot, "session", None)
         if not session or getattr(session, "closed", False):
-            return aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)), True
+            session = shared_session()
         return session, False
 
 
@@ -794,6 +894,10 @@ class AIClient(
     # Public interface
     # ------------------------------------------------------------------
 
+    def _routing_history_window(self) -> int:
+        """How many recent messages the routing prompt shows the model."""
+        return max(1, int(self.config.routing_context_messages))
+
     def _build_routing_prompt(
         self,
         *,
@@ -819,7 +923,7 @@ class AIClient(
             reply_suffix = f" {reply_tag}" if reply_tag else ""
             return f"[{label}] {m.author} ({m.author.id}): {content}{reply_suffix}"
 
-        history_window = max(1, int(self.config.routing_context_messages))
+        history_window = self._routing_history_window()
         history = "\n".join(
             _format_line(m) for m in recent_messages[-history_window:]
         ) or "None"
@@ -881,7 +985,19 @@ class AIClient(
         recent_messages: List[discord.Message],
         permissions: PermissionFlags,
         model: Optional[str] = None,
+        use_cache: bool = False,
+        policy_key: str = "",
+        source_message: Optional[discord.Message] = None,
     ) -> Decision:
+        """Ask the moderation lane which action the message requests.
+
+        With ``use_cache`` an identical request (same guild policy, channel,
+        author, permissions, mentions, normalized text, reply target and
+        routing history) made within the cache TTL, or while one is in flight,
+        reuses that model reply. The reply target and history are part of the
+        key because "ban him" resolves its target from them.
+        ``policy_key`` scopes the reuse to one version of the guild's settings.
+        """
         if not self.is_available:
             return Decision.error(self.availability_message())
 
@@ -902,10 +1018,10 @@ class AIClient(
             {"role": "user", "content": prompt},
         ]
 
-        try:
+        async def route() -> Optional[str]:
             await self._rate_limiter.record_call(author.id)
             # FIX: pass json_mode=True so the model is constrained to JSON output
-            content = await self._call(
+            return await self._call(
                 messages,
                 temperature=self.config.temperature_routing,
                 max_tokens=self.config.max_tokens_routing,
@@ -914,6 +1030,32 @@ class AIClient(
                 session_key=f"{guild.id}:moderation",
                 session_name=f"{guild.name} -> moderation",
             )
+
+        try:
+            if use_cache:
+                channel = getattr(recent_messages[-1], "channel", None) if recent_messages else None
+                key = self._decision_cache_key(
+                    model or self.config.model,
+                    policy_key,
+                    guild.id,
+                    getattr(channel, "id", None),
+                    author.id,
+                    permissions.to_dict(),
+                    [mention.user_id for mention in mentions],
+                    re.sub(r"\s+", " ", user_content or "").strip(),
+                    _reference_id(source_message),
+                    [
+                        (getattr(m, "id", None), _reference_id(m))
+                        for m in recent_messages[-self._routing_history_window():]
+                    ],
+                )
+                content = await self._routing_cache.get_or_call(
+                    key,
+                    route,
+                    cacheable=lambda reply: bool(reply),
+                )
+            else:
+                content = await route()
             if not content:
                 return Decision.error("No response from AI model.")
             data = json.loads(self._extract_json(content))
@@ -1092,23 +1234,33 @@ class AIClient(
         "false": "none",
     }
 
-    async def classify_intent(self, user_content: str) -> Optional[Dict[str, Any]]:
+    async def classify_intent(
+        self,
+        user_content: str,
+        *,
+        use_cache: bool = True,
+    ) -> Optional[Dict[str, Any]]:
         """Ask Ling for the answering route AND whether this is a moderation request.
 
         One call, two labels. Returns None on any failure so callers fall back to
         their own heuristics: this classifier is an optimization and must never
         gate the reply it was only trying to label.
+
+        The prompt carries no guild context, so identical text (after
+        whitespace and case folding) shares one in-flight call and a short-lived
+        cached answer across guilds; ``use_cache=False`` opts a guild out.
         """
         text = re.sub(r"\s+", " ", user_content or "").strip()
         if not text or not _openrouter_conversation_enabled():
             return None
 
         user_prompt = _sanitize_untrusted_text(text, limit=4_000)
-        try:
-            messages = [
-                {"role": "system", "content": LING_INTENT_SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt},
-            ]
+        messages = [
+            {"role": "system", "content": LING_INTENT_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ]
+
+        async def classify() -> Optional[Dict[str, Any]]:
             raw = await asyncio.wait_for(
                 self._post_chat_completion(
                     messages,
@@ -1135,6 +1287,15 @@ class AIClient(
                 timeout=2.5,
             )
             return self._parse_intent_payload(raw or "")
+
+        try:
+            if not use_cache:
+                return await classify()
+            key = self._decision_cache_key(
+                _OPENROUTER_LING_ROUTER_MODEL, user_prompt.casefold()
+            )
+            decision = await self._intent_cache.get_or_call(key, classify)
+            return dict(decision) if decision is not None else None
         except asyncio.TimeoutError:
             logger.warning("Ling intent classification timed out")
             return None
@@ -1142,9 +1303,14 @@ class AIClient(
             logger.warning("Ling intent classification failed", exc_info=True)
             return None
 
-    async def classify_research_route(self, user_content: str) -> Optional[Dict[str, Any]]:
+    async def classify_research_route(
+        self,
+        user_content: str,
+        *,
+        use_cache: bool = True,
+    ) -> Optional[Dict[str, Any]]:
         """Back-compat name for the route half of :meth:`classify_intent`."""
-        return await self.classify_intent(user_content)
+        return await self.classify_intent(user_content, use_cache=use_cache)
 
     def _parse_intent_payload(self, raw: str) -> Optional[Dict[str, Any]]:
         """Parse Ling's two-label JSON, tolerating near-miss vocabulary."""
@@ -2180,7 +2346,7 @@ class AIClient(
                 return None
             session, owned_session = self._get_http_session(timeout=20)
             try:
-                async with session.get(url) as resp:
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=20)) as resp:
                     if resp.status >= 400:
                         return None
                     content_length = resp.headers.get("Content-Length")
@@ -2821,7 +2987,8 @@ class AIClient(
         "remember them across conversations.\n\n"
         "Inputs you receive:\n"
         "- CURRENT MEMORY: the existing distilled profile (may be empty).\n"
-        "- NEW EXCHANGE: the latest user message and the assistant's reply.\n\n"
+        "- NEW EXCHANGES: the user's latest messages and the assistant's replies, "
+        "oldest first.\n\n"
         "Rules:\n"
         "- Extract durable, useful facts about the USER only: name/aliases, preferences, "
         "interests, recurring topics, important context they shared, goals, tone they like.\n"
@@ -2829,11 +2996,16 @@ class AIClient(
         "with no lasting value.\n"
         "- Merge new facts into CURRENT MEMORY, deduplicate, and keep it tight.\n"
         "- Prefer short bullet lines like '- Likes roguelike games' or '- Prefers brief answers.'\n"
-        "- Drop facts that are clearly outdated or contradicted by the new exchange.\n"
+        "- Drop facts that are clearly outdated or contradicted by the new exchanges; "
+        "later exchanges win over earlier ones.\n"
         "- Keep the whole profile under ~1200 characters. Be ruthless about relevance.\n"
         "- Output ONLY the updated profile text. No preamble, no JSON, no quotes."
     )
 
+    # A batch can hold up to ``memory_batch_turns`` exchanges; the feed is
+    # capped so a long burst of pasted text cannot blow up the prompt.
+    _MEMORY_TURN_FEED_CHARS: Final[int] = 12_000
+
     def _schedule_memory_update(
         self,
         signals: ConversationSignals,
@@ -2842,7 +3014,7 @@ class AIClient(
         bot_response: str,
         stored_memory: str,
     ) -> None:
-        """Persist a conversation turn as a fire-and-forget summarization task.
+        """Queue a conversation turn for the debounced memory summarizer.
 
         Research isolation is deliberately INPUT-ONLY: ``converse`` withholds the
         stored profile from the research prompt so private memory never leaks into
@@ -2851,21 +3023,42 @@ class AIClient(
         skipping the write -- that silently drops research turns from memory and
         breaks test_research_does_not_feed_saved_memory_or_continue_chat.
         """
-        asyncio.create_task(
-            self._update_memory_smart(
-                author.id,
-                user_content,
-                bot_response,
-                stored_memory,
-            )
+        guild = getattr(author, "guild", None)
+        self._memory_batcher.add(
+            (getattr(guild, "id", None), author.id),
+            user_content,
+            bot_response,
+            stored_memory,
         )
 
+    async def _flush_memory_turns(
+        self, key: Tuple[Optional[int], int], turns: List[Tuple[str, str]], stored_memory: str
+    ) -> None:
+        """Batch callback: merge every queued turn for one user in one call."""
+        user_id = key[1]
+        db = getattr(self.bot, "db", None)
+        past_memory = stored_memory
+        if db:
+            # The profile may have moved on since the first turn was queued
+            # (the memory scanner writes it too), so merge into the latest.
+            try:
+                past_memory = await db.get_ai_memory(user_id) or stored_memory
+            except Exception:
+                logger.debug("Failed to reload AI memory for user %d", user_id, exc_info=True)
+        await self._update_memory_turns(user_id, turns, past_memory)
+
     async def _update_memory_smart(
         self, user_id: int, user_msg: str, bot_response: str, past_memory: str
     ) -> None:
-        """Distill a conversation turn into a concise, evolving user profile.
+        """Distill a conversation turn into a concise, evolving user profile."""
+        await self._update_memory_turns(user_id, [(user_msg, bot_response)], past_memory)
 
-        Instead of accumulating raw dialogue, the model merges the new exchange
+    async def _update_memory_turns(
+        self, user_id: int, turns: List[Tuple[str, str]], past_memory: str
+    ) -> None:
+        """Distill conversation turns into a concise, evolving user profile.
+
+        Instead of accumulating raw dialogue, the model merges the new exchanges
         into the existing distilled memory so it stays small and meaningful.
         Falls back to raw-log accumulation only if the summarization call fails.
         """
@@ -2875,20 +3068,26 @@ class AIClient(
                 return
 
             # Skip noise: empty or trivially short exchanges add no lasting value.
-            user_text = (user_msg or "").strip()
-            bot_text = (bot_response or "").strip()
-            if len(user_text) < 3 and len(bot_text) < 3:
+            exchanges = [
+                ((user_msg or "").strip(), (bot_response or "").strip())
+                for user_msg, bot_response in turns
+            ]
+            exchanges = [
+                (user_text, bot_text)
+                for user_text, bot_text in exchanges
+                if len(user_text) >= 3 or len(bot_text) >= 3
+            ]
+            if not exchanges:
                 return
 
-            new_memory = await self._summarize_memory(
-                past_memory or "", user_text, bot_response
-            )
+            new_memory = await self._summarize_memory_turns(past_memory or "", exchanges)
 
             if not new_memory or not new_memory.strip():
                 # Fallback: keep the old raw-log behavior so memory still evolves
                 # even if the summarizer is unavailable.
-                entry = (
+                entry = "".join(
                     f"\n[user]: {user_text[:1000]}\n[bot]: {bot_text[:1000]}"
+                    for user_text, bot_text in exchanges
                 )
                 new_memory = (past_memory + entry).strip()
                 max_chars = self.config.memory_max_chars
@@ -2910,17 +3109,33 @@ class AIClient(
         self, current_memory: str, user_msg: str, bot_response: str
     ) -> Optional[str]:
         """Ask the configured AI provider to merge a new exchange into the profile."""
+        return await self._summarize_memory_turns(current_memory, [(user_msg, bot_response)])
+
+    async def _summarize_memory_turns(
+        self, current_memory: str, turns: List[Tuple[str, str]]
+    ) -> Optional[str]:
+        """Ask the configured AI provider to merge new exchanges into the profile."""
         if not self.is_available:
             return None
         try:
             current_block = current_memory.strip() or "(none yet)"
-            user_block = (user_msg or "").strip()[:1500]
-            bot_block = (bot_response or "").strip()[:1500]
+            # Newest exchanges matter most: keep those whole when the feed
+            # would exceed its cap and drop the oldest instead.
+            blocks: List[str] = []
+            feed_chars = 0
+            for user_msg, bot_response in reversed(turns):
+                block = (
+                    f"User said: {(user_msg or '').strip()[:1500]}\n"
+                    f"Assistant replied: {(bot_response or '').strip()[:1500]}"
+                )
+                if blocks and feed_chars + len(block) > self._MEMORY_TURN_FEED_CHARS:
+                    break
+                blocks.append(block)
+                feed_chars += len(block)
+            exchanges = "\n\n".join(reversed(blocks))
             prompt = (
                 f"CURRENT MEMORY:\n{current_block}\n\n"
-                f"NEW EXCHANGE:\n"
-                f"User said: {user_block}\n"
-                f"Assistant replied: {bot_block}\n\n"
+                f"NEW EXCHANGES:\n{exchanges}\n\n"
                 "Output the updated profile now (bullets, <= ~1200 chars)."
             )
             messages = [
@@ -2956,8 +3171,9 @@ class AIClient(
     # Background Batch Memory Scanner
     # ------------------------------------------------------------------
     #
-    # Every ~30 minutes each guild's text channels are sampled for the
-    # last 50 stored messages.  Those batches are distilled into:
+    # Every ~30 minutes each guild's text channels are read for the stored
+    # messages past their watermark (at most the latest 50 per channel).
+    # Those batches are distilled into:
     #   - "(ServerName) -> Memory"  — a concise guild-level profile
     #   - per-user memory updates for every active author in the batch
     #
@@ -3004,80 +3220,173 @@ class AIClient(
         "- Output ONLY the updated profile text. No preamble, no JSON, no quotes."
     )
 
-    async def run_memory_scanner(self) -> Dict[str, int]:
-        """Scan every guild's text channels and update server + user memories.
-
-        Returns a stats dict: {'guilds': int, 'channels': int, 'users': int}.
+    async def run_memory_scanner(
+        self,
+        *,
+        concurrency: Optional[int] = None,
+        token_budget: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """Fold messages stored since the last scan into server + user memories.
+
+        Guilds are scanned by a small worker pool. A guild whose channels hold
+        nothing past their watermarks costs one query and no model calls.
+        Each guild reserves its estimated tokens from the cycle's budget before
+        any call; a guild that no longer fits waits for the next cycle with its
+        watermarks untouched.
+
+        Returns a stats dict: {'guilds', 'channels', 'users', 'deferred', 'tokens'}.
         """
+        stats = {"guilds": 0, "channels": 0, "users": 0, "deferred": 0, "tokens": 0}
         db = getattr(self.bot, "db", None)
         if not db or not self.is_available:
-            return {"guilds": 0, "channels": 0, "users": 0}
+            return stats
 
-        guilds_scanned = 0
-        channels_scanned = 0
-        users_updated = 0
+        budget = _MemoryScanBudget(token_budget or _MEMORY_SCAN_TOKEN_BUDGET)
+        pending = iter(list(self.bot.guilds))
 
-        for guild in self.bot.guilds:
-            try:
-                # Collect all batches for this guild
-                guild_batches: List[Dict[str, Any]] = []
-                all_author_msgs: Dict[int, List[str]] = {}
-
-                for channel in guild.text_channels:
-                    # Respect channel permissions — only read channels we can see
-                    me = getattr(guild, "me", None)
-                    if me is None:
-                        continue
-                    perms = channel.permissions_for(me)
-                    if not perms.read_messages or not perms.read_message_history:
-                        continue
-
-                    msgs = await db.get_recent_channel_messages(channel.id, limit=50)
-                    if not msgs:
-                        continue
-
-                    guild_batches.append({
-                        "channel_name": channel.name,
-                        "channel_id": channel.id,
-                        "messages": msgs,
-                    })
-                    channels_scanned += 1
-
-                    for msg in msgs:
-                        author_id = msg.get("user_id")
-                        content = (msg.get("content") or "").strip()
-                        if author_id and content:
-                            all_author_msgs.setdefault(author_id, []).append(content)
-
-                if guild_batches:
-                    await self._summarize_server_memory(guild, guild_batches)
-                    guilds_scanned += 1
-
-                # Per-user memory updates from this guild's batch
-                if all_author_msgs and guild_batches:
-                    user_count = await self._batch_update_user_memories(
-                        guild, all_author_msgs
+        async def worker() -> None:
+            # Workers share one iterator, so each guild is scanned once.
+            for guild in pending:
+                try:
+                    result = await self._scan_guild_memory(db, guild, budget)
+                except Exception:
+                    logger.debug(
+                        "Memory scanner failed for guild %d", guild.id, exc_info=True
+                    )
+                    continue
+                for key, value in result.items():
+                    stats[key] += value
+
+        workers = max(1, int(concurrency or _MEMORY_SCAN_CONCURRENCY))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        stats["tokens"] = budget.spent
+        return stats
+
+    async def _scan_guild_memory(
+        self, db: Any, guild: discord.Guild, budget: "_MemoryScanBudget"
+    ) -> Dict[str, int]:
+        """Scan one guild's channels past their watermarks; see run_memory_scanner."""
+        heads = await db.get_channel_message_heads(guild.id)
+        me = getattr(guild, "me", None)
+        if not heads or me is None:
+            return {}
+        marks = await db.get_memory_watermarks("channel", heads)
+
+        guild_batches: List[Dict[str, Any]] = []
+        for channel in guild.text_channels:
+            mark = marks.get(channel.id, 0)
+            if heads.get(channel.id, 0) <= mark:
+                continue
+            # Respect channel permissions — only read channels we can see
+            perms = channel.permissions_for(me)
+            if not perms.read_messages or not perms.read_message_history:
+                continue
+            msgs = await db.get_recent_channel_messages(
+                channel.id, limit=50, after_message_id=mark
+            )
+            if msgs:
+                guild_batches.append({
+                    "channel_name": channel.name,
+                    "channel_id": channel.id,
+                    "messages": msgs,
+                })
+        if not guild_batches:
+            return {}
+
+        all_author_msgs: Dict[int, List[str]] = {}
+        author_heads: Dict[int, int] = {}
+        for batch in guild_batches:
+            for msg in batch["messages"]:
+                author_id = msg.get("user_id")
+                content = (msg.get("content") or "").strip()
+                if author_id and content:
+                    all_author_msgs.setdefault(author_id, []).append(content)
+                    author_heads[author_id] = max(
+                        author_heads.get(author_id, 0), int(msg["message_id"])
                     )
-                    users_updated += user_count
 
-            except Exception:
-                logger.debug(
-                    "Memory scanner failed for guild %d", guild.id, exc_info=True
+        # Authors whose memory already covers these messages (an earlier pass
+        # updated them, then the server summary failed) are not redone.
+        user_scope = _user_watermark_scope(guild.id)
+        user_marks = await db.get_memory_watermarks(user_scope, author_heads)
+        for author_id, head in list(author_heads.items()):
+            if head <= user_marks.get(author_id, 0):
+                del author_heads[author_id]
+                all_author_msgs.pop(author_id, None)
+
+        feed_chars = sum(
+            min(len(msg.get("content") or ""), 400)
+            for batch in guild_batches
+            for msg in batch["messages"]
+        )
+        cost = _estimate_memory_tokens(
+            len(self._SERVER_MEMORY_SUMMARY_PROMPT) + min(feed_chars, 6000) + 1500,
+            1000,
+        )
+        user_costs = {
+            author_id: _estimate_memory_tokens(
+                len(self._BATCH_USER_MEMORY_PROMPT)
+                + sum(min(len(line), 400) for line in lines[:15])
+                + 1200,
+                800,
+            )
+            for author_id, lines in all_author_msgs.items()
+        }
+        held_back: set[int] = set()
+        if not budget.reserve(cost + sum(user_costs.values())):
+            if budget.spent or not budget.reserve(cost):
+                return {"deferred": 1}
+            # Alone in a fresh budget and still too big: summarize the server
+            # and the most active authors that fit, rather than never progress.
+            kept: Dict[int, List[str]] = {}
+            for author_id in sorted(all_author_msgs, key=lambda a: -len(all_author_msgs[a])):
+                if budget.reserve(user_costs[author_id]):
+                    kept[author_id] = all_author_msgs[author_id]
+            if kept:
+                # The rest are re-read next cycle: channel watermarks stop short
+                # of their messages, and the kept authors' user watermarks keep
+                # them from being redone.
+                held_back = set(all_author_msgs) - set(kept)
+            else:
+                logger.info(
+                    "Memory scan for guild %d skipped %d author(s) that did not fit the token budget",
+                    guild.id,
+                    len(all_author_msgs),
                 )
+            all_author_msgs = kept
 
-        return {
-            "guilds": guilds_scanned,
-            "channels": channels_scanned,
-            "users": users_updated,
-        }
+        users_updated = 0
+        if all_author_msgs:
+            users_updated = await self._batch_update_user_memories(
+                guild, all_author_msgs, watermarks=author_heads
+            )
+        if not await self._summarize_server_memory(guild, guild_batches):
+            # Channel watermarks stay put, so this batch is retried next cycle.
+            return {"users": users_updated}
+
+        channel_marks: Dict[int, int] = {}
+        for batch in guild_batches:
+            ids = [int(msg["message_id"]) for msg in batch["messages"]]
+            held = [
+                message_id
+                for message_id, msg in zip(ids, batch["messages"])
+                if msg.get("user_id") in held_back
+            ]
+            channel_marks[batch["channel_id"]] = min(held) - 1 if held else max(ids)
+        await db.set_memory_watermarks("channel", channel_marks)
+        return {"guilds": 1, "channels": len(guild_batches), "users": users_updated}
 
     async def _summarize_server_memory(
         self, guild: discord.Guild, batches: List[Dict[str, Any]]
-    ) -> None:
-        """Distil recent channel messages into a guild-level memory profile."""
+    ) -> bool:
+        """Distil recent channel messages into a guild-level memory profile.
+
+        Returns False only when the summary should be retried: the model call
+        failed or returned nothing. A batch too thin to summarize counts as done.
+        """
         db = getattr(self.bot, "db", None)
         if not db or not batches:
-            return
+            return False
 
         # Build a compact feed of messages
         feed_lines: List[str] = []
@@ -3104,7 +3413,7 @@ class AIClient(
                 break
 
         if not feed_lines or total_chars < 20:
-            return
+            return True
 
         feed_text = "\n".join(feed_lines)
         current_memory = (await db.get_guild_memory(guild.id)) or "(none yet)"
@@ -3145,15 +3454,26 @@ class AIClient(
                     "Updated server memory for %s (%d chars)",
                     guild_name, len(content),
                 )
+                return True
         except Exception:
             logger.debug(
                 "Guild memory summarization failed for %d", guild.id, exc_info=True
             )
+        return False
 
     async def _batch_update_user_memories(
-        self, guild: discord.Guild, author_msgs: Dict[int, List[str]]
+        self,
+        guild: discord.Guild,
+        author_msgs: Dict[int, List[str]],
+        *,
+        watermarks: Optional[Dict[int, int]] = None,
     ) -> int:
-        """Update per-user memories from a batch of recent messages."""
+        """Update per-user memories from a batch of recent messages.
+
+        ``watermarks`` maps an author to the newest message id in the batch
+        from this guild; it is recorded once that author's memory has been
+        updated.
+        """
         db = getattr(self.bot, "db", None)
         if not db:
             return 0
@@ -3200,6 +3520,11 @@ class AIClient(
                     if content and len(content) > 5:
                         await db.update_ai_memory(author_id, content.strip())
                         updated += 1
+                        if watermarks and author_id in watermarks:
+                            await db.set_memory_watermarks(
+                                _user_watermark_scope(guild.id),
+                                {author_id: watermarks[author_id]},
+                            )
             except Exception:
                 logger.debug(
                     "Batch user memory update failed for %d", author_id, exc_info=True
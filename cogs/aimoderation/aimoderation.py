@@ -20,6 +20,7 @@ import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 
+from utils.cache import RecentMessageBuffer
 from utils.classic_send import send_classic_message
 from utils.checks import is_bot_owner_id
 from utils.embeds import compact_kv_lines
@@ -323,15 +324,17 @@ class AIModeration(MessageParsingMixin, ResponseRenderingMixin, commands.Cog):
 
     @tasks.loop(minutes=30)
     async def _memory_scanner(self) -> None:
-        """Periodically scan every guild's channels and update memories."""
+        """Periodically fold new channel messages into guild and user memories."""
         if not self.ai.is_available:
             return
         try:
             stats = await self.ai.run_memory_scanner()
-            if stats["guilds"]:
+            if stats["guilds"] or stats["deferred"]:
                 logger.info(
-                    "Memory scanner: %d guilds, %d channels, %d users updated",
+                    "Memory scanner: %d guilds, %d channels, %d users updated, "
+                    "%d guilds deferred, ~%d tokens",
                     stats["guilds"], stats["channels"], stats["users"],
+                    stats["deferred"], stats["tokens"],
                 )
         except Exception:
             logger.debug("Memory scanner loop failed", exc_info=True)
@@ -362,7 +365,7 @@ class AIModeration(MessageParsingMixin, ResponseRenderingMixin, commands.Cog):
         if not db:
             return GuildSettings()
         try:
-            data = await db.get_settings(guild_id)
+            data = await db.get_settings_view(guild_id)
             return GuildSettings.from_dict(data)
         except Exception:
             logger.debug("Failed to fetch guild settings for %d", guild_id, exc_info=True)
@@ -569,17 +572,7 @@ class AIModeration(MessageParsingMixin, ResponseRenderingMixin, commands.Cog):
     ) -> None:
         """Report a flagged image to the moderation log channel."""
         try:
-            db = getattr(self.bot, "db", None)
-            raw_settings = await db.get_settings(message.guild.id) if db else {}
-            channel_id = (
-                raw_settings.get("automod_log_channel")
-                or raw_settings.get("log_channel_automod")
-                or raw_settings.get("mod_log_channel")
-                or raw_settings.get("log_channel_mod")
-            )
-            if not channel_id:
-                return
-            log_channel = message.guild.get_channel(int(channel_id))
+            log_channel = await self._image_log_channel(message.guild)
             if log_channel is None:
                 return
 
@@ -615,6 +608,50 @@ class AIModeration(MessageParsingMixin, ResponseRenderingMixin, commands.Cog):
         except Exception:
             logger.debug("Could not log flagged image", exc_info=True)
 
+    async def _log_unscreened_image(self, message: discord.Message) -> None:
+        """Tell staff an image went unscreened because the screening queue was full.
+
+        Goes through the logging cog's batcher when it is loaded, so a flood
+        of refused uploads folds into a few log messages.
+        """
+        try:
+            log_channel = await self._image_log_channel(message.guild)
+            if log_channel is None:
+                return
+            embed = discord.Embed(
+                title="Image not screened",
+                description=(
+                    f"**Author:** {message.author.mention} (`{message.author.id}`)\n"
+                    f"**Channel:** {message.channel.mention}\n"
+                    "The screening queue was full, so this upload was not checked. "
+                    f"[Jump to message]({message.jump_url})"
+                ),
+                color=discord.Color.dark_orange(),
+                timestamp=discord.utils.utcnow(),
+            )
+            embed.set_footer(text="AI image screening")
+            logging_cog = self.bot.get_cog("Logging")
+            if logging_cog is not None and hasattr(logging_cog, "safe_send_log"):
+                await logging_cog.safe_send_log(log_channel, embed)
+            else:
+                await log_channel.send(embed=embed)
+        except Exception:
+            logger.debug("Could not log unscreened image", exc_info=True)
+
+    async def _image_log_channel(self, guild: discord.Guild) -> Optional[discord.abc.Messageable]:
+        """The channel image-screening reports go to, if one is configured."""
+        db = getattr(self.bot, "db", None)
+        raw_settings = await db.get_settings_view(guild.id) if db else {}
+        channel_id = (
+            raw_settings.get("automod_log_channel")
+            or raw_settings.get("log_channel_automod")
+            or raw_settings.get("mod_log_channel")
+            or raw_settings.get("log_channel_mod")
+        )
+        if not channel_id:
+            return None
+        return guild.get_channel(int(channel_id))
+
     async def _punish_unsafe_image(
         self,
         message: discord.Message,
@@ -832,12 +869,25 @@ class AIModeration(MessageParsingMixin, ResponseRenderingMixin, commands.Cog):
         ]
 
     async def fetch_recent_messages(self, channel: discord.abc.Messageable, limit: int = 15) -> List[discord.Message]:
+        # The bot's gateway-fed buffer answers once the channel is warm; REST
+        # only loads a channel's backlog the first time it is read.
+        buffer = getattr(self.bot, "recent_messages", None)
+        if not isinstance(buffer, RecentMessageBuffer):
+            buffer = None
+        channel_id = getattr(channel, "id", None)
+        if buffer is not None and channel_id is not None:
+            cached = buffer.recent(channel_id, limit)
+            if cached is not None:
+                return cached
+        fetch_limit = max(limit, buffer.per_channel) if buffer is not None else limit
         try:
-            messages = [m async for m in channel.history(limit=limit)]
-            messages.reverse()  # Oldest to newest
-            return messages
+            messages = [m async for m in channel.history(limit=fetch_limit)]
         except discord.HTTPException:
             return []
+        messages.reverse()  # Oldest to newest
+        if buffer is not None and channel_id is not None:
+            buffer.seed(channel_id, messages, requested=fetch_limit)
+        return messages[-limit:] if limit > 0 else []
 
     async def _include_referenced_message(
         self,
@@ -2618,7 +2668,7 @@ class AIModeration(MessageParsingMixin, ResponseRenderingMixin, commands.Cog):
 
         # Track message for behavioral profiling
         if hasattr(self.bot, 'db') and hasattr(self.bot.db, 'track_user_message'):
-            self.bot.loop.create_task(self.bot.db.track_user_message(message))
+            await self.bot.db.track_user_message(message)
 
         is_mentioned = self.bot.user in message.mentions
         is_reply_to_bot = await self._message_replies_to_bot(message)
@@ -2638,12 +2688,17 @@ class AIModeration(MessageParsingMixin, ResponseRenderingMixin, commands.Cog):
         settings = await self.get_guild_settings(message.guild.id)
 
         # Age screening runs regardless of whether the bot was addressed, so it
-        # must come before the mention/reply gates. Fire-and-forget so a slow
-        # screening call never delays normal conversation handling.
+        # must come before the mention/reply gates. Backgrounded in a bounded
+        # lane so a slow screening call never delays normal conversation
+        # handling and an image flood cannot pile up tasks.
         if settings.image_scan_enabled and message.attachments:
-            self.bot.loop.create_task(
-                self._screen_message_images(message, settings)
+            accepted = self.bot.tasks.submit(
+                "image_screening",
+                self._screen_message_images(message, settings),
+                name=f"image-screening-{message.id}",
             )
+            if not accepted and self._scannable_attachments(message):
+                await self._log_unscreened_image(message)
 
         implicit_continuation = False
         if not is_mentioned and not is_reply_to_bot:
@@ -2761,6 +2816,9 @@ class AIModeration(MessageParsingMixin, ResponseRenderingMixin, commands.Cog):
                         recent_messages=recent,
                         permissions=permissions,
                         model=settings.model,
+                        use_cache=settings.decision_cache,
+                        policy_key=settings.policy_hash(),
+                        source_message=message,
                     )
                 except Exception:
                     logger.exception("AI routing call failed")
@@ -2955,7 +3013,7 @@ class AIModeration(MessageParsingMixin, ResponseRenderingMixin, commands.Cog):
             await self.reply(message, content=quick_reply)
             self._mark_chat_active(message.channel.id)
             return
-        signals = await self._build_conversation_signals(content)
+        signals = await self._build_conversation_signals(content, use_cache=settings.decision_cache)
 
         # --- Research indicator ---
         research_msg: Optional[discord.Message] = None
@@ -3195,6 +3253,7 @@ class AIModeration(MessageParsingMixin, ResponseRenderingMixin, commands.Cog):
                     ("Model", f"`{settings.model or self.config.model}`"),
                     ("Context Messages", settings.context_messages),
                     ("Proactive Chance", f"{settings.proactive_chance * 100:.1f}%"),
+                    ("Decision Cache", "On" if settings.decision_cache else "Off"),
                     ("Provider Available", "Yes" if self.ai.is_available else "No"),
                     ("Provider", f"`{self.ai.provider}`"),
                     ("Talking Model", f"`{self.ai.conversation_model_name()}`"),
@@ -31,6 +31,7 @@ from ..python_runtime import (
 from ..registry import ToolRegistry
 from ..types import ToolType
 from utils.checks import is_bot_owner_id
+from utils.scheduler import get_scheduler
 
 logger = logging.getLogger("ModBot.AIModeration.Handlers.Admin")
 
@@ -348,13 +349,15 @@ async def handle_execute_python(ctx: ToolContext) -> ToolResult:
         )
         execute_at_naive = execute_at_utc.replace(tzinfo=None)
         async with ctx.cog.bot.db.get_connection() as db:
-            await db.execute(
+            cursor = await db.execute(
                 "INSERT INTO scheduled_tasks "
                 "(guild_id, author_id, task_type, payload, execute_at, status) "
                 "VALUES (?, ?, 'execute_python', ?, ?, 'pending')",
                 (ctx.guild.id, ctx.actor.id, payload, execute_at_naive),
             )
             await db.commit()
+        if cursor.lastrowid is not None:
+            get_scheduler(ctx.cog.bot).schedule("ai_task", int(cursor.lastrowid), execute_at_utc)
         return {
             "scheduled_for": execute_at_utc.isoformat(),
             "code_sha256": follow_up_digest,
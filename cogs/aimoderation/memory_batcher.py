@@ -0,0 +1,163 @@
+"""Debounced conversation-memory writes.
+
+Every conversation turn used to start its own summarization call, so a quick
+20-message back-and-forth paid for 20 calls that each saw nearly the same
+profile. Turns now collect per (guild, user) and are summarized together once
+the user has been quiet for ``quiet_seconds`` or ``max_turns`` have built up.
+``flush_all`` writes whatever is still pending, a few batches at a time; the
+client calls it on close with a deadline and abandoned batches are counted.
+
+Time is read from an injectable clock and due batches are found by
+``flush_due``, which a background ticker calls every ``tick_seconds``. Tests
+drive ``flush_due`` directly with a fake clock.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger("ModBot.AIModeration.Client")
+
+Turn = Tuple[str, str]
+FlushCallback = Callable[[Hashable, List[Turn], str], Awaitable[None]]
+
+
+@dataclass
+class _PendingTurns:
+    turns: List[Turn] = field(default_factory=list)
+    stored_memory: str = ""
+    last_turn_at: float = 0.0
+
+
+class MemoryTurnBatcher:
+    """Collects conversation turns per key and hands them over in batches."""
+
+    def __init__(
+        self,
+        on_flush: FlushCallback,
+        *,
+        quiet_seconds: float = 90.0,
+        max_turns: int = 8,
+        flush_concurrency: int = 4,
+        tick_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            on_flush: Awaited with (key, turns, stored_memory) for each batch
+            quiet_seconds: Idle time after a user's last turn before flushing
+            max_turns: Turns that flush a batch without waiting
+            flush_concurrency: Batches ``flush_all`` summarizes at once
+            tick_seconds: How often the ticker looks for quiet batches
+            clock: Monotonic time source, injectable for tests
+        """
+        self.on_flush = on_flush
+        self.quiet_seconds = max(0.0, float(quiet_seconds))
+        self.max_turns = max(1, int(max_turns))
+        self.flush_concurrency = max(1, int(flush_concurrency))
+        self.tick_seconds = tick_seconds if tick_seconds is not None else min(10.0, self.quiet_seconds / 3 or 1.0)
+        self._clock = clock
+        self._pending: Dict[Hashable, _PendingTurns] = {}
+        self._ticker: Optional[asyncio.Task] = None
+        self._flushes: set[asyncio.Task] = set()
+        self.flush_count = 0
+
+    def pending(self, key: Hashable) -> int:
+        batch = self._pending.get(key)
+        return len(batch.turns) if batch else 0
+
+    def add(self, key: Hashable, user_msg: str, bot_response: str, stored_memory: str = "") -> None:
+        """Queue one turn; a full batch is flushed in the background at once."""
+        batch = self._pending.setdefault(key, _PendingTurns())
+        batch.turns.append((user_msg, bot_response))
+        batch.stored_memory = stored_memory or batch.stored_memory
+        batch.last_turn_at = self._clock()
+        if len(batch.turns) >= self.max_turns:
+            # Detach the full batch now so turns arriving before the flush
+            # task runs start the next batch instead of joining this one.
+            del self._pending[key]
+            task = asyncio.create_task(self._flush_batch(key, batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.create_task(self._tick())
+
+    async def flush_due(self) -> int:
+        """Flush every batch whose user has gone quiet; returns how many."""
+        now = self._clock()
+        due = [
+            key
+            for key, batch in self._pending.items()
+            if now - batch.last_turn_at >= self.quiet_seconds
+        ]
+        for key in due:
+            await self._flush_key(key)
+        return len(due)
+
+    async def flush_all(self, timeout: Optional[float] = None) -> int:
+        """Flush everything pending, including batches already flushing.
+
+        Pending batches are summarized ``flush_concurrency`` at a time. Batches
+        still unwritten after ``timeout`` seconds are cancelled and logged.
+        Returns how many were abandoned.
+        """
+        limiter = asyncio.Semaphore(self.flush_concurrency)
+        for key, batch in list(self._pending.items()):
+            del self._pending[key]
+            task = asyncio.create_task(self._flush_limited(limiter, key, batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        if not self._flushes:
+            return 0
+        _, unfinished = await asyncio.wait(list(self._flushes), timeout=timeout)
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            await asyncio.gather(*unfinished, return_exceptions=True)
+            logger.warning(
+                "Abandoned %d pending memory batch(es) after %.0fs",
+                len(unfinished),
+                timeout,
+            )
+        return len(unfinished)
+
+    async def close(self, timeout: Optional[float] = None) -> int:
+        if self._ticker is not None and not self._ticker.done():
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+        self._ticker = None
+        return await self.flush_all(timeout)
+
+    async def _tick(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.tick_seconds)
+            try:
+                await self.flush_due()
+            except Exception:
+                logger.debug("Memory batch flush failed", exc_info=True)
+
+    async def _flush_key(self, key: Hashable) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is not None:
+            await self._flush_batch(key, batch)
+
+    async def _flush_limited(
+        self, limiter: asyncio.Semaphore, key: Hashable, batch: _PendingTurns
+    ) -> None:
+        async with limiter:
+            await self._flush_batch(key, batch)
+
+    async def _flush_batch(self, key: Hashable, batch: _PendingTurns) -> None:
+        if not batch.turns:
+            return
+        self.flush_count += 1
+        try:
+            await self.on_flush(key, batch.turns, batch.stored_memory)
+        except Exception:
+            logger.debug("Memory batch flush failed for %s", key, exc_info=True)
@@ -404,7 +404,12 @@ class MessageParsingMixin:
             or permission_matrix
         )
 
-    async def _build_conversation_signals(self, content: str) -> ConversationSignals:
+    async def _build_conversation_signals(
+        self,
+        content: str,
+        *,
+        use_cache: bool = True,
+    ) -> ConversationSignals:
         low = self._normalize_chat_text(content)
 
         explicit_research = bool(re.search(
@@ -461,7 +466,7 @@ class MessageParsingMixin:
             and not asks_for_sources
         )
         if should_classify:
-            decision = await classifier(content)
+            decision = await classifier(content, use_cache=use_cache)
             if isinstance(decision, dict):
                 candidate = str(decision.get("route") or "").strip().lower()
                 candidate = {
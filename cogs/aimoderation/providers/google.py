@@ -217,6 +217,7 @@ class GoogleImageSearchLaneMixin:
                         "Content-Type": "application/json",
                     },
                     json=payload,
+                    timeout=aiohttp.ClientTimeout(total=timeout),
                 ) as response:
                     raw_body = await response.text()
                     try:
@@ -26,7 +26,7 @@ import re
 from typing import Any, Dict, List, Optional, Tuple
 
 from .. import settings
-from ..transport import _exception_summary
+from ..transport import DeltaCallback, _exception_summary
 
 def _int_env(name: str, default: int, *, low: int, high: int) -> int:
     try:
@@ -266,6 +266,7 @@ class OpenRouterLaneMixin:
         *,
         temperature: float,
         max_tokens: int,
+        on_delta: Optional[DeltaCallback] = None,
     ) -> Optional[str]:
         """Call the talking model on OpenRouter for ordinary text conversation.
 
@@ -277,6 +278,9 @@ class OpenRouterLaneMixin:
         Reasoning is turned off here by default. The current talking model (GLM)
         enables it implicitly, which tripled reply latency and spent billable
         output tokens on hidden reasoning that a casual chat reply never needs.
+
+        ``on_delta`` streams the reply as it is generated (see
+        ``_post_chat_completion``).
         """
         if not settings.call("_openrouter_conversation_enabled"):
             raise RuntimeError("OpenRouter conversation is missing OPENROUTER_API_KEY.")
@@ -299,6 +303,7 @@ class OpenRouterLaneMixin:
             max_retries=1,
             request_timeout=settings.call("_openrouter_request_timeout"),
             extra_payload=extra_payload,
+            on_delta=on_delta,
         )
 
     async def _call_openrouter_conversation(
@@ -309,6 +314,7 @@ class OpenRouterLaneMixin:
         max_tokens: int,
         allow_multimodal: bool = False,
         require_search: bool = False,
+        on_delta: Optional[DeltaCallback] = None,
     ) -> Optional[str]:
         """Call Luna with bounded web search that the model normally invokes as needed.
 
@@ -359,6 +365,7 @@ class OpenRouterLaneMixin:
             request_timeout=settings.call("_openrouter_request_timeout"),
             extra_payload=extra_payload,
             include_citations=True,
+            on_delta=on_delta,
         )
 
     async def _call_openrouter_research_writer(
@@ -14,7 +14,7 @@ mocked as AIClient attributes in the test-suite; keeping the method surface
 identical preserves both.
 
 Requires from the composing class:
-  - ``self.bot``           for the shared aiohttp session
+  - ``self._get_http_session`` for the pooled aiohttp session
   - ``self._set_block``    to trip the service block on auth failure
 """
 from __future__ import annotations
@@ -22,12 +22,14 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 import aiohttp
 
 logger = logging.getLogger("ModBot.AIModeration.Client")
 
+DeltaCallback = Callable[[str], Awaitable[None]]
+
 
 def _exception_summary(exc: BaseException) -> str:
     """Return a useful one-line label even for message-less timeout errors."""
@@ -56,6 +58,7 @@ class TransportMixin:
         extra_payload: Optional[Dict[str, Any]] = None,
         include_citations: bool = False,
         allow_service_block: bool = True,
+        on_delta: Optional[DeltaCallback] = None,
     ) -> Optional[str]:
         """Shared OpenAI-compatible chat-completions POST with bounded retries.
 
@@ -69,6 +72,14 @@ class TransportMixin:
         model, so its quota says nothing about whether the talking lane works,
         and a rate-limited 2-second route classifier must not silence every
         conversation in every guild for a minute.
+
+        ``on_delta`` requests an SSE stream and is awaited with each text delta
+        as it arrives, so a caller can start replying before the completion
+        finishes; the full text is still returned. Once a delta has been
+        delivered a failure is raised rather than retried, so nothing is
+        emitted twice. No reply path passes it yet: ``converse`` post-processes
+        and vets the complete text before anything is posted, and raw deltas
+        would skip that.
         """
         request_messages = messages if allow_multimodal else self._normalize_text_messages(messages)
         if not request_messages:
@@ -84,6 +95,14 @@ class TransportMixin:
             payload["response_format"] = {"type": "json_object"}
         if extra_payload:
             payload.update(extra_payload)
+        delivered = False
+        if on_delta is not None:
+            payload["stream"] = True
+
+            async def forward(text: str) -> None:
+                nonlocal delivered
+                delivered = True
+                await on_delta(text)
 
         last_error: Optional[Exception] = None
         for attempt in range(max_retries + 1):
@@ -96,7 +115,19 @@ class TransportMixin:
                         "Content-Type": "application/json",
                     },
                     json=payload,
+                    timeout=aiohttp.ClientTimeout(total=request_timeout),
                 ) as resp:
+                    if (
+                        on_delta is not None
+                        and resp.status < 400
+                        and resp.content_type == "text/event-stream"
+                    ):
+                        return await self._read_sse_stream(
+                            resp,
+                            forward,
+                            provider_label=provider_label,
+                            include_citations=include_citations,
+                        )
                     raw_body = await resp.text()
                     try:
                         data = json.loads(raw_body)
@@ -132,6 +163,8 @@ class TransportMixin:
                             return content
                         return self._extract_sse_completion_content(raw_body)
             except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                if delivered:
+                    raise
                 last_error = exc
                 logger.warning(
                     "%s network error (attempt %d/%d): %s",
@@ -151,26 +184,74 @@ class TransportMixin:
             raise last_error
         return None
 
+    async def _read_sse_stream(
+        self,
+        resp: aiohttp.ClientResponse,
+        on_delta: DeltaCallback,
+        *,
+        provider_label: str,
+        include_citations: bool,
+    ) -> Optional[str]:
+        """Read an SSE completion line by line, handing each delta to ``on_delta``."""
+        chunks: List[str] = []
+        annotations: List[Any] = []
+        async for raw_line in resp.content:
+            chunk = self._parse_sse_line(raw_line.decode("utf-8", "replace"))
+            if chunk is None:
+                continue
+            if chunk.get("error"):
+                error = chunk["error"]
+                detail = error.get("message", error) if isinstance(error, dict) else error
+                raise RuntimeError(f"{provider_label} stream error: {str(detail)[:500]}")
+            delta = self._sse_chunk_delta(chunk)
+            annotations.extend(delta.get("annotations") or [])
+            content = delta.get("content")
+            if isinstance(content, str) and content:
+                chunks.append(content)
+                await on_delta(content)
+
+        content = "".join(chunks).strip() or None
+        if content and include_citations and annotations:
+            urls = self._extract_openrouter_citation_urls(
+                {"choices": [{"message": {"annotations": annotations}}]}
+            )
+            if urls:
+                sources = "\n".join(f"- {url}" for url in urls)
+                content = f"{content}\n\n__BOT_SOURCES__\n{sources}"
+        return content
+
     @staticmethod
-    def _extract_sse_completion_content(raw_body: str) -> Optional[str]:
+    def _parse_sse_line(line: str) -> Optional[Dict[str, Any]]:
+        """Decode one ``data:`` line of an SSE body; comments and [DONE] give None."""
+        line = line.strip()
+        if not line.startswith("data:"):
+            return None
+        payload = line[5:].strip()
+        if not payload or payload == "[DONE]":
+            return None
+        try:
+            data = json.loads(payload)
+        except json.JSONDecodeError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    @staticmethod
+    def _sse_chunk_delta(chunk: Dict[str, Any]) -> Dict[str, Any]:
+        choices = chunk.get("choices")
+        if not choices or not isinstance(choices[0], dict):
+            return {}
+        delta = choices[0].get("delta")
+        return delta if isinstance(delta, dict) else {}
+
+    @classmethod
+    def _extract_sse_completion_content(cls, raw_body: str) -> Optional[str]:
         """Extract assistant text from OpenAI-compatible SSE chunks."""
         chunks: List[str] = []
         for line in (raw_body or "").splitlines():
-            line = line.strip()
-            if not line.startswith("data:"):
+            data = cls._parse_sse_line(line)
+            if data is None:
                 continue
-            payload = line[5:].strip()
-            if not payload or payload == "[DONE]":
-                continue
-            try:
-                data = json.loads(payload)
-            except json.JSONDecodeError:
-                continue
-            choices = data.get("choices") if isinstance(data, dict) else None
-            if not choices:
-                continue
-            delta = (choices[0] or {}).get("delta") or {}
-            content = delta.get("content")
+            content = cls._sse_chunk_delta(data).get("content")
             if isinstance(content, str):
                 chunks.append(content)
         return "".join(chunks).strip() or None
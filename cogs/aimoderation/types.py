@@ -5,6 +5,8 @@ Extracted from cogs/aimoderation.py into cogs/moderation/ai/types.py
 """
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import os
 from dataclasses import dataclass, field
@@ -181,6 +183,10 @@ class AIConfig:
     confirm_timeout_seconds: int = 25
     proactive_chance: float = 0.02
     target_cache_ttl_minutes: int = 15
+    decision_cache_ttl_seconds: int = 30
+    decision_cache_size: int = 2048
+    memory_quiet_seconds: int = 90
+    memory_batch_turns: int = 8
 
 
 @dataclass
@@ -204,6 +210,10 @@ class GuildSettings:
     # (remove the message and log), or "punish" (delete and run the configured
     # automod escalation). Defaults to the least destructive option.
     image_scan_action: str = "log"
+    # Reuse identical intent/routing answers for a few seconds (see
+    # AIClient._intent_cache). Guilds that want every message judged fresh
+    # turn this off.
+    decision_cache: bool = True
     mod_roles: Set[int] = field(default_factory=set)
 
     IMAGE_SCAN_ACTIONS: ClassVar[Tuple[str, ...]] = ("log", "delete", "punish")
@@ -281,6 +291,7 @@ class GuildSettings:
             image_scan_action=cls._coerce_image_scan_action(
                 data.get("aimod_image_scan_action", "log"),
             ),
+            decision_cache=cls._coerce_bool(data.get("aimod_decision_cache", True), True),
             mod_roles=moderation_id_set(data, "mod_roles"),
         )
 
@@ -295,9 +306,15 @@ class GuildSettings:
             "aimod_location_context": self.location_context,
             "aimod_image_scan_enabled": self.image_scan_enabled,
             "aimod_image_scan_action": self.image_scan_action,
+            "aimod_decision_cache": self.decision_cache,
             "mod_roles": sorted(self.mod_roles),
         }
 
+    def policy_hash(self) -> str:
+        """Fingerprint of these settings; scopes cached routing decisions."""
+        encoded = json.dumps(self.to_dict(), sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
 
 # =============================================================================
 # DECISION DATACLASS
@@ -3,15 +3,23 @@ Alt Account Detection
 
 Detects alt/suspicious accounts by comparing new joins against banned
 user profiles: name similarity, avatar hashes, join patterns.
+
+Banned profiles are held in an in-memory index (loaded once, then updated on
+ban/unban) so a join only fuzzy-scores the few profiles that share the most
+character trigrams with the new name, instead of every banned profile.
 """
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
+import heapq
 import logging
+from collections import Counter, defaultdict
 from dataclasses import dataclass
 from difflib import SequenceMatcher
-from typing import Any, Dict, List, Optional
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Set
 
 import discord
 from discord import app_commands
@@ -24,6 +32,7 @@ from utils.embeds import ModEmbed
 logger = logging.getLogger("ModBot.AltDetection")
 
 NAME_SIMILARITY_THRESHOLD = 0.75
+NAME_NGRAM = 3
 
 
 @dataclass
@@ -44,22 +53,133 @@ def _name_similarity(a: str, b: str) -> float:
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
 
+def _name_grams(name: str) -> Set[str]:
+    """Character trigrams of a lowercased name, padded so short names still have some."""
+    padded = "\x02\x02" + name.lower() + "\x03\x03"
+    return {padded[i:i + NAME_NGRAM] for i in range(len(padded) - NAME_NGRAM + 1)}
+
+
+def _lengths_can_match(a: int, b: int) -> bool:
+    """SequenceMatcher.ratio() is at most 2*min/(a+b); skip pairs that can't reach the threshold."""
+    return 2 * min(a, b) >= NAME_SIMILARITY_THRESHOLD * (a + b)
+
+
+class BannedProfileIndex:
+    """
+    Banned profiles keyed by user id, with a trigram inverted index on the
+    username and an exact index on the avatar hash.
+
+    ``candidates`` counts shared trigrams through the posting lists (rarest
+    first, skipping grams shared by a large fraction of all profiles once a
+    couple of rarer ones were counted) and returns the ``candidate_limit``
+    best, plus every avatar match. Only those are fuzzy-scored.
+    """
+
+    def __init__(self, *, candidate_limit: int = 64, common_gram_fraction: float = 0.05):
+        self.candidate_limit = max(1, int(candidate_limit))
+        self.common_gram_fraction = float(common_gram_fraction)
+        self._profiles: Dict[int, Dict[str, Any]] = {}
+        self._grams: Dict[int, Set[str]] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._avatars: Dict[str, Set[int]] = defaultdict(set)
+        self._load_lock = asyncio.Lock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    async def ensure_loaded(self, db: Any) -> None:
+        """Load every stored profile on first use; later changes arrive through add/remove."""
+        if self.loaded:
+            return
+        async with self._load_lock:
+            if self.loaded:
+                return
+            self.extend(await db.get_all_banned_profiles())
+            self.loaded = True
+
+    def extend(self, profiles: Iterable[Dict[str, Any]]) -> None:
+        for profile in profiles:
+            self.add(profile)
+
+    def add(self, profile: Dict[str, Any]) -> None:
+        """Insert or replace a profile (a re-ban may change name and avatar)."""
+        user_id = int(profile["user_id"])
+        self.remove(user_id)
+        grams = _name_grams(profile.get("username") or "")
+        self._profiles[user_id] = profile
+        self._grams[user_id] = grams
+        for gram in grams:
+            self._postings[gram].add(user_id)
+        if profile.get("avatar_hash"):
+            self._avatars[profile["avatar_hash"]].add(user_id)
+
+    def remove(self, user_id: int) -> None:
+        profile = self._profiles.pop(user_id, None)
+        if profile is None:
+            return
+        for gram in self._grams.pop(user_id, ()):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(user_id)
+                if not posting:
+                    del self._postings[gram]
+        avatar_hash = profile.get("avatar_hash")
+        if avatar_hash and avatar_hash in self._avatars:
+            self._avatars[avatar_hash].discard(user_id)
+            if not self._avatars[avatar_hash]:
+                del self._avatars[avatar_hash]
+
+    def candidates(self, name: str, avatar_hash: Optional[str]) -> List[Dict[str, Any]]:
+        """Profiles worth scoring for ``name``/``avatar_hash``, most recently banned first."""
+        user_ids: Set[int] = set()
+        if avatar_hash:
+            user_ids.update(self._avatars.get(avatar_hash, ()))
+
+        postings = sorted(
+            (self._postings[gram] for gram in _name_grams(name) if gram in self._postings),
+            key=len,
+        )
+        common = max(1000, int(len(self._profiles) * self.common_gram_fraction))
+        shared: Counter = Counter()
+        for used, posting in enumerate(postings):
+            if used >= 2 and len(posting) > common:
+                break
+            shared.update(posting)
+
+        length = len(name)
+        ranked = heapq.nlargest(
+            self.candidate_limit,
+            (
+                item for item in shared.items()
+                if _lengths_can_match(length, len(self._profiles[item[0]].get("username") or ""))
+            ),
+            key=itemgetter(1),
+        )
+        user_ids.update(user_id for user_id, _ in ranked)
+        profiles = [self._profiles[user_id] for user_id in user_ids]
+        profiles.sort(key=lambda profile: str(profile.get("banned_at") or ""), reverse=True)
+        return profiles
+
+
 class AltDetectionEngine:
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.index = BannedProfileIndex()
 
     async def check(self, member: discord.Member) -> AltResult:
         reasons: List[str] = []
         best_match: Optional[Dict[str, Any]] = None
         best_confidence = 0.0
 
+        avatar_hash = _hash_avatar(member.avatar)
+
         try:
-            profiles = await self.bot.db.get_all_banned_profiles()
+            await self.index.ensure_loaded(self.bot.db)
+            profiles = self.index.candidates(member.name, avatar_hash)
         except Exception:
             profiles = []
 
-        avatar_hash = _hash_avatar(member.avatar)
-
         for profile in profiles:
             confidence = 0.0
             local_reasons: List[str] = []
@@ -137,9 +257,23 @@ class AltDetection(commands.Cog):
                 avatar_hash=avatar_hash,
                 guild_id=guild.id,
             )
+            profile = await self.bot.db.get_banned_profile(user.id)
+            if profile:
+                self.engine.index.add(profile)
         except Exception:
             logger.error("Failed to store banned profile for %s", user.id, exc_info=True)
 
+    @commands.Cog.listener()
+    async def on_member_unban(self, guild: discord.Guild, user: discord.User):
+        try:
+            profile = await self.bot.db.remove_banned_profile_guild(user.id, guild.id)
+            if profile:
+                self.engine.index.add(profile)
+            else:
+                self.engine.index.remove(user.id)
+        except Exception:
+            logger.error("Failed to update banned profile for %s", user.id, exc_info=True)
+
     alt_group = app_commands.Group(
         name="alt",
         description="Alt account detection",
@@ -40,6 +40,7 @@ _AI_MODEL = (
 
 from utils.embeds import ModEmbed, compact_kv_lines, sapphire_log_embed
 from utils.logging import send_log_embed
+from utils.mass_actions import MassActionExecutor
 from utils.checks import is_admin, is_mod, is_bot_owner_id
 from utils.moderation_settings import moderation_bool, moderation_id_set
 from config import Config
@@ -278,6 +279,7 @@ class AntiRaid(commands.Cog):
         self.join_tracker: Dict[int, List[datetime]] = defaultdict(list)
         self.member_tracker: Dict[int, List[discord.Member]] = defaultdict(list)
         self.raid_cooldown: set[int] = set()  # guilds on cooldown after raid response
+        self.raid_responses: Dict[int, MassActionExecutor] = {}  # in-flight kick/ban/quarantine sweeps
         self.ai_analyzer = AIRaidAnalyzer()
         
         # start background tasks
@@ -351,22 +353,22 @@ class AntiRaid(commands.Cog):
                 self._serialize_lockdown_restore_state(restore_state),
             )
 
-        locked = 0
+        async def lock(channel) -> None:
+            overwrite = channel.overwrites_for(guild.default_role)
+            overwrite.send_messages = False
+            await channel.set_permissions(
+                guild.default_role,
+                overwrite=overwrite,
+                reason=reason,
+            )
+
+        result = await MassActionExecutor().run(pending, lock, route="channel_permissions")
+        locked = len(result.succeeded)
         changed_state = False
-        for channel in pending:
-            try:
-                overwrite = channel.overwrites_for(guild.default_role)
-                overwrite.send_messages = False
-                await channel.set_permissions(
-                    guild.default_role,
-                    overwrite=overwrite,
-                    reason=reason,
-                )
-                locked += 1
-            except (discord.Forbidden, discord.HTTPException):
-                if channel.id in newly_recorded:
-                    restore_state.pop(channel.id, None)
-                    changed_state = True
+        for channel, _ in result.failed:
+            if channel.id in newly_recorded:
+                restore_state.pop(channel.id, None)
+                changed_state = True
 
         if changed_state:
             await self.bot.db.set_setting(
@@ -384,24 +386,27 @@ class AntiRaid(commands.Cog):
         reason: str,
     ) -> int:
         restore_state = self._lockdown_restore_state(settings)
-        unlocked = 0
-        for channel_id, previous_send_messages in list(restore_state.items()):
+        pending = []
+        for channel_id in list(restore_state):
             channel = guild.get_channel(channel_id)
             if channel is None or not hasattr(channel, "overwrites_for"):
                 restore_state.pop(channel_id, None)
                 continue
-            try:
-                overwrite = channel.overwrites_for(guild.default_role)
-                overwrite.send_messages = previous_send_messages
-                await channel.set_permissions(
-                    guild.default_role,
-                    overwrite=None if overwrite.is_empty() else overwrite,
-                    reason=reason,
-                )
-                restore_state.pop(channel_id, None)
-                unlocked += 1
-            except (discord.Forbidden, discord.HTTPException):
-                continue
+            pending.append(channel)
+
+        async def unlock(channel) -> None:
+            overwrite = channel.overwrites_for(guild.default_role)
+            overwrite.send_messages = restore_state[channel.id]
+            await channel.set_permissions(
+                guild.default_role,
+                overwrite=None if overwrite.is_empty() else overwrite,
+                reason=reason,
+            )
+
+        result = await MassActionExecutor().run(pending, unlock, route="channel_permissions")
+        for channel in result.succeeded:
+            restore_state.pop(channel.id, None)
+        unlocked = len(result.succeeded)
 
         await self.bot.db.set_setting(
             guild.id,
@@ -597,6 +602,8 @@ class AntiRaid(commands.Cog):
             response_window = 10
         cutoff = now - timedelta(seconds=response_window)
         action_count = 0
+        failed_count = 0
+        stopped_count = 0
 
         if action == "lockdown":
             action_count = await self._lock_raid_channels(
@@ -615,28 +622,25 @@ class AntiRaid(commands.Cog):
                 and m.joined_at.replace(tzinfo=timezone.utc) >= cutoff
             ]
 
-            for member in recent_members:
-                if is_bot_owner_id(member.id):
-                    continue
-                try:
-                    if action == "kick":
-                        await member.kick(reason="[ANTI-RAID] Automatic raid protection")
-                    else:
-                        await member.ban(
-                            reason="[ANTI-RAID] Automatic raid protection",
-                            delete_message_days=(
-                                0
-                                if moderation_bool(
-                                    settings,
-                                    "moderation_preserve_ban_messages",
-                                    True,
-                                )
-                                else 1
-                            ),
-                        )
-                    action_count += 1
-                except Exception:
-                    pass
+            targets = [member for member in recent_members if not is_bot_owner_id(member.id)]
+            executor = self.raid_responses[guild.id] = MassActionExecutor()
+            if action == "kick":
+                result = await executor.run(
+                    targets,
+                    lambda member: member.kick(reason="[ANTI-RAID] Automatic raid protection"),
+                    route="kick",
+                )
+            else:
+                preserve = moderation_bool(settings, "moderation_preserve_ban_messages", True)
+                result = await executor.ban(
+                    guild,
+                    targets,
+                    reason="[ANTI-RAID] Automatic raid protection",
+                    delete_message_seconds=0 if preserve else 86400,
+                )
+            action_count = len(result.succeeded)
+            failed_count = len(result.failed)
+            stopped_count = len(result.skipped)
 
         elif action == "quarantine":
             # add quarantine role to recent joiners
@@ -652,19 +656,22 @@ class AntiRaid(commands.Cog):
                         if m.joined_at
                         and m.joined_at.replace(tzinfo=timezone.utc) >= cutoff
                     ]
-                    for member in recent_members:
-                        if is_bot_owner_id(member.id):
-                            continue
-                        try:
-                            await member.add_roles(
-                                role,
-                                reason="[ANTI-RAID] Quarantine",
-                            )
-                            action_count += 1
-                        except Exception:
-                            pass
+                    executor = self.raid_responses[guild.id] = MassActionExecutor()
+                    result = await executor.run(
+                        [member for member in recent_members if not is_bot_owner_id(member.id)],
+                        lambda member: member.add_roles(role, reason="[ANTI-RAID] Quarantine"),
+                        route="member_roles",
+                    )
+                    action_count = len(result.succeeded)
+                    failed_count = len(result.failed)
+                    stopped_count = len(result.skipped)
 
+        self.raid_responses.pop(guild.id, None)
         log_rows.append(("Actions taken", f"{action_count} {action} operation(s)"))
+        if failed_count:
+            log_rows.append(("Failed", f"{failed_count} member(s)"))
+        if stopped_count:
+            log_rows.append(("Stopped early", f"{stopped_count} member(s) not actioned"))
         embed = sapphire_log_embed(
             title="Raid detected",
             color=Config.COLOR_ERROR,
@@ -711,9 +718,7 @@ class AntiRaid(commands.Cog):
     @antiraid_group.command(name="enable", description="Enable anti-raid protection")
     @is_admin()
     async def antiraid_enable(self, interaction: discord.Interaction):
-        settings = await self.bot.db.get_settings(interaction.guild_id)
-        settings["antiraid_enabled"] = True
-        await self.bot.db.update_settings(interaction.guild_id, settings)
+        await self.bot.db.set_setting(interaction.guild_id, "antiraid_enabled", True)
         embed = ModEmbed.success(
             "Anti-Raid Enabled",
             "Anti-raid protection is now active.",
@@ -723,9 +728,7 @@ class AntiRaid(commands.Cog):
     @antiraid_group.command(name="disable", description="Disable anti-raid protection")
     @is_admin()
     async def antiraid_disable(self, interaction: discord.Interaction):
-        settings = await self.bot.db.get_settings(interaction.guild_id)
-        settings["antiraid_enabled"] = False
-        await self.bot.db.update_settings(interaction.guild_id, settings)
+        await self.bot.db.set_setting(interaction.guild_id, "antiraid_enabled", False)
         embed = ModEmbed.success(
             "Anti-Raid Disabled",
             "Anti-raid protection has been disabled.",
@@ -748,18 +751,19 @@ class AntiRaid(commands.Cog):
         seconds: Optional[int] = None,
         cooldown: Optional[int] = None,
     ):
-        settings = await self.bot.db.get_settings(interaction.guild_id)
+        changes = {}
 
         if threshold is not None:
-            settings["antiraid_join_threshold"] = max(3, threshold)
+            changes["antiraid_join_threshold"] = max(3, threshold)
 
         if seconds is not None:
-            settings["antiraid_join_seconds"] = max(5, seconds)
+            changes["antiraid_join_seconds"] = max(5, seconds)
 
         if cooldown is not None:
-            settings["antiraid_cooldown_seconds"] = max(10, cooldown)
+            changes["antiraid_cooldown_seconds"] = max(10, cooldown)
 
-        await self.bot.db.update_settings(interaction.guild_id, settings)
+        await self.bot.db.patch_settings(interaction.guild_id, changes)
+        settings = await self.bot.db.get_settings_view(interaction.guild_id)
 
         rows = (
             ("Threshold", f"{settings.get('antiraid_join_threshold', 10)} joins"),
@@ -787,9 +791,7 @@ class AntiRaid(commands.Cog):
         interaction: discord.Interaction,
         action: Literal["kick", "ban", "lockdown", "quarantine"],
     ):
-        settings = await self.bot.db.get_settings(interaction.guild_id)
-        settings["antiraid_action"] = action
-        await self.bot.db.update_settings(interaction.guild_id, settings)
+        await self.bot.db.set_setting(interaction.guild_id, "antiraid_action", action)
         embed = ModEmbed.success(
             "Action Updated",
             f"Anti-raid action set to **{action}**",
@@ -811,18 +813,14 @@ class AntiRaid(commands.Cog):
         interaction: discord.Interaction,
         role: Optional[discord.Role] = None,
     ):
-        settings = await self.bot.db.get_settings(interaction.guild_id)
-
         if role is None:
-            settings["antiraid_quarantine_role"] = None
-            await self.bot.db.update_settings(interaction.guild_id, settings)
+            await self.bot.db.set_setting(interaction.guild_id, "antiraid_quarantine_role", None)
             embed = ModEmbed.success(
                 "Quarantine Disabled",
                 "Quarantine role has been removed.",
             )
         else:
-            settings["antiraid_quarantine_role"] = role.id
-            await self.bot.db.update_settings(interaction.guild_id, settings)
+            await self.bot.db.set_setting(interaction.guild_id, "antiraid_quarantine_role", role.id)
             embed = ModEmbed.success(
                 "Quarantine Role Set",
                 f"Quarantine role set to {role.mention}",
@@ -849,18 +847,19 @@ class AntiRaid(commands.Cog):
         min_confidence: Optional[int] = None,
         override_action: Optional[bool] = None,
     ):
-        settings = await self.bot.db.get_settings(interaction.guild_id)
+        changes = {}
 
         if enabled is not None:
-            settings["antiraid_ai_enabled"] = enabled
+            changes["antiraid_ai_enabled"] = enabled
 
         if min_confidence is not None:
-            settings["antiraid_ai_min_confidence"] = max(0, min(100, min_confidence))
+            changes["antiraid_ai_min_confidence"] = max(0, min(100, min_confidence))
 
         if override_action is not None:
-            settings["antiraid_override_ai_action"] = override_action
+            changes["antiraid_override_ai_action"] = override_action
 
-        await self.bot.db.update_settings(interaction.guild_id, settings)
+        await self.bot.db.patch_settings(interaction.guild_id, changes)
+        settings = await self.bot.db.get_settings_view(interaction.guild_id)
 
         ai_status = (
             "enabled" if settings.get("antiraid_ai_enabled", False) else "disabled"
@@ -914,6 +913,10 @@ class AntiRaid(commands.Cog):
             )
             await self.bot.db.set_setting(interaction.guild_id, "raid_mode", False)
             self.raid_cooldown.discard(interaction.guild_id)
+            # Stop a kick/ban sweep still running for a raid now called off.
+            response = self.raid_responses.pop(interaction.guild_id, None)
+            if response is not None:
+                response.cancel()
 
             embed = ModEmbed.success("Raid Mode Disabled", f"Unlocked **{unlocked_count}** channels.")
 
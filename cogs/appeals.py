@@ -14,7 +14,6 @@ from urllib.parse import urlparse
 import discord
 from discord.ext import commands
 
-from utils.async_tasks import fire_and_forget
 from utils.embeds import Colors, moderation_list_embed, stamp_actor_footer
 from utils.status_emojis import get_app_emoji
 
@@ -542,7 +541,8 @@ class Appeals(commands.Cog):
             return False
 
         if eligible or normalized_action in {"kick", "softban"}:
-            fire_and_forget(
+            self.bot.tasks.submit(
+                "notices",
                 self._enrich_punishment_notice(
                     message=message,
                     guild=guild,
@@ -558,7 +558,6 @@ class Appeals(commands.Cog):
                     base_url=base_url,
                 ),
                 name=f"punishment-dm-enrichment-{guild.id}-{case_number}",
-                log=logger,
             )
         return True
 
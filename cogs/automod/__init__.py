@@ -3,7 +3,7 @@
 from .commands import AutoMod, setup
 from .config import AUTOMOD_SETTINGS, EXAMPLE_CONFIG, MODULES, MODULE_SETTING_KEYS
 from .engine import AutoModEngine
-from .models import Action, Category, RuleMatch, Severity, ViolationRecord
+from .models import Action, Category, MessageFeatures, RuleMatch, Severity, ViolationRecord
 from .panel import AutoModPanel, PANEL_PAGES, _compact_duration, _parse_duration, _parse_threshold_pair
 from .utils import domain_matches, normalize_domain
 
@@ -15,6 +15,7 @@ __all__ = (
     "AUTOMOD_SETTINGS",
     "Category",
     "EXAMPLE_CONFIG",
+    "MessageFeatures",
     "MODULES",
     "MODULE_SETTING_KEYS",
     "PANEL_PAGES",
@@ -10,7 +10,7 @@ from typing import Any, Deque, Optional
 import discord
 
 from .config import MODULE_SETTING_KEYS
-from .models import Action, Category, RuleMatch, Severity, ViolationRecord
+from .models import Action, Category, MessageFeatures, RuleMatch, Severity, ViolationRecord
 from .rules import ALL_RULES, Rule
 from .utils import id_list
 from utils.checks import is_bot_owner_id
@@ -32,11 +32,12 @@ class AutoModEngine:
     async def evaluate(self, message: discord.Message, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
         if not dry_run:
             self.stats["messages_checked"] += 1
+        features = MessageFeatures.from_message(message)
         for rule in self.rules:
             if not settings.get(rule.setting_key, False):
                 continue
             try:
-                match = await rule.check(message, settings, dry_run=dry_run)
+                match = await rule.check(message, settings, dry_run=dry_run, features=features)
             except Exception:
                 error_key = f"{rule.name}_errors"
                 self.stats[error_key] += 1
@@ -6,10 +6,16 @@ return facts; the cog decides whether to delete, warn, timeout, kick, or ban.
 
 from __future__ import annotations
 
+import hashlib
+import re
+import unicodedata
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import cached_property
 from typing import Any, Mapping, Optional
 
+from .utils import INVITE_RE, extract_domains, normalize_text
+
 
 class Severity(Enum):
     INFO = 0
@@ -58,3 +64,72 @@ class ViolationRecord:
     action: str
     severity: str
     created_at: float
+
+
+CUSTOM_EMOJI_RE = re.compile(r"<a?:[A-Za-z0-9_]{2,32}:\d{15,25}>")
+DISGUISED_INVITE_RE = re.compile(
+    r"(?ix)"
+    r"\b(?:discord|d\s*i\s*s\s*c\s*o\s*r\s*d)\s*"
+    r"(?:\.|\(dot\)|\[dot\]|dot|\s)+\s*"
+    r"(?:gg|com\s*/\s*invite|app\s*\.\s*com\s*/\s*invite)\s*"
+    r"(?:/|\\|\s)+\s*([A-Za-z0-9-]{2,32})"
+)
+
+
+@dataclass(frozen=True)
+class MessageFeatures:
+    """Text features shared by every rule that inspects one message.
+
+    The engine builds one of these per message so the NFKC/casefold/leet
+    folding runs once instead of once per rule. Each feature is computed on
+    first access and then fixed, so rules that are switched off cost nothing.
+    """
+
+    content: str
+    user_mention_ids: frozenset[Any] = frozenset()
+    role_mention_ids: frozenset[Any] = frozenset()
+
+    @classmethod
+    def from_message(cls, message: Any) -> "MessageFeatures":
+        return cls(
+            content=getattr(message, "content", "") or "",
+            user_mention_ids=frozenset(getattr(item, "id", item) for item in getattr(message, "mentions", []) or []),
+            role_mention_ids=frozenset(getattr(item, "id", item) for item in getattr(message, "role_mentions", []) or []),
+        )
+
+    @cached_property
+    def normalized(self) -> str:
+        return normalize_text(self.content)
+
+    @cached_property
+    def tokens(self) -> tuple[str, ...]:
+        return tuple(self.normalized.split())
+
+    @cached_property
+    def domains(self) -> tuple[str, ...]:
+        return tuple(extract_domains(self.content))
+
+    @cached_property
+    def invite_codes(self) -> tuple[str, ...]:
+        return tuple(match.group(1).casefold() for match in INVITE_RE.finditer(self.content))
+
+    @cached_property
+    def disguised_invite_codes(self) -> tuple[str, ...]:
+        return tuple(match.group(1).casefold() for match in DISGUISED_INVITE_RE.finditer(self.content))
+
+    @cached_property
+    def emoji_count(self) -> int:
+        custom = len(CUSTOM_EMOJI_RE.findall(self.content))
+        unicode_emoji = 0
+        for char in self.content:
+            if unicodedata.category(char) == "So" and not char.isalnum():
+                unicode_emoji += 1
+        return custom + unicode_emoji
+
+    @cached_property
+    def mention_count(self) -> int:
+        return len(self.user_mention_ids) + len(self.role_mention_ids)
+
+    @cached_property
+    def fingerprint(self) -> str:
+        return hashlib.blake2s(self.normalized.encode("utf-8"), digest_size=8).hexdigest()
@@ -7,24 +7,14 @@ messages or punish users.
 from __future__ import annotations
 
 import hashlib
-import re
 import time
 import unicodedata
-from collections import Counter, defaultdict, deque
+import re
+from collections import Counter, OrderedDict, defaultdict, deque
 from typing import Any, Deque, Iterable, Optional
 
-from .models import Category, RuleMatch, Severity
-from .utils import INVITE_RE, domain_matches, extract_domains, keyword_pattern, normalize_text, unique_strings
-
-
-CUSTOM_EMOJI_RE = re.compile(r"<a?:[A-Za-z0-9_]{2,32}:\d{15,25}>")
-DISGUISED_INVITE_RE = re.compile(
-    r"(?ix)"
-    r"\b(?:discord|d\s*i\s*s\s*c\s*o\s*r\s*d)\s*"
-    r"(?:\.|\(dot\)|\[dot\]|dot|\s)+\s*"
-    r"(?:gg|com\s*/\s*invite|app\s*\.\s*com\s*/\s*invite)\s*"
-    r"(?:/|\\|\s)+\s*([A-Za-z0-9-]{2,32})"
-)
+from .models import Category, MessageFeatures, RuleMatch, Severity
+from .utils import KeywordMatcher, domain_matches, normalize_text, unique_strings
 
 
 class Rule:
@@ -32,7 +22,14 @@ class Rule:
     setting_key = ""
     priority = 0
 
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
         raise NotImplementedError
 
     def prune(self, now: float) -> None:
@@ -44,27 +41,37 @@ class BadWordsRule(Rule):
     setting_key = "automod_badwords_enabled"
     priority = 100
 
+    # Guilds keep distinct lists, so one slot thrashed on every guild switch.
+    max_cached_lists = 256
+
     def __init__(self) -> None:
-        self._cache_key: tuple[str, ...] = ()
-        self._patterns: list[tuple[str, Any]] = []
-
-    def _patterns_for(self, words: Iterable[Any]) -> list[tuple[str, Any]]:
-        normalized = tuple(unique_strings(words))
-        if normalized != self._cache_key:
-            compiled: list[tuple[str, Any]] = []
-            for word in normalized:
-                pattern = keyword_pattern(word)
-                if pattern is not None:
-                    compiled.append((word, pattern))
-            self._cache_key = normalized
-            self._patterns = compiled
-        return self._patterns
-
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
-        content = normalize_text(getattr(message, "content", ""))
+        self._matchers: OrderedDict[bytes, KeywordMatcher] = OrderedDict()
+
+    def _matcher_for(self, words: Iterable[Any]) -> KeywordMatcher:
+        normalized = unique_strings(words)
+        key = hashlib.blake2s("\x00".join(normalized).encode("utf-8"), digest_size=16).digest()
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            matcher = KeywordMatcher(normalized)
+            self._matchers[key] = matcher
+            while len(self._matchers) > self.max_cached_lists:
+                self._matchers.popitem(last=False)
+        else:
+            self._matchers.move_to_end(key)
+        return matcher
+
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
+        content = (features or MessageFeatures.from_message(message)).normalized
         if not content:
             return None
-        hits = [word for word, pattern in self._patterns_for(settings.get("automod_badwords", [])) if pattern.search(content)]
+        hits = self._matcher_for(settings.get("automod_badwords", [])).find_all(content)
         if not hits:
             return None
         return RuleMatch(
@@ -103,16 +110,26 @@ class ScamRule(Rule):
         "click this link",
         "password reset",
     )
-
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
-        content = normalize_text(getattr(message, "content", ""))
+    # Plain substrings with no boundaries: one alternation scanned in C.
+    _scam_re = re.compile("|".join(re.escape(phrase) for phrase in scam_phrases))
+
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
+        features = features or MessageFeatures.from_message(message)
+        content = features.normalized
         if not content:
             return None
-        domains = extract_domains(getattr(message, "content", ""))
-        has_invite_or_link = bool(domains or INVITE_RE.search(getattr(message, "content", "") or ""))
+        domains = features.domains
+        has_invite_or_link = bool(domains or features.invite_codes)
         if not has_invite_or_link:
             return None
-        if any(phrase in content for phrase in self.scam_phrases):
+        if self._scam_re.search(content):
             return RuleMatch(
                 self.name,
                 "Likely scam or phishing message",
@@ -131,8 +148,15 @@ class LinkRule(Rule):
     # setting (editable from the dashboard AutoMod page).
     suspicious_domains = ("bit.ly", "tinyurl.com", "tiny.one", "cutt.ly", "rb.gy", "is.gd", "grabify.link", "iplogger.org")
 
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
-        domains = extract_domains(getattr(message, "content", ""))
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
+        domains = (features or MessageFeatures.from_message(message)).domains
         if not domains:
             return None
         allowlist = list(settings.get("automod_links_whitelist", []) or []) + list(settings.get("automod_whitelisted_domains", []) or [])
@@ -161,10 +185,16 @@ class InviteRule(Rule):
     setting_key = "automod_invites_enabled"
     priority = 75
 
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
-        content = getattr(message, "content", "") or ""
-        codes = [match.group(1).casefold() for match in INVITE_RE.finditer(content)]
-        codes.extend(match.group(1).casefold() for match in DISGUISED_INVITE_RE.finditer(content))
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
+        features = features or MessageFeatures.from_message(message)
+        codes = [*features.invite_codes, *features.disguised_invite_codes]
         if not codes:
             return None
         allowed = {str(value).rsplit("/", 1)[-1].casefold() for value in settings.get("automod_allowed_invites", []) or []}
@@ -172,7 +202,7 @@ class InviteRule(Rule):
         if not blocked:
             return None
         reason = "Discord invite is not allowed"
-        if any(DISGUISED_INVITE_RE.search(content) for _ in (0,)):
+        if features.disguised_invite_codes:
             reason = "Disguised Discord invite is not allowed"
         return RuleMatch(self.name, reason, Severity.MEDIUM, Category.CONTENT, evidence=tuple(blocked[:3]))
 
@@ -182,11 +212,16 @@ class MentionRule(Rule):
     setting_key = "automod_mentions_enabled"
     priority = 70
 
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
         limit = max(1, min(50, int(settings.get("automod_max_mentions", 5))))
-        user_ids = {getattr(item, "id", item) for item in getattr(message, "mentions", [])}
-        role_ids = {getattr(item, "id", item) for item in getattr(message, "role_mentions", [])}
-        total = len(user_ids) + len(role_ids)
+        total = (features or MessageFeatures.from_message(message)).mention_count
         if total < limit:
             return None
         return RuleMatch(
@@ -203,7 +238,14 @@ class CapsRule(Rule):
     setting_key = "automod_caps_enabled"
     priority = 60
 
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
         content = getattr(message, "content", "") or ""
         letters = [char for char in content if char.isalpha()]
         minimum = max(5, min(500, int(settings.get("automod_caps_min_length", 12))))
@@ -224,11 +266,19 @@ class SpamRule(Rule):
     def __init__(self) -> None:
         self._messages: dict[tuple[int, int], Deque[float]] = defaultdict(deque)
 
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
-        content = normalize_text(getattr(message, "content", ""))
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
+        features = features or MessageFeatures.from_message(message)
+        content = features.normalized
         if not content:
             return None
-        compact = "".join(content.split())
+        compact = "".join(features.tokens)
         if len(compact) >= 16:
             most_common = Counter(compact).most_common(1)[0][1]
             if most_common / len(compact) >= 0.82:
@@ -269,16 +319,23 @@ class DuplicateRule(Rule):
         normalized = normalize_text(content)
         return hashlib.blake2s(normalized.encode("utf-8"), digest_size=8).hexdigest()
 
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
-        content = normalize_text(getattr(message, "content", ""))
-        if not content or dry_run:
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
+        features = features or MessageFeatures.from_message(message)
+        if not features.normalized or dry_run:
             return None
         guild_id = int(getattr(getattr(message, "guild", None), "id", 0))
         user_id = int(getattr(getattr(message, "author", None), "id", 0))
         now = time.monotonic()
         window = max(5, min(300, int(settings.get("automod_duplicate_window", 30))))
         limit = max(2, min(20, int(settings.get("automod_duplicate_threshold", 3))))
-        fingerprint = self.fingerprint(content)
+        fingerprint = features.fingerprint
         entries = self._messages[(guild_id, user_id)]
         while entries and now - entries[0][0] > window:
             entries.popleft()
@@ -304,8 +361,15 @@ class FastMessageRule(Rule):
     def __init__(self) -> None:
         self._messages: dict[tuple[int, int], Deque[float]] = defaultdict(deque)
 
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
-        if dry_run or not normalize_text(getattr(message, "content", "")):
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
+        if dry_run or not (features or MessageFeatures.from_message(message)).normalized:
             return None
         guild_id = int(getattr(getattr(message, "guild", None), "id", 0))
         user_id = int(getattr(getattr(message, "author", None), "id", 0))
@@ -335,18 +399,21 @@ class EmojiSpamRule(Rule):
 
     @staticmethod
     def _emoji_count(content: str) -> int:
-        custom = len(CUSTOM_EMOJI_RE.findall(content or ""))
-        unicode_emoji = 0
-        for char in content or "":
-            if unicodedata.category(char) == "So" and not char.isalnum():
-                unicode_emoji += 1
-        return custom + unicode_emoji
-
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
-        content = getattr(message, "content", "") or ""
+        return MessageFeatures(content or "").emoji_count
+
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
+        features = features or MessageFeatures.from_message(message)
+        content = features.content
         if not content:
             return None
-        emoji_count = self._emoji_count(content)
+        emoji_count = features.emoji_count
         threshold = max(4, min(100, int(settings.get("automod_emoji_spam_threshold", 14))))
         if emoji_count < threshold:
             return None
@@ -369,7 +436,14 @@ class WallSpamRule(Rule):
     setting_key = "automod_wall_spam_enabled"
     priority = 64
 
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
         content = getattr(message, "content", "") or ""
         if not content:
             return None
@@ -404,7 +478,14 @@ class AttachmentSpamRule(Rule):
     def __init__(self) -> None:
         self._attachments: dict[tuple[int, int], Deque[tuple[float, int]]] = defaultdict(deque)
 
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
         attachments = getattr(message, "attachments", []) or []
         count = len(attachments)
         if count <= 0:
@@ -440,7 +521,14 @@ class UnicodeSpamRule(Rule):
     setting_key = "automod_unicode_spam_enabled"
     priority = 62
 
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
         content = getattr(message, "content", "") or ""
         if len(content) < 8:
             return None
@@ -464,7 +552,14 @@ class NewAccountRule(Rule):
     setting_key = "automod_newaccount_enabled"
     priority = 40
 
-    async def check(self, message: Any, settings: dict[str, Any], *, dry_run: bool = False) -> Optional[RuleMatch]:
+    async def check(
+        self,
+        message: Any,
+        settings: dict[str, Any],
+        *,
+        dry_run: bool = False,
+        features: Optional[MessageFeatures] = None,
+    ) -> Optional[RuleMatch]:
         author = getattr(message, "author", None)
         created_at = getattr(author, "created_at", None)
         message_time = getattr(message, "created_at", None)
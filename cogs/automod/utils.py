@@ -4,8 +4,9 @@ from __future__ import annotations
 
 import re
 import unicodedata
+from collections import deque
 from datetime import timedelta
-from typing import Any, Iterable, Optional
+from typing import Any, Iterable, Optional, Sequence
 from urllib.parse import urlsplit
 
 import discord
@@ -52,6 +53,95 @@ def keyword_pattern(keyword: str) -> Optional[re.Pattern[str]]:
     return re.compile(rf"(?<!\w){separator.join(characters)}(?!\w)", re.IGNORECASE)
 
 
+WORD_RUN_RE = re.compile(r"[^\W_]+")
+
+
+class KeywordMatcher:
+    """All-hits keyword matcher equivalent to one ``keyword_pattern`` per word.
+
+    ``keyword_pattern`` lets any run of non-alphanumerics sit between the
+    letters of a keyword and requires no word character on either side. So a
+    keyword hits exactly when its letters appear contiguously once every
+    non-alphanumeric is dropped, with a non-word character (or the edge of the
+    text) around the original span. This builds one Aho-Corasick automaton over
+    the compacted keywords and scans the compacted text once, instead of
+    running one regex per keyword. Overlapping hits are all reported, like the
+    per-keyword regexes did.
+    """
+
+    __slots__ = ("words", "_goto", "_fail", "_output")
+
+    def __init__(self, words: Sequence[str]) -> None:
+        self.words: tuple[str, ...] = tuple(words)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[tuple[int, int], ...]] = [()]
+        for index, word in enumerate(self.words):
+            compact = "".join(char for char in normalize_text(word) if char.isalnum()).lower()
+            if not compact:
+                continue
+            state = 0
+            for char in compact:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += ((index, len(compact)),)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def find_all(self, text: str) -> list[str]:
+        """Return every keyword that hits ``text``, in keyword-list order."""
+        if not text or len(self._goto) == 1:
+            return []
+        goto, fail, output = self._goto, self._fail, self._output
+        positions: list[int] = []
+        found: set[int] = set()
+        state = 0
+        for run in WORD_RUN_RE.finditer(text):
+            start = run.start()
+            for offset, char in enumerate(run.group().lower()):
+                positions.append(start + offset)
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                if not output[state]:
+                    continue
+                end = len(positions) - 1
+                for index, length in output[state]:
+                    if index in found:
+                        continue
+                    first = positions[end - length + 1]
+                    last = positions[end]
+                    if first > 0 and _is_word_char(text[first - 1]):
+                        continue
+                    if last + 1 < len(text) and _is_word_char(text[last + 1]):
+                        continue
+                    found.add(index)
+        return [self.words[index] for index in sorted(found)]
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
 def unique_strings(values: Iterable[Any]) -> list[str]:
     result: list[str] = []
     seen: set[str] = set()
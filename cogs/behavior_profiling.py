@@ -15,6 +15,7 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
+from utils.cache import RecentMessageBuffer
 from utils.embeds import ModEmbed
 
 logger = logging.getLogger("ModBot.Behavior")
@@ -563,9 +564,29 @@ class BehaviorProfiling(commands.Cog):
         limiter: asyncio.Semaphore,
     ) -> list[ProfileMessage]:
         matches: list[ProfileMessage] = []
+        buffer = getattr(self.bot, "recent_messages", None)
+        if not isinstance(buffer, RecentMessageBuffer):
+            buffer = None
+        if buffer is not None:
+            # The gateway-fed buffer only stands in for paging the history
+            # when it holds the full scan depth (or the whole channel); a
+            # shallower ring would quietly shrink the scan.
+            buffered = buffer.recent(channel.id, HISTORY_SCAN_PER_CHANNEL)
+            if buffered is not None:
+                for message in reversed(buffered):
+                    if message.author.id != target_id:
+                        continue
+                    normalized = _coerce_message(message)
+                    if normalized is not None:
+                        matches.append(normalized)
+                    if len(matches) >= HISTORY_MATCH_LIMIT_PER_CHANNEL:
+                        break
+                return matches
+        scanned: list[discord.Message] = []
         try:
             async with limiter:
                 async for message in channel.history(limit=HISTORY_SCAN_PER_CHANNEL):
+                    scanned.append(message)
                     if message.author.id != target_id:
                         continue
                     normalized = _coerce_message(message)
@@ -573,6 +594,9 @@ class BehaviorProfiling(commands.Cog):
                         matches.append(normalized)
                     if len(matches) >= HISTORY_MATCH_LIMIT_PER_CHANNEL:
                         break
+                else:
+                    if buffer is not None:
+                        buffer.seed(channel.id, reversed(scanned), requested=HISTORY_SCAN_PER_CHANNEL)
         except (discord.Forbidden, discord.NotFound):
             logger.debug("Cannot read profiling history in channel %s", channel.id)
         except discord.HTTPException:
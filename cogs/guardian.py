@@ -29,6 +29,7 @@ from discord import app_commands
 from discord.ext import commands
 
 from config import Config
+from utils.audit_log_cache import get_audit_log_cache
 from utils.checks import is_admin, is_bot_owner_id
 from utils.embeds import compact_kv_lines, moderation_list_embed, sapphire_log_embed
 from utils.logging import send_log_embed
@@ -107,17 +108,17 @@ class Guardian(commands.Cog):
     ) -> Optional[discord.abc.User]:
         """Find who performed a destructive action via the audit log."""
         try:
-            async for entry in guild.audit_logs(limit=6, action=action):
-                age = (datetime.now(timezone.utc) - entry.created_at).total_seconds()
-                if age > seconds:
-                    break
-                if target_id is not None and getattr(entry.target, "id", None) != target_id:
-                    continue
-                if entry.user:
-                    return entry.user
+            entry = await get_audit_log_cache(self.bot).lookup(
+                guild,
+                action,
+                target_id=target_id,
+                within=seconds,
+                predicate=lambda candidate: candidate.user is not None,
+                wait=1.0,
+            )
         except (discord.Forbidden, discord.HTTPException):
             return None
-        return None
+        return entry.user if entry else None
 
     def _is_exempt(
         self,
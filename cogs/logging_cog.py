@@ -15,12 +15,27 @@ import tempfile
 import asyncio
 import time
 from pathlib import Path
+import aiohttp
 from discord.ext import tasks
 
+from utils.attachment_cache import (
+    CAPTURE_FULL,
+    CAPTURE_NONE,
+    FULL_MAX_BYTES,
+    MAX_ATTACHMENTS,
+    THUMBNAIL_MAX_BYTES,
+    AttachmentCache,
+    capture_policy,
+    cdn_url_expiry,
+    fetch_capped,
+    thumbnail_url,
+)
 from utils.embeds import ModEmbed, Colors, compact_kv_lines, sapphire_log_embed
 from utils.checks import is_admin
-from utils.cache import ChannelCache
+from utils.audit_log_cache import get_audit_log_cache
+from utils.cache import BoundedLRU, ChannelCache
 from utils.transcript import generate_html_transcript, EphemeralTranscriptView
+from utils.log_batcher import LogBatcher
 from utils.logging import prepare_log_embed
 from utils.server_setup import module_enabled
 
@@ -32,6 +47,8 @@ except Exception:
 
 logger = logging.getLogger(__name__)
 
+_PRIORITY_LOG_TITLE = re.compile(r"\b(?:banned|unbanned|softbanned|kicked)\b")
+
 
 class DeletedMessageImageView(discord.ui.View):
     CUSTOM_ID = "deleted_message_images:view"
@@ -120,10 +137,19 @@ class DeletedMessageImageView(discord.ui.View):
                 title=image.get("filename") or "Deleted message image",
                 color=Colors.INFO,
             )
-            if data:
+            file: Optional[discord.File] = None
+            if image.get("path"):
+                try:
+                    # Streamed from the attachment store rather than read into memory.
+                    file = discord.File(str(image["path"]), filename=filename)
+                except OSError:
+                    # Collected since the lookup; fall back to inline data or the URL.
+                    logger.debug("Stored image %s is no longer readable", image["path"], exc_info=True)
+            if file is None and data:
                 if isinstance(data, memoryview):
                     data = data.tobytes()
                 file = discord.File(io.BytesIO(bytes(data)), filename=filename)
+            if file is not None:
                 files.append(file)
                 embed.set_image(url=f"attachment://{filename}")
             elif image.get("url"):
@@ -163,6 +189,9 @@ class Logging(commands.Cog):
         self.bot = bot
         self._channel_cache = ChannelCache(ttl=300)  # 5 minute TTL
         self._audit_search_window_seconds = 15
+        # Grace period for an audit entry that the gateway delivers after the
+        # event it describes, before falling back to a REST read.
+        self._audit_cache_wait_seconds = 1.0
         self._seen_generic_audit_entries: dict[int, datetime] = {}
         self._suppress_message_delete_until: dict[int, datetime] = {}
         self._message_snapshots: dict[int, discord.Message] = {}
@@ -179,9 +208,19 @@ class Logging(commands.Cog):
         self._suppress_bulk_delete_until: dict[int, datetime] = {}
         self._suppress_timeout_change_until: dict[tuple[int, int], datetime] = {}
         self._seen_webhook_create_entries: dict[int, datetime] = {}
-        self._recent_message_snapshots: dict[int, dict[str, Any]] = {}
-        self._recent_message_snapshot_ttl = timedelta(hours=3)
-        self._recent_message_snapshot_max = 20000
+        # Bounded LRU: O(1) insert and evict under message floods, expiring
+        # on the monotonic clock.
+        self._recent_message_snapshots: BoundedLRU[int, dict[str, Any]] = BoundedLRU(
+            20000,
+            ttl=timedelta(hours=3).total_seconds(),
+        )
+        # Send-time attachment captures for deleted-message logs, capped per
+        # guild. See utils/attachment_cache.py for the capture policies.
+        self._attachment_cache = AttachmentCache(CACHE_DIR)
+        self._http: Optional[aiohttp.ClientSession] = None
+        # Per-channel outbound queues: bursts go out ten embeds per message,
+        # ban/kick logs skip the queue. See utils/log_batcher.py.
+        self._log_batcher = LogBatcher(on_failure=self._on_log_send_failure)
 
     async def _logging_enabled(self, guild_id: int) -> bool:
         now = time.monotonic()
@@ -189,7 +228,7 @@ class Logging(commands.Cog):
         if cached and cached[0] > now:
             return cached[1]
         try:
-            settings = await self.bot.db.get_settings(guild_id)
+            settings = await self.bot.db.get_settings_view(guild_id)
             enabled = module_enabled(settings, "logging", True)
         except Exception as exc:
             logger.error("Failed to resolve logging state for guild %s: %s", guild_id, exc)
@@ -198,6 +237,10 @@ class Logging(commands.Cog):
         return enabled
 
     async def cog_load(self):
+        try:
+            await asyncio.to_thread(self._attachment_cache.load)
+        except Exception:
+            logger.debug("Failed to index the attachment cache", exc_info=True)
         self._cleanup_temp_cache.start()
         # Registered once at load. This used to sit inside the hourly cleanup
         # loop, which meant the persistent view was not registered until the
@@ -212,16 +255,24 @@ class Logging(commands.Cog):
 
     async def cog_unload(self):
         self._cleanup_temp_cache.cancel()
+        await self._log_batcher.close()
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+
+    def _http_session(self) -> aiohttp.ClientSession:
+        shared = getattr(self.bot, "session", None)
+        if shared is not None and not getattr(shared, "closed", False):
+            return shared
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15))
+        return self._http
 
     @tasks.loop(hours=1)
     async def _cleanup_temp_cache(self):
         try:
-            now = time.time()
-            for f in CACHE_DIR.glob("*.bin"):
-                if f.is_file() and now - f.stat().st_mtime > 86400:
-                    f.unlink(missing_ok=True)
+            await self._attachment_cache.prune()
         except Exception:
-            pass
+            logger.debug("Failed to prune the attachment cache", exc_info=True)
         # Prune expired entries; do NOT reassign these dicts. Replacing them
         # with fresh empties (what this used to do) threw away every live
         # suppression window and the entire message-snapshot cache once an hour.
@@ -367,32 +418,14 @@ class Logging(commands.Cog):
         return True
 
     def _prune_recent_message_snapshots(self) -> None:
-        if not self._recent_message_snapshots:
-            return
-        now = datetime.now(timezone.utc)
-        cutoff = now - self._recent_message_snapshot_ttl
-        stale_ids = [
-            message_id
-            for message_id, data in self._recent_message_snapshots.items()
-            if data.get("stored_at", now) < cutoff
-        ]
-        for message_id in stale_ids:
-            self._recent_message_snapshots.pop(message_id, None)
-
-        while len(self._recent_message_snapshots) > self._recent_message_snapshot_max:
-            oldest_id = min(
-                self._recent_message_snapshots,
-                key=lambda mid: self._recent_message_snapshots[mid].get("stored_at", now),
-            )
-            self._recent_message_snapshots.pop(oldest_id, None)
+        self._recent_message_snapshots.prune_expired()
 
     def _cache_message_snapshot(self, message: discord.Message) -> None:
         if not message.guild:
             return
         avatar_url = getattr(getattr(message.author, "display_avatar", None), "url", None)
         attachments = self._attachment_records(message.attachments or [])
-        self._recent_message_snapshots[message.id] = {
-            "stored_at": datetime.now(timezone.utc),
+        self._recent_message_snapshots.set(message.id, {
             "guild_id": message.guild.id,
             "channel_id": message.channel.id,
             "author_id": getattr(message.author, "id", None),
@@ -403,9 +436,7 @@ class Logging(commands.Cog):
             "created_ts": int(message.created_at.timestamp()) if getattr(message, "created_at", None) else None,
             "attachments": attachments[:10],
             "attachment_count": len(attachments),
-        }
-        if len(self._recent_message_snapshots) % 250 == 0:
-            self._prune_recent_message_snapshots()
+        })
 
     def _pop_message_snapshot(
         self,
@@ -422,11 +453,6 @@ class Logging(commands.Cog):
             return None
         if channel_id is not None and data.get("channel_id") != channel_id:
             return None
-
-        stored_at = data.get("stored_at")
-        if isinstance(stored_at, datetime):
-            if datetime.now(timezone.utc) - stored_at > self._recent_message_snapshot_ttl:
-                return None
         return data
 
     async def get_log_channel(
@@ -449,7 +475,7 @@ class Logging(commands.Cog):
         if channel_id is None:
             # Fetch from DB
             try:
-                settings = await self.bot.db.get_settings(guild.id)
+                settings = await self.bot.db.get_settings_view(guild.id)
                 channel_id = self._resolve_log_channel_id(settings, log_type)
 
                 if not channel_id and log_type in self._MOD_LOG_FALLBACK_TYPES:
@@ -518,10 +544,11 @@ class Logging(commands.Cog):
         use_v2: bool = False,
         view: Optional[discord.ui.View] = None,
         mirror_to_audit: bool = False,
+        priority: bool = False,
     ) -> bool:
         """
         Safely send a log embed with enhanced error handling
-        Returns: bool indicating success
+        Returns: bool indicating the log was queued (priority logs: delivered)
         
         Args:
             channel: The channel to send to
@@ -530,6 +557,7 @@ class Logging(commands.Cog):
                 Discord can render the actor avatar and timestamp footer.
             view: Optional view to attach to the log message
             mirror_to_audit: Also send this log to the configured audit log channel
+            priority: Send now instead of batching; implied for ban and kick logs
         """
         if not channel:
             return False
@@ -545,7 +573,7 @@ class Logging(commands.Cog):
         try:
             destination_type = self._classify_misrouted_log_embed(embed)
             if destination_type:
-                settings = await self.bot.db.get_settings(channel.guild.id)
+                settings = await self.bot.db.get_settings_view(channel.guild.id)
                 mod_channel_id = self._resolve_log_channel_id(settings, "mod")
                 source_is_mod = bool(mod_channel_id and channel.id == mod_channel_id)
                 destination_id = self._resolve_log_channel_id(settings, destination_type)
@@ -570,26 +598,16 @@ class Logging(commands.Cog):
         except Exception:
             routed_channel = channel
 
+        priority = priority or self._is_priority_log(embed)
         sent_primary = False
         try:
             normalized = await prepare_log_embed(routed_channel, embed)
-            await routed_channel.send(
-                embed=normalized,
+            sent_primary = await self._log_batcher.submit(
+                routed_channel,
+                normalized,
                 view=view,
-                allowed_mentions=discord.AllowedMentions.none(),
-                use_v2=False,
+                priority=priority,
             )
-            sent_primary = True
-        except discord.Forbidden:
-            logger.warning(f"Missing permissions to log in {routed_channel.guild.name} #{routed_channel.name}")
-            # Invalidate cache for this channel
-            await self._channel_cache.invalidate(routed_channel.guild.id, "unknown")
-        except discord.NotFound:
-            logger.warning(f"Log channel not found: {routed_channel.guild.name} #{routed_channel.name}")
-            # Channel was deleted
-            await self._channel_cache.invalidate(routed_channel.guild.id, "unknown")
-        except discord.HTTPException as e:
-            logger.error(f"Failed to send log in {routed_channel.guild.name}: {e}")
         except Exception as e:
             logger.error(f"Unexpected error sending log: {e}")
         sent_audit = False
@@ -603,25 +621,43 @@ class Logging(commands.Cog):
                 try:
                     # Do not reuse the same View object across multiple messages.
                     normalized_audit = await prepare_log_embed(audit_channel, embed)
-                    await audit_channel.send(
-                        embed=normalized_audit,
-                        allowed_mentions=discord.AllowedMentions.none(),
-                        use_v2=False,
+                    sent_audit = await self._log_batcher.submit(
+                        audit_channel,
+                        normalized_audit,
+                        priority=priority,
+                        log_type="audit",
                     )
-                    sent_audit = True
-                except discord.Forbidden:
-                    logger.warning(f"Missing permissions to log in {audit_channel.guild.name} #{audit_channel.name}")
-                    await self._channel_cache.invalidate(audit_channel.guild.id, "audit")
-                except discord.NotFound:
-                    logger.warning(f"Audit log channel not found: {audit_channel.guild.name} #{audit_channel.name}")
-                    await self._channel_cache.invalidate(audit_channel.guild.id, "audit")
-                except discord.HTTPException as e:
-                    logger.error(f"Failed to mirror log to audit in {audit_channel.guild.name}: {e}")
                 except Exception as e:
                     logger.error(f"Unexpected error mirroring audit log: {e}")
 
         return sent_primary or sent_audit
 
+    @staticmethod
+    def _is_priority_log(embed: discord.Embed) -> bool:
+        """Ban and kick logs bypass batching so they are never stuck behind a burst."""
+        title = (getattr(embed, "title", "") or "").strip().lower()
+        return bool(_PRIORITY_LOG_TITLE.search(title))
+
+    async def _on_log_send_failure(
+        self, channel: Any, exc: Exception, log_types: tuple[Optional[str], ...] = ()
+    ) -> None:
+        guild = getattr(channel, "guild", None)
+        guild_name = getattr(guild, "name", "?")
+        if isinstance(exc, discord.Forbidden):
+            logger.warning(f"Missing permissions to log in {guild_name} #{getattr(channel, 'name', '?')}")
+        elif isinstance(exc, discord.NotFound):
+            logger.warning(f"Log channel not found: {guild_name} #{getattr(channel, 'name', '?')}")
+        else:
+            # Other HTTP errors are logged by the batcher itself.
+            if not isinstance(exc, discord.HTTPException):
+                logger.error(f"Unexpected error sending log: {exc}")
+            return
+        # Channel is gone or unusable; drop it from the cache under the log
+        # type it was resolved for (audit mirrors say so when submitted).
+        if guild is not None:
+            for log_type in log_types or (None,):
+                await self._channel_cache.invalidate(guild.id, log_type or "unknown")
+
     def _shorten(self, text: Optional[str], limit: int) -> str:
         if not text:
             return "*None*"
@@ -645,35 +681,6 @@ class Logging(commands.Cog):
             )
         return records
 
-    async def _attachment_records_with_data(
-        self,
-        attachments: list[discord.Attachment],
-        *,
-        max_bytes_each: int = 8_000_000,
-    ) -> list[dict[str, Any]]:
-        records: list[dict[str, Any]] = []
-        for attachment in attachments:
-            filename = str(getattr(attachment, "filename", "") or "attachment")
-            url = str(getattr(attachment, "url", "") or getattr(attachment, "proxy_url", "") or "")
-            content_type = str(getattr(attachment, "content_type", "") or "")
-            record: dict[str, Any] = {
-                "filename": filename,
-                "url": url,
-                "content_type": content_type,
-            }
-            if self._is_image_attachment(record):
-                size = int(getattr(attachment, "size", 0) or 0)
-                if size <= max_bytes_each:
-                    try:
-                        data = await attachment.read(use_cached=True)
-                    except Exception:
-                        logger.debug("Failed to read deleted-message image attachment %s", filename, exc_info=True)
-                    else:
-                        if data and len(data) <= max_bytes_each:
-                            record["data"] = data
-            records.append(record)
-        return records
-
     async def _persist_deleted_image_attachments(
         self,
         guild_id: int,
@@ -701,22 +708,88 @@ class Logging(commands.Cog):
         except Exception:
             pass
 
+    async def _attachment_capture_policy(self, message: discord.Message) -> str:
+        """Capture policy for a message's channel; ``none`` when deletes are not logged."""
+        try:
+            settings = await self.bot.db.get_settings_view(message.guild.id)
+        except Exception:
+            logger.debug("Failed to resolve attachment capture policy", exc_info=True)
+            return CAPTURE_NONE
+        if not (
+            self._resolve_log_channel_id(settings, "message")
+            or self._resolve_log_channel_id(settings, "audit")
+        ):
+            return CAPTURE_NONE
+        policy = capture_policy(settings, message.channel.id)
+        parent_id = getattr(message.channel, "parent_id", None)
+        if policy != CAPTURE_NONE and parent_id:
+            policy = capture_policy(settings, parent_id)
+        return policy
+
+    async def _capture_attachment(self, attachment: discord.Attachment, policy: str) -> Optional[bytes]:
+        url = str(getattr(attachment, "url", "") or "")
+        proxy_url = str(getattr(attachment, "proxy_url", "") or "") or url
+        if not proxy_url:
+            return None
+        if policy == CAPTURE_FULL:
+            if int(getattr(attachment, "size", 0) or 0) > FULL_MAX_BYTES:
+                return None
+            return await fetch_capped(self._http_session(), proxy_url, FULL_MAX_BYTES)
+        preview = thumbnail_url(
+            proxy_url,
+            getattr(attachment, "width", None),
+            getattr(attachment, "height", None),
+        )
+        return await fetch_capped(self._http_session(), preview, THUMBNAIL_MAX_BYTES)
+
     async def _process_message_attachments_on_send(self, message: discord.Message) -> None:
-        """Downloads attachments to local temp storage when a message is sent."""
-        if not message.attachments:
+        """Captures image attachments per the guild's capture policy when a message is sent."""
+        if not message.attachments or not message.guild:
             return
         try:
-            records = await self._attachment_records_with_data(message.attachments)
-            for i, record in enumerate(records):
-                data = record.get("data")
+            policy = await self._attachment_capture_policy(message)
+            if policy == CAPTURE_NONE:
+                return
+            attachments = list(message.attachments)[:MAX_ATTACHMENTS]
+            records = self._attachment_records(attachments)
+            for index, (attachment, record) in enumerate(zip(attachments, records)):
+                if not self._is_image_attachment(record):
+                    continue
+                data = await self._capture_attachment(attachment, policy)
                 if data:
-                    cache_file = CACHE_DIR / f"{message.id}_{i}.bin"
-                    def _write(cf, d):
-                        cf.write_bytes(d)
-                    await asyncio.to_thread(_write, cache_file, data)
+                    await self._attachment_cache.put(message.guild.id, message.id, index, data)
         except Exception:
             logger.exception("Failed to cache message image attachments locally")
 
+    async def _recover_deleted_attachments(
+        self,
+        guild_id: int,
+        message_id: int,
+        attachment_records: list[dict[str, Any]],
+    ) -> bool:
+        """Fill in image bytes for a deleted message's records; returns whether any were found.
+
+        The signed CDN URL keeps serving the original for a while after a
+        delete, so it is tried first until it expires. The send-time capture
+        (a thumbnail by default) is the fallback.
+        """
+        captured = await self._attachment_cache.take(guild_id, message_id)
+        found = False
+        now = time.time()
+        for index, record in enumerate(attachment_records):
+            if not self._is_image_attachment(record):
+                continue
+            data = None
+            url = str(record.get("url") or "")
+            expiry = cdn_url_expiry(url) if url else None
+            if url and (expiry is None or expiry > now):
+                data = await fetch_capped(self._http_session(), url, FULL_MAX_BYTES)
+            data = data or captured.get(index)
+            if data:
+                record["data"] = data
+                found = True
+        return found
+
     @staticmethod
     def _attachment_name(attachment: object) -> str:
         if isinstance(attachment, dict):
@@ -766,15 +839,14 @@ class Logging(commands.Cog):
         action: discord.AuditLogAction,
         target_id: int,
     ) -> Optional[discord.AuditLogEntry]:
-        now = datetime.now(timezone.utc)
         try:
-            async for entry in guild.audit_logs(limit=6, action=action):
-                entry_target_id = getattr(getattr(entry, "target", None), "id", None)
-                if entry_target_id != target_id:
-                    continue
-                age = (now - entry.created_at).total_seconds()
-                if age <= self._audit_search_window_seconds:
-                    return entry
+            return await get_audit_log_cache(self.bot).lookup(
+                guild,
+                action,
+                target_id=target_id,
+                within=self._audit_search_window_seconds,
+                wait=self._audit_cache_wait_seconds,
+            )
         except discord.Forbidden:
             return None
         except Exception as e:
@@ -803,25 +875,29 @@ class Logging(commands.Cog):
         channel_id: int,
         author_id: Optional[int] = None,
     ) -> Optional[discord.AuditLogEntry]:
-        now = datetime.now(timezone.utc)
-        try:
-            async for entry in guild.audit_logs(limit=8, action=discord.AuditLogAction.message_delete):
-                age = (now - entry.created_at).total_seconds()
-                if age > self._audit_search_window_seconds:
-                    continue
-
-                extra = getattr(entry, "extra", None)
-                entry_channel = getattr(extra, "channel", None)
-                entry_channel_id = getattr(entry_channel, "id", None) or getattr(extra, "channel_id", None)
-                if entry_channel_id is not None and entry_channel_id != channel_id:
-                    continue
 
-                if author_id is not None:
-                    target_id = getattr(getattr(entry, "target", None), "id", None)
-                    if target_id is not None and target_id != author_id:
-                        continue
+        def matches(entry: Any) -> bool:
+            extra = getattr(entry, "extra", None)
+            entry_channel = getattr(extra, "channel", None)
+            entry_channel_id = getattr(entry_channel, "id", None) or getattr(extra, "channel_id", None)
+            if entry_channel_id is not None and entry_channel_id != channel_id:
+                return False
+            if author_id is not None:
+                target_id = getattr(getattr(entry, "target", None), "id", None)
+                if target_id is not None and target_id != author_id:
+                    return False
+            return True
 
-                return entry
+        try:
+            # No wait here: Discord folds repeat deletes into an existing entry
+            # without a new gateway event, so those only ever resolve via REST.
+            return await get_audit_log_cache(self.bot).lookup(
+                guild,
+                discord.AuditLogAction.message_delete,
+                within=self._audit_search_window_seconds,
+                predicate=matches,
+                rest_limit=8,
+            )
         except discord.Forbidden:
             return None
         except Exception as e:
@@ -1353,7 +1429,7 @@ class Logging(commands.Cog):
         if not getattr(message.author, "bot", False) and message.webhook_id is None:
             return
 
-        settings = await self.bot.db.get_settings(message.guild.id)
+        settings = await self.bot.db.get_settings_view(message.guild.id)
         mod_channel_id = self._resolve_log_channel_id(settings, "mod")
         if not mod_channel_id or message.channel.id != mod_channel_id:
             return
@@ -1580,7 +1656,11 @@ class Logging(commands.Cog):
             pass
             
         if message.attachments:
-            self.bot.loop.create_task(self._process_message_attachments_on_send(message))
+            self.bot.tasks.submit(
+                "attachment_capture",
+                self._process_message_attachments_on_send(message),
+                name=f"attachment-capture-{message.id}",
+            )
     
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message):
@@ -1638,22 +1718,7 @@ class Logging(commands.Cog):
             
         if not attachment_records:
             attachment_records = self._attachment_records(message.attachments or [])
-            has_data = False
-            for i, record in enumerate(attachment_records):
-                cache_file = CACHE_DIR / f"{message.id}_{i}.bin"
-                if cache_file.exists():
-                    try:
-                        def _read(cf):
-                            return cf.read_bytes()
-                        record["data"] = await asyncio.to_thread(_read, cache_file)
-                        has_data = True
-                        def _unlink(cf):
-                            cf.unlink(missing_ok=True)
-                        await asyncio.to_thread(_unlink, cache_file)
-                    except Exception:
-                        pass
-            
-            if has_data:
+            if await self._recover_deleted_attachments(message.guild.id, message.id, attachment_records):
                 await self._persist_deleted_image_attachments(
                     message.guild.id,
                     message.channel.id,
@@ -1798,10 +1863,17 @@ class Logging(commands.Cog):
                 message_id=message_id,
             )
             
-        image_attachments = self._image_attachments(attachment_records)
         if not attachment_records and snapshot:
             # Fallback to metadata from snapshot if no DB records exist
-            image_attachments = self._image_attachments(list(snapshot.get("attachments") or []))
+            attachment_records = [dict(record) for record in snapshot.get("attachments") or []]
+            if await self._recover_deleted_attachments(guild.id, message_id, attachment_records):
+                await self._persist_deleted_image_attachments(
+                    guild.id,
+                    channel_id,
+                    message_id,
+                    attachment_records,
+                )
+        image_attachments = self._image_attachments(attachment_records)
         view = DeletedMessageImageView(self.bot, image_attachments) if image_attachments else None
         if view is not None:
             embed.timestamp = None
@@ -1903,18 +1975,22 @@ class Logging(commands.Cog):
 
         actor = None
         action_reason = None
-        now = datetime.now(timezone.utc)
+
+        def same_channel(entry: Any) -> bool:
+            entry_channel = getattr(getattr(entry, "extra", None), "channel", None)
+            return not entry_channel or getattr(entry_channel, "id", None) == source_channel.id
+
         try:
-            async for entry in guild.audit_logs(limit=6, action=discord.AuditLogAction.message_bulk_delete):
-                age = (now - entry.created_at).total_seconds()
-                if age > self._audit_search_window_seconds:
-                    continue
-                entry_channel = getattr(getattr(entry, "extra", None), "channel", None)
-                if entry_channel and getattr(entry_channel, "id", None) != source_channel.id:
-                    continue
+            entry = await get_audit_log_cache(self.bot).lookup(
+                guild,
+                discord.AuditLogAction.message_bulk_delete,
+                within=self._audit_search_window_seconds,
+                predicate=same_channel,
+                wait=self._audit_cache_wait_seconds,
+            )
+            if entry is not None:
                 actor = getattr(entry, "user", None)
                 action_reason = getattr(entry, "reason", None)
-                break
         except discord.Forbidden:
             actor = None
         except Exception as e:
@@ -2039,22 +2115,23 @@ class Logging(commands.Cog):
         footer_user = None
         was_kicked = False
         try:
-            async for entry in member.guild.audit_logs(limit=5, action=discord.AuditLogAction.kick):
-                target_id = getattr(getattr(entry, "target", None), "id", None)
-                if target_id != member.id:
-                    continue
-                # .seconds is the seconds-of-day component, so a kick entry from
-                # 24h+1s ago reported "1" and read as brand new. That logged a
-                # voluntary leave as a kick and credited it to whichever
-                # moderator last kicked this user. total_seconds() is the age.
-                if (datetime.now(timezone.utc) - entry.created_at).total_seconds() < 5:
-                    title = "Member kicked"
-                    footer_user = getattr(entry, "user", None)
-                    reason = getattr(entry, "reason", None)
-                    if reason:
-                        details_lines.append(f"**Reason:** {self._shorten(reason, 250)}")
-                    was_kicked = True
-                    break
+            # Only a kick entry from the last few seconds counts; an older one
+            # would credit a voluntary leave to whoever last kicked this user.
+            entry = await get_audit_log_cache(self.bot).lookup(
+                member.guild,
+                discord.AuditLogAction.kick,
+                target_id=member.id,
+                within=5,
+                wait=self._audit_cache_wait_seconds,
+                rest_limit=5,
+            )
+            if entry is not None:
+                title = "Member kicked"
+                footer_user = getattr(entry, "user", None)
+                reason = getattr(entry, "reason", None)
+                if reason:
+                    details_lines.append(f"**Reason:** {self._shorten(reason, 250)}")
+                was_kicked = True
         except discord.Forbidden:
             pass
         except Exception as e:
@@ -2113,7 +2190,7 @@ class Logging(commands.Cog):
             verification_queue_update = False
             if len(added) == 1 and not removed:
                 try:
-                    settings = await self.bot.db.get_settings(before.guild.id)
+                    settings = await self.bot.db.get_settings_view(before.guild.id)
                     verification_queue_update = self._is_verification_queue_role_update(
                         settings,
                         added,
@@ -2352,12 +2429,16 @@ class Logging(commands.Cog):
         moderator = None
         ban_reason = None
         try:
-            async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.ban):
-                target_id = getattr(getattr(entry, "target", None), "id", None)
-                if target_id == user.id:
-                    moderator = getattr(entry, "user", None)
-                    ban_reason = getattr(entry, "reason", None)
-                    break
+            entry = await get_audit_log_cache(self.bot).lookup(
+                guild,
+                discord.AuditLogAction.ban,
+                target_id=user.id,
+                wait=self._audit_cache_wait_seconds,
+                rest_limit=1,
+            )
+            if entry is not None:
+                moderator = getattr(entry, "user", None)
+                ban_reason = getattr(entry, "reason", None)
         except discord.Forbidden:
             logger.warning(f"Missing audit log permissions in {guild.name}")
         except Exception as e:
@@ -2393,12 +2474,16 @@ class Logging(commands.Cog):
         moderator = None
         unban_reason = None
         try:
-            async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.unban):
-                target_id = getattr(getattr(entry, "target", None), "id", None)
-                if target_id == user.id:
-                    moderator = getattr(entry, "user", None)
-                    unban_reason = getattr(entry, "reason", None)
-                    break
+            entry = await get_audit_log_cache(self.bot).lookup(
+                guild,
+                discord.AuditLogAction.unban,
+                target_id=user.id,
+                wait=self._audit_cache_wait_seconds,
+                rest_limit=1,
+            )
+            if entry is not None:
+                moderator = getattr(entry, "user", None)
+                unban_reason = getattr(entry, "reason", None)
         except discord.Forbidden:
             pass
         except Exception as e:
@@ -2429,22 +2514,22 @@ class Logging(commands.Cog):
         if not log_channel:
             return
 
-        now = datetime.now(timezone.utc)
-        entry = None
-        try:
-            async for candidate in channel.guild.audit_logs(limit=8, action=discord.AuditLogAction.webhook_create):
-                age = (now - candidate.created_at).total_seconds()
-                if age > self._audit_search_window_seconds:
-                    continue
 
-                webhook = getattr(candidate, "target", None)
-                webhook_channel = getattr(webhook, "channel", None)
-                webhook_channel_id = getattr(webhook_channel, "id", None) or getattr(webhook, "channel_id", None)
-                if webhook_channel_id is not None and webhook_channel_id != channel.id:
-                    continue
+        def same_channel(candidate: Any) -> bool:
+            webhook = getattr(candidate, "target", None)
+            webhook_channel = getattr(webhook, "channel", None)
+            webhook_channel_id = getattr(webhook_channel, "id", None) or getattr(webhook, "channel_id", None)
+            return webhook_channel_id is None or webhook_channel_id == channel.id
 
-                entry = candidate
-                break
+        try:
+            entry = await get_audit_log_cache(self.bot).lookup(
+                channel.guild,
+                discord.AuditLogAction.webhook_create,
+                within=self._audit_search_window_seconds,
+                predicate=same_channel,
+                wait=self._audit_cache_wait_seconds,
+                rest_limit=8,
+            )
         except discord.Forbidden:
             return
         except Exception as e:
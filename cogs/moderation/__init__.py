@@ -1,6 +1,6 @@
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 from datetime import datetime, timezone
 import logging
 import json
@@ -15,6 +15,7 @@ from utils.checks import (
 from utils.moderation_settings import moderation_bool
 from utils.server_setup import module_enabled
 from utils.embeds import Colors, ModEmbed, moderation_list_embed
+from utils.scheduler import get_scheduler
 
 # Mixins
 from .extensions.helpers import HelperCommands
@@ -200,7 +201,7 @@ class Moderation(
         return True
 
     async def cog_load(self):
-        """Initialize database table for quarantines and start tasks"""
+        """Initialize database table for quarantines and register expiry jobs"""
         await self._register_top_level_commands()
 
         async with self.bot.db.get_connection() as db:
@@ -219,16 +220,14 @@ class Moderation(
             """)
             await db.commit()
         
-        if not self.check_quarantine_expiry.is_running():
-            self.check_quarantine_expiry.start()
-        if not self.check_tempban_expiry.is_running():
-            self.check_tempban_expiry.start()
+        scheduler = get_scheduler(self.bot)
+        scheduler.register("quarantine", self._on_quarantine_due, self._load_quarantine_jobs)
+        scheduler.register("tempban", self._on_tempban_due, self._load_tempban_jobs)
 
     async def cog_unload(self):
-        if self.check_quarantine_expiry.is_running():
-            self.check_quarantine_expiry.cancel()
-        if self.check_tempban_expiry.is_running():
-            self.check_tempban_expiry.cancel()
+        scheduler = get_scheduler(self.bot)
+        scheduler.unregister("quarantine")
+        scheduler.unregister("tempban")
 
         self._unregister_top_level_commands()
 
@@ -238,9 +237,20 @@ class Moderation(
             except Exception:
                 pass
 
-    @tasks.loop(minutes=1)
-    async def check_quarantine_expiry(self):
-        """Check for expired quarantines and restore roles"""
+    async def _load_quarantine_jobs(self):
+        """Scheduler loader: one job per active quarantine with an expiry."""
+        async with self.bot.db.get_connection() as conn:
+            cursor = await conn.execute(
+                "SELECT guild_id, user_id, expires_at FROM quarantines WHERE active = 1 AND expires_at IS NOT NULL"
+            )
+            rows = await cursor.fetchall()
+        return [((int(guild_id), int(user_id)), expires_at, None) for guild_id, user_id, expires_at in rows]
+
+    async def _on_quarantine_due(self, key, payload) -> None:
+        await self._process_expired_quarantines()
+
+    async def _process_expired_quarantines(self) -> None:
+        """Restore roles for every quarantine whose expiry has passed"""
         now = datetime.now(timezone.utc).replace(tzinfo=None)
         try:
             async with self.bot.db.get_connection() as conn:
@@ -302,12 +312,14 @@ class Moderation(
         except Exception as e:
             logger.error(f"Error checking quarantine expiry: {e}")
 
-    @check_quarantine_expiry.before_loop
-    async def before_quarantine_check(self):
-        await self.bot.wait_until_ready()
+    async def _load_tempban_jobs(self):
+        """Scheduler loader: one job per stored tempban."""
+        return [
+            ((int(tempban["guild_id"]), int(tempban["user_id"])), tempban["expires_at_utc"], None)
+            for tempban in await self.bot.db.get_tempbans()
+        ]
 
-    @tasks.loop(minutes=1)
-    async def check_tempban_expiry(self):
+    async def _on_tempban_due(self, key, payload) -> None:
         """Automatically unban expired tempbans and deliver a rejoin notice."""
         await self._process_expired_tempbans()
 
@@ -374,10 +386,6 @@ class Moderation(
             except Exception as exc:
                 logger.debug("Could not log expired tempban for %s: %s", user_id, exc)
 
-    @check_tempban_expiry.before_loop
-    async def before_tempban_check(self):
-        await self.bot.wait_until_ready()
-
     # ==================== REPLY-BASED QUICK ACTIONS ====================
 
     # Maps embed title keywords to the original action type
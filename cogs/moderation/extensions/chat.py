@@ -14,6 +14,7 @@ from utils.embeds import (
     sapphire_log_embed,
 )
 from utils.checks import is_mod, is_admin, is_bot_owner_id
+from utils.mass_actions import MassActionExecutor
 from utils.moderation_settings import moderation_id_set
 from utils.time_parser import parse_time
 from utils.transcript import EphemeralTranscriptView, generate_html_transcript
@@ -261,7 +262,6 @@ class ChatCommands:
         settings = await self.bot.db.get_settings(source.guild.id)
         target_channels = self._configured_lockdown_channels(source.guild, settings)
         restore_state = self._lockdown_restore_state(settings)
-        locked = []
         failed = []
         unchanged = []
         pending: list[discord.TextChannel] = []
@@ -286,20 +286,21 @@ class ChatCommands:
                 self._serialize_lockdown_restore_state(restore_state),
             )
 
-        for channel in pending:
-            try:
-                overwrite = channel.overwrites_for(source.guild.default_role)
-                overwrite.send_messages = False
-                await channel.set_permissions(
-                    source.guild.default_role,
-                    overwrite=overwrite,
-                    reason=f"[LOCKDOWN] {author}: {reason}",
-                )
-                locked.append(channel.mention)
-            except (discord.Forbidden, discord.HTTPException):
-                failed.append(channel.mention)
-                if channel.id in newly_recorded:
-                    restore_state.pop(channel.id, None)
+        async def lock(channel: discord.TextChannel) -> None:
+            overwrite = channel.overwrites_for(source.guild.default_role)
+            overwrite.send_messages = False
+            await channel.set_permissions(
+                source.guild.default_role,
+                overwrite=overwrite,
+                reason=f"[LOCKDOWN] {author}: {reason}",
+            )
+
+        result = await MassActionExecutor().run(pending, lock, route="channel_permissions")
+        locked = [channel.mention for channel in result.succeeded]
+        for channel, _ in result.failed:
+            failed.append(channel.mention)
+            if channel.id in newly_recorded:
+                restore_state.pop(channel.id, None)
 
         if failed and newly_recorded:
             await self.bot.db.set_setting(
@@ -342,28 +343,31 @@ class ChatCommands:
 
         settings = await self.bot.db.get_settings(source.guild.id)
         restore_state = self._lockdown_restore_state(settings)
-        unlocked = []
-        failed = []
         missing = []
+        pending: list[discord.TextChannel] = []
 
-        for channel_id, previous_send_messages in list(restore_state.items()):
+        for channel_id in list(restore_state):
             channel = source.guild.get_channel(channel_id)
             if not isinstance(channel, discord.TextChannel):
                 restore_state.pop(channel_id, None)
                 missing.append(str(channel_id))
                 continue
-            try:
-                overwrite = channel.overwrites_for(source.guild.default_role)
-                overwrite.send_messages = previous_send_messages
-                await channel.set_permissions(
-                    source.guild.default_role,
-                    overwrite=None if overwrite.is_empty() else overwrite,
-                    reason=f"[UNLOCKDOWN] {author}: {reason}",
-                )
-                unlocked.append(channel.mention)
-                restore_state.pop(channel_id, None)
-            except (discord.Forbidden, discord.HTTPException):
-                failed.append(channel.mention)
+            pending.append(channel)
+
+        async def unlock(channel: discord.TextChannel) -> None:
+            overwrite = channel.overwrites_for(source.guild.default_role)
+            overwrite.send_messages = restore_state[channel.id]
+            await channel.set_permissions(
+                source.guild.default_role,
+                overwrite=None if overwrite.is_empty() else overwrite,
+                reason=f"[UNLOCKDOWN] {author}: {reason}",
+            )
+
+        result = await MassActionExecutor().run(pending, unlock, route="channel_permissions")
+        unlocked = [channel.mention for channel in result.succeeded]
+        failed = [channel.mention for channel, _ in result.failed]
+        for channel in result.succeeded:
+            restore_state.pop(channel.id, None)
 
         await self.bot.db.set_setting(
             source.guild.id,
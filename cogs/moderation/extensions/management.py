@@ -16,7 +16,7 @@ from utils.moderation_settings import (
     render_moderation_response,
 )
 from utils.time_parser import parse_time
-from utils.async_tasks import fire_and_forget
+from utils.scheduler import get_scheduler
 from config import Config
 
 logger = logging.getLogger("ModBot.Moderation.Management")
@@ -468,6 +468,7 @@ class ManagementCommands:
              return await self._respond(source, embed=ModEmbed.error("Failed", f"Could not unban: {e}"), ephemeral=True)
              
         await self.bot.db.remove_tempban(guild.id, user.id)
+        get_scheduler(self.bot).cancel("tempban", (guild.id, user.id))
         case_num = await self.bot.db.create_case(guild.id, user.id, moderator.id, "Unban", reason)
 
         settings = await self.bot.db.get_settings(guild.id)
@@ -606,6 +607,7 @@ class ManagementCommands:
 
         case_num = await self.bot.db.create_case(guild.id, user.id, moderator.id, "Tempban", reason, human_duration)
         await self.bot.db.add_tempban(guild.id, user.id, moderator.id, reason, expires_at)
+        get_scheduler(self.bot).schedule("tempban", (guild.id, user.id), expires_at)
         dm_embed = ModEmbed.punishment_notice(
             guild=guild,
             action="Tempban",
@@ -1339,6 +1341,8 @@ class ManagementCommands:
             expires_at,
             backup_role_ids
         )
+        if expires_at is not None:
+            get_scheduler(self.bot).schedule("quarantine", (source.guild.id, user.id), expires_at)
 
         quarantine_details = {
             "Duration": human_duration,
@@ -1398,7 +1402,8 @@ class ManagementCommands:
                     moderator=author,
                 )
 
-            fire_and_forget(
+            self.bot.tasks.submit(
+                "notices",
                 _send_quarantine_dm(),
                 name=f"quarantine-dm-{source.guild.id}-{user.id}",
             )
@@ -1429,7 +1434,8 @@ class ManagementCommands:
                     except Exception:
                         pass
 
-                fire_and_forget(
+                self.bot.tasks.submit(
+                    "notices",
                     _post_jail_notice(jail_channel, user.mention, jail_embed),
                     name=f"quarantine-jail-notice-{source.guild.id}-{user.id}",
                 )
@@ -1475,6 +1481,7 @@ class ManagementCommands:
 
         # DB update
         await self.bot.db.remove_quarantine(source.guild.id, user.id)
+        get_scheduler(self.bot).cancel("quarantine", (source.guild.id, user.id))
 
         case_num = await self.bot.db.create_case(
             source.guild.id,
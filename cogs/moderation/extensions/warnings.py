@@ -7,7 +7,6 @@ from typing import Optional
 from utils.embeds import Colors, ModEmbed, compact_text, moderation_list_embed
 from utils.checks import is_mod, is_bot_owner_id
 from utils.warning_escalation import apply_warning_escalation, build_escalation_dm_embed
-from utils.async_tasks import fire_and_forget
 
 class WarningCommands:
     async def _warn_logic(self, source, user: discord.Member, reason: str):
@@ -59,7 +58,8 @@ class WarningCommands:
                 case_number=case_num,
                 guidance=f"You now have **{warn_count}** active warning(s).",
             )
-            fire_and_forget(
+            self.bot.tasks.submit(
+                "notices",
                 self.send_punishment_notice(
                     guild=source.guild,
                     user=user,
@@ -129,7 +129,8 @@ class WarningCommands:
                             except (discord.Forbidden, discord.HTTPException):
                                 pass
 
-                        fire_and_forget(
+                        self.bot.tasks.submit(
+                            "notices",
                             _send_escalation_dm(user, escalation_dm_body),
                             name=f"warn-escalation-dm-{source.guild.id}-{user.id}",
                         )
@@ -1,63 +1,139 @@
 """
 Sticky pin command: keeps a bot message as the last message in a channel.
+
+Pins are stored in the ``sticky_pins`` table with the id of the message
+currently posted and when it was last bumped, so they survive restarts. A
+channel's pin is loaded lazily the first time it sees a message after
+startup: nothing is posted when the bot comes up, the previous sticky message
+is deleted rather than duplicated, and the bump throttle carries over. Expiry
+is a job on the shared scheduler rather than a sleeping task per pin.
 """
 
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Optional
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
+from utils.cache import BoundedLRU
 from utils.checks import is_admin
 from utils.embeds import ModEmbed
+from utils.scheduler import get_scheduler
 from utils.time_parser import parse_time
 from config import Config
 
+logger = logging.getLogger("ModBot.Pin")
 
 _MIN_BUMP_INTERVAL_SECONDS = 1.0
+_PIN_JOB = "sticky_pin"
+# Channels looked up and found without a pin, so their messages skip the DB.
+_NO_PIN_CACHE_SIZE = 10_000
 
 
 @dataclass
 class StickyPin:
+    guild_id: int
     channel_id: int
     content: str
     created_by: int
     created_at: datetime
     expires_at: Optional[datetime]
     as_embed: bool
-    message: Optional[discord.Message] = None
+    # A full Message once posted by this process; a PartialMessage when the
+    # pin was rehydrated from the database (enough to delete it).
+    message: Optional[Any] = None
     bump_task: Optional[asyncio.Task] = None
-    expiry_task: Optional[asyncio.Task] = None
     bump_requested: bool = False
     last_bumped_at: Optional[datetime] = None
 
+    def expired(self, now: Optional[datetime] = None) -> bool:
+        return self.expires_at is not None and (now or datetime.now(timezone.utc)) >= self.expires_at
+
 
 class Pin(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self._pins: dict[int, StickyPin] = {}
+        self._no_pin: BoundedLRU[int, bool] = BoundedLRU(_NO_PIN_CACHE_SIZE)
+        self._loading: dict[int, asyncio.Task] = {}
+        get_scheduler(self.bot).register(_PIN_JOB, self._on_pin_due, self._load_pin_jobs)
+
+    def cog_unload(self):
+        get_scheduler(self.bot).unregister(_PIN_JOB)
+        for pin in self._pins.values():
+            if pin.bump_task is not None and not pin.bump_task.done():
+                pin.bump_task.cancel()
 
     def _get_pin(self, channel_id: int) -> Optional[StickyPin]:
         pin = self._pins.get(channel_id)
-        if pin is None:
+        if pin is None or pin.expired():
+            return None
+        return pin
+
+    async def _lookup_pin(self, channel: discord.abc.Messageable) -> Optional[StickyPin]:
+        """The channel's pin, loading it from the database on first sight."""
+        pin = self._pins.get(channel.id)
+        if pin is not None or channel.id in self._no_pin:
+            return pin
+        # A burst of messages after startup shares one lookup per channel.
+        task = self._loading.get(channel.id)
+        if task is None:
+            task = asyncio.ensure_future(self._load_pin(channel))
+            self._loading[channel.id] = task
+            task.add_done_callback(lambda _: self._loading.pop(channel.id, None))
+        return await asyncio.shield(task)
+
+    async def _load_pin(self, channel: discord.abc.Messageable) -> Optional[StickyPin]:
+        try:
+            row = await self.bot.db.get_sticky_pin(channel.id)
+        except Exception:
+            logger.debug("Sticky pin lookup failed for channel %s", channel.id, exc_info=True)
             return None
-        if pin.expires_at is not None and datetime.now(timezone.utc) >= pin.expires_at:
+        if channel.id in self._pins:
+            # /pin ran while we were reading.
+            return self._pins[channel.id]
+        if row is None:
+            self._no_pin.set(channel.id, True)
             return None
+
+        message = None
+        if row["message_id"]:
+            message = channel.get_partial_message(row["message_id"])
+        pin = StickyPin(
+            guild_id=row["guild_id"],
+            channel_id=channel.id,
+            content=row["content"],
+            created_by=row["created_by"],
+            created_at=row["created_at"] or datetime.now(timezone.utc),
+            expires_at=row["expires_at"],
+            as_embed=row["as_embed"],
+            message=message,
+            last_bumped_at=row["last_bumped_at"],
+        )
+        self._pins[channel.id] = pin
         return pin
 
     async def _clear_pin(self, channel_id: int, *, delete_message: bool = True) -> None:
         pin = self._pins.pop(channel_id, None)
+        self._no_pin.set(channel_id, True)
+        get_scheduler(self.bot).cancel(_PIN_JOB, channel_id)
+        try:
+            await self.bot.db.delete_sticky_pin(channel_id)
+        except Exception:
+            logger.warning("Failed to delete sticky pin for channel %s", channel_id, exc_info=True)
         if pin is None:
             return
 
-        for task in (pin.bump_task, pin.expiry_task):
-            if task is not None and not task.done():
-                task.cancel()
+        task = pin.bump_task
+        if task is not None and not task.done() and task is not asyncio.current_task():
+            task.cancel()
 
         if delete_message and pin.message is not None:
             try:
@@ -79,6 +155,54 @@ class Pin(commands.Cog):
                 content = content[:1997] + "..."
             return await channel.send(content, use_v2=False)
 
+    async def _start_pin(
+        self,
+        channel: discord.abc.Messageable,
+        content: str,
+        *,
+        created_by: int,
+        expires_at: Optional[datetime],
+        as_embed: bool,
+    ) -> StickyPin:
+        """Replace the channel's pin, post it and persist it; raises if sending fails."""
+        await self._clear_pin(channel.id, delete_message=True)
+
+        now = datetime.now(timezone.utc)
+        pin = StickyPin(
+            guild_id=channel.guild.id,
+            channel_id=channel.id,
+            content=content,
+            created_by=created_by,
+            created_at=now,
+            expires_at=expires_at,
+            as_embed=bool(as_embed),
+        )
+        try:
+            pin.message = await self._send_pin_message(channel, content, as_embed=pin.as_embed)
+            pin.last_bumped_at = datetime.now(timezone.utc)
+            await self.bot.db.save_sticky_pin(
+                pin.guild_id,
+                pin.channel_id,
+                pin.content,
+                pin.created_by,
+                pin.created_at,
+                pin.expires_at,
+                pin.as_embed,
+                pin.message.id,
+                pin.last_bumped_at,
+            )
+        except Exception:
+            if pin.message is not None:
+                with contextlib.suppress(Exception):
+                    await pin.message.delete()
+            raise
+
+        self._pins[channel.id] = pin
+        self._no_pin.pop(channel.id)
+        if pin.expires_at is not None:
+            get_scheduler(self.bot).schedule(_PIN_JOB, channel.id, pin.expires_at)
+        return pin
+
     async def _bump_pin(self, channel: discord.abc.Messageable, pin: StickyPin) -> None:
         try:
             if pin.message is not None:
@@ -92,23 +216,36 @@ class Pin(commands.Cog):
         except Exception:
             # If we can't bump (missing perms, deleted channel, etc.), stop the pin.
             await self._clear_pin(pin.channel_id, delete_message=False)
-
-    def _schedule_expiry(self, pin: StickyPin) -> None:
-        if pin.expires_at is None:
             return
 
-        async def _expiry_worker() -> None:
-            try:
-                delay = (pin.expires_at - datetime.now(timezone.utc)).total_seconds()
-                if delay > 0:
-                    await asyncio.sleep(delay)
-                await self._clear_pin(pin.channel_id, delete_message=True)
-            except asyncio.CancelledError:
-                raise
-            except Exception:
-                await self._clear_pin(pin.channel_id, delete_message=False)
+        try:
+            await self.bot.db.record_sticky_pin_bump(pin.channel_id, pin.message.id, pin.last_bumped_at)
+        except Exception:
+            logger.warning("Failed to record sticky pin bump in channel %s", pin.channel_id, exc_info=True)
+
+    async def _load_pin_jobs(self):
+        """Scheduler loader: one job per sticky pin that expires."""
+        return [
+            (channel_id, expires_at, None)
+            for channel_id, expires_at in await self.bot.db.get_sticky_pin_expiries()
+        ]
+
+    async def _on_pin_due(self, channel_id: int, payload) -> None:
+        row = await self.bot.db.get_sticky_pin(channel_id)
+        if row is None or row["expires_at"] is None:
+            return
+        if row["expires_at"] > datetime.now(timezone.utc):
+            # Replaced by a longer pin since this job was queued.
+            get_scheduler(self.bot).schedule(_PIN_JOB, channel_id, row["expires_at"])
+            return
 
-        pin.expiry_task = asyncio.create_task(_expiry_worker())
+        if channel_id not in self._pins and row["message_id"]:
+            # Never rehydrated since startup: delete the posted message by id.
+            channel = self.bot.get_channel(channel_id)
+            if channel is not None and hasattr(channel, "get_partial_message"):
+                with contextlib.suppress(Exception):
+                    await channel.get_partial_message(row["message_id"]).delete()
+        await self._clear_pin(channel_id, delete_message=True)
 
     @app_commands.command(
         name="pin",
@@ -177,31 +314,21 @@ class Pin(commands.Cog):
             delta, human_duration = parsed
             expires_at = datetime.now(timezone.utc) + delta
 
-        # Replace any existing pin in this channel.
-        await self._clear_pin(channel.id, delete_message=True)
-
-        pin = StickyPin(
-            channel_id=channel.id,
-            content=message,
-            created_by=interaction.user.id,
-            created_at=datetime.now(timezone.utc),
-            expires_at=expires_at,
-            as_embed=bool(embed),
-        )
-        self._pins[channel.id] = pin
-
+        # Replaces any existing pin in this channel.
         try:
-            pin.message = await self._send_pin_message(channel, message, as_embed=pin.as_embed)
-            pin.last_bumped_at = datetime.now(timezone.utc)
+            await self._start_pin(
+                channel,
+                message,
+                created_by=interaction.user.id,
+                expires_at=expires_at,
+                as_embed=bool(embed),
+            )
         except Exception as e:
-            await self._clear_pin(channel.id, delete_message=False)
             return await interaction.followup.send(
                 embed=ModEmbed.error("Failed", f"Couldn't send the pinned message: {e}"),
                 ephemeral=True,
             )
 
-        self._schedule_expiry(pin)
-
         expiry_note = f" (expires in **{human_duration}**)" if human_duration else ""
         mode_note = "embed" if embed else "message"
         await interaction.followup.send(
@@ -220,17 +347,17 @@ class Pin(commands.Cog):
         if getattr(self.bot, "user", None) is not None and message.author.id == self.bot.user.id:
             return
 
-        pin = self._get_pin(message.channel.id)
-        if pin is None:
-            return
-        if pin.expires_at is not None and datetime.now(timezone.utc) >= pin.expires_at:
-            await self._clear_pin(message.channel.id, delete_message=True)
-            return
-
         channel = message.channel
         if not isinstance(channel, (discord.TextChannel, discord.Thread)):
             return
 
+        pin = await self._lookup_pin(channel)
+        if pin is None:
+            return
+        if pin.expired():
+            await self._clear_pin(channel.id, delete_message=True)
+            return
+
         pin.bump_requested = True
         if pin.bump_task is not None and not pin.bump_task.done():
             return
@@ -730,18 +730,43 @@ class PrefixCommands(commands.Cog):
     @commands.command(name="snipe")
     async def snipe_cmd(self, ctx):
         """Snipe a deleted message"""
-        snipe = self.bot.snipe_cache.get(ctx.channel.id) if hasattr(self.bot, "snipe_cache") else None
+        snipe = await self.bot.snipe_cache.get(ctx.channel.id) if hasattr(self.bot, "snipe_cache") else None
         if snipe:
             embed = discord.Embed(description=snipe.get("content", ""), color=Colors.INFO)
             embed.set_author(name=snipe.get("author", "Unknown"))
+            file = await self._sniped_image(ctx.guild.id, snipe.get("message_id"))
+            if file is not None:
+                embed.set_image(url=f"attachment://{file.filename}")
+                await ctx.send(embed=embed, file=file)
+                return
             await ctx.send(embed=embed)
         else:
             await ctx.send(embed=ModEmbed.error("No Snipe", "Nothing to snipe."))
 
+    async def _sniped_image(self, guild_id: int, message_id: Optional[int]) -> Optional[discord.File]:
+        """First image the delete log kept for a sniped message, streamed from the attachment store."""
+        db = getattr(self.bot, "db", None)
+        if not db or not message_id:
+            return None
+        try:
+            records = await db.get_deleted_message_attachments(int(guild_id), int(message_id))
+        except Exception:
+            logger.debug("Failed to load sniped message attachments", exc_info=True)
+            return None
+        for record in records:
+            if record.get("path"):
+                filename = re.sub(r"[^A-Za-z0-9._-]", "_", str(record.get("filename") or "image.png"))
+                try:
+                    return discord.File(str(record["path"]), filename=filename)
+                except OSError:
+                    # Collected since the lookup; try the next image.
+                    logger.debug("Sniped image %s is no longer readable", record["path"], exc_info=True)
+        return None
+
     @commands.command(name="editsnipe", aliases=["esnipe"])
     async def editsnipe_cmd(self, ctx):
         """Snipe an edited message"""
-        snipe = self.bot.edit_snipe_cache.get(ctx.channel.id) if hasattr(self.bot, "edit_snipe_cache") else None
+        snipe = await self.bot.edit_snipe_cache.get(ctx.channel.id) if hasattr(self.bot, "edit_snipe_cache") else None
         if snipe:
             embed = discord.Embed(description=snipe.get("before", ""), color=Colors.INFO)
             embed.set_author(name=snipe.get("author", "Unknown"))
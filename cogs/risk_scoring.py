@@ -176,6 +176,8 @@ class RiskEngine:
         if table not in ("automod_events", "cases"):
             return 0
         cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        if table == "automod_events":
+            await self.bot.db.flush_pending_writes()
         async with self.bot.db.get_connection() as db:
             cursor = await db.execute(
                 f"SELECT created_at FROM {table} WHERE guild_id = ? AND user_id = ? ORDER BY created_at DESC LIMIT 500",
@@ -14,14 +14,18 @@ from typing import Any, Dict, List, Optional
 
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 from config import Config
 from utils.checks import is_admin, is_bot_owner_id
 from utils.embeds import ModEmbed
+from utils.scheduler import get_scheduler
 
 logger = logging.getLogger("ModBot.StaffReports")
 
+# A slot is still delivered if the bot comes up this long after it.
+REPORT_GRACE = timedelta(minutes=5)
+
 
 class StaffReports(commands.Cog):
     """Periodic staff reporting and analytics."""
@@ -29,14 +33,13 @@ class StaffReports(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self._report_tasks: Dict[int, Dict[str, Any]] = {}
+        self._last_delivered: Dict[int, datetime] = {}
 
     async def cog_load(self):
-        if not self._check_scheduled.is_running():
-            self._check_scheduled.start()
+        get_scheduler(self.bot).register("staff_report", self._on_report_due, self._load_report_jobs)
 
     async def cog_unload(self):
-        if self._check_scheduled.is_running():
-            self._check_scheduled.cancel()
+        get_scheduler(self.bot).unregister("staff_report")
 
     report_group = app_commands.Group(
         name="staffreport",
@@ -117,6 +120,7 @@ class StaffReports(commands.Cog):
 
         current["staff_report"] = report_cfg
         await self.bot.db.update_settings(guild.id, current)
+        self._schedule_report(guild.id, report_cfg)
 
         parts = []
         if "day" in report_cfg:
@@ -134,35 +138,59 @@ class StaffReports(commands.Cog):
             ephemeral=True,
         )
 
-    @tasks.loop(minutes=5)
-    async def _check_scheduled(self):
-        await self.bot.wait_until_ready()
+    def _next_report_slot(self, guild_id: int, cfg: Dict[str, Any], now: datetime) -> Optional[datetime]:
+        day = cfg.get("day")
+        hour = cfg.get("hour")
+        if day is None or hour is None or cfg.get("channel_id") is None:
+            return None
+        slot = next_report_time(now, int(day), int(hour))
+        last = self._last_delivered.get(guild_id)
+        if last is not None and slot <= last:
+            slot += timedelta(days=7)
+        return slot
+
+    def _schedule_report(self, guild_id: int, cfg: Dict[str, Any]) -> None:
+        scheduler = get_scheduler(self.bot)
+        slot = self._next_report_slot(guild_id, cfg, datetime.now(timezone.utc))
+        if slot is None:
+            scheduler.cancel("staff_report", guild_id)
+        else:
+            scheduler.schedule("staff_report", guild_id, slot)
+
+    async def _load_report_jobs(self):
+        """Scheduler loader: the next weekly slot for every configured guild."""
         now = datetime.now(timezone.utc)
-
+        jobs = []
         for guild in self.bot.guilds:
             try:
                 settings = await self.bot.db.get_settings(guild.id)
-                cfg = settings.get("staff_report", {})
-                day = cfg.get("day")
-                hour = cfg.get("hour")
-                channel_id = cfg.get("channel_id")
-
-                if day is None or hour is None or channel_id is None:
-                    continue
-
-                if now.weekday() != day or now.hour != hour or now.minute > 5:
-                    continue
-
-                channel = guild.get_channel(int(channel_id))
-                if channel is None:
-                    continue
-
-                embed = await self._build_report_embed(guild, 7)
-                await channel.send(embed=embed)
-                logger.info("Weekly report delivered to guild %d", guild.id)
-
+                slot = self._next_report_slot(guild.id, settings.get("staff_report", {}), now)
             except Exception:
-                logger.error("Failed delivery for guild %d", guild.id, exc_info=True)
+                logger.error("Could not load the report schedule for guild %d", guild.id, exc_info=True)
+                continue
+            if slot is not None:
+                jobs.append((guild.id, slot, None))
+        return jobs
+
+    async def _on_report_due(self, guild_id: int, payload: Any) -> None:
+        """Deliver one weekly report and book the next.
+
+        A failed delivery raises, so the scheduler retries it shortly instead
+        of the week's report being skipped.
+        """
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        settings = await self.bot.db.get_settings(guild.id)
+        cfg: Dict[str, Any] = settings.get("staff_report", {})
+        channel_id = cfg.get("channel_id")
+        channel = guild.get_channel(int(channel_id)) if channel_id is not None else None
+        if channel is not None:
+            embed = await self._build_report_embed(guild, 7)
+            await channel.send(embed=embed)
+            logger.info("Weekly report delivered to guild %d", guild.id)
+        self._last_delivered[guild.id] = datetime.now(timezone.utc)
+        self._schedule_report(guild.id, cfg)
 
     async def _build_report_embed(self, guild: discord.Guild, days: int) -> discord.Embed:
         since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
@@ -229,6 +257,15 @@ class StaffReports(commands.Cog):
         return embed
 
 
+def next_report_time(now: datetime, day: int, hour: int) -> datetime:
+    """The weekly ``day``/``hour`` (UTC) slot at or after ``now``, within REPORT_GRACE."""
+    slot = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    slot += timedelta(days=(day - now.weekday()) % 7)
+    if now - slot > REPORT_GRACE:
+        slot += timedelta(days=7)
+    return slot
+
+
 def _day_name(d: int) -> str:
     return ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"][d]
 
@@ -180,6 +180,45 @@ class Utility(commands.Cog):
                 except Exception:
                     pass
 
+    # ==================== MAINTENANCE ====================
+
+    @commands.command(name="rebuildanalytics")
+    @commands.is_owner()
+    async def rebuild_analytics(self, ctx: commands.Context, scope: Optional[Literal["all"]] = None):
+        """
+        Recount the dashboard's analytics rollups from the raw event tables (Owner only).
+        Usage: ,rebuildanalytics [all]
+        """
+        guild_id = None if scope == "all" or ctx.guild is None else ctx.guild.id
+        async with ctx.typing():
+            try:
+                written = await self.bot.db.rebuild_analytics_rollups(guild_id)
+            except Exception as e:
+                await ctx.reply(f"❌ Rebuilding analytics failed: {e}")
+                return
+        target = "all servers" if guild_id is None else "this server"
+        summary = ", ".join(f"{metric}: {count}" for metric, count in written.items())
+        await ctx.reply(f"✅ Rebuilt analytics rollups for {target}. Rows written: {summary}")
+
+    @commands.command(name="compactdb")
+    @commands.is_owner()
+    async def compact_database(self, ctx: commands.Context):
+        """
+        Switch an older SQLite file to incremental vacuum so retention can shrink it (Owner only).
+        Rewrites the whole file once; other commands wait until it finishes.
+        Usage: ,compactdb
+        """
+        async with ctx.typing():
+            try:
+                result = await self.bot.db.convert_to_incremental_vacuum()
+            except Exception as e:
+                await ctx.reply(f"❌ Compacting the database failed: {e}")
+                return
+        await ctx.reply(
+            f"✅ Database compacted: {result['pages_before']} → {result['pages_after']} pages. "
+            "Retention now reclaims free pages after each prune."
+        )
+
     # ==================== AFK SYSTEM ====================
     
     @utility_group.command(name="afk", description="⏸️ Set your AFK status")
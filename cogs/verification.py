@@ -18,7 +18,6 @@ import io
 import json
 import logging
 import os
-import random
 import secrets
 import time
 from dataclasses import dataclass
@@ -30,6 +29,7 @@ from discord import app_commands
 from discord.ext import commands
 
 from config import Config
+from utils.captcha import CAPTCHA_LENGTH, PILLOW_AVAILABLE, CaptchaFactory
 from utils.checks import is_admin
 from utils.embeds import Colors, ModEmbed, sapphire_log_embed
 from utils.components_v2 import branded_panel_container
@@ -38,16 +38,6 @@ from utils.logging import prepare_log_embed
 from utils.status_emojis import get_app_emoji, sync_status_emojis_to_application
 from utils.server_setup import apply_verification_gate, module_enabled, sync_setup_aliases
 
-# Try to import Pillow for image captchas
-try:
-    from PIL import Image, ImageDraw, ImageFont, ImageFilter
-    PILLOW_AVAILABLE = True
-except ImportError:
-    PILLOW_AVAILABLE = False
-
-
-CAPTCHA_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
-CAPTCHA_LENGTH = 5
 CAPTCHA_TTL_SECONDS = 5 * 60
 CAPTCHA_COOLDOWN_SECONDS = 15
 DEFAULT_SESSION_TTL_SECONDS = 30 * 60  # 30 minutes
@@ -74,77 +64,6 @@ class SessionEntry:
         return datetime.now(timezone.utc) >= self.expires_at
 
 
-def _generate_captcha_code() -> str:
-    return "".join(secrets.choice(CAPTCHA_ALPHABET) for _ in range(CAPTCHA_LENGTH))
-
-
-def _generate_captcha_image(code: str) -> Optional[bytes]:
-    """Generate a distorted captcha image using Pillow."""
-    if not PILLOW_AVAILABLE:
-        return None
-
-    try:
-        # Image dimensions
-        width, height = 200, 80
-        
-        # Create image with gradient background
-        img = Image.new("RGB", (width, height), (45, 45, 55))
-        draw = ImageDraw.Draw(img)
-        
-        # Add noise dots
-        for _ in range(150):
-            x = random.randint(0, width)
-            y = random.randint(0, height)
-            r = random.randint(60, 120)
-            g = random.randint(60, 120)
-            b = random.randint(80, 140)
-            draw.ellipse([x, y, x + 2, y + 2], fill=(r, g, b))
-        
-        # Add noise lines
-        for _ in range(5):
-            x1 = random.randint(0, width)
-            y1 = random.randint(0, height)
-            x2 = random.randint(0, width)
-            y2 = random.randint(0, height)
-            draw.line([(x1, y1), (x2, y2)], fill=(80, 80, 100), width=1)
-        
-        # Try to use a font, fallback to default
-        try:
-            font = ImageFont.truetype("arial.ttf", 40)
-        except Exception:
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 40)
-            except Exception:
-                font = ImageFont.load_default()
-        
-        # Draw each character with slight rotation/offset
-        x_offset = 15
-        colors = [
-            (88, 101, 242),   # Blurple
-            (87, 242, 135),   # Green
-            (254, 231, 92),   # Yellow
-            (235, 69, 158),   # Pink
-            (237, 66, 69),    # Red
-        ]
-        
-        for i, char in enumerate(code):
-            color = colors[i % len(colors)]
-            y_offset = random.randint(-5, 5)
-            draw.text((x_offset, 15 + y_offset), char, font=font, fill=color)
-            x_offset += 35
-        
-        # Apply slight blur for anti-OCR
-        img = img.filter(ImageFilter.GaussianBlur(radius=0.8))
-        
-        # Save to bytes
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        buffer.seek(0)
-        return buffer.getvalue()
-    except Exception:
-        return None
-
-
 class CaptchaModal(discord.ui.Modal, title="Verification Captcha"):
     captcha = discord.ui.TextInput(
         label="Enter the captcha code",
@@ -424,6 +343,15 @@ class Verification(commands.Cog):
         # Persistent components (so old panels keep working after restarts)
         self.bot.add_view(VerificationPanelLayout(self))
         self._panels_refreshed = False
+        # Pre-rendered captcha images, so a raid of Verify clicks never
+        # renders on the event loop.
+        self._captchas = CaptchaFactory(pool_size=32)
+
+    async def cog_load(self) -> None:
+        self._captchas.warm()
+
+    async def cog_unload(self) -> None:
+        await self._captchas.close()
 
     async def _refresh_configured_panels(self) -> None:
         if self._panels_refreshed:
@@ -1217,8 +1145,7 @@ class Verification(commands.Cog):
         key = (guild.id, member.id, purpose)
         existing = self._pending.get(key)
         if regenerate or not existing or existing.expired():
-            code = _generate_captcha_code()
-            image_bytes = _generate_captcha_image(code)
+            code, image_bytes = await self._captchas.take()
             self._pending[key] = CaptchaEntry(
                 code=code,
                 expires_at=datetime.now(timezone.utc) + timedelta(seconds=CAPTCHA_TTL_SECONDS),
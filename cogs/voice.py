@@ -10,6 +10,7 @@ from datetime import datetime
 from typing import Optional, Literal, Union
 from utils.embeds import ModEmbed
 from utils.checks import is_mod, is_admin, is_bot_owner_id, can_moderate
+from utils.mass_actions import MassActionExecutor
 from config import Config
 
 # TTS for voice announcements
@@ -816,17 +817,18 @@ class Voice(commands.Cog):
         
         author = source.user if isinstance(source, discord.Interaction) else source.author
 
-        count = 0
-        for member in from_channel.members:
-            # Skip members the actor can't moderate (role hierarchy / owners).
-            if isinstance(author, discord.Member) and not can_moderate(member, author):
-                continue
-            try:
-                await member.move_to(to_channel, reason=f"Mass move by {author}")
-                count += 1
-            except Exception:
-                pass
-        
+        # Skip members the actor can't moderate (role hierarchy / owners).
+        targets = [
+            member for member in from_channel.members
+            if not isinstance(author, discord.Member) or can_moderate(member, author)
+        ]
+        result = await MassActionExecutor().run(
+            targets,
+            lambda member: member.move_to(to_channel, reason=f"Mass move by {author}"),
+            route="member_edit",
+        )
+        count = len(result.succeeded)
+
         embed = ModEmbed.success("Users Moved", 
                                  f"Moved **{count}** users from {from_channel.mention} to {to_channel.mention}")
         await self._respond(source, embed=embed)
@@ -858,10 +860,9 @@ class Voice(commands.Cog):
         action_label = "muted" if mute_state else "unmuted"
         action_title = "Voice Muted" if mute_state else "Voice Unmuted"
 
-        changed = 0
         already = 0
         skipped_owner = 0
-        failed = 0
+        targets: list[discord.Member] = []
 
         for member in list(channel.members):
             # Skip members the actor can't moderate (role hierarchy / owners).
@@ -876,14 +877,18 @@ class Voice(commands.Cog):
                 already += 1
                 continue
 
-            try:
-                await member.edit(
-                    mute=mute_state,
-                    reason=f"Mass VC {action_label} by {author}: {reason}",
-                )
-                changed += 1
-            except (discord.Forbidden, discord.HTTPException):
-                failed += 1
+            targets.append(member)
+
+        result = await MassActionExecutor().run(
+            targets,
+            lambda member: member.edit(
+                mute=mute_state,
+                reason=f"Mass VC {action_label} by {author}: {reason}",
+            ),
+            route="member_edit",
+        )
+        changed = len(result.succeeded)
+        failed = len(result.failed)
 
         summary_lines = [
             f"{channel.mention}: **{changed}** member(s) {action_label}.",
@@ -1,5 +1,6 @@
 import 'server-only'
 
+import { bumpRollup } from '@/lib/analytics-rollups'
 import { botQuery, withBotTransaction } from '@/lib/bot-db'
 import { ensureDashboardBackendSchema } from '@/lib/bot-schema'
 import { recordGuildAudit } from '@/lib/bot-audit'
@@ -233,6 +234,7 @@ async function createPendingCase(input: CreateModerationInput): Promise<{ row: M
       ],
     )
     const caseId = inserted.rows[0].id
+    await bumpRollup(client, input.guildId, 'case', input.action.toLowerCase())
     await client.query(
       'UPDATE dashboard_moderation_commands SET case_id = $2::bigint, updated_at = CURRENT_TIMESTAMP WHERE id = $1::bigint',
       [commandId, caseId],
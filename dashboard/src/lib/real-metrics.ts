@@ -4,8 +4,8 @@ import { botDatabaseHealthy, botQuery } from '@/lib/bot-db'
 import { resolveDiscordProfiles, type ManagedGuild } from '@/lib/discord'
 import { ensureDashboardBackendSchema } from '@/lib/bot-schema'
 import { listAutomodRules } from '@/lib/automod-service'
+import { clampDays, rollupDailySeries, rollupPeriodCount } from '@/lib/analytics-rollups'
 
-type Kpi = { value: number; delta: number }
 type Point = { label: string; value: number }
 
 function number(value: unknown): number {
@@ -13,63 +13,6 @@ function number(value: unknown): number {
   return Number.isFinite(parsed) ? parsed : 0
 }
 
-function trend(current: number, previous: number): number {
-  if (previous === 0) return current === 0 ? 0 : 100
-  return Math.round(((current - previous) / previous) * 1000) / 10
-}
-
-function clampDays(days: number): number {
-  return Math.max(1, Math.min(365, Math.trunc(days) || 30))
-}
-
-async function periodCount(
-  guildId: string,
-  days: number,
-  table: 'cases' | 'automod_events' | 'guild_member_events',
-  extra = '',
-): Promise<Kpi> {
-  const safeDays = clampDays(days)
-  const rows = await botQuery<{ current: string; previous: string }>(
-    `SELECT
-       COUNT(*) FILTER (WHERE created_at >= NOW() - ($2::int * INTERVAL '1 day')) AS current,
-       COUNT(*) FILTER (
-         WHERE created_at >= NOW() - ($2::int * 2 * INTERVAL '1 day')
-           AND created_at < NOW() - ($2::int * INTERVAL '1 day')
-       ) AS previous
-     FROM ${table}
-     WHERE guild_id = $1::bigint ${extra}`,
-    [guildId, safeDays],
-  )
-  const current = number(rows[0]?.current)
-  const previous = number(rows[0]?.previous)
-  return { value: current, delta: trend(current, previous) }
-}
-
-async function dailySeries(
-  guildId: string,
-  days: number,
-  table: 'cases' | 'automod_events' | 'guild_member_events',
-  extra = '',
-): Promise<Point[]> {
-  const safeDays = clampDays(days)
-  const rows = await botQuery<{ label: string; value: string }>(
-    `WITH dates AS (
-       SELECT generate_series(CURRENT_DATE - ($2::int - 1), CURRENT_DATE, INTERVAL '1 day')::date AS day
-     )
-     SELECT TO_CHAR(dates.day, 'Mon DD') AS label, COUNT(events.id)::int AS value
-     FROM dates
-     LEFT JOIN ${table} events
-       ON events.guild_id = $1::bigint
-      AND events.created_at >= dates.day
-      AND events.created_at < dates.day + INTERVAL '1 day'
-      ${extra}
-     GROUP BY dates.day
-     ORDER BY dates.day`,
-    [guildId, safeDays],
-  )
-  return rows.map((row) => ({ label: row.label, value: number(row.value) }))
-}
-
 function snapshotSeries(days: number, value: number): Point[] {
   const safeDays = clampDays(days)
   const formatter = new Intl.DateTimeFormat('en-US', { month: 'short', day: '2-digit', timeZone: 'UTC' })
@@ -98,20 +41,20 @@ export async function getRealAnalytics(guild: ManagedGuild, days: number) {
     kicksSeries,
     warnsSeries,
   ] = await Promise.all([
-    periodCount(guild.id, days, 'cases'),
-    periodCount(guild.id, days, 'automod_events'),
-    periodCount(guild.id, days, 'guild_member_events', "AND event_type = 'join'"),
-    periodCount(guild.id, days, 'guild_member_events', "AND event_type = 'leave'"),
-    periodCount(guild.id, days, 'cases', "AND LOWER(action) = 'ban'"),
-    periodCount(guild.id, days, 'cases', "AND LOWER(action) = 'kick'"),
-    periodCount(guild.id, days, 'cases', "AND LOWER(action) = 'warn'"),
-    dailySeries(guild.id, days, 'cases'),
-    dailySeries(guild.id, days, 'automod_events'),
-    dailySeries(guild.id, days, 'guild_member_events', "AND events.event_type = 'join'"),
-    dailySeries(guild.id, days, 'guild_member_events', "AND events.event_type = 'leave'"),
-    dailySeries(guild.id, days, 'cases', "AND LOWER(events.action) = 'ban'"),
-    dailySeries(guild.id, days, 'cases', "AND LOWER(events.action) = 'kick'"),
-    dailySeries(guild.id, days, 'cases', "AND LOWER(events.action) = 'warn'"),
+    rollupPeriodCount(guild.id, days, 'case'),
+    rollupPeriodCount(guild.id, days, 'automod'),
+    rollupPeriodCount(guild.id, days, 'member_join'),
+    rollupPeriodCount(guild.id, days, 'member_leave'),
+    rollupPeriodCount(guild.id, days, 'case', 'ban'),
+    rollupPeriodCount(guild.id, days, 'case', 'kick'),
+    rollupPeriodCount(guild.id, days, 'case', 'warn'),
+    rollupDailySeries(guild.id, days, 'case'),
+    rollupDailySeries(guild.id, days, 'automod'),
+    rollupDailySeries(guild.id, days, 'member_join'),
+    rollupDailySeries(guild.id, days, 'member_leave'),
+    rollupDailySeries(guild.id, days, 'case', 'ban'),
+    rollupDailySeries(guild.id, days, 'case', 'kick'),
+    rollupDailySeries(guild.id, days, 'case', 'warn'),
   ])
   const memberCount = guild.memberCount ?? 0
   const onlineCount = guild.onlineCount ?? 0
@@ -187,36 +130,39 @@ export async function getRealOverview(guild: ManagedGuild, days: number) {
          ) AS month
        )
        SELECT TO_CHAR(months.month, 'Mon') AS label,
-         COUNT(events.id) FILTER (WHERE events.event_type = 'join')::int AS joined,
-         COUNT(events.id) FILTER (WHERE events.event_type = 'leave')::int AS left
+         COALESCE(SUM(rollup.count) FILTER (WHERE rollup.metric = 'member_join'), 0)::int AS joined,
+         COALESCE(SUM(rollup.count) FILTER (WHERE rollup.metric = 'member_leave'), 0)::int AS left
        FROM months
-       LEFT JOIN guild_member_events events
-         ON events.guild_id = $1::bigint
-        AND events.created_at >= months.month
-        AND events.created_at < months.month + INTERVAL '1 month'
+       LEFT JOIN analytics_daily rollup
+         ON rollup.guild_id = $1::bigint
+        AND rollup.metric IN ('member_join', 'member_leave')
+        AND rollup.bucket_start >= months.month
+        AND rollup.bucket_start < months.month + INTERVAL '1 month'
         GROUP BY months.month ORDER BY months.month`,
       [guild.id],
     ),
     botQuery<{ name: string; value: string }>(
-      `SELECT COALESCE(NULLIF(LOWER(action), ''), 'other') AS name, COUNT(*)::int AS value
-       FROM cases WHERE guild_id = $1::bigint GROUP BY 1 ORDER BY value DESC`,
+      `SELECT COALESCE(NULLIF(dimension, ''), 'other') AS name, SUM(count)::int AS value
+       FROM analytics_daily WHERE guild_id = $1::bigint AND metric = 'case'
+       GROUP BY 1 ORDER BY value DESC`,
       [guild.id],
     ),
     botQuery<{ id: string; score: number; warnings: string; messages: string; username: string }>(
-      `SELECT risk.user_id::text AS id, risk.score,
-         COALESCE(warnings.count, 0)::int AS warnings,
-         COALESCE(messages.count, 0)::int AS messages,
+      `WITH risk AS (
+         SELECT user_id, score FROM user_risk_scores
+         WHERE guild_id = $1::bigint AND score > 0
+         ORDER BY score DESC LIMIT 5
+       )
+       SELECT risk.user_id::text AS id, risk.score,
+         (SELECT COUNT(*) FROM warnings WHERE guild_id = $1::bigint AND user_id = risk.user_id)::int AS warnings,
+         COALESCE((
+           SELECT SUM(count) FROM analytics_daily
+           WHERE guild_id = $1::bigint AND metric = 'message_user' AND dimension = risk.user_id::text
+         ), 0)::int AS messages,
          COALESCE(NULLIF(profiles.username, ''), 'Discord user ' || risk.user_id::text) AS username
-       FROM user_risk_scores risk
-       LEFT JOIN (
-         SELECT user_id, COUNT(*) AS count FROM warnings WHERE guild_id = $1::bigint GROUP BY user_id
-       ) warnings ON warnings.user_id = risk.user_id
-       LEFT JOIN (
-         SELECT user_id, COUNT(*) AS count FROM user_messages WHERE guild_id = $1::bigint GROUP BY user_id
-       ) messages ON messages.user_id = risk.user_id
+       FROM risk
        LEFT JOIN banned_user_profiles profiles ON profiles.user_id = risk.user_id
-       WHERE risk.guild_id = $1::bigint AND risk.score > 0
-       ORDER BY risk.score DESC LIMIT 5`,
+       ORDER BY risk.score DESC`,
       [guild.id],
     ),
     listAutomodRules(guild.id),
@@ -228,9 +174,10 @@ export async function getRealOverview(guild: ManagedGuild, days: number) {
       [guild.id],
     ),
     botQuery<{ channel_id: string; value: string }>(
-      `SELECT channel_id::text, COUNT(*)::int AS value FROM user_messages
-       WHERE guild_id = $1::bigint AND timestamp >= NOW() - INTERVAL '30 days'
-       GROUP BY channel_id ORDER BY value DESC LIMIT 6`,
+      `SELECT dimension AS channel_id, SUM(count)::int AS value FROM analytics_daily
+       WHERE guild_id = $1::bigint AND metric = 'message_channel'
+         AND bucket_start >= CURRENT_DATE - 29
+       GROUP BY dimension ORDER BY value DESC LIMIT 6`,
       [guild.id],
     ),
     botQuery<{ value: string }>(
@@ -12,9 +12,11 @@ import os
 import re
 import shutil
 import tempfile
-from contextlib import asynccontextmanager
+import time
+from contextlib import asynccontextmanager, nullcontext
 from datetime import date, datetime, timezone
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, NamedTuple
 
 import aiosqlite
 import aiohttp
@@ -52,6 +54,14 @@ _FEATURE_MODULE_KEYS = {
     "autoroles": ("autoroles_enabled", False),
 }
 
+# Keys whose normalisation depends on the rest of the stored row: the feature
+# toggles (verification/autoroles exclusion, flat keys beating stale module
+# blobs) and the modules blob itself. Patches touching them take the full
+# read/merge/normalise path.
+_ROW_NORMALIZED_SETTINGS = frozenset(
+    ["modules", *(flat_key for flat_key, _ in _FEATURE_MODULE_KEYS.values())]
+)
+
 _LOG_CHANNEL_MODULE_FIELDS = {
     "modChannel": ("mod_log_channel", "log_channel_mod"),
     "auditChannel": ("audit_log_channel", "log_channel_audit"),
@@ -208,6 +218,166 @@ def normalize_runtime_settings(settings: Dict[str, Any]) -> Dict[str, Any]:
     return normalized
 
 
+def _settings_patch_plan(
+    changes: Dict[str, Any],
+) -> tuple[list[tuple[str, ...]], list[tuple[tuple[str, ...], Any]]]:
+    """Split a settings patch into object paths and leaf assignments.
+
+    Applying the plan reproduces ``_deep_merge_settings``: every object path is
+    made an object first (kept if it already is one, replaced with ``{}`` if
+    not), then each leaf is written at its full path. Object paths are listed
+    parents-first so the SQL can create them in order.
+    """
+    object_paths: list[tuple[str, ...]] = []
+    leaves: list[tuple[tuple[str, ...], Any]] = []
+
+    def walk(prefix: tuple[str, ...], node: Dict[str, Any]) -> None:
+        for key, value in node.items():
+            path = prefix + (str(key),)
+            if isinstance(value, dict):
+                object_paths.append(path)
+                walk(path, value)
+            else:
+                leaves.append((path, value))
+
+    walk((), changes)
+    return object_paths, leaves
+
+
+def _sqlite_json_path(path: tuple[str, ...]) -> str:
+    return "$" + "".join(f'."{key}"' for key in path)
+
+
+def _sqlite_settings_patch_sql(
+    object_paths: list[tuple[str, ...]],
+    leaves: list[tuple[tuple[str, ...], Any]],
+) -> tuple[str, list[Any]]:
+    # json_patch() with an all-objects skeleton deep-merges objects without
+    # touching anything else (the skeleton has no nulls, so nothing is deleted).
+    skeleton: Dict[str, Any] = {}
+    for path in object_paths:
+        node = skeleton
+        for key in path:
+            node = node.setdefault(key, {})
+
+    expr = "json_patch(COALESCE(NULLIF(settings, ''), '{}'), ?)"
+    params: list[Any] = [json.dumps(skeleton)]
+    if leaves:
+        assignments = ", ".join("?, json(?)" for _ in leaves)
+        expr = f"json_set({expr}, {assignments})"
+        for path, value in leaves:
+            params.extend((_sqlite_json_path(path), json.dumps(value)))
+    return f"UPDATE guild_settings SET settings = {expr} WHERE guild_id = ?", params
+
+
+def _postgres_settings_patch_sql(
+    object_paths: list[tuple[str, ...]],
+    leaves: list[tuple[tuple[str, ...], Any]],
+) -> tuple[str, list[Any]]:
+    # Postgres has no deep-merge operator and jsonb_set() only creates the last
+    # path element, so each object path gets its own derived-table step. That
+    # lets a step read the previous document twice without re-evaluating it.
+    source = "(SELECT COALESCE(NULLIF(guild_settings.settings, ''), '{}')::jsonb AS s) AS step0"
+    params: list[Any] = []
+    for index, path in enumerate(object_paths, start=1):
+        source = (
+            "(SELECT jsonb_set(s, ?::text[], CASE WHEN jsonb_typeof(s #> ?::text[]) = 'object' "
+            f"THEN s #> ?::text[] ELSE '{{}}'::jsonb END) AS s FROM {source}) AS step{index}"
+        )
+        params = [list(path), list(path), list(path)] + params
+
+    expr = "s"
+    leaf_params: list[Any] = []
+    for path, value in leaves:
+        expr = f"jsonb_set({expr}, ?::text[], ?::jsonb)"
+        leaf_params.extend((list(path), json.dumps(value)))
+
+    sql = (
+        f"UPDATE guild_settings SET settings = (SELECT ({expr})::text FROM {source}) "
+        "WHERE guild_id = ?"
+    )
+    return sql, leaf_params + params
+
+
+class FrozenSettings(dict):
+    """Read-only settings mapping handed out by ``Database.get_settings_view``.
+
+    It is still a ``dict`` so the ``isinstance(..., dict)`` checks scattered
+    through the settings helpers keep working, but every mutator raises. The
+    cached copy is shared by every caller in the process; a cog that edited it
+    in place would silently change settings for everyone until the next reload.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args: Any, **kwargs: Any) -> Any:
+        raise TypeError("cached guild settings are read-only; use get_settings() for a mutable copy")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def __copy__(self) -> Dict[str, Any]:
+        return _thaw_settings(self)
+
+    def __deepcopy__(self, memo: Any) -> Dict[str, Any]:
+        return _thaw_settings(self)
+
+    def __reduce__(self) -> Any:
+        return (dict, (_thaw_settings(self),))
+
+
+class _FrozenList(list):
+    """Read-only list used for list values inside ``FrozenSettings``."""
+
+    __slots__ = ()
+
+    def _readonly(self, *args: Any, **kwargs: Any) -> Any:
+        raise TypeError("cached guild settings are read-only; use get_settings() for a mutable copy")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __iadd__ = _readonly
+    __imul__ = _readonly
+    append = _readonly
+    extend = _readonly
+    insert = _readonly
+    pop = _readonly
+    remove = _readonly
+    clear = _readonly
+    sort = _readonly
+    reverse = _readonly
+
+    def __copy__(self) -> List[Any]:
+        return _thaw_settings(self)
+
+    def __deepcopy__(self, memo: Any) -> List[Any]:
+        return _thaw_settings(self)
+
+    def __reduce__(self) -> Any:
+        return (list, (_thaw_settings(self),))
+
+
+def _freeze_settings(value: Any) -> Any:
+    if isinstance(value, dict):
+        return FrozenSettings((key, _freeze_settings(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return _FrozenList(_freeze_settings(item) for item in value)
+    return value
+
+
+def _thaw_settings(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _thaw_settings(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_thaw_settings(item) for item in value]
+    return value
+
 
 def _explicit_database_mode() -> Optional[str]:
     for env_key in ("DB_MODE", "DATABASE_MODE"):
@@ -408,6 +578,84 @@ def _convert_sqlite_insert_sql(query: str) -> tuple[str, bool]:
     return converted, False
 
 
+# Translated statements, keyed by the original SQLite text. The bot issues a
+# few hundred distinct statements, so this holds all of them; f-string SQL
+# with inlined values just churns the least recently used entries.
+_POSTGRES_STATEMENT_CACHE_SIZE = 1024
+
+
+class _PostgresStatement(NamedTuple):
+    """A SQLite statement translated for asyncpg.
+
+    ``kind`` is ``"fetch"`` or ``"execute"`` for statements sent to the
+    server, ``"begin"`` for a transaction start, and ``"page_count"``,
+    ``"page_size"`` or ``"noop"`` for SQLite-only statements answered locally.
+    """
+
+    sql: str
+    kind: str
+    returning_id: bool
+    is_write: bool
+
+
+@lru_cache(maxsize=_POSTGRES_STATEMENT_CACHE_SIZE)
+def _translate_postgres_statement(query: str) -> _PostgresStatement:
+    """Translate one SQLite statement, once per distinct text.
+
+    This only saves the regex passes. The translation was already
+    deterministic, so asyncpg's prepared statement cache, which is keyed by
+    query text, hit for repeated statements before this cache existed.
+    """
+    stripped = (query or "").strip()
+    upper = stripped.upper()
+
+    if upper == "BEGIN":
+        return _PostgresStatement("", "begin", False, False)
+
+    if upper.startswith("PRAGMA "):
+        pragma = upper[7:].strip()
+        if pragma.startswith("PAGE_COUNT"):
+            return _PostgresStatement("", "page_count", False, False)
+        if pragma.startswith("PAGE_SIZE"):
+            return _PostgresStatement("", "page_size", False, False)
+        return _PostgresStatement("", "noop", False, False)
+
+    if upper.startswith("VACUUM INTO"):
+        return _PostgresStatement("", "noop", False, False)
+
+    if upper.startswith("CREATE TABLE") or upper.startswith("ALTER TABLE") or upper.startswith("CREATE INDEX"):
+        stripped = _convert_sqlite_schema_sql(stripped)
+
+    stripped, has_returning_id = _convert_sqlite_insert_sql(stripped)
+    stripped = _convert_sqlite_placeholders(stripped)
+    upper = stripped.upper()
+
+    is_write = upper.startswith(("INSERT", "UPDATE", "DELETE", "CREATE", "ALTER", "DROP", "TRUNCATE"))
+    kind = "fetch" if upper.startswith("SELECT") or " RETURNING " in upper else "execute"
+    return _PostgresStatement(stripped, kind, has_returning_id, is_write)
+
+
+@lru_cache(maxsize=_POSTGRES_STATEMENT_CACHE_SIZE)
+def _translate_postgres_executemany(query: str) -> str:
+    """Translate a statement for ``executemany``, which discards results."""
+    stripped, has_returning_id = _convert_sqlite_insert_sql((query or "").strip())
+    if has_returning_id:
+        # Drop the RETURNING added for lastrowid.
+        stripped = re.sub(r"(?is)\s+RETURNING\s+id\s*$", "", stripped)
+    return _convert_sqlite_placeholders(stripped)
+
+
+def postgres_statement_cache_info() -> Dict[str, Any]:
+    """Hit and size counters of the SQLite-to-PostgreSQL translation caches."""
+    stats = {}
+    for name, cached in (
+        ("execute", _translate_postgres_statement),
+        ("executemany", _translate_postgres_executemany),
+    ):
+        info = cached.cache_info()
+        stats[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+    return stats
+
 
 
 def _row_get(row: Any, column: str) -> Any:
@@ -444,13 +692,26 @@ def _parse_status_rowcount(status: str) -> int:
 
 
 class PostgresCompatRow(dict):
-    """Mapping row that also preserves SQLite-style positional indexing."""
+    """Mapping row that also preserves SQLite-style positional indexing.
+
+    The column values are captured once, in column order, when the row is
+    built, so ``row[0]`` is a tuple lookup rather than a copy of every value.
+    Positional access reads the row as fetched; rows are never modified.
+    """
+
+    __slots__ = ("_values",)
+
+    def __init__(self, row: Any = ()) -> None:
+        super().__init__(row)
+        values = getattr(row, "values", None)
+        # asyncpg Records keep every column, even repeated names that the
+        # mapping collapses, so positions come from the record itself.
+        self._values = tuple(values()) if callable(values) else tuple(dict.values(self))
 
     def __getitem__(self, key: Any) -> Any:
         if isinstance(key, int):
-            values = tuple(self.values())
             try:
-                return values[key]
+                return self._values[key]
             except IndexError as exc:
                 raise IndexError(key) from exc
         return super().__getitem__(key)
@@ -531,53 +792,52 @@ class PostgresCompatConnection:
             raise RuntimeError("asyncpg is required for PostgreSQL mode")
 
         normalized_params = _normalize_query_params(params)
-        stripped = (query or "").strip()
-        upper = stripped.upper()
+        statement = _translate_postgres_statement(query)
+        kind = statement.kind
 
-        if upper == "BEGIN":
+        if kind == "begin":
             await self._start_transaction()
             return PostgresCompatCursor()
-
-        if upper.startswith("PRAGMA "):
-            pragma = upper[7:].strip()
-            if pragma.startswith("PAGE_COUNT"):
-                return PostgresCompatCursor([(0,)], rowcount=1)
-            if pragma.startswith("PAGE_SIZE"):
-                return PostgresCompatCursor([(8192,)], rowcount=1)
-            return PostgresCompatCursor()
-
-        if upper.startswith("VACUUM INTO"):
+        if kind == "page_count":
+            return PostgresCompatCursor([(0,)], rowcount=1)
+        if kind == "page_size":
+            return PostgresCompatCursor([(8192,)], rowcount=1)
+        if kind == "noop":
             return PostgresCompatCursor()
 
-        if upper.startswith("CREATE TABLE") or upper.startswith("ALTER TABLE") or upper.startswith("CREATE INDEX"):
-            stripped = _convert_sqlite_schema_sql(stripped)
-
-        stripped, has_returning_id = _convert_sqlite_insert_sql(stripped)
-        stripped = _convert_sqlite_placeholders(stripped)
-        upper = stripped.upper()
-
-        is_write = upper.startswith(("INSERT", "UPDATE", "DELETE", "CREATE", "ALTER", "DROP", "TRUNCATE"))
-        if is_write and self._transaction is None:
+        if statement.is_write and self._transaction is None:
             await self._start_transaction()
 
         try:
-            if upper.startswith("SELECT") or " RETURNING " in upper:
-                rows = await self._conn.fetch(stripped, *normalized_params)
+            if kind == "fetch":
+                rows = await self._conn.fetch(statement.sql, *normalized_params)
                 lastrowid = None
-                if has_returning_id and rows:
+                if statement.returning_id and rows:
                     lastrowid = rows[0][0]
-                rowcount = len(rows)
-                if has_returning_id and not rowcount:
-                    rowcount = 0
-                return PostgresCompatCursor(rows, rowcount=rowcount, lastrowid=lastrowid)
+                return PostgresCompatCursor(rows, rowcount=len(rows), lastrowid=lastrowid)
 
-            status = await self._conn.execute(stripped, *normalized_params)
+            status = await self._conn.execute(statement.sql, *normalized_params)
             return PostgresCompatCursor(rowcount=_parse_status_rowcount(status))
         except asyncpg.UniqueViolationError as exc:
             raise aiosqlite.IntegrityError(str(exc)) from exc
         except asyncpg.PostgresError as exc:
             raise aiosqlite.OperationalError(str(exc)) from exc
 
+    async def executemany(self, query: str, params_seq: Any) -> PostgresCompatCursor:
+        if asyncpg is None:
+            raise RuntimeError("asyncpg is required for PostgreSQL mode")
+
+        stripped = _translate_postgres_executemany(query)
+        if self._transaction is None:
+            await self._start_transaction()
+        try:
+            await self._conn.executemany(stripped, [_normalize_query_params(params) for params in params_seq])
+        except asyncpg.UniqueViolationError as exc:
+            raise aiosqlite.IntegrityError(str(exc)) from exc
+        except asyncpg.PostgresError as exc:
+            raise aiosqlite.OperationalError(str(exc)) from exc
+        return PostgresCompatCursor()
+
     async def close_pending_transaction(self) -> None:
         await self.rollback()
 
@@ -713,10 +973,15 @@ from db import (
     EnforcementMixin,
     BackupsMixin,
     AccessMixin,
+    RetentionMixin,
+    AnalyticsMixin,
+    PinsMixin,
 )
+from db.attachment_store import AttachmentBlobStore
+from db.write_behind import WriteBehindBuffer
 
 
-class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin, CourtMixin, GiveawaysMixin, RolesMixin, EnforcementMixin, BackupsMixin, AccessMixin):
+class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin, CourtMixin, GiveawaysMixin, RolesMixin, EnforcementMixin, BackupsMixin, AccessMixin, RetentionMixin, AnalyticsMixin, PinsMixin):
     """
     Main database handler with:
     - Async context manager support
@@ -769,6 +1034,34 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
         self._supabase_sync_interval_seconds = max(5, int(os.getenv("SUPABASE_SYNC_INTERVAL_SECONDS", "15")))
         self._supabase_last_token: Optional[tuple[tuple[str, int, int], ...]] = None
         self._supabase_sync_task: Optional[asyncio.Task] = None
+        # Per-guild settings cache. Writes through this class invalidate it
+        # synchronously; the TTL only bounds how long an edit made outside the
+        # process (the dashboard writes guild_settings directly) stays unseen.
+        self._settings_cache_ttl_seconds = max(0.0, float(os.getenv("SETTINGS_CACHE_TTL_SECONDS", "30")))
+        self._settings_cache: dict[int, tuple[float, FrozenSettings]] = {}
+        self._settings_generation: dict[int, int] = {}
+        # Moved on by a cache-wide invalidation, which also covers guilds that
+        # were not cached when it ran but had a read in flight.
+        self._settings_epoch = 0
+        # Per-message telemetry inserts are batched; see db/write_behind.py.
+        self._write_behind = WriteBehindBuffer(
+            self._write_rows,
+            flush_rows=int(os.getenv("WRITE_BEHIND_FLUSH_ROWS", "200")),
+            flush_interval=int(os.getenv("WRITE_BEHIND_FLUSH_MS", "250")) / 1000,
+            max_rows=int(os.getenv("WRITE_BEHIND_MAX_ROWS", "5000")),
+        )
+        # Telemetry retention pass; see db/retention_mixin.py. 0 disables the loop.
+        self._retention_interval_seconds = max(0, int(os.getenv("RETENTION_INTERVAL_SECONDS", "3600")))
+        self._retention_vacuum_pages = max(1, int(os.getenv("RETENTION_VACUUM_PAGES", "2000")))
+        self._retention_vacuum_skip_logged = False
+        self._retention_task: Optional[asyncio.Task] = None
+        self._retention_stats: Dict[str, Any] = {}
+        # Deleted-message attachment bytes; see db/attachment_store.py. The
+        # directory defaults to "attachments" next to the SQLite file.
+        self._attachment_store_dir = (os.getenv("ATTACHMENT_STORE_DIR") or "").strip()
+        self._attachment_store_max_bytes = max(0, int(os.getenv("ATTACHMENT_STORE_MAX_MB", "1024"))) * 1024 * 1024
+        self._attachment_blob_store: Optional[AttachmentBlobStore] = None
+        self._attachment_store_lock = asyncio.Lock()
 
         if self._is_postgres:
             logger.info("Supabase storage mirror disabled while PostgreSQL is the live database.")
@@ -812,13 +1105,23 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
                     min_size=1,
                     max_size=max(2, int(os.getenv("DATABASE_POOL_MAX_SIZE", "10"))),
                     command_timeout=60,
+                    # asyncpg's per-connection prepared statement cache (its
+                    # default is 100 entries). Set 0 behind PgBouncer in
+                    # transaction mode, which cannot hold prepared statements.
+                    statement_cache_size=max(0, int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "512"))),
                     init=_init_postgres_connection,
                 )
                 logger.info("Database connection pool initialized (PostgreSQL)")
+                self._start_retention_loop()
                 return
 
             await self._restore_sqlite_from_supabase()
+            is_new_file = not os.path.exists(self.db_path) or os.path.getsize(self.db_path) == 0
             self._pool = await aiosqlite.connect(self.db_path)
+            if is_new_file:
+                # Lets retention hand freed pages back in small steps. Older
+                # files keep their mode until the owner runs compactdb.
+                await self._pool.execute("PRAGMA auto_vacuum=INCREMENTAL")
             # Enable WAL mode for better concurrency
             await self._pool.execute("PRAGMA journal_mode=WAL")
             await self._pool.execute("PRAGMA synchronous=NORMAL")
@@ -829,6 +1132,7 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
             # Ensure we can always restore from a recent remote snapshot.
             await self._sync_sqlite_to_supabase(force=True)
             self._start_supabase_sync_loop()
+            self._start_retention_loop()
             logger.info("✅ Database connection pool initialized")
     
     async def _ensure_blacklist_table(self) -> None:
@@ -997,6 +1301,13 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
             return
         self._supabase_sync_task = asyncio.create_task(self._supabase_sync_loop())
     
+    def _start_retention_loop(self) -> None:
+        if not self._retention_interval_seconds:
+            return
+        if self._retention_task and not self._retention_task.done():
+            return
+        self._retention_task = asyncio.create_task(self._retention_loop())
+
     @asynccontextmanager
     async def transaction(self):
         """
@@ -1013,6 +1324,27 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
                     await conn.rollback()
                     raise
     
+    async def _write_rows(self, sql: str, rows: List[Any]) -> None:
+        """Insert a batch of buffered rows in one transaction.
+
+        Takes ``_lock`` like every other write so a flush cannot commit or
+        roll back a ``transaction()`` block on the shared connection, and
+        rolls back a failed batch so its earlier rows are not committed by
+        the next unrelated ``commit()``.
+        """
+        async with self._lock:
+            async with self.get_connection() as db:
+                try:
+                    await db.executemany(sql, rows)
+                    await db.commit()
+                except Exception:
+                    await db.rollback()
+                    raise
+
+    async def flush_pending_writes(self) -> None:
+        """Write buffered telemetry rows now, e.g. before reading them back."""
+        await self._write_behind.flush()
+
     @staticmethod
     def _validate_guild_id(guild_id: int) -> None:
         """Validate guild ID"""
@@ -1072,6 +1404,9 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
             ("dashboard_appeals", "staff_message_id", "INTEGER"),
             ("dashboard_appeals", "staff_delivery_error", "TEXT"),
             ("dashboard_appeal_tokens", "questions_json", "TEXT DEFAULT '[]'"),
+            # deleted_message_attachments now reference the attachment store
+            ("deleted_message_attachments", "sha256", "TEXT"),
+            ("deleted_message_attachments", "size", "INTEGER DEFAULT 0"),
         ]
         
         for table, column, col_type in migrations:
@@ -1148,6 +1483,20 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
                 "INSERT OR IGNORE INTO dashboard_schema_migrations (key) VALUES (?)",
                 (notification_defaults_migration,),
             )
+
+        attachment_store_migration = "20261016_attachment_blobs_to_store"
+        cursor = await db.execute(
+            "SELECT key FROM dashboard_schema_migrations WHERE key = ?",
+            (attachment_store_migration,),
+        )
+        if not await cursor.fetchone():
+            moved = await self._move_attachment_blobs_to_store(db)
+            if moved:
+                logger.info("Moved %d deleted-message attachments into the attachment store", moved)
+            await db.execute(
+                "INSERT OR IGNORE INTO dashboard_schema_migrations (key) VALUES (?)",
+                (attachment_store_migration,),
+            )
     
     async def init_guild(self, guild_id: int) -> None:
         """Initialize all database tables and ensure guild exists"""
@@ -1171,6 +1520,7 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
                         (guild_id,),
                     )
                     await db.commit()
+                    self.invalidate_settings_cache(guild_id)
                     return
 
                 # ===== CORE GUILD SETTINGS =====
@@ -1473,6 +1823,18 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
                     )
                 """)
 
+                # Last message id folded into memory, per channel and per user,
+                # so the memory scanner only reads what arrived since.
+                await db.execute("""
+                    CREATE TABLE IF NOT EXISTS memory_scan_watermarks (
+                        scope TEXT NOT NULL,
+                        scope_id INTEGER NOT NULL,
+                        last_message_id INTEGER NOT NULL DEFAULT 0,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (scope, scope_id)
+                    )
+                """)
+
                 # ===== DELETED MESSAGE ATTACHMENTS =====
                 await db.execute("""
                     CREATE TABLE IF NOT EXISTS deleted_message_attachments (
@@ -1484,6 +1846,18 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
                         content_type TEXT,
                         original_url TEXT,
                         data BLOB NOT NULL,
+                        sha256 TEXT,
+                        size INTEGER DEFAULT 0,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+
+                # Reference counts for the on-disk attachment store.
+                await db.execute("""
+                    CREATE TABLE IF NOT EXISTS attachment_blobs (
+                        sha256 TEXT PRIMARY KEY,
+                        size INTEGER NOT NULL,
+                        ref_count INTEGER NOT NULL DEFAULT 0,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
@@ -1694,6 +2068,34 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
+
+                # ===== ANALYTICS ROLLUPS (db/analytics_mixin.py) =====
+                for rollup_table in ("analytics_hourly", "analytics_daily"):
+                    await db.execute(f"""
+                        CREATE TABLE IF NOT EXISTS {rollup_table} (
+                            guild_id INTEGER NOT NULL,
+                            bucket_start TIMESTAMP NOT NULL,
+                            metric TEXT NOT NULL,
+                            dimension TEXT NOT NULL DEFAULT '',
+                            count INTEGER NOT NULL DEFAULT 0,
+                            PRIMARY KEY (guild_id, bucket_start, metric, dimension)
+                        )
+                    """)
+
+                # ===== STICKY PINS (db/pins_mixin.py) =====
+                await db.execute("""
+                    CREATE TABLE IF NOT EXISTS sticky_pins (
+                        channel_id INTEGER PRIMARY KEY,
+                        guild_id INTEGER NOT NULL,
+                        content TEXT NOT NULL,
+                        created_by INTEGER,
+                        created_at TIMESTAMP,
+                        expires_at TIMESTAMP,
+                        as_embed BOOLEAN DEFAULT 0,
+                        message_id INTEGER,
+                        last_bumped_at TIMESTAMP
+                    )
+                """)
                 
                 # Auto-migrate missing columns
                 await self._migrate_schema(db)
@@ -1733,10 +2135,26 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
                     ON deleted_message_attachments(guild_id, message_id)
                     """,
                     """
+                    CREATE INDEX IF NOT EXISTS idx_deleted_message_attachments_sha256
+                    ON deleted_message_attachments(sha256)
+                    """,
+                    """
                     CREATE INDEX IF NOT EXISTS idx_user_messages_guild_user
                     ON user_messages(guild_id, user_id)
                     """,
                     """
+                    CREATE INDEX IF NOT EXISTS idx_user_messages_guild_timestamp
+                    ON user_messages(guild_id, timestamp)
+                    """,
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_user_messages_guild_channel_message
+                    ON user_messages(guild_id, channel_id, message_id)
+                    """,
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_user_messages_channel_timestamp
+                    ON user_messages(channel_id, timestamp)
+                    """,
+                    """
                     CREATE INDEX IF NOT EXISTS idx_automod_events_guild_created
                     ON automod_events(guild_id, created_at)
                     """,
@@ -1744,6 +2162,14 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
                     CREATE INDEX IF NOT EXISTS idx_member_events_guild_created
                     ON guild_member_events(guild_id, created_at)
                     """,
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_analytics_hourly_metric
+                    ON analytics_hourly(guild_id, metric, bucket_start)
+                    """,
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_analytics_daily_metric
+                    ON analytics_daily(guild_id, metric, bucket_start)
+                    """,
                 ]
                 for sql in index_statements:
                     try:
@@ -1763,6 +2189,8 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
                 )
                 
                 await db.commit()
+                # The migration pass above can rewrite every guild's settings.
+                self.invalidate_settings_cache()
                 
                 if not self._initialized:
                     logger.info(f"✅ Initialized database for guild {guild_id}")
@@ -1770,33 +2198,59 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
     
     # ==================== SETTINGS ====================
     
-    async def get_settings(self, guild_id: int) -> Dict[str, Any]:
-        """Get guild settings"""
+    def invalidate_settings_cache(self, guild_id: Optional[int] = None) -> None:
+        """Drop cached settings for one guild, or for every guild when omitted."""
+        if guild_id is None:
+            self._settings_epoch += 1
+            self._settings_cache.clear()
+            return
+        self._bump_settings_generation(guild_id)
+        self._settings_cache.pop(guild_id, None)
+
+    def _bump_settings_generation(self, guild_id: int) -> None:
+        # A read that started before this write must not repopulate the cache
+        # with what it fetched, so every invalidation moves the generation on.
+        self._settings_generation[guild_id] = self._settings_generation.get(guild_id, 0) + 1
+
+    def _settings_read_token(self, guild_id: int) -> tuple[int, int]:
+        """What a read must still match when it finishes to be cached."""
+        return self._settings_epoch, self._settings_generation.get(guild_id, 0)
+
+    async def _load_settings_row(self, guild_id: int) -> Dict[str, Any]:
+        async with self.get_connection() as db:
+            cursor = await db.execute(
+                "SELECT settings FROM guild_settings WHERE guild_id = ?",
+                (guild_id,),
+            )
+            row = await cursor.fetchone()
+            return json.loads(_row_get(row, "settings")) if row and _row_get(row, "settings") else {}
+
+    async def get_settings_view(self, guild_id: int) -> FrozenSettings:
+        """Get guild settings as a shared, read-only mapping.
+
+        This is the cheap path for per-message readers: a cache hit is a dict
+        lookup with no copy. Mutating the result raises ``TypeError``; callers
+        that edit settings should use ``get_settings`` instead.
+        """
         self._validate_guild_id(guild_id)
-        
-        settings = {}
+
+        cached = self._settings_cache.get(guild_id)
+        now = time.monotonic()
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        generation = self._settings_read_token(guild_id)
         try:
-            async with self.get_connection() as db:
-                cursor = await db.execute(
-                    "SELECT settings FROM guild_settings WHERE guild_id = ?",
-                    (guild_id,),
-                )
-                row = await cursor.fetchone()
-                settings = json.loads(_row_get(row, "settings")) if row and _row_get(row, "settings") else {}
+            settings = await self._load_settings_row(guild_id)
         except aiosqlite.OperationalError as e:
             if "no such table: guild_settings" not in str(e).lower():
                 raise
 
             # Schema missing: initialize and retry once.
             await self.init_guild(guild_id)
-            async with self.get_connection() as db:
-                cursor = await db.execute(
-                    "SELECT settings FROM guild_settings WHERE guild_id = ?",
-                    (guild_id,),
-                )
-                row = await cursor.fetchone()
-                settings = json.loads(_row_get(row, "settings")) if row and _row_get(row, "settings") else {}
-                
+            generation = self._settings_read_token(guild_id)
+            settings = await self._load_settings_row(guild_id)
+
         # Merge with defaults, but resolve explicit module/flat toggle state
         # before defaults can make a missing key look enabled.
         settings = normalize_runtime_settings(settings)
@@ -1805,7 +2259,15 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
         merged.setdefault("moderation_dm_users", True)
         merged.setdefault("appeals_enabled", True)
         merged.setdefault("appeals_open", True)
-        return normalize_runtime_settings(merged)
+        frozen = _freeze_settings(normalize_runtime_settings(merged))
+
+        if self._settings_cache_ttl_seconds > 0 and self._settings_read_token(guild_id) == generation:
+            self._settings_cache[guild_id] = (time.monotonic() + self._settings_cache_ttl_seconds, frozen)
+        return frozen
+
+    async def get_settings(self, guild_id: int) -> Dict[str, Any]:
+        """Get guild settings as a private, mutable copy."""
+        return _thaw_settings(await self.get_settings_view(guild_id))
     
     async def update_settings(self, guild_id: int, settings: Dict[str, Any]) -> None:
         """Update guild settings"""
@@ -1835,12 +2297,61 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
                     (guild_id, json.dumps(settings_to_store)),
                 )
                 await db.commit()
-    
+                self.invalidate_settings_cache(guild_id)
+    
+    async def patch_settings(self, guild_id: int, changes: Dict[str, Any]) -> None:
+        """Apply only the given keys to the stored guild settings.
+
+        Same deep-merge rules as ``update_settings``, but the merge runs inside
+        one ``UPDATE`` (``json_set`` on SQLite, ``jsonb_set`` on PostgreSQL), so
+        the blob is never read into Python and concurrent patches to different
+        keys cannot overwrite each other. Flat toggles are mirrored into their
+        ``modules`` entries the same way ``normalize_runtime_settings`` does.
+        Patches to the feature toggles or ``modules`` fall back to
+        ``update_settings``, because the verification/autoroles exclusion and
+        the flat-over-module precedence have to see the stored row.
+        An empty patch is a no-op; use ``update_settings({})`` to reset.
+        """
+        self._validate_guild_id(guild_id)
+        if not changes:
+            return
+        if _ROW_NORMALIZED_SETTINGS.intersection(changes):
+            await self.update_settings(guild_id, changes)
+            return
+
+        patch = normalize_runtime_settings(changes)
+        object_paths, leaves = _settings_patch_plan(patch)
+        all_paths = object_paths + [path for path, _ in leaves]
+        if not self._is_postgres and any('"' in key for path in all_paths for key in path):
+            # SQLite JSON paths cannot quote a key that itself contains a quote.
+            await self.update_settings(guild_id, patch)
+            return
+
+        if self._is_postgres:
+            sql, params = _postgres_settings_patch_sql(object_paths, leaves)
+        else:
+            sql, params = _sqlite_settings_patch_sql(object_paths, leaves)
+        params.append(guild_id)
+
+        # Postgres patches run on their own pooled connection and rely on the
+        # row lock taken by UPDATE. SQLite shares one connection, so the lock is
+        # still needed to keep this commit out of another task's transaction --
+        # but it is now held for a single statement, not a read/merge/write.
+        async with (nullcontext() if self._is_postgres else self._lock):
+            async with self.get_connection() as db:
+                cursor = await db.execute(sql, params)
+                if not cursor.rowcount:
+                    await db.execute(
+                        "INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)",
+                        (guild_id,),
+                    )
+                    await db.execute(sql, params)
+                await db.commit()
+                self.invalidate_settings_cache(guild_id)
+
     async def set_setting(self, guild_id: int, key: str, value: Any) -> None:
         """Set a single setting"""
-        settings = await self.get_settings(guild_id)
-        settings[key] = value
-        await self.update_settings(guild_id, settings)
+        await self.patch_settings(guild_id, {key: value})
 
     # ==================== AI MEMORY ====================
 
@@ -1993,7 +2504,20 @@ class Database(MemoryMixin, CasesMixin, StaffMixin, TicketsMixin, ModmailMixin,
     # ==================== LIFECYCLE ====================
 
     async def close(self) -> None:
-        """Flush WAL, do a final Supabase sync, and close the connection."""
+        """Drain buffered writes, flush WAL, do a final Supabase sync, and close the connection."""
+        if self._retention_task and not self._retention_task.done():
+            self._retention_task.cancel()
+            try:
+                await self._retention_task
+            except asyncio.CancelledError:
+                pass
+        self._retention_task = None
+
+        try:
+            await self._write_behind.close()
+        except Exception as exc:
+            logger.error("Draining buffered writes on close failed: %s", exc)
+
         if self._supabase_sync_task and not self._supabase_sync_task.done():
             self._supabase_sync_task.cancel()
             try:
@@ -10,6 +10,9 @@ from db.roles_mixin import RolesMixin
 from db.enforcement_mixin import EnforcementMixin
 from db.backups_mixin import BackupsMixin
 from db.access_mixin import AccessMixin
+from db.retention_mixin import RetentionMixin
+from db.analytics_mixin import AnalyticsMixin
+from db.pins_mixin import PinsMixin
 
 __all__ = [
     "MemoryMixin",
@@ -23,4 +26,7 @@ __all__ = [
     "EnforcementMixin",
     "BackupsMixin",
     "AccessMixin",
+    "RetentionMixin",
+    "AnalyticsMixin",
+    "PinsMixin",
 ]
@@ -313,6 +313,36 @@ class AccessMixin:
                 "banned_from_guilds": json.loads(row[4]) if row[4] else [],
             }
 
+    async def remove_banned_profile_guild(self, user_id: int, guild_id: int) -> Optional[Dict[str, Any]]:
+        """Drop a guild from a banned profile after an unban.
+
+        The profile is deleted once no guild bans the user any more. Returns
+        the remaining profile, or None if it was deleted (or never stored).
+        """
+        self._validate_user_id(user_id)
+        async with self._lock:
+            async with self.get_connection() as db:
+                cursor = await db.execute(
+                    "SELECT banned_from_guilds FROM banned_user_profiles WHERE user_id = ?",
+                    (user_id,),
+                )
+                existing = await cursor.fetchone()
+                if not existing:
+                    return None
+                guilds = [g for g in (json.loads(existing[0]) if existing[0] else []) if g != guild_id]
+                if guilds:
+                    await db.execute(
+                        "UPDATE banned_user_profiles SET banned_from_guilds = ? WHERE user_id = ?",
+                        (json.dumps(guilds, ensure_ascii=False), user_id),
+                    )
+                else:
+                    await db.execute(
+                        "DELETE FROM banned_user_profiles WHERE user_id = ?",
+                        (user_id,),
+                    )
+                await db.commit()
+        return await self.get_banned_profile(user_id) if guilds else None
+
     async def get_all_banned_profiles(self) -> List[Dict[str, Any]]:
         """Get all stored banned user profiles."""
         async with self.get_connection() as db:
@@ -0,0 +1,285 @@
+"""Analytics rollup database methods (mixin for Database).
+
+The dashboard used to answer every page load with ``COUNT(*) ... GROUP BY``
+scans over ``user_messages``, ``cases``, ``automod_events`` and
+``guild_member_events``. The bot now keeps hourly and daily counters as it
+records those events, and the dashboard reads only these rollups.
+
+Both tables share one shape: ``(guild_id, bucket_start, metric, dimension)``
+to ``count``, where ``bucket_start`` is the UTC hour or day the events fall in
+(formatted like SQLite's ``CURRENT_TIMESTAMP``) and ``dimension`` narrows the
+metric: a channel or user id for messages, the action for cases, ``''`` when
+there is nothing to split by.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from db.retention_mixin import retention_policy
+
+logger = logging.getLogger("ModBot.Database.analytics")
+
+ROLLUP_TABLES: Dict[str, str] = {
+    "hour": "analytics_hourly",
+    "day": "analytics_daily",
+}
+
+# metric -> (source table, timestamp column, dimension expression, extra filter)
+_ROLLUP_SOURCES: Dict[str, tuple] = {
+    "message_channel": ("user_messages", "timestamp", "CAST(channel_id AS TEXT)", ""),
+    "message_user": ("user_messages", "timestamp", "CAST(user_id AS TEXT)", ""),
+    "member_join": ("guild_member_events", "created_at", "''", "AND event_type = 'join'"),
+    "member_leave": ("guild_member_events", "created_at", "''", "AND event_type = 'leave'"),
+    "case": ("cases", "created_at", "LOWER(COALESCE(action, ''))", ""),
+    "automod": ("automod_events", "created_at", "''", ""),
+}
+
+_SQLITE_BUCKETS = {
+    "hour": "strftime('%Y-%m-%d %H:00:00', {column})",
+    "day": "strftime('%Y-%m-%d 00:00:00', {column})",
+}
+_POSTGRES_BUCKETS = {
+    "hour": "date_trunc('hour', {column})",
+    "day": "date_trunc('day', {column})",
+}
+
+
+def rollup_buckets(when: Optional[datetime] = None) -> Dict[str, str]:
+    """The hour and day bucket a moment falls in, keyed like ``ROLLUP_TABLES``."""
+    when = (when or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    return {
+        "hour": when.strftime("%Y-%m-%d %H:00:00"),
+        "day": when.strftime("%Y-%m-%d 00:00:00"),
+    }
+
+
+def _increment_sql(table: str) -> str:
+    return f"""
+        INSERT INTO {table} (guild_id, bucket_start, metric, dimension, count)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (guild_id, bucket_start, metric, dimension)
+        DO UPDATE SET count = {table}.count + excluded.count
+    """
+
+
+class AnalyticsMixin:
+    async def bump_analytics(
+        self,
+        guild_id: int,
+        metric: str,
+        dimension: Any = "",
+        amount: int = 1,
+        *,
+        at: Optional[datetime] = None,
+    ) -> None:
+        """Count ``amount`` events of ``metric`` in the hourly and daily rollups.
+
+        Increments are coalesced in the write-behind buffer and land with the
+        next flush, after the raw rows queued alongside them.
+        """
+        if metric not in _ROLLUP_SOURCES:
+            raise ValueError(f"Unknown analytics metric: {metric}")
+        buckets = rollup_buckets(at)
+        for bucket, table in ROLLUP_TABLES.items():
+            await self._write_behind.increment(
+                _increment_sql(table),
+                (int(guild_id), buckets[bucket], metric, str(dimension)),
+                int(amount),
+            )
+
+    async def get_analytics_rollup(
+        self,
+        guild_id: int,
+        metric: str,
+        *,
+        bucket: str = "day",
+        since: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Rollup rows for one metric, oldest bucket first."""
+        table = ROLLUP_TABLES[bucket]
+        await self.flush_pending_writes()
+        params: List[Any] = [int(guild_id), metric]
+        since_clause = ""
+        if since is not None:
+            since_clause = " AND bucket_start >= ?"
+            params.append(rollup_buckets(since)[bucket])
+        async with self.get_connection() as db:
+            cursor = await db.execute(
+                f"""
+                SELECT bucket_start, dimension, count FROM {table}
+                WHERE guild_id = ? AND metric = ?{since_clause}
+                ORDER BY bucket_start, dimension
+                """,
+                tuple(params),
+            )
+            rows = await cursor.fetchall()
+        return [
+            {"bucket_start": str(row[0]), "dimension": row[1], "count": int(row[2])}
+            for row in rows
+        ]
+
+    async def rebuild_analytics_rollups(self, guild_id: Optional[int] = None) -> Dict[str, int]:
+        """Recount the rollups from the raw event rows.
+
+        Retention prunes raw rows long before their rollups, so each metric is
+        only rebuilt from the bucket of its oldest surviving raw row onward;
+        older buckets are kept as they are. Message metrics start later where
+        the per-user cap has trimmed some authors' older messages but not
+        others' (see ``_capped_messages_complete_from``). Returns rollup rows
+        written per metric.
+        """
+        buckets = _POSTGRES_BUCKETS if self._is_postgres else _SQLITE_BUCKETS
+        written: Dict[str, int] = {}
+        # Holding the buffer keeps a half-flushed batch (raw rows written,
+        # their counters not yet) from being counted twice.
+        async with self._write_behind.held():
+            messages_complete_from = await self._capped_messages_complete_from(guild_id)
+            async with self.transaction() as db:
+                for metric, (source, column, dimension, extra) in _ROLLUP_SOURCES.items():
+                    guild_clause = "" if guild_id is None else "AND guild_id = ?"
+                    guild_params: tuple = () if guild_id is None else (int(guild_id),)
+                    cursor = await db.execute(
+                        f"""
+                        SELECT guild_id, MIN({column}) FROM {source}
+                        WHERE {column} IS NOT NULL {extra} {guild_clause}
+                        GROUP BY guild_id
+                        """,
+                        guild_params,
+                    )
+                    oldest = {int(row[0]): row[1] for row in await cursor.fetchall()}
+                    written[metric] = 0
+                    for bucket, table in ROLLUP_TABLES.items():
+                        bucket_sql = buckets[bucket].format(column=column)
+                        for rollup_guild_id, first_seen in oldest.items():
+                            floor = _bucket_floor(first_seen, bucket)
+                            complete_from = (
+                                messages_complete_from.get(rollup_guild_id)
+                                if source == "user_messages"
+                                else None
+                            )
+                            if complete_from is not None:
+                                floor = max(floor, _bucket_ceiling(complete_from, bucket))
+                            await db.execute(
+                                f"DELETE FROM {table} WHERE guild_id = ? AND metric = ? AND bucket_start >= ?",
+                                (rollup_guild_id, metric, floor),
+                            )
+                            cursor = await db.execute(
+                                f"""
+                                INSERT INTO {table} (guild_id, bucket_start, metric, dimension, count)
+                                SELECT guild_id, {bucket_sql}, ?, {dimension}, COUNT(*)
+                                FROM {source}
+                                WHERE guild_id = ? AND {column} IS NOT NULL
+                                    AND {bucket_sql} >= ? {extra}
+                                GROUP BY guild_id, {bucket_sql}, {dimension}
+                                """,
+                                (metric, rollup_guild_id, floor),
+                            )
+                            written[metric] += max(0, cursor.rowcount or 0)
+        logger.info("Rebuilt analytics rollups%s: %s", "" if guild_id is None else f" for guild {guild_id}", written)
+        return written
+
+    async def _capped_messages_complete_from(self, guild_id: Optional[int]) -> Dict[int, Any]:
+        """Per guild, the moment from which no author's messages were capped.
+
+        ``retention_user_messages_per_user`` deletes a heavy author's oldest
+        messages while lighter authors keep theirs, so the guild's oldest
+        message says nothing about completeness. Authors at the cap may have
+        lost everything before their oldest kept message; the latest of those
+        is where the raw rows are complete again.
+        """
+        if guild_id is None:
+            async with self.get_connection() as db:
+                cursor = await db.execute("SELECT DISTINCT guild_id FROM user_messages")
+                guild_ids = [int(row[0]) for row in await cursor.fetchall()]
+        else:
+            guild_ids = [int(guild_id)]
+        complete_from: Dict[int, Any] = {}
+        for gid in guild_ids:
+            per_user = retention_policy(await self.get_settings_view(gid))["retention_user_messages_per_user"]
+            if not per_user:
+                continue
+            async with self.get_connection() as db:
+                cursor = await db.execute(
+                    """
+                    SELECT MAX(first_kept) FROM (
+                        SELECT MIN(timestamp) AS first_kept FROM user_messages
+                        WHERE guild_id = ? AND timestamp IS NOT NULL
+                        GROUP BY user_id
+                        HAVING COUNT(*) >= ?
+                    ) AS capped
+                    """,
+                    (gid, per_user),
+                )
+                row = await cursor.fetchone()
+            if row and row[0] is not None:
+                complete_from[gid] = row[0]
+        return complete_from
+
+    async def prune_analytics_rollups(
+        self,
+        guild_ids: Optional[Iterable[int]] = None,
+        *,
+        batch_buckets: int = 24,
+        now: Optional[datetime] = None,
+    ) -> int:
+        """Drop hourly rollups past ``retention_analytics_hourly_days``.
+
+        Daily rollups are small and kept indefinitely; they are what outlives
+        the raw rows. Hourly buckets are deleted ``batch_buckets`` hours at a
+        time. Returns rows deleted.
+        """
+        now = now or datetime.now(timezone.utc)
+        await self.flush_pending_writes()
+        if guild_ids is None:
+            async with self.get_connection() as db:
+                cursor = await db.execute("SELECT DISTINCT guild_id FROM analytics_hourly")
+                guild_ids = [int(row[0]) for row in await cursor.fetchall()]
+        deleted = 0
+        for guild_id in guild_ids:
+            policy = retention_policy(await self.get_settings_view(int(guild_id)))
+            days = policy["retention_analytics_hourly_days"]
+            if not days:
+                continue
+            horizon = rollup_buckets(now - timedelta(days=days))["hour"]
+            while True:
+                count = await self._delete_batch(
+                    """
+                    DELETE FROM analytics_hourly
+                    WHERE guild_id = ? AND bucket_start IN (
+                        SELECT DISTINCT bucket_start FROM analytics_hourly
+                        WHERE guild_id = ? AND bucket_start < ?
+                        ORDER BY bucket_start
+                        LIMIT ?
+                    )
+                    """,
+                    (int(guild_id), int(guild_id), horizon, max(1, int(batch_buckets))),
+                )
+                deleted += count
+                if not count:
+                    break
+        if deleted:
+            logger.info("Pruned %d hourly analytics rollup rows", deleted)
+        return deleted
+
+
+def _as_moment(value: Any) -> datetime:
+    """An aware UTC datetime from a stored timestamp (datetime or SQLite text)."""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _bucket_floor(value: Any, bucket: str) -> str:
+    """The bucket a stored timestamp (datetime or SQLite text) falls in."""
+    return rollup_buckets(_as_moment(value))[bucket]
+
+
+def _bucket_ceiling(value: Any, bucket: str) -> str:
+    """The first bucket that starts at or after a stored timestamp."""
+    moment = _as_moment(value)
+    floor = _bucket_floor(moment, bucket)
+    if moment.strftime("%Y-%m-%d %H:%M:%S") == floor and not moment.microsecond:
+        return floor
+    step = timedelta(hours=1) if bucket == "hour" else timedelta(days=1)
+    return rollup_buckets(moment + step)[bucket]
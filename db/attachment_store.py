@@ -0,0 +1,104 @@
+"""Content-addressed file store for deleted-message attachments (used by Database).
+
+Deleted-message images used to be written as BLOBs into
+``deleted_message_attachments``, which grew the SQLite file, every
+``VACUUM INTO`` snapshot and every Supabase upload, and stored a meme reposted
+fifty times fifty times. The bytes now live on disk under their SHA-256
+digest; the database keeps the digest on each attachment row and a reference
+count per blob in ``attachment_blobs``. Blob files sit on the local data
+volume next to the database, so they are not part of the Supabase mirror.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterator, Optional, Set
+
+logger = logging.getLogger("ModBot.Database.attachment_store")
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _is_digest(name: str) -> bool:
+    return len(name) == 64 and all(ch in "0123456789abcdef" for ch in name)
+
+
+class AttachmentBlobStore:
+    """Blob files named by digest, fanned out as ``ab/abcdef...``.
+
+    All methods block on file I/O; callers run them in a worker thread.
+    Writes go through a temp file and ``os.replace``, so a reader never sees a
+    half-written blob and a crash leaves at most a stray temp file.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self.path_for(digest).is_file()
+
+    def write(self, digest: str, data: bytes) -> bool:
+        """Store ``data`` under ``digest``; returns False if it was already there."""
+        path = self.path_for(digest)
+        if path.is_file() and path.stat().st_size == len(data):
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return True
+
+    def read(self, digest: str) -> Optional[bytes]:
+        try:
+            return self.path_for(digest).read_bytes()
+        except OSError:
+            return None
+
+    def delete(self, digest: str) -> int:
+        """Remove a blob; returns the bytes freed (0 if it was missing)."""
+        path = self.path_for(digest)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return 0
+        except OSError:
+            logger.debug("Failed to remove attachment blob %s", path, exc_info=True)
+            return 0
+        return size
+
+    def digests(self) -> Iterator[str]:
+        """Every blob on disk (stray temp files are skipped)."""
+        if not self.root.is_dir():
+            return
+        for path in self.root.glob("??/*"):
+            if _is_digest(path.name) and path.parent.name == path.name[:2]:
+                yield path.name
+
+    def sweep(self, referenced: Set[str]) -> int:
+        """Delete blobs missing from ``referenced`` and leftover temp files."""
+        freed = 0
+        for digest in list(self.digests()):
+            if digest not in referenced:
+                freed += self.delete(digest)
+        if self.root.is_dir():
+            for path in self.root.glob("??/.tmp-*"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+        return freed
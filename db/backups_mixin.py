@@ -89,7 +89,9 @@ class BackupsMixin:
             tables = [
                 "guild_settings", "cases", "warnings", "mod_notes",
                 "reports", "tickets", "staff_sanctions", "court_sessions",
-                "modmail_threads", "giveaways", "reaction_roles", "voice_roles"
+                "modmail_threads", "giveaways", "reaction_roles", "voice_roles",
+                "user_messages", "automod_events", "guild_member_events",
+                "analytics_hourly", "analytics_daily", "sticky_pins",
             ]
             
             for table in tables:
@@ -111,7 +113,14 @@ class BackupsMixin:
                 cursor = await db.execute("PRAGMA page_size")
                 page_size = (await cursor.fetchone())[0]
                 stats["database_size_mb"] = round((page_count * page_size) / (1024 * 1024), 2)
-        
+
+        stats["attachment_store"] = await self.get_attachment_store_stats()
+
+        # What the telemetry retention pass removed (see RetentionMixin).
+        stats["retention"] = {
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in self._retention_stats.items()
+        }
         return stats
 
     async def create_server_backup(
@@ -54,8 +54,9 @@ class CasesMixin:
                 "INSERT INTO mod_stats (guild_id, moderator_id, action) VALUES (?, ?, ?)",
                 (guild_id, moderator_id, action),
             )
-            
-            return case_number
+
+        await self.bump_analytics(guild_id, "case", (action or "").lower())
+        return case_number
 
     async def get_case(self, guild_id: int, case_number: int) -> Optional[Dict[str, Any]]:
         """Get a specific case"""
@@ -15,6 +15,8 @@ from typing import Optional, List, Dict, Any
 
 import aiosqlite
 
+from db.attachment_store import AttachmentBlobStore, content_digest
+
 logger = logging.getLogger("ModBot.Database.enforcement")
 
 
@@ -31,28 +33,30 @@ class EnforcementMixin:
         reason: str,
         message_deleted: bool,
     ) -> None:
-        """Persist an AutoMod decision for guild-scoped dashboard telemetry."""
+        """Persist an AutoMod decision for guild-scoped dashboard telemetry.
+
+        The row is buffered and written in a batch; see ``WriteBehindBuffer``.
+        """
         self._validate_guild_id(guild_id)
-        async with self.get_connection() as db:
-            await db.execute(
-                """
-                INSERT INTO automod_events
-                    (guild_id, user_id, channel_id, rule, category, severity, action, reason, message_deleted)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    guild_id,
-                    int(user_id),
-                    int(channel_id) if channel_id else None,
-                    str(rule)[:64],
-                    str(category)[:64],
-                    str(severity)[:32],
-                    str(action)[:32],
-                    str(reason)[:1000],
-                    bool(message_deleted),
-                ),
-            )
-            await db.commit()
+        await self._write_behind.add(
+            """
+            INSERT INTO automod_events
+                (guild_id, user_id, channel_id, rule, category, severity, action, reason, message_deleted)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                guild_id,
+                int(user_id),
+                int(channel_id) if channel_id else None,
+                str(rule)[:64],
+                str(category)[:64],
+                str(severity)[:32],
+                str(action)[:32],
+                str(reason)[:1000],
+                bool(message_deleted),
+            ),
+        )
+        await self.bump_analytics(guild_id, "automod")
 
     async def record_member_event(self, guild_id: int, user_id: int, event_type: str) -> None:
         """Record joins and leaves so dashboard growth charts use real events."""
@@ -60,12 +64,11 @@ class EnforcementMixin:
         normalized = str(event_type).strip().lower()
         if normalized not in {"join", "leave"}:
             raise ValueError(f"Invalid member event type: {event_type}")
-        async with self.get_connection() as db:
-            await db.execute(
-                "INSERT INTO guild_member_events (guild_id, user_id, event_type) VALUES (?, ?, ?)",
-                (guild_id, int(user_id), normalized),
-            )
-            await db.commit()
+        await self._write_behind.add(
+            "INSERT INTO guild_member_events (guild_id, user_id, event_type) VALUES (?, ?, ?)",
+            (guild_id, int(user_id), normalized),
+        )
+        await self.bump_analytics(guild_id, f"member_{normalized}")
 
     async def add_quarantine(self, guild_id: int, user_id: int, moderator_id: int, reason: str, expires_at=None, role_ids: list = None) -> None:
         """Add a quarantine record"""
@@ -187,38 +190,46 @@ class EnforcementMixin:
                 )
                 await db.commit()
 
-    async def get_expired_tempbans(self) -> List[Dict[str, Any]]:
-        """Get expired tempbans across SQLite and PostgreSQL timestamp formats."""
+    async def get_tempbans(self) -> List[Dict[str, Any]]:
+        """Get all tempbans; ``expires_at_utc`` is the parsed aware expiry (None if unreadable)."""
         async with self.get_connection() as db:
             cursor = await db.execute("SELECT * FROM tempbans")
             rows = await cursor.fetchall()
-            now = datetime.now(timezone.utc)
-            expired: List[Dict[str, Any]] = []
-            for row in rows:
-                raw_expiry = row[5]
-                if isinstance(raw_expiry, datetime):
-                    parsed_expiry = raw_expiry
-                else:
-                    try:
-                        parsed_expiry = datetime.fromisoformat(str(raw_expiry).replace("Z", "+00:00"))
-                    except (TypeError, ValueError):
-                        continue
+        tempbans: List[Dict[str, Any]] = []
+        for row in rows:
+            raw_expiry = row[5]
+            if isinstance(raw_expiry, datetime):
+                parsed_expiry = raw_expiry
+            else:
+                try:
+                    parsed_expiry = datetime.fromisoformat(str(raw_expiry).replace("Z", "+00:00"))
+                except (TypeError, ValueError):
+                    parsed_expiry = None
+            if parsed_expiry is not None:
                 if parsed_expiry.tzinfo is None:
                     parsed_expiry = parsed_expiry.replace(tzinfo=timezone.utc)
                 else:
                     parsed_expiry = parsed_expiry.astimezone(timezone.utc)
-                if parsed_expiry > now:
-                    continue
-                expired.append({
-                    "id": row[0],
-                    "guild_id": row[1],
-                    "user_id": row[2],
-                    "moderator_id": row[3],
-                    "reason": row[4],
-                    "expires_at": raw_expiry,
-                    "created_at": row[6],
-                })
-            return expired
+            tempbans.append({
+                "id": row[0],
+                "guild_id": row[1],
+                "user_id": row[2],
+                "moderator_id": row[3],
+                "reason": row[4],
+                "expires_at": raw_expiry,
+                "created_at": row[6],
+                "expires_at_utc": parsed_expiry,
+            })
+        return tempbans
+
+    async def get_expired_tempbans(self) -> List[Dict[str, Any]]:
+        """Get expired tempbans across SQLite and PostgreSQL timestamp formats."""
+        now = datetime.now(timezone.utc)
+        return [
+            tempban
+            for tempban in await self.get_tempbans()
+            if tempban["expires_at_utc"] is not None and tempban["expires_at_utc"] <= now
+        ]
 
     async def remove_tempban(self, guild_id: int, user_id: int) -> None:
         """Remove a tempban"""
@@ -230,6 +241,50 @@ class EnforcementMixin:
                 )
                 await db.commit()
 
+    def _attachment_store(self) -> AttachmentBlobStore:
+        if self._attachment_blob_store is None:
+            root = self._attachment_store_dir or os.path.join(
+                os.path.dirname(os.path.abspath(self.db_path)), "attachments"
+            )
+            self._attachment_blob_store = AttachmentBlobStore(root)
+        return self._attachment_blob_store
+
+    @staticmethod
+    def _write_attachment_blobs(store: AttachmentBlobStore, payloads: List[bytes]) -> List[str]:
+        digests = []
+        for data in payloads:
+            digest = content_digest(data)
+            store.write(digest, data)
+            digests.append(digest)
+        return digests
+
+    @staticmethod
+    async def _reference_attachment_blob(db, digest: str, size: int) -> None:
+        await db.execute(
+            """
+            INSERT INTO attachment_blobs (sha256, size, ref_count)
+            VALUES (?, ?, 1)
+            ON CONFLICT(sha256) DO UPDATE SET ref_count = attachment_blobs.ref_count + 1
+            """,
+            (digest, size),
+        )
+
+    @staticmethod
+    async def _release_attachment_rows(db, row_ids: List[int]) -> None:
+        """Delete attachment rows and drop the blob references they held."""
+        for row_id in row_ids:
+            cursor = await db.execute(
+                "SELECT sha256 FROM deleted_message_attachments WHERE id = ?",
+                (row_id,),
+            )
+            row = await cursor.fetchone()
+            await db.execute("DELETE FROM deleted_message_attachments WHERE id = ?", (row_id,))
+            if row and row[0]:
+                await db.execute(
+                    "UPDATE attachment_blobs SET ref_count = ref_count - 1 WHERE sha256 = ?",
+                    (row[0],),
+                )
+
     async def save_deleted_message_attachments(
         self,
         *,
@@ -238,52 +293,68 @@ class EnforcementMixin:
         message_id: int,
         attachments: List[Dict[str, Any]],
     ) -> None:
-        """Persist deleted-message attachment bytes for durable log retrieval."""
-        rows = [
-            (
-                guild_id,
-                channel_id,
-                message_id,
-                str(item.get("filename") or "attachment"),
-                str(item.get("content_type") or ""),
-                str(item.get("url") or ""),
-                item.get("data"),
-            )
-            for item in attachments
-            if item.get("data")
-        ]
-        if not rows:
+        """Persist deleted-message attachments for durable log retrieval.
+
+        The bytes go to the content-addressed attachment store; the rows keep
+        the digest, so a repost of the same image adds a reference, not a copy.
+        """
+        items = [item for item in attachments if item.get("data")]
+        if not items:
             return
+        payloads = [bytes(item["data"]) for item in items]
+        store = self._attachment_store()
 
-        async with self.get_connection() as db:
-            await db.execute(
-                """
-                DELETE FROM deleted_message_attachments
-                WHERE guild_id = ? AND message_id = ?
-                """,
-                (guild_id, message_id),
-            )
-            for row in rows:
-                await db.execute(
+        async with self._attachment_store_lock:
+            digests = await asyncio.to_thread(self._write_attachment_blobs, store, payloads)
+            async with self.get_connection() as db:
+                cursor = await db.execute(
                     """
-                    INSERT INTO deleted_message_attachments
-                    (guild_id, channel_id, message_id, filename, content_type, original_url, data)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    SELECT id FROM deleted_message_attachments
+                    WHERE guild_id = ? AND message_id = ?
                     """,
-                    row,
+                    (guild_id, message_id),
                 )
-            await db.commit()
+                await self._release_attachment_rows(db, [row[0] for row in await cursor.fetchall()])
+                for item, data, digest in zip(items, payloads, digests):
+                    await self._reference_attachment_blob(db, digest, len(data))
+                    # data stays empty: the column predates the store and is NOT NULL.
+                    await db.execute(
+                        """
+                        INSERT INTO deleted_message_attachments
+                        (guild_id, channel_id, message_id, filename, content_type, original_url, data, sha256, size)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        (
+                            guild_id,
+                            channel_id,
+                            message_id,
+                            str(item.get("filename") or "attachment"),
+                            str(item.get("content_type") or ""),
+                            str(item.get("url") or ""),
+                            b"",
+                            digest,
+                            len(data),
+                        ),
+                    )
+                await db.commit()
+
+        if self._attachment_store_max_bytes:
+            await self.collect_attachment_garbage(sweep_files=False)
 
     async def get_deleted_message_attachments(
         self,
         guild_id: int,
         message_id: int,
     ) -> List[Dict[str, Any]]:
-        """Return persisted deleted-message attachment bytes."""
+        """Return persisted deleted-message attachments.
+
+        Stored images carry a ``path`` into the attachment store so callers
+        can stream the file; rows written before the store carry ``data``.
+        """
         async with self.get_connection() as db:
             cursor = await db.execute(
                 """
-                SELECT filename, content_type, original_url, data
+                SELECT filename, content_type, original_url, sha256, data
                 FROM deleted_message_attachments
                 WHERE guild_id = ? AND message_id = ?
                 ORDER BY id ASC
@@ -291,13 +362,142 @@ class EnforcementMixin:
                 (guild_id, message_id),
             )
             rows = await cursor.fetchall()
-            return [
-                {
+
+        store = self._attachment_store()
+
+        def _resolve() -> List[Dict[str, Any]]:
+            records = []
+            for r in rows:
+                record: Dict[str, Any] = {
                     "filename": r[0],
                     "content_type": r[1],
                     "url": r[2],
-                    "data": r[3],
                 }
-                for r in rows
-            ]
+                if r[3]:
+                    path = store.path_for(r[3])
+                    if path.is_file():
+                        record["path"] = str(path)
+                elif r[4]:
+                    record["data"] = r[4]
+                records.append(record)
+            return records
+
+        return await asyncio.to_thread(_resolve)
+
+    async def _move_attachment_blobs_to_store(self, db, batch_size: int = 100) -> int:
+        """Migrate BLOB rows into the attachment store (run from _migrate_schema)."""
+        store = self._attachment_store()
+        moved = 0
+        while True:
+            cursor = await db.execute(
+                """
+                SELECT id, data FROM deleted_message_attachments
+                WHERE sha256 IS NULL AND LENGTH(data) > 0
+                ORDER BY id ASC
+                LIMIT ?
+                """,
+                (batch_size,),
+            )
+            rows = await cursor.fetchall()
+            if not rows:
+                return moved
+            payloads = [bytes(row[1]) for row in rows]
+            digests = await asyncio.to_thread(self._write_attachment_blobs, store, payloads)
+            for row, data, digest in zip(rows, payloads, digests):
+                await self._reference_attachment_blob(db, digest, len(data))
+                await db.execute(
+                    """
+                    UPDATE deleted_message_attachments
+                    SET sha256 = ?, size = ?, data = ?
+                    WHERE id = ?
+                    """,
+                    (digest, len(data), b"", row[0]),
+                )
+            moved += len(rows)
+
+    async def collect_attachment_garbage(
+        self,
+        *,
+        sweep_files: bool = True,
+        batch_size: int = 100,
+    ) -> Dict[str, int]:
+        """Enforce the attachment store's size cap and delete unreferenced blobs.
+
+        While referenced blobs exceed ``ATTACHMENT_STORE_MAX_MB``, the oldest
+        attachment rows are dropped. Blobs left with no references are then
+        removed. ``sweep_files`` also deletes files the database does not know
+        about (left by a crash) and compacts SQLite afterwards.
+        """
+        store = self._attachment_store()
+        evicted = 0
+        async with self._attachment_store_lock:
+            # The shared lock keeps the reference check and the row deletes out
+            # of other writers' transactions on the shared connection.
+            async with self._lock:
+                async with self.get_connection() as db:
+                    cap = self._attachment_store_max_bytes
+                    while cap:
+                        cursor = await db.execute(
+                            "SELECT COALESCE(SUM(size), 0) FROM attachment_blobs WHERE ref_count > 0"
+                        )
+                        excess = int((await cursor.fetchone())[0]) - cap
+                        if excess <= 0:
+                            break
+                        cursor = await db.execute(
+                            "SELECT id, size FROM deleted_message_attachments ORDER BY id ASC LIMIT ?",
+                            (batch_size,),
+                        )
+                        row_ids = []
+                        for row_id, size in await cursor.fetchall():
+                            row_ids.append(row_id)
+                            excess -= int(size or 0)
+                            if excess <= 0:
+                                break
+                        if not row_ids:
+                            break
+                        await self._release_attachment_rows(db, row_ids)
+                        await db.commit()
+                        evicted += len(row_ids)
+
+                    cursor = await db.execute("SELECT sha256 FROM attachment_blobs WHERE ref_count <= 0")
+                    unreferenced = [row[0] for row in await cursor.fetchall()]
+                    if unreferenced:
+                        await db.executemany(
+                            "DELETE FROM attachment_blobs WHERE sha256 = ?",
+                            [(digest,) for digest in unreferenced],
+                        )
+                        await db.commit()
+                    referenced = None
+                    if sweep_files:
+                        cursor = await db.execute("SELECT sha256 FROM attachment_blobs")
+                        referenced = {row[0] for row in await cursor.fetchall()}
+
+            def _delete() -> int:
+                freed = sum(store.delete(digest) for digest in unreferenced)
+                if referenced is not None:
+                    freed += store.sweep(referenced)
+                return freed
+
+            freed_bytes = await asyncio.to_thread(_delete)
+
+        if sweep_files:
+            # Also hands back the pages freed by the BLOB migration.
+            await self._reclaim_free_pages()
+        if evicted or unreferenced:
+            logger.info(
+                "Attachment store: evicted %d rows, removed %d blobs (%d bytes)",
+                evicted,
+                len(unreferenced),
+                freed_bytes,
+            )
+        return {"evicted_rows": evicted, "removed_blobs": len(unreferenced), "freed_bytes": freed_bytes}
+
+    async def get_attachment_store_stats(self) -> Dict[str, int]:
+        """Blob count, stored bytes and row references for the attachment store."""
+        async with self.get_connection() as db:
+            cursor = await db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(ref_count), 0) FROM attachment_blobs"
+            )
+            row = await cursor.fetchone()
+        return {"blobs": int(row[0]), "bytes": int(row[1]), "references": int(row[2])}
 
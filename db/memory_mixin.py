@@ -11,7 +11,7 @@ import os
 import shutil
 import tempfile
 from datetime import datetime, timezone
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable
 
 import aiosqlite
 
@@ -128,20 +128,30 @@ class MemoryMixin:
                 return cursor.rowcount > 0
 
     async def get_recent_channel_messages(
-        self, channel_id: int, limit: int = 50
+        self, channel_id: int, limit: int = 50, after_message_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Retrieve the most recent messages in a specific channel."""
+        """Retrieve the most recent messages in a specific channel.
+
+        ``after_message_id`` keeps only messages newer than that id.
+        """
         try:
+            await self.flush_pending_writes()
+            params: List[Any] = [int(channel_id)]
+            after_clause = ""
+            if after_message_id is not None:
+                after_clause = " AND message_id > ?"
+                params.append(int(after_message_id))
+            params.append(int(limit))
             async with self.get_connection() as db:
                 cursor = await db.execute(
-                    """
+                    f"""
                     SELECT message_id, channel_id, user_id, content, timestamp
                     FROM user_messages
-                    WHERE channel_id = ?
-                    ORDER BY timestamp DESC
+                    WHERE channel_id = ?{after_clause}
+                    ORDER BY timestamp DESC, message_id DESC
                     LIMIT ?
                     """,
-                    (int(channel_id), int(limit)),
+                    tuple(params),
                 )
                 rows = await cursor.fetchall()
                 return [
@@ -158,6 +168,63 @@ class MemoryMixin:
             logger.error("Failed to get recent channel messages: %s", e)
             return []
 
+    async def get_channel_message_heads(self, guild_id: int) -> Dict[int, int]:
+        """Newest stored message id per channel of a guild."""
+        await self.flush_pending_writes()
+        async with self.get_connection() as db:
+            cursor = await db.execute(
+                """
+                SELECT channel_id, MAX(message_id)
+                FROM user_messages
+                WHERE guild_id = ?
+                GROUP BY channel_id
+                """,
+                (int(guild_id),),
+            )
+            return {int(row[0]): int(row[1]) for row in await cursor.fetchall() if row[1]}
+
+    async def get_memory_watermarks(self, scope: str, scope_ids: Iterable[int]) -> Dict[int, int]:
+        """Last message id folded into memory for each id in ``scope``.
+
+        ``scope`` is "channel", or "user:<guild_id>" for authors in one
+        guild; ids never scanned are absent.
+        """
+        ids = [int(scope_id) for scope_id in scope_ids]
+        marks: Dict[int, int] = {}
+        async with self.get_connection() as db:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" for _ in chunk)
+                cursor = await db.execute(
+                    f"""
+                    SELECT scope_id, last_message_id
+                    FROM memory_scan_watermarks
+                    WHERE scope = ? AND scope_id IN ({placeholders})
+                    """,
+                    (scope, *chunk),
+                )
+                marks.update({int(row[0]): int(row[1] or 0) for row in await cursor.fetchall()})
+        return marks
+
+    async def set_memory_watermarks(self, scope: str, marks: Dict[int, int]) -> None:
+        """Advance the memory-scan watermark for each id in ``scope``."""
+        if not marks:
+            return
+        async with self._lock:
+            async with self.get_connection() as db:
+                await db.executemany(
+                    """
+                    INSERT INTO memory_scan_watermarks (scope, scope_id, last_message_id, updated_at)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(scope, scope_id) DO UPDATE SET
+                        last_message_id = excluded.last_message_id,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE excluded.last_message_id > memory_scan_watermarks.last_message_id
+                    """,
+                    [(scope, int(scope_id), int(mark)) for scope_id, mark in marks.items()],
+                )
+                await db.commit()
+
     async def track_user_message(self, message: discord.Message) -> None:
         """Store a message for behavioral profiling."""
         if not message.guild or not message.author or message.author.bot:
@@ -167,21 +234,24 @@ class MemoryMixin:
             return
             
         try:
-            async with self.get_connection() as db:
-                await db.execute(
-                    """
-                    INSERT INTO user_messages (message_id, guild_id, channel_id, user_id, content)
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    (message.id, message.guild.id, message.channel.id, message.author.id, content)
-                )
-                await db.commit()
+            # Buffered and batched; OR IGNORE keeps one replayed message id
+            # from failing the whole batch it lands in.
+            await self._write_behind.add(
+                """
+                INSERT OR IGNORE INTO user_messages (message_id, guild_id, channel_id, user_id, content)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (message.id, message.guild.id, message.channel.id, message.author.id, content)
+            )
+            await self.bump_analytics(message.guild.id, "message_channel", message.channel.id)
+            await self.bump_analytics(message.guild.id, "message_user", message.author.id)
         except Exception as e:
             logger.error("Failed to track user message: %s", e)
 
     async def get_recent_user_messages(self, guild_id: int, user_id: int, limit: int = 100) -> List[Dict[str, Any]]:
         """Retrieve recent messages for a specific user in a guild."""
         try:
+            await self.flush_pending_writes()
             async with self.get_connection() as db:
                 cursor = await db.execute(
                     """
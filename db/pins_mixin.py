@@ -0,0 +1,146 @@
+"""Sticky pin database methods (mixin for Database).
+
+The ``Pin`` cog used to keep sticky pins only in memory, so every restart or
+deploy silently dropped them. One row per channel now records the pin, the id
+of the sticky message currently posted and when it was last bumped, so a
+restarted bot can delete that message instead of posting a duplicate and can
+keep throttling bumps where it left off.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("ModBot.Database.pins")
+
+_PIN_COLUMNS = (
+    "guild_id, channel_id, content, created_by, created_at, expires_at, "
+    "as_embed, message_id, last_bumped_at"
+)
+
+
+def _as_utc(value: Any) -> Optional[datetime]:
+    """An aware UTC datetime from a stored timestamp (ISO string or datetime)."""
+    if value is None or value == "":
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except (TypeError, ValueError):
+            return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _pin_row(row) -> Dict[str, Any]:
+    return {
+        "guild_id": int(row[0]),
+        "channel_id": int(row[1]),
+        "content": row[2] or "",
+        "created_by": int(row[3]) if row[3] is not None else 0,
+        "created_at": _as_utc(row[4]),
+        "expires_at": _as_utc(row[5]),
+        "as_embed": bool(row[6]),
+        "message_id": int(row[7]) if row[7] is not None else None,
+        "last_bumped_at": _as_utc(row[8]),
+    }
+
+
+class PinsMixin:
+    async def save_sticky_pin(
+        self,
+        guild_id: int,
+        channel_id: int,
+        content: str,
+        created_by: int,
+        created_at: datetime,
+        expires_at: Optional[datetime],
+        as_embed: bool,
+        message_id: Optional[int],
+        last_bumped_at: Optional[datetime],
+    ) -> None:
+        """Create or replace the sticky pin of a channel."""
+        async with self._lock:
+            async with self.get_connection() as db:
+                await db.execute(
+                    f"""
+                    INSERT INTO sticky_pins ({_PIN_COLUMNS})
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (channel_id) DO UPDATE SET
+                        guild_id = excluded.guild_id,
+                        content = excluded.content,
+                        created_by = excluded.created_by,
+                        created_at = excluded.created_at,
+                        expires_at = excluded.expires_at,
+                        as_embed = excluded.as_embed,
+                        message_id = excluded.message_id,
+                        last_bumped_at = excluded.last_bumped_at
+                    """,
+                    (
+                        int(guild_id),
+                        int(channel_id),
+                        content,
+                        int(created_by),
+                        _iso(created_at),
+                        _iso(expires_at),
+                        1 if as_embed else 0,
+                        message_id,
+                        _iso(last_bumped_at),
+                    ),
+                )
+                await db.commit()
+
+    async def get_sticky_pin(self, channel_id: int) -> Optional[Dict[str, Any]]:
+        """The sticky pin of a channel, expired or not; None if there is none."""
+        async with self.get_connection() as db:
+            cursor = await db.execute(
+                f"SELECT {_PIN_COLUMNS} FROM sticky_pins WHERE channel_id = ?",
+                (int(channel_id),),
+            )
+            row = await cursor.fetchone()
+        return _pin_row(row) if row else None
+
+    async def record_sticky_pin_bump(
+        self, channel_id: int, message_id: int, bumped_at: datetime
+    ) -> None:
+        """Remember which message is the sticky now and when it was posted.
+
+        Written straight through rather than via the write-behind buffer: a
+        restart that lost the new id would leave an undeletable duplicate.
+        """
+        async with self._lock:
+            async with self.get_connection() as db:
+                await db.execute(
+                    "UPDATE sticky_pins SET message_id = ?, last_bumped_at = ? WHERE channel_id = ?",
+                    (int(message_id), _iso(bumped_at), int(channel_id)),
+                )
+                await db.commit()
+
+    async def delete_sticky_pin(self, channel_id: int) -> bool:
+        """Remove a channel's sticky pin; returns whether one existed."""
+        async with self._lock:
+            async with self.get_connection() as db:
+                cursor = await db.execute(
+                    "DELETE FROM sticky_pins WHERE channel_id = ?",
+                    (int(channel_id),),
+                )
+                await db.commit()
+                return (cursor.rowcount or 0) > 0
+
+    async def get_sticky_pin_expiries(self) -> List[Tuple[int, datetime]]:
+        """``(channel_id, expires_at)`` for every sticky pin that expires."""
+        async with self.get_connection() as db:
+            cursor = await db.execute(
+                "SELECT channel_id, expires_at FROM sticky_pins WHERE expires_at IS NOT NULL"
+            )
+            rows = await cursor.fetchall()
+        expiries = []
+        for channel_id, expires_at in rows:
+            when = _as_utc(expires_at)
+            if when is not None:
+                expiries.append((int(channel_id), when))
+        return expiries
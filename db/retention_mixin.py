@@ -0,0 +1,245 @@
+"""Retention database methods (mixin for Database).
+
+The per-message telemetry tables (``user_messages``, ``automod_events``,
+``guild_member_events``) are append-only, so without pruning they grow the
+SQLite file, every ``VACUUM INTO`` snapshot and every Supabase upload forever.
+These methods delete rows past each guild's retention policy in bounded
+batches and then hand the freed pages back to the filesystem.
+"""
+import asyncio
+import logging
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger("ModBot.Database.retention")
+
+# Settings keys and their defaults. 0 (or a negative/invalid value) disables
+# that limit for the guild.
+RETENTION_DEFAULTS: Dict[str, int] = {
+    "retention_user_messages_days": 30,
+    "retention_user_messages_per_user": 500,
+    "retention_automod_events_days": 180,
+    "retention_member_events_days": 365,
+    "retention_analytics_hourly_days": 30,
+}
+
+# table -> (primary key, timestamp column, age setting key)
+_RETENTION_TABLES = {
+    "user_messages": ("message_id", "timestamp", "retention_user_messages_days"),
+    "automod_events": ("id", "created_at", "retention_automod_events_days"),
+    "guild_member_events": ("id", "created_at", "retention_member_events_days"),
+}
+
+
+def retention_policy(settings: Dict[str, Any]) -> Dict[str, int]:
+    """Resolve a guild's retention limits from its settings."""
+    policy: Dict[str, int] = {}
+    for key, default in RETENTION_DEFAULTS.items():
+        try:
+            value = int(settings.get(key, default))
+        except (TypeError, ValueError):
+            value = default
+        policy[key] = max(0, value)
+    return policy
+
+
+def _sql_timestamp(value: datetime) -> str:
+    """Format like SQLite's CURRENT_TIMESTAMP (UTC) so text comparison works."""
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class RetentionMixin:
+    async def prune_telemetry(
+        self,
+        guild_ids: Optional[Iterable[int]] = None,
+        *,
+        batch_size: int = 500,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, int]:
+        """Delete telemetry rows past each guild's retention policy.
+
+        Deletes run in batches of ``batch_size``; on SQLite the shared
+        connection lock is released between batches so other writers are never
+        held up for more than one batch. Returns rows deleted per table.
+        """
+        batch_size = max(1, int(batch_size))
+        now = now or datetime.now(timezone.utc)
+        await self.flush_pending_writes()
+
+        if guild_ids is None:
+            guild_ids = await self._telemetry_guild_ids()
+        pruned = {table: 0 for table in _RETENTION_TABLES}
+        for guild_id in guild_ids:
+            policy = retention_policy(await self.get_settings_view(int(guild_id)))
+            for table, (key_column, time_column, setting_key) in _RETENTION_TABLES.items():
+                days = policy[setting_key]
+                if not days:
+                    continue
+                pruned[table] += await self._delete_in_batches(
+                    f"""
+                    DELETE FROM {table} WHERE {key_column} IN (
+                        SELECT {key_column} FROM {table}
+                        WHERE guild_id = ? AND {time_column} < ?
+                        LIMIT ?
+                    )
+                    """,
+                    (int(guild_id), _sql_timestamp(now - timedelta(days=days))),
+                    batch_size,
+                )
+            per_user = policy["retention_user_messages_per_user"]
+            if per_user:
+                pruned["user_messages"] += await self._cap_user_messages(int(guild_id), per_user, batch_size)
+
+        vacuumed_pages = await self._reclaim_free_pages() if any(pruned.values()) else 0
+        totals = self._retention_stats.setdefault("pruned_total", {table: 0 for table in _RETENTION_TABLES})
+        for table, count in pruned.items():
+            totals[table] = totals.get(table, 0) + count
+        self._retention_stats.update(
+            last_run_at=now.isoformat(),
+            last_pruned=dict(pruned),
+            last_vacuumed_pages=vacuumed_pages,
+        )
+        if any(pruned.values()):
+            logger.info("Retention pruned %s (%d pages reclaimed)", pruned, vacuumed_pages)
+        return pruned
+
+    async def _telemetry_guild_ids(self) -> list[int]:
+        guild_ids: set[int] = set()
+        async with self.get_connection() as db:
+            for table in _RETENTION_TABLES:
+                cursor = await db.execute(f"SELECT DISTINCT guild_id FROM {table}")
+                guild_ids.update(int(row[0]) for row in await cursor.fetchall())
+        return sorted(guild_ids)
+
+    async def _delete_batch(self, sql: str, params: tuple) -> int:
+        async with (nullcontext() if self._is_postgres else self._lock):
+            async with self.get_connection() as db:
+                cursor = await db.execute(sql, params)
+                await db.commit()
+        return max(0, cursor.rowcount or 0)
+
+    async def _delete_in_batches(self, sql: str, params: tuple, batch_size: int) -> int:
+        deleted = 0
+        while True:
+            count = await self._delete_batch(sql, (*params, batch_size))
+            deleted += count
+            if count < batch_size:
+                return deleted
+            # Let queued writers take the connection between batches.
+            await asyncio.sleep(0)
+
+    async def _cap_user_messages(self, guild_id: int, per_user: int, batch_size: int) -> int:
+        async with self.get_connection() as db:
+            cursor = await db.execute(
+                """
+                SELECT user_id, COUNT(*) FROM user_messages
+                WHERE guild_id = ?
+                GROUP BY user_id
+                HAVING COUNT(*) > ?
+                """,
+                (guild_id, per_user),
+            )
+            over_cap = [(int(row[0]), int(row[1]) - per_user) for row in await cursor.fetchall()]
+
+        deleted = 0
+        for user_id, excess in over_cap:
+            # Message ids are snowflakes, so ascending id is oldest first.
+            while excess > 0:
+                count = await self._delete_batch(
+                    """
+                    DELETE FROM user_messages WHERE message_id IN (
+                        SELECT message_id FROM user_messages
+                        WHERE guild_id = ? AND user_id = ?
+                        ORDER BY message_id ASC
+                        LIMIT ?
+                    )
+                    """,
+                    (guild_id, user_id, min(excess, batch_size)),
+                )
+                if not count:
+                    break
+                deleted += count
+                excess -= count
+                await asyncio.sleep(0)
+        return deleted
+
+    async def _reclaim_free_pages(self) -> int:
+        """Return free pages to the filesystem after a prune (SQLite only).
+
+        PostgreSQL reclaims dead tuples through autovacuum, so nothing runs
+        there. On SQLite each pass runs a bounded ``incremental_vacuum``.
+        Files created before ``auto_vacuum=INCREMENTAL`` was set are skipped:
+        switching them takes a full VACUUM that rewrites the file and stalls
+        every other query, so it only runs from ``convert_to_incremental_vacuum``.
+        """
+        if self._is_postgres:
+            return 0
+        max_pages = self._retention_vacuum_pages
+        async with self._lock:
+            async with self.get_connection() as db:
+                cursor = await db.execute("PRAGMA freelist_count")
+                free_pages = int((await cursor.fetchone())[0])
+                if not free_pages:
+                    return 0
+                cursor = await db.execute("PRAGMA auto_vacuum")
+                mode = int((await cursor.fetchone())[0])
+                if mode != 2:
+                    if not self._retention_vacuum_skip_logged:
+                        self._retention_vacuum_skip_logged = True
+                        logger.info(
+                            "SQLite auto_vacuum is not INCREMENTAL; free pages are not reclaimed "
+                            "until the owner runs the compactdb maintenance command"
+                        )
+                    return 0
+                # The pragma frees one page per step; drain it to run them all.
+                cursor = await db.execute(f"PRAGMA incremental_vacuum({int(max_pages)})")
+                await cursor.fetchall()
+                await db.commit()
+                return min(free_pages, max_pages)
+
+    async def convert_to_incremental_vacuum(self) -> Dict[str, int]:
+        """Switch an older SQLite file to ``auto_vacuum=INCREMENTAL``.
+
+        Runs one full VACUUM, which rewrites the whole file and blocks every
+        other query meanwhile, so it is an explicit maintenance step rather
+        than part of the retention loop. Returns the page counts before and
+        after (both 0 on PostgreSQL).
+        """
+        if self._is_postgres:
+            return {"pages_before": 0, "pages_after": 0}
+        # Keep write-behind flushes out so no implicit transaction is open
+        # when VACUUM runs.
+        async with self._write_behind.held():
+            async with self._lock:
+                async with self.get_connection() as db:
+                    cursor = await db.execute("PRAGMA page_count")
+                    before = int((await cursor.fetchone())[0])
+                    await db.commit()
+                    await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                    await db.execute("VACUUM")
+                    cursor = await db.execute("PRAGMA page_count")
+                    after = int((await cursor.fetchone())[0])
+        self._retention_vacuum_skip_logged = False
+        logger.info("Converted SQLite file to incremental auto_vacuum (%d -> %d pages)", before, after)
+        return {"pages_before": before, "pages_after": after}
+
+    async def _retention_loop(self) -> None:
+        """Periodic retention pass; started by init_pool."""
+        try:
+            while self._pool is not None:
+                await asyncio.sleep(self._retention_interval_seconds)
+                try:
+                    await self.prune_telemetry()
+                except Exception as exc:
+                    logger.error("Retention pass failed: %s", exc)
+                try:
+                    await self.prune_analytics_rollups()
+                except Exception as exc:
+                    logger.error("Analytics rollup pruning failed: %s", exc)
+                try:
+                    await self.collect_attachment_garbage()
+                except Exception as exc:
+                    logger.error("Attachment store collection failed: %s", exc)
+        except asyncio.CancelledError:
+            raise
@@ -0,0 +1,154 @@
+"""Write-behind buffer for high-volume telemetry inserts (used by Database).
+
+Per-message rows (behaviour-profiling messages, AutoMod events, member
+joins/leaves) used to pay one INSERT and one COMMIT each. On SQLite every one
+of those commits contends for the single shared connection and a WAL fsync.
+The buffer collects rows per statement and writes each statement's rows with
+one ``executemany`` and one commit, every ``flush_rows`` rows or
+``flush_interval`` seconds, whichever comes first.
+
+Counters (the analytics rollups) are coalesced instead: ``increment`` sums
+amounts per key in memory, so a busy channel writes one upsert per bucket per
+flush rather than one per message.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("ModBot.Database.write_behind")
+
+RowWriter = Callable[[str, List[Sequence[Any]]], Awaitable[None]]
+
+
+class WriteBehindBuffer:
+    """Batch rows per SQL statement and flush them in the background.
+
+    Rows for one statement are written in the order they were added; flushes
+    never overlap, so a later batch cannot land before an earlier one. When
+    ``max_rows`` are pending, ``add`` waits for a flush before queueing more.
+    Column defaults such as ``CURRENT_TIMESTAMP`` are evaluated at flush time,
+    so they can lag the event by up to ``flush_interval``.
+    """
+
+    def __init__(
+        self,
+        writer: RowWriter,
+        *,
+        flush_rows: int = 200,
+        flush_interval: float = 0.25,
+        max_rows: int = 5000,
+    ) -> None:
+        self._writer = writer
+        self.max_rows = max(1, int(max_rows))
+        self.flush_rows = min(max(1, int(flush_rows)), self.max_rows)
+        self.flush_interval = max(0.0, float(flush_interval))
+        self._rows: Dict[str, List[Sequence[Any]]] = {}
+        self._counters: Dict[str, Dict[Tuple[Any, ...], int]] = {}
+        self._counter_keys = 0
+        self._pending = 0
+        self._flush_lock = asyncio.Lock()
+        self._has_rows = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def add(self, sql: str, row: Sequence[Any]) -> None:
+        """Queue one row for ``sql``; waits for a flush if the buffer is full."""
+        while self._pending >= self.max_rows:
+            await self.flush()
+        self._rows.setdefault(sql, []).append(tuple(row))
+        self._pending += 1
+        self._has_rows.set()
+        if self._pending >= self.flush_rows:
+            self._full.set()
+        self._ensure_task()
+
+    async def increment(self, sql: str, key: Sequence[Any], amount: int = 1) -> None:
+        """Add ``amount`` to the counter ``key`` for ``sql``.
+
+        At flush time each counter is written once as ``(*key, total)``, so
+        ``sql`` must take the amount as its last parameter.
+        """
+        key = tuple(key)
+        counters = self._counters.setdefault(sql, {})
+        while key not in counters and self._counter_keys >= self.max_rows:
+            await self.flush()
+            # Another increment may have added the key while this one waited.
+            counters = self._counters.setdefault(sql, {})
+        if key not in counters:
+            counters[key] = 0
+            self._counter_keys += 1
+        counters[key] += amount
+        self._has_rows.set()
+        self._ensure_task()
+
+    async def flush(self) -> None:
+        """Write everything queued so far."""
+        async with self._flush_lock:
+            await self._flush_locked()
+
+    async def _flush_locked(self) -> None:
+        if not self._pending and not self._counter_keys:
+            return
+        batches, self._rows, self._pending = self._rows, {}, 0
+        counters, self._counters, self._counter_keys = self._counters, {}, 0
+        self._has_rows.clear()
+        self._full.clear()
+        for sql, rows in batches.items():
+            try:
+                await self._writer(sql, rows)
+            except Exception as exc:
+                logger.error("Write-behind flush dropped %d row(s): %s", len(rows), exc)
+        # Counters go after the rows they summarize.
+        for sql, totals in counters.items():
+            try:
+                await self._writer(sql, [(*key, amount) for key, amount in totals.items()])
+            except Exception as exc:
+                logger.error("Write-behind flush dropped %d counter(s): %s", len(totals), exc)
+
+    @asynccontextmanager
+    async def held(self) -> AsyncIterator[None]:
+        """Flush, then keep further flushes out until the block exits.
+
+        Callers that rebuild data from what has been written use this so a
+        batch cannot land halfway through; ``add`` and ``increment`` keep
+        queueing meanwhile.
+        """
+        async with self._flush_lock:
+            await self._flush_locked()
+            yield
+
+    async def close(self) -> None:
+        """Stop the background flusher and drain whatever is still queued."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            # Cancel only between flushes so an in-flight batch is not lost.
+            async with self._flush_lock:
+                task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def _ensure_task(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                await self._has_rows.wait()
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                await self.flush()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error("Write-behind flusher crashed: %s", exc)
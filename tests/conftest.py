@@ -1,6 +1,13 @@
-"""Make the project root importable and keep provider tests offline."""
+"""Make the project root importable, keep provider tests offline, and share
+the helpers most test files need.
+
+pytest-asyncio is not installed here, so async tests drive their coroutines
+with ``run``; database tests get throwaway SQLite files from ``make_db``.
+Import ``run`` with ``from conftest import run``.
+"""
 from __future__ import annotations
 
+import asyncio
 import os
 import sys
 
@@ -11,6 +18,41 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
 
+def run(coro):
+    """Drive a coroutine to completion on a fresh event loop, then close it."""
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def make_db(tmp_path, monkeypatch):
+    """A factory for SQLite ``Database`` instances under ``tmp_path``.
+
+    ``path`` overrides the database file (``modbot.db`` by default), ``env``
+    sets environment variables read at construction, ``buffer`` overrides
+    write-behind buffer attributes, and any other keyword is set on the
+    database itself. The retention loop is off unless ``env`` turns it on.
+    """
+    monkeypatch.setenv("DB_MODE", "sqlite")
+    monkeypatch.setenv("RETENTION_INTERVAL_SECONDS", "0")
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("ATTACHMENT_STORE_DIR", raising=False)
+
+    def factory(path=None, *, env=None, buffer=None, **attributes):
+        from database import Database
+
+        for key, value in (env or {}).items():
+            monkeypatch.setenv(key, value)
+        db = Database()
+        db.db_path = str(path or tmp_path / "modbot.db")
+        for key, value in (buffer or {}).items():
+            setattr(db._write_behind, key, value)
+        for key, value in attributes.items():
+            setattr(db, key, value)
+        return db
+
+    return factory
+
+
 @pytest.fixture
 def parser():
     """A bare instance of the routing/parsing mixin.
@@ -32,24 +74,36 @@ def pytest_addoption(parser):
         default=False,
         help="Also run tests that make real calls to configured AI vendors.",
     )
+    parser.addoption(
+        "--bench",
+        action="store_true",
+        default=False,
+        help="Also run the long synthetic-load benchmarks.",
+    )
 
 
 def pytest_configure(config):
     config.addinivalue_line(
         "markers", "live: makes real network calls to configured AI providers"
     )
+    config.addinivalue_line(
+        "markers", "bench: long synthetic-load benchmark, reports timings"
+    )
 
 
 def pytest_collection_modifyitems(config, items):
-    """Keep vendor-dialling tests out of the default run.
+    """Keep vendor-dialling tests and long benchmarks out of the default run.
 
-    They cost tokens and fail on a flaky network, so they must be opt-in -- but
-    they are the only tests that can notice an expired key, which is exactly
-    how the moderation lane once broke while every unit test stayed green.
+    Live tests cost tokens and fail on a flaky network, so they must be opt-in
+    -- but they are the only tests that can notice an expired key, which is
+    exactly how the moderation lane once broke while every unit test stayed
+    green. Benchmarks replay tens of thousands of synthetic events; they are
+    for measuring, not for gating every run.
     """
-    if config.getoption("--live"):
-        return
-    skip = pytest.mark.skip(reason="needs --live (makes real provider calls)")
+    skip_live = pytest.mark.skip(reason="needs --live (makes real provider calls)")
+    skip_bench = pytest.mark.skip(reason="needs --bench (long synthetic-load run)")
     for item in items:
-        if "live" in item.keywords:
-            item.add_marker(skip)
+        if "live" in item.keywords and not config.getoption("--live"):
+            item.add_marker(skip_live)
+        if "bench" in item.keywords and not config.getoption("--bench"):
+            item.add_marker(skip_bench)
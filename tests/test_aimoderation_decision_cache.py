@@ -0,0 +1,243 @@
+"""Singleflight and short-TTL reuse of intent and routing answers.
+
+A spam wave or copy-paste raid sends the same text hundreds of times within
+seconds, and ``classify_intent`` paid for a model call per message. Identical
+prompts now share one in-flight call and, for a short TTL, one stored answer;
+a guild can opt out. These tests stand a counting stub in for the provider and
+push a synthetic burst of 1,000 duplicate messages through it.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import types as _types
+from unittest.mock import MagicMock
+
+import pytest
+
+import cogs.aimoderation.ai_client as ai_client
+from cogs.aimoderation.ai_client import AIClient
+from cogs.aimoderation.types import AIConfig, DecisionType, GuildSettings, MentionInfo, PermissionFlags
+from utils.cache import SingleFlightCache
+from conftest import run
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubProvider:
+    """Counts model calls; each one takes a little while, like the real thing."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    async def __call__(self, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return self.reply
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(ai_client, "_OPENROUTER_API_KEY", "sk-or-v1-real")
+    monkeypatch.setattr(ai_client, "_OPENROUTER_CHAT_MODEL", "vendor/talk")
+    return AIClient(_types.SimpleNamespace(user=None, loop=None, session=None), AIConfig())
+
+
+# --- SingleFlightCache ------------------------------------------------------
+
+def test_concurrent_callers_share_one_call_and_errors_are_not_stored():
+    cache = SingleFlightCache(16, ttl=30)
+    calls = []
+
+    async def fail():
+        calls.append("fail")
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream 500")
+
+    async def body():
+        results = await asyncio.gather(
+            *(cache.get_or_call("k", fail) for _ in range(5)), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        async def ok():
+            calls.append("ok")
+            return "fine"
+
+        return await cache.get_or_call("k", ok)
+
+    assert run(body()) == "fine"
+    assert calls == ["fail", "ok"]
+    assert (cache.misses, cache.coalesced, len(cache)) == (2, 4, 1)
+
+
+def test_stored_answers_expire_and_none_is_never_stored():
+    clock = FakeClock()
+    cache = SingleFlightCache(16, ttl=30, clock=clock)
+    provider = StubProvider("answer")
+
+    async def body():
+        await cache.get_or_call("k", provider)
+        clock.now += 29
+        await cache.get_or_call("k", provider)
+        clock.now += 2
+        await cache.get_or_call("k", provider)
+        empty = StubProvider(None)
+        await cache.get_or_call("none", empty)
+        await cache.get_or_call("none", empty)
+        return empty.calls
+
+    assert run(body()) == 2
+    assert provider.calls == 2 and cache.hits == 1
+
+
+# --- classify_intent --------------------------------------------------------
+
+def burst(client, texts, **kwargs):
+    async def body():
+        return await asyncio.gather(*(client.classify_intent(text, **kwargs) for text in texts))
+
+    return run(body())
+
+
+def test_burst_of_1000_duplicates_costs_one_model_call(client):
+    provider = StubProvider('{"route":"normal","moderation":"none"}')
+    client._post_chat_completion = provider
+    # Copy-paste raids vary spacing and case; both normalize away.
+    texts = ["FREE nitro at  example.gg", "free nitro at example.gg"] * 500
+
+    results = burst(client, texts)
+
+    assert provider.calls == 1
+    assert all(result["route"] == "normal" for result in results)
+    stats = client.decision_cache_stats()["Intent"]
+    assert stats["misses"] == 1
+    assert stats["hits"] + stats["coalesced"] == 999
+    assert stats["coalesce_rate"] == "99.90%"
+
+    # Later duplicates inside the TTL are plain hits.
+    burst(client, texts[:10])
+    assert provider.calls == 1
+    assert client.decision_cache_stats()["Intent"]["hits"] == stats["hits"] + 10
+
+
+def test_opted_out_guilds_call_the_model_every_time(client):
+    provider = StubProvider('{"route":"search","moderation":"none"}')
+    client._post_chat_completion = provider
+
+    burst(client, ["what's the weather"] * 1000, use_cache=False)
+
+    assert provider.calls == 1000
+    assert client.decision_cache_stats()["Intent"]["misses"] == 0
+
+
+def test_callers_get_their_own_copy_of_a_cached_answer(client):
+    client._post_chat_completion = StubProvider('{"route":"normal","moderation":"none"}')
+    first, second = burst(client, ["hello", "hello"])
+    first["route"] = "research"
+    assert second["route"] == "normal"
+    assert burst(client, ["hello"])[0]["route"] == "normal"
+
+
+# --- choose_action ----------------------------------------------------------
+
+def member(user_id):
+    author = MagicMock()
+    author.id, author.name, author.bot, author.roles = user_id, f"user{user_id}", False, []
+    return author
+
+
+def test_routing_reuse_is_scoped_to_author_mentions_and_policy(client):
+    guild = MagicMock()
+    guild.id, guild.name, guild.member_count = 111, "Guild", 10
+    provider = StubProvider(json.dumps({"type": "tool_call", "tool": "warn_member", "arguments": {}}))
+    client._call = provider
+    settings = GuildSettings(enabled=True)
+
+    def choose(author, mentions=(), policy=settings.policy_hash(), use_cache=True):
+        return client.choose_action(
+            user_content="warn  <@5> for spam",
+            guild=guild,
+            author=author,
+            mentions=list(mentions),
+            recent_messages=[],
+            permissions=PermissionFlags(moderate_members=True),
+            use_cache=use_cache,
+            policy_key=policy,
+        )
+
+    async def body():
+        same = await asyncio.gather(*(choose(member(1)) for _ in range(50)))
+        await choose(member(2))
+        await choose(member(1), mentions=[MentionInfo(index=1, user_id=5)])
+        changed = GuildSettings(enabled=True, model="other").policy_hash()
+        await choose(member(1), policy=changed)
+        await choose(member(1), use_cache=False)
+        return same
+
+    decisions = run(body())
+    assert all(decision.type is DecisionType.TOOL_CALL for decision in decisions)
+    assert decisions[0] is not decisions[1]
+    assert provider.calls == 5
+
+
+def test_same_text_replying_to_different_members_is_routed_again(client):
+    guild = MagicMock()
+    guild.id, guild.name, guild.member_count = 111, "Guild", 10
+    channel = _types.SimpleNamespace(id=222)
+    targets = iter([11, 12])
+    provider = StubProvider(None)
+
+    async def route(*args, **kwargs):
+        provider.calls += 1
+        return json.dumps({"type": "tool_call", "tool": "ban_member", "arguments": {"user_id": next(targets)}})
+
+    client._call = route
+
+    def said(message_id, text, *, replying_to=None, author_id=1):
+        return _types.SimpleNamespace(
+            id=message_id,
+            channel=channel,
+            content=text,
+            author=_types.SimpleNamespace(id=author_id, bot=False, display_name=f"user{author_id}"),
+            reference=_types.SimpleNamespace(message_id=replying_to, resolved=None) if replying_to else None,
+        )
+
+    history = [said(100, "spam spam", author_id=11), said(101, "more spam", author_id=12)]
+
+    def choose(message):
+        return client.choose_action(
+            user_content="ban him",
+            guild=guild,
+            author=member(1),
+            mentions=[],
+            recent_messages=[*history, message],
+            permissions=PermissionFlags(ban_members=True),
+            use_cache=True,
+            source_message=message,
+        )
+
+    async def body():
+        first = await choose(said(102, "ban him", replying_to=100))
+        second = await choose(said(103, "ban him", replying_to=101))
+        return first, second
+
+    first, second = run(body())
+    assert provider.calls == 2
+    assert first.arguments["user_id"] == 11
+    assert second.arguments["user_id"] == 12
+
+
+def test_decision_cache_setting_round_trips():
+    assert GuildSettings().decision_cache is True
+    settings = GuildSettings.from_dict({"aimod_decision_cache": "off"})
+    assert settings.decision_cache is False
+    assert settings.to_dict()["aimod_decision_cache"] is False
+    assert settings.policy_hash() != GuildSettings().policy_hash()
@@ -0,0 +1,243 @@
+"""Debounced, batched conversation-memory summarization.
+
+``_schedule_memory_update`` started one summarization call per conversation
+turn, so a quick 20-message exchange paid for 20 calls that each re-wrote
+nearly the same profile. Turns now collect per (guild, user) until the user
+goes quiet or a turn cap is hit, and one call merges them all; pending turns
+are written on close. These tests drive the batcher with a fake clock and
+count calls against a stub provider for scripted conversation patterns.
+"""
+from __future__ import annotations
+
+import asyncio
+import types as _types
+
+import pytest
+
+import cogs.aimoderation.ai_client as ai_client
+from cogs.aimoderation.ai_client import AIClient
+from cogs.aimoderation.memory_batcher import MemoryTurnBatcher
+from cogs.aimoderation.types import AIConfig, ConversationMode, ConversationSignals
+from conftest import run
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubProvider:
+    """Stands in for the protected OpenRouter call; records each prompt."""
+
+    def __init__(self, reply="- Likes roguelike games"):
+        self.reply = reply
+        self.prompts = []
+
+    async def __call__(self, messages, **kwargs):
+        self.prompts.append(messages[-1]["content"])
+        return self.reply
+
+
+class MemoryStore:
+    def __init__(self):
+        self.memory = {}
+        self.writes = []
+
+    async def get_ai_memory(self, user_id):
+        return self.memory.get(user_id)
+
+    async def update_ai_memory(self, user_id, text):
+        self.memory[user_id] = text
+        self.writes.append(user_id)
+
+
+@pytest.fixture
+def harness(monkeypatch):
+    monkeypatch.setattr(ai_client, "_OPENROUTER_API_KEY", "sk-or-v1-real")
+    clock = FakeClock()
+    provider = StubProvider()
+    store = MemoryStore()
+    bot = _types.SimpleNamespace(user=None, loop=None, session=None, db=store)
+    client = AIClient(bot, AIConfig(memory_quiet_seconds=90, memory_batch_turns=8))
+    client._call_openrouter_protected = provider
+    client._memory_batcher._clock = clock
+    return client, clock, provider, store
+
+
+def author(user_id, guild_id=1):
+    return _types.SimpleNamespace(id=user_id, guild=_types.SimpleNamespace(id=guild_id))
+
+
+def say(client, who, n):
+    client._schedule_memory_update(
+        ConversationSignals(ConversationMode.QUICK, 1.0),
+        who,
+        f"message number {n} about speedrunning",
+        f"reply {n}",
+        "",
+    )
+
+
+def test_a_rapid_burst_is_summarized_in_turn_cap_batches(harness):
+    client, clock, provider, store = harness
+
+    async def body():
+        for n in range(20):
+            say(client, author(5), n)
+            clock.now += 2
+        await asyncio.gather(*client._memory_batcher._flushes)
+        mid_burst = len(provider.prompts)
+        clock.now += 90
+        await client._memory_batcher.flush_due()
+        await client.close()
+        return mid_burst
+
+    mid_burst = run(body())
+    # 20 turns: two full batches of 8 while talking, then the quiet remainder.
+    assert mid_burst == 2
+    assert len(provider.prompts) == 3
+    assert provider.prompts[0].count("User said:") == 8
+    assert provider.prompts[2].count("User said:") == 4
+    assert "message number 19" in provider.prompts[2]
+    assert store.memory[5] == "- Likes roguelike games"
+
+
+def test_nothing_is_summarized_until_the_user_goes_quiet(harness):
+    client, clock, provider, _store = harness
+    batcher = client._memory_batcher
+
+    async def body():
+        say(client, author(5), 0)
+        clock.now += 60
+        say(client, author(5), 1)
+        clock.now += 60
+        assert await batcher.flush_due() == 0
+        clock.now += 30
+        assert await batcher.flush_due() == 1
+        # A later conversation starts its own batch.
+        clock.now += 600
+        say(client, author(5), 2)
+        clock.now += 90
+        await batcher.flush_due()
+        await client.close()
+
+    run(body())
+    assert len(provider.prompts) == 2
+    assert provider.prompts[0].count("User said:") == 2
+    assert "message number 2" in provider.prompts[1]
+
+
+def test_users_and_guilds_are_batched_separately(harness):
+    client, clock, provider, store = harness
+
+    async def body():
+        for n in range(3):
+            say(client, author(5, guild_id=1), n)
+            say(client, author(6, guild_id=1), n)
+            say(client, author(5, guild_id=2), n)
+        clock.now += 90
+        await client._memory_batcher.flush_due()
+        await client.close()
+
+    run(body())
+    assert len(provider.prompts) == 3
+    assert all(prompt.count("User said:") == 3 for prompt in provider.prompts)
+    assert sorted(store.writes) == [5, 5, 6]
+
+
+def test_close_flushes_pending_turns_into_the_latest_memory(harness):
+    client, clock, provider, store = harness
+    store.memory[5] = "- Written by the memory scanner"
+
+    async def body():
+        say(client, author(5), 0)
+        say(client, author(5), 1)
+        say(client, author(6), 0)
+        await client.close()
+
+    run(body())
+    assert len(provider.prompts) == 2
+    assert "- Written by the memory scanner" in provider.prompts[0]
+    assert client._memory_batcher.pending((1, 5)) == 0
+
+
+def test_failed_summary_falls_back_to_a_raw_log_of_every_turn(harness):
+    client, clock, provider, store = harness
+    provider.reply = None
+
+    async def body():
+        say(client, author(5), 0)
+        say(client, author(5), 1)
+        await client.flush_memory_updates()
+
+    run(body())
+    assert store.memory[5].count("[user]: message number") == 2
+
+
+def test_ticker_flushes_quiet_batches_in_the_background():
+    flushed = []
+
+    async def on_flush(key, turns, stored_memory):
+        flushed.append((key, len(turns)))
+
+    async def body():
+        batcher = MemoryTurnBatcher(on_flush, quiet_seconds=0.02, max_turns=8, tick_seconds=0.01)
+        batcher.add("k", "hello there", "hi")
+        batcher.add("k", "how are you", "good")
+        await asyncio.sleep(0.1)
+        await batcher.close()
+
+    run(body())
+    assert flushed == [("k", 2)]
+
+
+def test_close_flushes_pending_batches_concurrently_with_a_bound():
+    active = []
+    peak = []
+    flushed = []
+
+    async def on_flush(key, turns, stored_memory):
+        active.append(key)
+        peak.append(len(active))
+        await asyncio.sleep(0.05)
+        active.remove(key)
+        flushed.append(key)
+
+    async def body():
+        batcher = MemoryTurnBatcher(on_flush, quiet_seconds=90, max_turns=8, flush_concurrency=4)
+        for n in range(12):
+            batcher.add(n, "hello there", "hi")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        abandoned = await batcher.close(timeout=5)
+        return abandoned, loop.time() - started
+
+    abandoned, elapsed = run(body())
+    assert abandoned == 0
+    assert sorted(flushed) == list(range(12))
+    assert max(peak) == 4
+    # Three waves of four, not twelve calls in a row.
+    assert elapsed < 12 * 0.05
+
+
+def test_close_counts_and_logs_the_batches_it_abandons(caplog):
+    flushed = []
+
+    async def on_flush(key, turns, stored_memory):
+        await asyncio.sleep(1.0 if key == "slow" else 0)
+        flushed.append(key)
+
+    async def body():
+        batcher = MemoryTurnBatcher(on_flush, quiet_seconds=90, max_turns=8, flush_concurrency=2)
+        for key in ("fast", "slow", "quick"):
+            batcher.add(key, "hello there", "hi")
+        return await batcher.close(timeout=0.05)
+
+    with caplog.at_level("WARNING", logger="ModBot.AIModeration.Client"):
+        abandoned = run(body())
+    assert abandoned == 1
+    assert sorted(flushed) == ["fast", "quick"]
+    assert "Abandoned 1 pending memory batch" in caplog.text
@@ -0,0 +1,282 @@
+"""Watermark-driven, budgeted memory scanning.
+
+``run_memory_scanner`` re-read the last 50 messages of every text channel in
+every guild, serially, each 30 minutes, and re-summarized server and user
+memory even when nothing had been said since. It now keeps a per-channel and
+per-user high-water mark in ``memory_scan_watermarks``, skips channels with
+nothing new, scans guilds with a small worker pool, and stops at a per-cycle
+token budget. These tests use a real SQLite database and count model calls.
+"""
+from __future__ import annotations
+
+import asyncio
+import types as _types
+
+import pytest
+
+import cogs.aimoderation.ai_client as ai_client
+from cogs.aimoderation.ai_client import AIClient
+from cogs.aimoderation.types import AIConfig
+from database import Database
+from conftest import run
+
+READABLE = _types.SimpleNamespace(read_messages=True, read_message_history=True)
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.name = f"channel-{channel_id}"
+
+    def permissions_for(self, member):
+        return READABLE
+
+
+class FakeGuild:
+    def __init__(self, guild_id, channel_count):
+        self.id = guild_id
+        self.name = f"Guild {guild_id}"
+        self.member_count = 100
+        self.me = object()
+        self.text_channels = [FakeChannel(guild_id * 1000 + n) for n in range(channel_count)]
+
+    def get_member(self, user_id):
+        return None
+
+
+class CountingModel:
+    """Stands in for ``AIClient._call``; records every curation prompt."""
+
+    def __init__(self, fail_server=False):
+        self.prompts = []
+        self.fail_server = fail_server
+        self.concurrent = 0
+        self.peak = 0
+
+    async def __call__(self, messages, **kwargs):
+        self.prompts.append(messages[-1]["content"])
+        self.concurrent += 1
+        self.peak = max(self.peak, self.concurrent)
+        await asyncio.sleep(0.005)
+        self.concurrent -= 1
+        if self.fail_server and messages[0]["content"].startswith("You are a community"):
+            return None
+        return "- remembers things"
+
+    @property
+    def server_calls(self):
+        return sum(prompt.startswith("SERVER NAME") for prompt in self.prompts)
+
+    @property
+    def user_calls(self):
+        return len(self.prompts) - self.server_calls
+
+
+@pytest.fixture
+def scanner(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_MODE", "sqlite")
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.setattr(ai_client, "_OPENROUTER_API_KEY", "sk-or-v1-real")
+
+    def factory(guilds, model):
+        db = Database()
+        db.db_path = str(tmp_path / "modbot.db")
+        bot = _types.SimpleNamespace(user=None, loop=None, session=None, db=db, guilds=guilds)
+        client = AIClient(bot, AIConfig())
+        client._call = model
+        return client, db
+
+    return factory
+
+
+_next_id = [10_000]
+
+
+async def post(db, guild, channel, user_id, text="talking about roguelike games today"):
+    _next_id[0] += 1
+    await db.track_user_message(_types.SimpleNamespace(
+        id=_next_id[0],
+        content=text,
+        guild=_types.SimpleNamespace(id=guild.id),
+        channel=_types.SimpleNamespace(id=channel.id),
+        author=_types.SimpleNamespace(id=user_id, bot=False),
+    ))
+
+
+def test_an_unchanged_guild_costs_no_model_calls(scanner):
+    guild = FakeGuild(1, channel_count=5)
+    model = CountingModel()
+    client, db = scanner([guild], model)
+
+    async def body():
+        await db.init_pool()
+        await db.init_guild(1)
+        try:
+            for n, channel in enumerate(guild.text_channels):
+                await post(db, guild, channel, user_id=100 + n)
+            first = await client.run_memory_scanner()
+            calls_after_first = len(model.prompts)
+            second = await client.run_memory_scanner()
+            return first, calls_after_first, second
+        finally:
+            await db.close()
+
+    first, calls_after_first, second = run(body())
+    assert (first["guilds"], first["channels"], first["users"]) == (1, 5, 5)
+    assert calls_after_first == 6
+    assert second == {"guilds": 0, "channels": 0, "users": 0, "deferred": 0, "tokens": 0}
+    assert len(model.prompts) == calls_after_first
+
+
+def test_work_scales_with_new_messages_not_channel_count(scanner):
+    guilds = [FakeGuild(1, channel_count=3), FakeGuild(2, channel_count=60)]
+    model = CountingModel()
+    client, db = scanner(guilds, model)
+
+    async def body():
+        await db.init_pool()
+        await db.init_guild(1)
+        try:
+            for guild in guilds:
+                for channel in guild.text_channels:
+                    await post(db, guild, channel, user_id=7)
+            await client.run_memory_scanner()
+            model.prompts.clear()
+
+            # One new message in one channel of the 60-channel guild.
+            big = guilds[1]
+            await post(db, big, big.text_channels[41], user_id=8, text="new topic: speedrunning")
+            stats = await client.run_memory_scanner()
+            return stats
+        finally:
+            await db.close()
+
+    stats = run(body())
+    assert (stats["guilds"], stats["channels"], stats["users"]) == (1, 1, 1)
+    assert (model.server_calls, model.user_calls) == (1, 1)
+    assert "new topic: speedrunning" in model.prompts[0] + model.prompts[1]
+    assert all("roguelike" not in prompt for prompt in model.prompts)
+
+
+def test_guilds_are_scanned_by_a_bounded_pool(scanner):
+    guilds = [FakeGuild(n, channel_count=1) for n in range(1, 13)]
+    model = CountingModel()
+    client, db = scanner(guilds, model)
+
+    async def body():
+        await db.init_pool()
+        await db.init_guild(1)
+        try:
+            for guild in guilds:
+                await post(db, guild, guild.text_channels[0], user_id=guild.id)
+            return await client.run_memory_scanner(concurrency=3)
+        finally:
+            await db.close()
+
+    stats = run(body())
+    assert stats["guilds"] == 12
+    assert 1 < model.peak <= 3
+
+
+def test_token_budget_defers_whole_guilds_to_the_next_cycle(scanner):
+    guilds = [FakeGuild(n, channel_count=2) for n in range(1, 5)]
+    model = CountingModel()
+    client, db = scanner(guilds, model)
+
+    async def body():
+        await db.init_pool()
+        await db.init_guild(1)
+        try:
+            for guild in guilds:
+                for channel in guild.text_channels:
+                    await post(db, guild, channel, user_id=guild.id)
+            first = await client.run_memory_scanner(concurrency=1, token_budget=5_000)
+            second = await client.run_memory_scanner(concurrency=1, token_budget=1_000_000)
+            third = await client.run_memory_scanner(concurrency=1)
+            return first, second, third
+        finally:
+            await db.close()
+
+    first, second, third = run(body())
+    assert 0 < first["guilds"] < 4 and first["deferred"] == 4 - first["guilds"]
+    assert first["tokens"] <= 5_000
+    assert second["guilds"] == first["deferred"] and second["deferred"] == 0
+    assert third["guilds"] == 0 and model.server_calls == 4
+
+
+def test_failed_server_summary_is_retried_without_redoing_users(scanner):
+    guild = FakeGuild(1, channel_count=2)
+    model = CountingModel(fail_server=True)
+    client, db = scanner([guild], model)
+
+    async def body():
+        await db.init_pool()
+        await db.init_guild(1)
+        try:
+            for n, channel in enumerate(guild.text_channels):
+                await post(db, guild, channel, user_id=100 + n)
+            failed = await client.run_memory_scanner()
+            model.fail_server = False
+            retried = await client.run_memory_scanner()
+            return failed, retried
+        finally:
+            await db.close()
+
+    failed, retried = run(body())
+    assert (failed["guilds"], failed["users"]) == (0, 2)
+    assert (retried["guilds"], retried["channels"], retried["users"]) == (1, 2, 0)
+    assert (model.server_calls, model.user_calls) == (2, 2)
+
+
+def test_an_author_in_two_guilds_is_folded_in_from_both(scanner):
+    first_guild, second_guild = FakeGuild(1, channel_count=1), FakeGuild(2, channel_count=1)
+    model = CountingModel()
+    client, db = scanner([first_guild, second_guild], model)
+
+    async def body():
+        await db.init_pool()
+        await db.init_guild(1)
+        await db.init_guild(2)
+        try:
+            # The older message is in the guild scanned second.
+            await post(db, second_guild, second_guild.text_channels[0], user_id=100, text="plays chess on sundays")
+            await post(db, first_guild, first_guild.text_channels[0], user_id=100, text="talking about roguelike games")
+            stats = await client.run_memory_scanner(concurrency=1)
+            return stats
+        finally:
+            await db.close()
+
+    stats = run(body())
+    assert (stats["guilds"], stats["users"]) == (2, 2)
+    user_prompts = [prompt for prompt in model.prompts if not prompt.startswith("SERVER NAME")]
+    assert any("plays chess on sundays" in prompt for prompt in user_prompts)
+
+
+def test_authors_cut_by_the_budget_are_read_again_next_cycle(scanner):
+    guild = FakeGuild(1, channel_count=1)
+    model = CountingModel()
+    client, db = scanner([guild], model)
+    channel = guild.text_channels[0]
+
+    async def body():
+        await db.init_pool()
+        await db.init_guild(1)
+        try:
+            # 100 is the most active author; 200 and 300 only fit a bigger budget.
+            for user_id in (100, 200, 100, 300, 100):
+                await post(db, guild, channel, user_id=user_id, text=f"member {user_id} chatting")
+            squeezed = await client.run_memory_scanner(token_budget=3_300)
+            squeezed_prompts = list(model.prompts)
+            caught_up = await client.run_memory_scanner(token_budget=1_000_000)
+            idle = await client.run_memory_scanner(token_budget=1_000_000)
+            return squeezed, squeezed_prompts, caught_up, idle, model.prompts[len(squeezed_prompts):]
+        finally:
+            await db.close()
+
+    squeezed, squeezed_prompts, caught_up, idle, later_prompts = run(body())
+    assert (squeezed["guilds"], squeezed["users"]) == (1, 1)
+    assert any("member 100" in prompt for prompt in squeezed_prompts if not prompt.startswith("SERVER NAME"))
+    assert caught_up["users"] == 2
+    user_prompts = [prompt for prompt in later_prompts if not prompt.startswith("SERVER NAME")]
+    assert all("member 100" not in prompt for prompt in user_prompts)
+    assert idle["guilds"] == 0 and idle["users"] == 0
@@ -0,0 +1,167 @@
+"""Pooled keep-alive session and SSE streaming in the chat-completions transport.
+
+``bot.session`` was never set, so ``_get_http_session`` opened (and closed) a
+new ClientSession for every AI call: a fresh TCP and TLS handshake each time,
+with the whole completion buffered before anyone saw a word. The transport now
+uses one pooled session per process, and ``on_delta`` streams SSE chunks as
+they arrive. These tests run a local aiohttp server that trickles chunked SSE,
+measure time-to-first-token against the full completion, and count the TCP
+connections the server sees.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import types as _types
+
+from aiohttp import web
+
+from cogs.aimoderation.ai_client import AIClient
+from cogs.aimoderation.types import AIConfig
+from utils.http import close_shared_session, shared_session
+from conftest import run
+
+CHUNK_DELAY = 0.05
+WORDS = ["Hello", " there", ",", " moderator", "."]
+
+
+def sse(data):
+    return f"data: {json.dumps(data)}\n\n".encode()
+
+
+class CompletionServer:
+    """Local OpenAI-compatible endpoint that streams when asked to."""
+
+    def __init__(self):
+        self.peers: list = []
+        self.payloads: list = []
+        self.runner = None
+        self.base_url = ""
+
+    async def handle(self, request):
+        self.peers.append(request.transport.get_extra_info("peername"))
+        payload = await request.json()
+        self.payloads.append(payload)
+        if not payload.get("stream"):
+            return web.json_response(
+                {"choices": [{"message": {"role": "assistant", "content": "".join(WORDS)}}]}
+            )
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        resp.enable_chunked_encoding()
+        await resp.prepare(request)
+        await resp.write(b": OPENROUTER PROCESSING\n\n")
+        for word in WORDS:
+            await resp.write(sse({"choices": [{"delta": {"content": word}}]}))
+            await asyncio.sleep(CHUNK_DELAY)
+        await resp.write(sse({
+            "choices": [{"delta": {"annotations": [
+                {"type": "url_citation", "url_citation": {"url": "https://example.com/a"}},
+            ]}}],
+        }))
+        await resp.write(b"data: [DONE]\n\n")
+        await resp.write_eof()
+        return resp
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/chat/completions", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+def make_client():
+    return AIClient(_types.SimpleNamespace(user=None, loop=None), AIConfig())
+
+
+async def complete(client, server, *, on_delta=None, include_citations=False):
+    return await client._post_chat_completion(
+        [{"role": "user", "content": "hi"}],
+        base_url=server.base_url,
+        api_key="sk-test",
+        model="vendor/talk",
+        temperature=0.2,
+        max_tokens=64,
+        provider_label="Local",
+        max_retries=0,
+        request_timeout=10,
+        include_citations=include_citations,
+        on_delta=on_delta,
+    )
+
+
+def test_streaming_delivers_the_first_token_before_the_completion_ends():
+    async def body():
+        server = CompletionServer()
+        await server.start()
+        client = make_client()
+        started = time.perf_counter()
+        deltas = []
+        first_token_at = None
+
+        async def on_delta(text):
+            nonlocal first_token_at
+            if first_token_at is None:
+                first_token_at = time.perf_counter() - started
+            deltas.append(text)
+
+        try:
+            content = await complete(client, server, on_delta=on_delta, include_citations=True)
+            total = time.perf_counter() - started
+        finally:
+            await close_shared_session()
+            await server.stop()
+        return server, deltas, content, first_token_at, total
+
+    server, deltas, content, first_token_at, total = run(body())
+    assert server.payloads[0]["stream"] is True
+    assert deltas == WORDS
+    assert content == "Hello there, moderator.\n\n__BOT_SOURCES__\n- https://example.com/a"
+    # The first word arrives before the remaining chunks have been written.
+    assert total >= CHUNK_DELAY * len(WORDS)
+    assert first_token_at < total - CHUNK_DELAY * (len(WORDS) - 2)
+
+
+def test_sequential_calls_reuse_one_pooled_connection():
+    async def body():
+        server = CompletionServer()
+        await server.start()
+        client = make_client()
+        try:
+            session, owned = client._get_http_session(timeout=10)
+            replies = [await complete(client, server) for _ in range(3)]
+
+            async def ignore(text):
+                return None
+
+            replies.append(await complete(client, server, on_delta=ignore))
+            same_session = client._get_http_session(timeout=10)[0] is session is shared_session()
+        finally:
+            await close_shared_session()
+            await server.stop()
+        return server, owned, same_session, replies
+
+    server, owned, same_session, replies = run(body())
+    assert not owned and same_session
+    assert replies == ["Hello there, moderator."] * 4
+    assert len(server.peers) == 4
+    assert len(set(server.peers)) == 1
+
+
+def test_bot_session_is_preferred_over_the_process_session():
+    async def body():
+        bot_session = shared_session()
+        client = AIClient(_types.SimpleNamespace(user=None, loop=None, session=bot_session), AIConfig())
+        try:
+            return client._get_http_session(timeout=5) == (bot_session, False)
+        finally:
+            await close_shared_session()
+
+    assert run(body())
@@ -0,0 +1,239 @@
+"""Indexed banned-profile lookup for alt detection.
+
+``AltDetectionEngine.check`` used to load every banned profile and run
+``SequenceMatcher`` against each one on every join. It now asks
+``BannedProfileIndex`` for the profiles sharing the most name trigrams (plus
+avatar matches) and scores only those. These tests pin the index's results to
+the old full scan on a fixture set, cover incremental ban/unban updates, and
+the ``bench`` test reports join-check latency at 100k banned profiles; run it
+with ``pytest --bench -s tests/test_alt_detection_index.py``.
+"""
+from __future__ import annotations
+
+import random
+import string
+import time
+import types as _types
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from cogs.alt_detection import (
+    NAME_SIMILARITY_THRESHOLD,
+    AltDetection,
+    AltDetectionEngine,
+    BannedProfileIndex,
+    _name_similarity,
+)
+from conftest import run
+
+SYLLABLES = ["dark", "shadow", "king", "xx", "lord", "ka", "ri", "to", "mo", "na", "pro", "gamer",
+             "_", "lil", "big", "the", "ez", "vex", "nyx", "zed", "ash", "ice", "toxic", "raid"]
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _username(rng):
+    name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4)))
+    if rng.random() < 0.4:
+        name += str(rng.randint(0, 9999))
+    if rng.random() < 0.3:
+        name += "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 5)))
+    return name[:32]
+
+
+def _mutate(rng, name):
+    chars = list(name)
+    for _ in range(rng.randint(1, 2)):
+        index = rng.randrange(len(chars) + 1)
+        op = rng.random()
+        if op < 0.4:
+            chars.insert(index, rng.choice(string.ascii_lowercase + string.digits + "_."))
+        elif op < 0.7 and len(chars) > 1:
+            chars.pop(min(index, len(chars) - 1))
+        else:
+            chars[min(index, len(chars) - 1)] = rng.choice(string.ascii_lowercase + string.digits)
+    return "".join(chars)
+
+
+def banned_profiles(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "user_id": 10_000 + n,
+            "username": _username(rng),
+            "avatar_hash": f"{rng.getrandbits(64):016x}" if rng.random() < 0.5 else None,
+            "banned_at": (T0 + timedelta(seconds=n)).isoformat(),
+            "banned_from_guilds": [1],
+        }
+        for n in range(count)
+    ]
+
+
+def joins(profiles, count, seed=1):
+    """Join names/avatars: near-copies of banned users, reused avatars and unrelated names."""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        roll = rng.random()
+        source = rng.choice(profiles)
+        if roll < 0.6:
+            result.append((_mutate(rng, source["username"]), None))
+        elif roll < 0.75:
+            result.append((_username(rng), source["avatar_hash"]))
+        else:
+            result.append((_username(rng), None))
+    return result
+
+
+def full_scan(profiles, name, avatar_hash):
+    """The pre-index engine loop, over every profile ordered by banned_at DESC."""
+    best_match, best_confidence = None, 0.0
+    for profile in sorted(profiles, key=lambda p: p["banned_at"], reverse=True):
+        confidence = 0.0
+        sim = _name_similarity(name, profile.get("username", ""))
+        if sim >= NAME_SIMILARITY_THRESHOLD:
+            confidence += sim * 0.5
+        if avatar_hash and profile.get("avatar_hash") and avatar_hash == profile["avatar_hash"]:
+            confidence += 0.4
+        if confidence > best_confidence:
+            best_confidence, best_match = confidence, profile
+    return best_confidence, best_match
+
+
+class FakeDB:
+    def __init__(self, profiles):
+        self.profiles = {p["user_id"]: p for p in profiles}
+        self.loads = 0
+
+    async def get_all_banned_profiles(self):
+        self.loads += 1
+        return sorted(self.profiles.values(), key=lambda p: p["banned_at"], reverse=True)
+
+    async def store_banned_profile(self, user_id, username, avatar_hash, guild_id):
+        profile = self.profiles.setdefault(user_id, {"user_id": user_id, "banned_from_guilds": []})
+        profile.update(username=username, avatar_hash=avatar_hash, banned_at=datetime.now(timezone.utc).isoformat())
+        if guild_id not in profile["banned_from_guilds"]:
+            profile["banned_from_guilds"].append(guild_id)
+
+    async def get_banned_profile(self, user_id):
+        return self.profiles.get(user_id)
+
+    async def remove_banned_profile_guild(self, user_id, guild_id):
+        profile = self.profiles.get(user_id)
+        if profile is None:
+            return None
+        profile["banned_from_guilds"] = [g for g in profile["banned_from_guilds"] if g != guild_id]
+        if not profile["banned_from_guilds"]:
+            del self.profiles[user_id]
+            return None
+        return profile
+
+
+def member(name, avatar_hash=None, user_id=1):
+    avatar = _types.SimpleNamespace(key=avatar_hash) if avatar_hash else None
+    return _types.SimpleNamespace(
+        id=user_id,
+        name=name,
+        avatar=avatar,
+        created_at=datetime.now(timezone.utc) - timedelta(days=365),
+    )
+
+
+# --- Parity -----------------------------------------------------------------
+
+def test_indexed_scores_match_the_full_scan():
+    profiles = banned_profiles(1000)
+    index = BannedProfileIndex()
+    index.extend(profiles)
+
+    agree = 0
+    cases = joins(profiles, 120)
+    for name, avatar_hash in cases:
+        expected_confidence, expected_match = full_scan(profiles, name, avatar_hash)
+        got_confidence, got_match = full_scan(index.candidates(name, avatar_hash), name, avatar_hash)
+        # The index only ever drops candidates, so it can never score higher.
+        assert got_confidence <= expected_confidence + 1e-9
+        if abs(got_confidence - expected_confidence) <= 0.02:
+            agree += 1
+        if avatar_hash and expected_match and expected_match.get("avatar_hash") == avatar_hash:
+            assert got_confidence >= 0.4
+    assert agree / len(cases) >= 0.98
+
+
+def test_engine_uses_the_index_and_loads_once():
+    profiles = banned_profiles(200)
+    db = FakeDB(profiles)
+    engine = AltDetectionEngine(_types.SimpleNamespace(db=db))
+    target = profiles[42]
+
+    result = run(engine.check(member(target["username"] + "1", target["avatar_hash"])))
+    run(engine.check(member("someone_else")))
+
+    assert db.loads == 1
+    assert result.is_suspect
+    assert result.matched_user["user_id"] == target["user_id"]
+
+
+# --- Incremental updates ----------------------------------------------------
+
+def test_ban_and_unban_update_the_index_incrementally():
+    db = FakeDB(banned_profiles(50))
+    bot = _types.SimpleNamespace(db=db)
+    cog = AltDetection(bot)
+    run(cog.engine.index.ensure_loaded(db))
+    guild_a, guild_b = _types.SimpleNamespace(id=1), _types.SimpleNamespace(id=2)
+    banned = _types.SimpleNamespace(id=777, name="evilraider", avatar=None)
+
+    run(cog.on_member_ban(guild_a, banned))
+    run(cog.on_member_ban(guild_b, banned))
+    assert run(cog.engine.check(member("evilraider2"))).matched_user["user_id"] == 777
+
+    run(cog.on_member_unban(guild_a, banned))
+    assert run(cog.engine.check(member("evilraider2"))).matched_user["user_id"] == 777
+
+    run(cog.on_member_unban(guild_b, banned))
+    assert not run(cog.engine.check(member("evilraider2"))).is_suspect
+    assert db.loads == 1
+
+
+def test_rebanned_profile_replaces_its_old_name():
+    index = BannedProfileIndex()
+    index.add({"user_id": 1, "username": "oldname", "avatar_hash": "a", "banned_at": "1"})
+    index.add({"user_id": 1, "username": "brandnew", "avatar_hash": "b", "banned_at": "2"})
+
+    assert len(index) == 1
+    assert [p["username"] for p in index.candidates("brandnew", None)] == ["brandnew"]
+    assert index.candidates("oldname", "a") == []
+    index.remove(1)
+    assert index.candidates("brandnew", "b") == []
+    assert not index._postings and not index._avatars
+
+
+# --- Benchmark --------------------------------------------------------------
+
+@pytest.mark.bench
+def test_join_check_latency_at_100k_banned_profiles():
+    profiles = banned_profiles(100_000, seed=5)
+    cases = joins(profiles, 300, seed=6)
+
+    started = time.perf_counter()
+    index = BannedProfileIndex()
+    index.extend(profiles)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for name, avatar_hash in cases:
+        full_scan(index.candidates(name, avatar_hash), name, avatar_hash)
+    indexed = (time.perf_counter() - started) / len(cases)
+
+    sample = cases[:5]
+    started = time.perf_counter()
+    for name, avatar_hash in sample:
+        full_scan(profiles, name, avatar_hash)
+    scan = (time.perf_counter() - started) / len(sample)
+
+    print(
+        f"\n100k profiles: index build {build:.2f} s | full scan {scan * 1e3:9.1f} ms/join"
+        f" | indexed {indexed * 1e3:6.2f} ms/join"
+    )
+    assert indexed * 20 < scan
@@ -0,0 +1,206 @@
+"""Shared audit-log entry cache for attribution lookups.
+
+The logging cog and Guardian used to read ``guild.audit_logs()`` over REST for
+every delete, kick, ban, unban and webhook event, which runs into the
+audit-log rate limit during raids and nukes. The bot now records each
+``on_audit_log_entry_create`` into ``AuditLogCache``, and lookups only reach
+REST on a miss. These tests feed fake entries into a fake guild that counts
+its ``audit_logs`` calls, so a zero count proves attribution came from the
+cache.
+"""
+from __future__ import annotations
+
+import asyncio
+import types as _types
+from datetime import datetime, timedelta, timezone
+
+import discord
+
+from cogs.guardian import Guardian
+from cogs.logging_cog import Logging
+from utils.audit_log_cache import AuditLogCache
+from conftest import run
+
+Action = discord.AuditLogAction
+DISCORD_EPOCH_MS = 1420070400000
+
+
+class FakeGuild:
+    def __init__(self, guild_id=1, rest_entries=(), forbidden=False):
+        self.id = guild_id
+        self.name = "guild"
+        self.rest_entries = list(rest_entries)
+        self.forbidden = forbidden
+        self.rest_calls = 0
+
+    def audit_logs(self, *, limit, action):
+        self.rest_calls += 1
+        matching = [entry for entry in self.rest_entries if entry.action == action]
+        return _AuditLogIterator(sorted(matching, key=lambda e: e.id, reverse=True)[:limit], self.forbidden)
+
+
+class _AuditLogIterator:
+    def __init__(self, entries, forbidden):
+        self._entries = iter(entries)
+        self._forbidden = forbidden
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._forbidden:
+            raise discord.Forbidden(_types.SimpleNamespace(status=403, reason="Forbidden"), "missing permission")
+        try:
+            return next(self._entries)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+_counter = iter(range(1, 1_000_000))
+
+
+def make_entry(guild, action, *, target_id=None, user_id=99, age=0.0, extra=None, reason=None):
+    created_at = datetime.now(timezone.utc) - timedelta(seconds=age)
+    snowflake = ((int(created_at.timestamp() * 1000) - DISCORD_EPOCH_MS) << 22) | next(_counter)
+    return _types.SimpleNamespace(
+        id=snowflake,
+        guild=guild,
+        action=action,
+        created_at=created_at,
+        target=_types.SimpleNamespace(id=target_id) if target_id is not None else None,
+        user=_types.SimpleNamespace(id=user_id) if user_id is not None else None,
+        extra=extra,
+        reason=reason,
+    )
+
+
+# --- Cache ------------------------------------------------------------------
+
+def test_lookup_hits_the_cache_without_rest():
+    cache = AuditLogCache()
+    guild = FakeGuild()
+    cache.record(make_entry(guild, Action.ban, target_id=5, user_id=7, age=2))
+    cache.record(make_entry(guild, Action.kick, target_id=5, user_id=8, age=1))
+
+    entry = run(cache.lookup(guild, Action.ban, target_id=5, within=10))
+    assert entry.user.id == 7
+    assert guild.rest_calls == 0
+    assert cache.hits == 1
+
+
+def test_filters_by_target_window_and_predicate():
+    cache = AuditLogCache()
+    guild = FakeGuild()
+    old = make_entry(guild, Action.channel_delete, target_id=1, user_id=1, age=30)
+    fresh_other = make_entry(guild, Action.channel_delete, target_id=2, user_id=2, age=1)
+    fresh = make_entry(guild, Action.channel_delete, target_id=1, user_id=None, age=0.5)
+    for entry in (old, fresh_other, fresh):
+        cache.record(entry)
+
+    assert cache.find(guild.id, Action.channel_delete, target_id=1, within=10) is fresh
+    assert cache.find(guild.id, Action.channel_delete, target_id=1, within=60,
+                      predicate=lambda e: e.user is not None) is old
+    assert cache.find(guild.id, Action.channel_delete, target_id=1, within=10,
+                      predicate=lambda e: e.user is not None) is None
+    assert cache.find(guild.id, Action.channel_delete) is fresh
+
+
+def test_entry_arriving_after_the_event_is_waited_for():
+    async def body():
+        cache = AuditLogCache()
+        guild = FakeGuild()
+
+        async def deliver_late():
+            await asyncio.sleep(0.05)
+            cache.record(make_entry(guild, Action.ban, target_id=5, user_id=7))
+
+        asyncio.create_task(deliver_late())
+        entry = await cache.lookup(guild, Action.ban, target_id=5, within=10, wait=1.0)
+        return entry, guild.rest_calls
+
+    entry, rest_calls = run(body())
+    assert entry.user.id == 7
+    assert rest_calls == 0
+
+
+def test_miss_falls_back_to_rest_once_and_caches_the_result():
+    guild = FakeGuild()
+    guild.rest_entries = [make_entry(guild, Action.unban, target_id=5, user_id=7, age=1)]
+    cache = AuditLogCache()
+
+    first = run(cache.lookup(guild, Action.unban, target_id=5, within=10))
+    second = run(cache.lookup(guild, Action.unban, target_id=5, within=10))
+    assert first is second
+    assert guild.rest_calls == 1
+    assert (cache.hits, cache.misses, cache.rest_calls) == (1, 1, 1)
+
+
+def test_missing_permission_resolves_to_none():
+    guild = FakeGuild(forbidden=True)
+    assert run(AuditLogCache().lookup(guild, Action.ban, target_id=5)) is None
+
+
+def test_ring_is_bounded_deduplicated_and_time_ordered():
+    cache = AuditLogCache(max_entries=3, max_age_seconds=60)
+    guild = FakeGuild()
+    entries = [make_entry(guild, Action.kick, target_id=n, age=10 - n) for n in range(5)]
+    stale = make_entry(guild, Action.kick, target_id=99, age=120)
+
+    # Out of order, with a duplicate and an entry past max age.
+    for entry in (entries[3], entries[0], entries[4], entries[1], entries[4], entries[2], stale):
+        cache.record(entry)
+
+    assert cache.record(entries[4]) is False
+    kept = cache._entries[guild.id]
+    assert [e.target.id for e in kept] == [2, 3, 4]
+    assert cache.find(guild.id, Action.kick, target_id=99) is None
+
+
+# --- Call sites -------------------------------------------------------------
+
+def _bot_with(cache):
+    return _types.SimpleNamespace(audit_log_cache=cache)
+
+
+def test_guardian_attribution_comes_from_the_cache():
+    cache = AuditLogCache()
+    guild = FakeGuild()
+    cache.record(make_entry(guild, Action.channel_delete, target_id=42, user_id=1234))
+    guardian = Guardian(_bot_with(cache))
+
+    actor = run(guardian._recent_actor(guild, Action.channel_delete, 42))
+    assert actor.id == 1234
+    assert guild.rest_calls == 0
+
+
+def test_logging_attribution_comes_from_the_cache():
+    cache = AuditLogCache()
+    guild = FakeGuild()
+    channel = _types.SimpleNamespace(id=77)
+    cache.record(make_entry(guild, Action.member_role_update, target_id=5, user_id=11))
+    cache.record(make_entry(
+        guild, Action.message_delete, target_id=5, user_id=12,
+        extra=_types.SimpleNamespace(channel=channel, count=1),
+    ))
+    cog = Logging(_bot_with(cache))
+
+    role_entry = run(cog._find_recent_audit_entry(guild, action=Action.member_role_update, target_id=5))
+    delete_entry = run(cog._find_recent_message_delete_entry(guild, channel_id=77, author_id=5))
+    assert role_entry.user.id == 11
+    assert delete_entry.user.id == 12
+    assert guild.rest_calls == 0
+
+
+def test_raid_burst_of_lookups_makes_no_rest_calls():
+    cache = AuditLogCache(max_entries=500)
+    guild = FakeGuild()
+    for target in range(300):
+        cache.record(make_entry(guild, Action.ban, target_id=target, user_id=1))
+    guardian = Guardian(_bot_with(cache))
+
+    async def burst():
+        return await asyncio.gather(*(guardian._recent_actor(guild, Action.ban, target) for target in range(300)))
+
+    actors = run(burst())
+    assert all(actor.id == 1 for actor in actors)
+    assert guild.rest_calls == 0
@@ -0,0 +1,188 @@
+"""Shared per-message feature extraction for the AutoMod rule engine.
+
+Five rules used to run ``normalize_text`` on the same message independently,
+repeating the NFKC/casefold/leet folding up to five times. The engine now
+builds one ``MessageFeatures`` per message and hands it to every rule. These
+tests pin that the fold runs once, and that rules reach the same verdicts with
+the shared features as they did computing everything themselves.
+
+The ``bench`` test replays a 50k-message synthetic corpus and prints per-rule
+time; run it with ``pytest --bench -s tests/test_automod_features.py``.
+"""
+from __future__ import annotations
+
+import random
+import time
+import types as _types
+from collections import defaultdict
+
+import pytest
+
+import cogs.automod.models as automod_models
+from cogs.automod.engine import AutoModEngine
+from cogs.automod.models import MessageFeatures
+from cogs.automod.rules import ALL_RULES
+from conftest import run
+
+
+ALL_ENABLED = {factory.setting_key: True for factory in ALL_RULES if factory.setting_key}
+ALL_ENABLED.update(
+    {
+        "automod_badwords": ["badword", "fr1ck", "heck off", "slur"],
+        # Keep the burst rules from firing on every message of a long replay.
+        "automod_spam_threshold": 50,
+        "automod_fast_message_threshold": 20,
+        "automod_duplicate_threshold": 20,
+        "automod_newaccount_enabled": False,
+    }
+)
+
+_TEMPLATES = (
+    "hello everyone, how is it going?",
+    "anyone up for a game tonight",
+    "FREE NITRO claim your prize at https://dlscord-gift.example/claim",
+    "join us discord.gg/{code} for more",
+    "d i s c o r d . gg / {code} best server",
+    "you are a b@dw0rd honestly",
+    "fr!ck this, heck off",
+    "check https://bit.ly/{code} now",
+    "THIS IS ALL CAPS AND VERY LOUD TODAY",
+    "😀🎉🔥👍😂🙌💯✨😎🥳🤖👀🎮🍕🚀🌈",
+    "aaaaaaaaaaaaaaaaaaaaaaaaaaaa",
+    "verify your account at www.steam-wallet.example now",
+    "ｆｕｌｌｗｉｄｔｈ text with ｌｅｅｔ 5p34k",
+    "z̷a̷l̷g̷o̷ text h̷e̷r̷e̷ please",
+    "",
+)
+
+
+def synthetic_corpus(count: int, *, seed: int = 1234) -> list[_types.SimpleNamespace]:
+    rng = random.Random(seed)
+    guild = _types.SimpleNamespace(id=1)
+    channel = _types.SimpleNamespace(id=10, parent_id=None)
+    messages = []
+    for index in range(count):
+        content = rng.choice(_TEMPLATES).format(code=f"c{rng.randrange(1000)}")
+        mention_count = rng.choice((0, 0, 0, 1, 2, 8))
+        messages.append(
+            _types.SimpleNamespace(
+                id=index,
+                content=content,
+                guild=guild,
+                channel=channel,
+                author=_types.SimpleNamespace(id=100 + rng.randrange(400)),
+                mentions=[_types.SimpleNamespace(id=1000 + n) for n in range(mention_count)],
+                role_mentions=[],
+                attachments=[],
+            )
+        )
+    return messages
+
+
+# --- Feature values ---------------------------------------------------------
+
+def test_features_hold_every_shared_signal():
+    message = _types.SimpleNamespace(
+        content="FREE N1TRO at https://Evil.Example/x discord.gg/abc <:pog:123456789012345678> 😀",
+        mentions=[_types.SimpleNamespace(id=1), _types.SimpleNamespace(id=1), _types.SimpleNamespace(id=2)],
+        role_mentions=[_types.SimpleNamespace(id=3)],
+    )
+    features = MessageFeatures.from_message(message)
+
+    assert features.normalized.startswith("free nitro at")
+    assert features.tokens[:3] == ("free", "nitro", "at")
+    assert "evil.example" in features.domains
+    assert features.invite_codes == ("abc",)
+    assert features.emoji_count == 2
+    assert features.mention_count == 3
+    assert len(features.fingerprint) == 16
+
+
+def test_features_are_immutable():
+    features = MessageFeatures("hello")
+    with pytest.raises(Exception):
+        features.content = "changed"
+
+
+def test_engine_folds_each_message_once(monkeypatch):
+    calls = []
+    original = automod_models.normalize_text
+    monkeypatch.setattr(automod_models, "normalize_text", lambda value: calls.append(value) or original(value))
+
+    engine = AutoModEngine()
+    for message in synthetic_corpus(50):
+        run(engine.evaluate(message, ALL_ENABLED, dry_run=True))
+
+    assert len(calls) == 50
+
+
+# --- Verdict parity ---------------------------------------------------------
+
+async def _verdicts_with_shared_features(messages):
+    engine = AutoModEngine()
+    return [await engine.evaluate(message, ALL_ENABLED) for message in messages]
+
+
+async def _verdicts_computed_per_rule(messages):
+    """The pre-change engine loop: every rule extracts its own features."""
+    engine = AutoModEngine()
+    verdicts = []
+    for message in messages:
+        verdict = None
+        for rule in engine.rules:
+            if not ALL_ENABLED.get(rule.setting_key, False):
+                continue
+            verdict = await rule.check(message, ALL_ENABLED)
+            if verdict is not None:
+                break
+        verdicts.append(verdict)
+    return verdicts
+
+
+def test_shared_features_reach_the_same_verdicts():
+    messages = synthetic_corpus(3000)
+    shared = run(_verdicts_with_shared_features(messages))
+    per_rule = run(_verdicts_computed_per_rule(messages))
+    assert shared == per_rule
+    assert {match.rule for match in shared if match} >= {
+        "scams", "badwords", "invites", "links", "mentions", "caps", "emoji_spam", "spam",
+    }
+
+
+# --- Benchmark --------------------------------------------------------------
+
+@pytest.mark.bench
+def test_replay_50k_messages_per_rule_time():
+    messages = synthetic_corpus(50_000)
+    engine = AutoModEngine()
+    elapsed: dict[str, float] = defaultdict(float)
+
+    for rule in engine.rules:
+        original = rule.check
+
+        async def timed(message, settings, *, _original=original, _name=rule.name, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await _original(message, settings, **kwargs)
+            finally:
+                elapsed[_name] += time.perf_counter() - started
+
+        rule.check = timed
+
+    async def replay():
+        started = time.perf_counter()
+        for message in messages:
+            # The engine stops at the first hit; run every enabled rule here so
+            # each one is timed on the whole corpus. The first rule to read a
+            # shared feature is charged for computing it.
+            features = MessageFeatures.from_message(message)
+            for rule in engine.rules:
+                if ALL_ENABLED.get(rule.setting_key, False):
+                    await rule.check(message, ALL_ENABLED, features=features)
+        return time.perf_counter() - started
+
+    total = run(replay())
+    print(f"\n50k messages in {total:.2f}s ({len(messages) / total:,.0f} msg/s)")
+    for name, seconds in sorted(elapsed.items(), key=lambda item: item[1], reverse=True):
+        print(f"  {name:<16} {seconds * 1e6 / len(messages):8.2f} us/msg")
+    assert total > 0
@@ -0,0 +1,227 @@
+"""Single-pass keyword matching for the badwords and scam rules.
+
+``BadWordsRule`` used to run one ``keyword_pattern`` regex per configured word
+on every message, and kept only the last guild's list compiled. It now scans
+each message once with a ``KeywordMatcher`` (Aho-Corasick over the compacted
+text) and keeps an LRU of matchers keyed by a hash of the word list. These
+tests pin that the matcher reports exactly what the per-word regexes did, on a
+golden set of edge cases and on a generated corpus.
+
+The ``bench`` test compares both at 10, 1k and 10k terms; run it with
+``pytest --bench -s tests/test_automod_matcher.py``.
+"""
+from __future__ import annotations
+
+import random
+import string
+import time
+import types as _types
+
+import pytest
+
+from cogs.automod.rules import BadWordsRule, ScamRule
+from cogs.automod.utils import KeywordMatcher, keyword_pattern, normalize_text, unique_strings
+
+from test_automod_features import synthetic_corpus
+from conftest import run
+
+
+def per_word_hits(words, text):
+    """The pre-change matcher: one compiled regex per word, in list order."""
+    hits = []
+    for word in unique_strings(words):
+        pattern = keyword_pattern(word)
+        if pattern is not None and pattern.search(text):
+            hits.append(word)
+    return hits
+
+
+def matcher_hits(words, text):
+    return KeywordMatcher(unique_strings(words)).find_all(text)
+
+
+# --- Golden cases -----------------------------------------------------------
+
+GOLDEN_WORDS = [
+    "heck", "heck off", "off", "badword", "fr1ck", "s.l.u.r", "ass", "class",
+    "nitro", "ab", "abc", "bc", "café", "ＦＵＬＬ", "!!!", "",
+]
+
+GOLDEN_TEXTS = [
+    "",
+    "heck",
+    "oh heck off already",
+    "heckoff",
+    "h e c k",
+    "h.e.c.k o_f_f",
+    "_heck_",
+    "heck_",
+    "checker",
+    "what the heck!",
+    "b@dw0rd",
+    "b a d w o r d s",
+    "badwordbadword",
+    "fr!ck",
+    "slur",
+    "s l u r",
+    "classic class assignment ass",
+    "a b c",
+    "abc ab bc",
+    "xabc",
+    "cafe café",
+    "full fully",
+    "!!! ???",
+    "free nitro",
+    "n​itro",
+    "héck",
+    "HECK OFF",
+    "abab",
+]
+
+
+@pytest.mark.parametrize("text", GOLDEN_TEXTS)
+def test_matcher_matches_per_word_regexes_on_golden_cases(text):
+    normalized = normalize_text(text)
+    assert matcher_hits(GOLDEN_WORDS, normalized) == per_word_hits(GOLDEN_WORDS, normalized)
+
+
+def test_overlapping_and_nested_words_are_all_reported():
+    words = ["heck", "heck off", "off", "ab", "abc", "bc"]
+    assert matcher_hits(words, "heck off") == ["heck", "heck off", "off"]
+    assert matcher_hits(words, "abc") == ["abc"]
+    assert matcher_hits(words, "a-b c") == ["ab", "abc", "bc"]
+    assert matcher_hits(words, "ab bc") == ["ab", "bc"]
+
+
+def test_hits_follow_the_configured_list_order():
+    words = ["fr1ck", "heck", "badword"]
+    assert matcher_hits(words, normalize_text("badword, heck, frick")) == ["fr1ck", "heck", "badword"]
+
+
+def test_lists_without_matchable_words_never_hit():
+    assert matcher_hits([], "anything") == []
+    assert matcher_hits(["", "!!!", "   "], "!!! anything") == []
+
+
+def _random_words(rng, count):
+    alphabet = "abcdefghij"
+    words = set()
+    while len(words) < count:
+        length = rng.randint(2, 6)
+        word = "".join(rng.choice(alphabet) for _ in range(length))
+        if rng.random() < 0.2:
+            word = word[: length // 2] + rng.choice(" ._-") + word[length // 2:]
+        words.add(word)
+    return sorted(words)
+
+
+def _random_text(rng, words):
+    parts = []
+    for _ in range(rng.randint(1, 12)):
+        roll = rng.random()
+        if roll < 0.3:
+            parts.append(rng.choice(words))
+        elif roll < 0.5:
+            parts.append(rng.choice(words) + rng.choice(words))
+        else:
+            parts.append("".join(rng.choice("abcdefghij_") for _ in range(rng.randint(1, 8))))
+        parts.append(rng.choice((" ", " ", ".", "-", "_", " * ", "")))
+    return "".join(parts)
+
+
+def test_matcher_matches_per_word_regexes_on_generated_corpus():
+    rng = random.Random(4)
+    for _ in range(40):
+        words = _random_words(rng, rng.randint(1, 30))
+        matcher = KeywordMatcher(unique_strings(words))
+        for _ in range(50):
+            text = normalize_text(_random_text(rng, words))
+            assert matcher.find_all(text) == per_word_hits(words, text), (words, text)
+
+
+# --- Rules ------------------------------------------------------------------
+
+def _message(content):
+    return _types.SimpleNamespace(content=content, mentions=[], role_mentions=[])
+
+
+def test_badwords_rule_keeps_a_matcher_per_guild_list():
+    rule = BadWordsRule()
+    guild_a = {"automod_badwords": ["alpha"]}
+    guild_b = {"automod_badwords": ["beta"]}
+
+    for _ in range(3):
+        assert run(rule.check(_message("alpha"), guild_a)).evidence == ("alpha",)
+        assert run(rule.check(_message("beta"), guild_b)).evidence == ("beta",)
+        assert run(rule.check(_message("alpha"), guild_b)) is None
+
+    assert len(rule._matchers) == 2
+
+
+def test_badwords_rule_evicts_the_least_recently_used_list(monkeypatch):
+    rule = BadWordsRule()
+    monkeypatch.setattr(rule, "max_cached_lists", 2)
+    first = rule._matcher_for(["one"])
+    rule._matcher_for(["two"])
+    assert rule._matcher_for(["one"]) is first
+    rule._matcher_for(["three"])
+
+    assert len(rule._matchers) == 2
+    assert rule._matcher_for(["one"]) is first
+    assert rule._matcher_for(["two"]) is not None and len(rule._matchers) == 2
+
+
+def test_badwords_rule_reaches_the_same_verdicts_on_the_feature_corpus():
+    rule = BadWordsRule()
+    words = ["badword", "fr1ck", "heck off", "slur", "claim", "gg"]
+    settings = {"automod_badwords": words}
+    for message in synthetic_corpus(2000):
+        match = run(rule.check(message, settings))
+        expected = per_word_hits(words, normalize_text(message.content))
+        assert (match.evidence if match else ()) == tuple(expected[:3])
+
+
+def test_scam_regex_agrees_with_substring_scan():
+    rng = random.Random(9)
+    phrases = ScamRule.scam_phrases
+    for _ in range(2000):
+        text = " ".join(
+            rng.choice(phrases) if rng.random() < 0.05 else rng.choice(("free", "nitro", "claim", "your", "gift", "x"))
+            for _ in range(rng.randint(1, 10))
+        )
+        assert bool(ScamRule._scam_re.search(text)) == any(phrase in text for phrase in phrases)
+
+
+# --- Benchmark --------------------------------------------------------------
+
+@pytest.mark.bench
+@pytest.mark.parametrize("term_count", [10, 1_000, 10_000])
+def test_matcher_scaling_against_per_word_regexes(term_count):
+    rng = random.Random(term_count)
+    words = sorted({
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+        for _ in range(term_count)
+    })
+    texts = [normalize_text(message.content) for message in synthetic_corpus(2000)]
+    texts += [f"{text} {rng.choice(words)}" for text in texts[:200]]
+
+    started = time.perf_counter()
+    patterns = [(word, keyword_pattern(word)) for word in unique_strings(words)]
+    old_build = time.perf_counter() - started
+    started = time.perf_counter()
+    old = [[word for word, pattern in patterns if pattern.search(text)] for text in texts]
+    old_scan = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matcher = KeywordMatcher(unique_strings(words))
+    new_build = time.perf_counter() - started
+    started = time.perf_counter()
+    new = [matcher.find_all(text) for text in texts]
+    new_scan = time.perf_counter() - started
+
+    assert new == old
+    per_msg = 1e6 / len(texts)
+    print(
+        f"\n{len(words):>6} terms: per-word build {old_build * 1e3:8.1f} ms scan {old_scan * per_msg:9.1f} us/msg"
+        f" | matcher build {new_build * 1e3:8.1f} ms scan {new_scan * per_msg:7.1f} us/msg"
+    )
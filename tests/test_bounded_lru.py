@@ -0,0 +1,132 @@
+"""O(1) bounded LRU behind the message-snapshot and snipe caches.
+
+The logging cog's recent-message snapshots evicted by calling ``min()`` over
+up to 20k entries inside a while loop, and ``SnipeCache.add`` found its oldest
+entry the same way, so a message flood made every insert pay a full scan.
+Both now sit on ``utils.cache.BoundedLRU``: an OrderedDict in write order,
+stamped with ``time.monotonic``, that evicts and expires from the front. These
+tests pin the eviction order and expiry, and flood 100k messages through the
+cog to check that the per-insert cost stays flat once the cache is full.
+"""
+from __future__ import annotations
+
+import time
+import types as _types
+
+import pytest
+
+from cogs.logging_cog import Logging
+from utils.cache import BoundedLRU, SnipeCache
+from conftest import run
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+# --- BoundedLRU -------------------------------------------------------------
+
+def test_overflow_evicts_the_least_recently_written_or_touched():
+    lru = BoundedLRU(3)
+    for key in "abc":
+        lru.set(key, key.upper())
+    assert lru.touch("a")
+    lru.set("b", "B2")
+    lru.set("d", "D")
+    assert ("a" in lru, "b" in lru, "c" in lru, "d" in lru) == (True, True, False, True)
+    lru.set("e", "E")
+    assert "a" not in lru and lru.get("b") == "B2"
+    assert len(lru) == 3 and lru.evictions == 2
+    assert not lru.touch("missing")
+
+
+def test_entries_expire_on_the_monotonic_clock():
+    clock = FakeClock()
+    lru = BoundedLRU(10, ttl=60, clock=clock)
+    lru.set(1, "one")
+    clock.now += 30
+    lru.set(2, "two")
+    clock.now += 31
+    assert lru.get(1) is None and lru.get(2) == "two"
+    assert lru.touch(2)
+    clock.now += 59
+    assert lru.pop(2) == "two"
+
+    lru.set(3, "three")
+    clock.now += 61
+    assert lru.pop(3) is None
+    lru.set(4, "four")
+    lru.set(5, "five")
+    clock.now += 61
+    # Writing a new entry drops expired ones from the front.
+    lru.set(6, "six")
+    assert len(lru) == 1
+    clock.now += 61
+    assert lru.prune_expired() == 1 and len(lru) == 0
+
+
+def test_snipe_cache_keeps_the_latest_per_channel():
+    cache = SnipeCache(max_age_seconds=300, max_size=2)
+
+    async def body():
+        await cache.add(1, {"content": "a"})
+        await cache.add(2, {"content": "b"})
+        await cache.add(1, {"content": "a2"})
+        await cache.add(3, {"content": "c"})
+        return [await cache.get(channel_id) for channel_id in (1, 2, 3)]
+
+    assert run(body()) == [{"content": "a2"}, None, {"content": "c"}]
+
+
+# --- Logging snapshots ------------------------------------------------------
+
+def fake_message(message_id, guild_id=1, channel_id=10):
+    return _types.SimpleNamespace(
+        id=message_id,
+        guild=_types.SimpleNamespace(id=guild_id),
+        channel=_types.SimpleNamespace(id=channel_id),
+        author=_types.SimpleNamespace(id=5, name="u", display_name="U", display_avatar=None),
+        content=f"message {message_id}",
+        created_at=None,
+        attachments=[],
+    )
+
+
+def test_snapshots_are_bounded_and_checked_on_pop():
+    cog = Logging(_types.SimpleNamespace(db=None))
+    cog._recent_message_snapshots.max_size = 3
+    for message_id in range(1, 6):
+        cog._cache_message_snapshot(fake_message(message_id))
+    assert len(cog._recent_message_snapshots) == 3
+    assert cog._pop_message_snapshot(1) is None
+    assert cog._pop_message_snapshot(4, channel_id=99) is None
+    assert cog._pop_message_snapshot(5, guild_id=1, channel_id=10)["content"] == "message 5"
+
+
+@pytest.mark.bench
+def test_flood_100k_messages_keeps_per_insert_cost_flat():
+    cog = Logging(_types.SimpleNamespace(db=None))
+    capacity = cog._recent_message_snapshots.max_size
+    messages = [fake_message(message_id) for message_id in range(100_000)]
+    window = 10_000
+    timings = []
+    for start in range(0, len(messages), window):
+        started = time.perf_counter()
+        for message in messages[start:start + window]:
+            cog._cache_message_snapshot(message)
+        timings.append((time.perf_counter() - started) / window)
+
+    # Window 0 includes warm-up; window 1 still fills a cache with room.
+    filling, full = timings[1], timings[capacity // window:]
+    print(
+        "\nper-insert cost by 10k window (us): "
+        + " ".join(f"{cost * 1e6:.2f}" for cost in timings)
+    )
+    assert len(cog._recent_message_snapshots) == capacity
+    # Evicting at capacity costs the same as inserting into a cache with room.
+    assert max(full) < filling * 3
+    assert max(full) < min(full) * 3
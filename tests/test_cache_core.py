@@ -0,0 +1,199 @@
+"""Monotonic, lock-free cache core in ``utils.cache``.
+
+``TTLCache``, ``SnipeCache``, ``PrefixCache``, ``ChannelCache`` and
+``RateLimiter`` took an ``asyncio.Lock`` around purely synchronous work, timed
+expiry with ``datetime.now()`` (which jumps with the wall clock), cleaned up
+by scanning every entry, and the rate limiter rebuilt each key's call list on
+every check. Expiry now runs off a min-heap on ``time.monotonic`` and the rate
+limiter is a GCRA holding one number per key. These tests pin the behavior on
+a fake clock and benchmark get, set and rate-check throughput.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from utils.cache import ChannelCache, PrefixCache, RateLimiter, TTLCache
+from conftest import run
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+# --- TTLCache ---------------------------------------------------------------
+
+def test_items_expire_on_their_own_ttl_and_cleanup_pops_only_those():
+    clock = FakeClock()
+    cache = TTLCache(ttl=60, max_size=100, clock=clock)
+
+    async def body():
+        await cache.set("short", 1, ttl=5)
+        await cache.set("default", 2)
+        await cache.set("long", 3, ttl=600)
+        await cache.set("short", 4, ttl=120)  # overwrite outlives the first entry
+        clock.now += 61
+        removed = await cache.cleanup_expired()
+        return removed, [await cache.get(key) for key in ("short", "default", "long")]
+
+    removed, values = run(body())
+    assert removed == 1
+    assert values == [4, None, 3]
+    stats = cache.get_stats()
+    assert (stats["size"], stats["hits"], stats["misses"]) == (2, 2, 1)
+
+
+def test_lru_eviction_and_stale_heap_entries_are_bounded():
+    clock = FakeClock()
+    cache = TTLCache(ttl=60, max_size=3, clock=clock)
+
+    async def body():
+        for key in "abc":
+            await cache.set(key, key)
+        await cache.get("a")
+        await cache.set("d", "d")
+        present = [await cache.get(key) for key in "abcd"]
+        for n in range(10_000):
+            await cache.set("a", n)
+        return present
+
+    assert run(body()) == ["a", None, "c", "d"]
+    assert len(cache._expiry) <= 2 * len(cache._cache) + 64
+
+
+def test_wall_clock_jumps_do_not_expire_entries(monkeypatch):
+    cache = PrefixCache(ttl=600)
+
+    async def body():
+        await cache.set(1, "!")
+        # An NTP step or DST change moves wall time, not the monotonic clock.
+        monkeypatch.setattr(time, "time", lambda: 10**10)
+        return await cache.get(1)
+
+    assert run(body()) == "!"
+
+
+def test_channel_cache_none_deletes():
+    cache = ChannelCache(ttl=300)
+
+    async def body():
+        await cache.set(1, "mod", 55)
+        first = await cache.get(1, "mod")
+        await cache.set(1, "mod", None)
+        return first, await cache.get(1, "mod")
+
+    assert run(body()) == (55, None)
+
+
+# --- RateLimiter ------------------------------------------------------------
+
+def test_gcra_allows_a_burst_then_spaces_calls_evenly():
+    clock = FakeClock()
+    limiter = RateLimiter(max_calls=5, window_seconds=10, clock=clock)
+
+    async def body():
+        for _ in range(5):
+            assert await limiter.is_rate_limited("u") == (False, 0)
+            await limiter.record_call("u")
+        limited, retry_after = await limiter.is_rate_limited("u")
+        assert limited and abs(retry_after - 2.0) < 1e-9
+        assert await limiter.is_rate_limited("other") == (False, 0)
+
+        clock.now += 2
+        assert not (await limiter.is_rate_limited("u"))[0]
+        await limiter.record_call("u")
+        assert (await limiter.is_rate_limited("u"))[0]
+
+        # A full quiet window restores the whole burst.
+        clock.now += 12
+        for _ in range(5):
+            assert not (await limiter.is_rate_limited("u"))[0]
+            await limiter.record_call("u")
+        assert (await limiter.is_rate_limited("u"))[0]
+
+        await limiter.reset("u")
+        assert not (await limiter.is_rate_limited("u"))[0]
+
+    run(body())
+
+
+def test_cleanup_drops_drained_keys():
+    clock = FakeClock()
+    limiter = RateLimiter(max_calls=2, window_seconds=10, clock=clock)
+
+    async def body():
+        for key in range(100):
+            await limiter.record_call(key)
+        clock.now += 3
+        await limiter.record_call("busy")
+        clock.now += 3
+        await limiter.cleanup()
+
+    run(body())
+    assert list(limiter._tat) == ["busy"]
+
+
+# --- Throughput -------------------------------------------------------------
+
+def ops_per_second(count, elapsed):
+    return count / elapsed if elapsed else float("inf")
+
+
+def test_benchmark_get_set_and_rate_checks():
+    cache = TTLCache(ttl=300, max_size=10_000)
+    limiter = RateLimiter(max_calls=30, window_seconds=60)
+    n = 100_000
+
+    async def body():
+        started = time.perf_counter()
+        for i in range(n):
+            await cache.set(i % 20_000, i)
+        set_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for i in range(n):
+            await cache.get(i % 20_000)
+        get_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for i in range(n):
+            key = i % 1_000
+            limited, _ = await limiter.is_rate_limited(key)
+            if not limited:
+                await limiter.record_call(key)
+        rate_time = time.perf_counter() - started
+        return set_time, get_time, rate_time
+
+    set_time, get_time, rate_time = run(body())
+    print(
+        f"\nset {ops_per_second(n, set_time):,.0f}/s, get {ops_per_second(n, get_time):,.0f}/s, "
+        f"rate check {ops_per_second(n, rate_time):,.0f}/s"
+    )
+    # Generous floors: these only catch a return to per-call scans.
+    assert ops_per_second(n, set_time) > 50_000
+    assert ops_per_second(n, get_time) > 100_000
+    assert ops_per_second(n, rate_time) > 50_000
+
+
+def test_cleanup_cost_tracks_expired_items_not_cache_size():
+    clock = FakeClock()
+    cache = TTLCache(ttl=600, max_size=200_000, clock=clock)
+
+    async def body():
+        for i in range(100_000):
+            await cache.set(i, i)
+        for i in range(100):
+            await cache.set(("short", i), i, ttl=1)
+        clock.now += 2
+        started = time.perf_counter()
+        removed = await cache.cleanup_expired()
+        return removed, time.perf_counter() - started
+
+    removed, elapsed = run(body())
+    print(f"\ncleanup of 100 expired among 100k live items: {elapsed * 1000:.2f} ms")
+    assert removed == 100
+    assert elapsed < 0.01
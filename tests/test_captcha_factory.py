@@ -0,0 +1,221 @@
+"""Pooled, off-loop captcha rendering in ``utils.captcha``.
+
+``_start_captcha`` in ``cogs.verification`` drew every captcha with Pillow on
+the event loop, reloading a TrueType font each time, so a raid of **Verify**
+clicks stalled the bot. ``CaptchaFactory`` renders on a small thread pool and
+keeps pre-rendered ``(code, png)`` pairs per style. These tests read the code
+back out of the pixels to prove every pair matches, and benchmark 500 start
+requests arriving during a raid.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import statistics
+
+import pytest
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image, ImageChops, ImageDraw  # noqa: E402
+
+import utils.captcha as captcha  # noqa: E402
+from utils.captcha import CAPTCHA_ALPHABET, CaptchaFactory, CaptchaStyle, render_captcha  # noqa: E402
+from conftest import run  # noqa: E402
+
+# The production style minus the blur, so glyph pixels keep their exact
+# per-position colour and can be decoded.
+READABLE = CaptchaStyle(blur_radius=0)
+
+
+def color_mask(image, color):
+    bands = [
+        band.point([255 if value == wanted else 0 for value in range(256)], "1")
+        for band, wanted in zip(image.split(), color)
+    ]
+    return ImageChops.logical_and(ImageChops.logical_and(bands[0], bands[1]), bands[2])
+
+
+def count(mask):
+    return mask.histogram()[255]
+
+
+class Decoder:
+    """Reads a ``READABLE`` captcha by matching each position's glyph colour."""
+
+    def __init__(self, style=READABLE):
+        self.style = style
+        self.font = captcha._load_font(style.font_size)
+        self._templates = {}
+
+    def template(self, slot, char, dy):
+        key = (slot, char, dy)
+        if key not in self._templates:
+            image = Image.new("RGB", (self.style.width, self.style.height), self.style.background)
+            color = self.style.colors[slot % len(self.style.colors)]
+            x = 15 + slot * self.style.glyph_step
+            ImageDraw.Draw(image).text((x, 15 + dy), char, font=self.font, fill=color)
+            self._templates[key] = color_mask(image, color)
+        return self._templates[key]
+
+    def read(self, png):
+        image = Image.open(io.BytesIO(png)).convert("RGB")
+        code = []
+        for slot in range(captcha.CAPTCHA_LENGTH):
+            mask = color_mask(image, self.style.colors[slot % len(self.style.colors)])
+            top = mask.getbbox()[1]
+            best, best_score = None, -1.0
+            for char in CAPTCHA_ALPHABET:
+                dy = top - self.template(slot, char, 0).getbbox()[1]
+                if abs(dy) > self.style.jitter:
+                    continue
+                template = self.template(slot, char, dy)
+                union = count(ImageChops.logical_or(mask, template))
+                score = count(ImageChops.logical_and(mask, template)) / union if union else 0.0
+                if score > best_score:
+                    best, best_score = char, score
+            code.append(best)
+        return "".join(code)
+
+
+@pytest.fixture(scope="module")
+def decoder():
+    return Decoder()
+
+
+# --- Codes match images -----------------------------------------------------
+
+def test_the_decoder_reads_rendered_codes(decoder):
+    for code in ("ABCDE", "WMW23", "HJK89"):
+        assert decoder.read(render_captcha(code, READABLE)) == code
+
+
+def test_pooled_and_on_demand_pairs_always_match(decoder):
+    async def body():
+        factory = CaptchaFactory(pool_size=8, refill_batch=3, styles={"standard": READABLE})
+        factory.warm()
+        await asyncio.sleep(0.2)
+        # A burst larger than the pool: hits, then misses rendered on demand.
+        pairs = await asyncio.gather(*(factory.take() for _ in range(40)))
+        stats = factory.get_stats()
+        await factory.close()
+        return pairs, stats
+
+    pairs, stats = run(body())
+    assert stats["hits"] >= 8 and stats["misses"] >= 1
+    for code, png in pairs:
+        assert decoder.read(png) == code
+    # Single use: no pair is ever handed out twice.
+    assert len({png for _, png in pairs}) == len(pairs)
+
+
+def test_production_style_images_and_font_loaded_once(monkeypatch):
+    loads = []
+    real_truetype = captcha.ImageFont.truetype
+
+    def counting_truetype(*args, **kwargs):
+        loads.append(args)
+        return real_truetype(*args, **kwargs)
+
+    monkeypatch.setattr(captcha, "_font_cache", {})
+    monkeypatch.setattr(captcha.ImageFont, "truetype", counting_truetype)
+
+    async def body():
+        factory = CaptchaFactory(pool_size=4)
+        pairs = [await factory.take() for _ in range(10)]
+        await factory.close()
+        return pairs
+
+    for code, png in run(body()):
+        assert len(code) == captcha.CAPTCHA_LENGTH and set(code) <= set(CAPTCHA_ALPHABET)
+        assert Image.open(io.BytesIO(png)).size == (200, 80)
+    assert len(loads) <= len(captcha._FONT_PATHS)
+
+
+def test_without_pillow_codes_fall_back_to_text(monkeypatch):
+    monkeypatch.setattr(captcha, "PILLOW_AVAILABLE", False)
+
+    async def body():
+        factory = CaptchaFactory()
+        factory.warm()
+        pair = await factory.take()
+        await factory.close()
+        return pair
+
+    code, png = run(body())
+    assert png is None and len(code) == captcha.CAPTCHA_LENGTH
+
+
+# --- Raid benchmark ---------------------------------------------------------
+
+RAID_CLICKS = 500
+CLICK_INTERVAL = 0.002  # 500 clicks across one second
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def raid(get_captcha):
+    """Clicks arrive on a schedule; each acks (defers) then fetches a captcha.
+
+    Latencies are measured from each click's scheduled arrival, so a loop
+    that is stuck rendering shows up as late acknowledgements.
+    """
+    loop = asyncio.get_running_loop()
+    acks, answers, tasks = [], [], []
+
+    async def start(arrival):
+        await asyncio.sleep(0)  # interaction.response.defer()
+        acks.append(loop.time() - arrival)
+        await get_captcha()
+        answers.append(loop.time() - arrival)
+
+    begin = loop.time() + 0.01
+    for n in range(RAID_CLICKS):
+        arrival = begin + n * CLICK_INTERVAL
+        loop.call_at(arrival, lambda arrival=arrival: tasks.append(asyncio.ensure_future(start(arrival))))
+    while len(answers) < RAID_CLICKS:
+        await asyncio.sleep(0.01)
+    await asyncio.gather(*tasks)
+    return acks, answers
+
+
+def test_benchmark_p99_latency_for_500_concurrent_starts():
+    async def inline():
+        async def render_on_loop():
+            code = captcha.generate_captcha_code()
+            return code, render_captcha(code)
+
+        return await raid(render_on_loop)
+
+    async def pooled():
+        factory = CaptchaFactory(pool_size=32)
+        factory.warm()
+        while factory.get_stats()["pooled"]["standard"] < 32:
+            await asyncio.sleep(0.01)
+        try:
+            return await raid(factory.take), factory.get_stats()
+        finally:
+            await factory.close()
+
+    inline_acks, inline_answers = run(inline())
+    (pooled_acks, pooled_answers), stats = run(pooled())
+    for label, acks, answers in (
+        ("on-loop render", inline_acks, inline_answers),
+        ("captcha factory", pooled_acks, pooled_answers),
+    ):
+        print(
+            f"\n{label}: ack p50 {statistics.median(acks) * 1000:.1f} ms, "
+            f"p99 {percentile(acks, 99) * 1000:.1f} ms; "
+            f"captcha p50 {statistics.median(answers) * 1000:.1f} ms, "
+            f"p99 {percentile(answers, 99) * 1000:.1f} ms"
+        )
+    print(f"pool hits {stats['hits']}, misses {stats['misses']}")
+    # The loop stays free to acknowledge every click within Discord's 3 s.
+    assert percentile(pooled_acks, 99) < 0.25
+    assert percentile(pooled_acks, 99) < percentile(inline_acks, 99) / 4
+    # Rendering is CPU-bound either way, so completion times are printed
+    # rather than compared (the on-loop baseline swings run to run on a
+    # shared CPU); every captcha must still arrive promptly.
+    assert percentile(pooled_answers, 99) < 3.0
@@ -0,0 +1,240 @@
+"""Hourly and daily analytics rollups kept by the bot.
+
+The dashboard charted messages, joins and leaves, automod hits and cases with
+``COUNT(*) ... GROUP BY`` scans over the raw event tables on every page load.
+The bot now bumps ``analytics_hourly`` and ``analytics_daily`` as it records
+each event, coalescing the increments in the write-behind buffer, and
+``rebuild_analytics_rollups`` recounts them from the raw rows. These tests pin
+that the incremental counters and a rebuild agree on SQLite.
+"""
+from __future__ import annotations
+
+import types as _types
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from db.analytics_mixin import rollup_buckets
+from conftest import run
+
+GUILD_ID = 444444444444444444
+OTHER_GUILD_ID = 555555555555555555
+
+
+def _message(message_id, user_id, channel_id, guild_id=GUILD_ID):
+    return _types.SimpleNamespace(
+        id=message_id,
+        content="hello",
+        guild=_types.SimpleNamespace(id=guild_id),
+        channel=_types.SimpleNamespace(id=channel_id),
+        author=_types.SimpleNamespace(id=user_id, bot=False),
+    )
+
+
+async def _record_activity(db):
+    for n in range(30):
+        await db.track_user_message(_message(1000 + n, user_id=n % 3, channel_id=70 + n % 2))
+    await db.track_user_message(_message(2000, user_id=9, channel_id=80, guild_id=OTHER_GUILD_ID))
+    for user_id in range(4):
+        await db.record_member_event(GUILD_ID, user_id, "join")
+    await db.record_member_event(GUILD_ID, 1, "leave")
+    for index in range(3):
+        await db.record_automod_event(GUILD_ID, 1, 70, "spam", "behavior", "low", "log", f"event {index}", False)
+    for action in ("warn", "warn", "Ban", "kick"):
+        await db.create_case(GUILD_ID, 1, 99, action, "reason")
+
+
+async def _snapshot(db, guild_id=GUILD_ID):
+    await db.flush_pending_writes()
+    rows = {}
+    for table in ("analytics_hourly", "analytics_daily"):
+        async with db.get_connection() as conn:
+            cursor = await conn.execute(
+                f"SELECT bucket_start, metric, dimension, count FROM {table} WHERE guild_id = ?",
+                (guild_id,),
+            )
+            rows[table] = sorted(tuple(str(value) for value in row) for row in await cursor.fetchall())
+    return rows
+
+
+def _totals(rows):
+    return {(metric, dimension): int(count) for _, metric, dimension, count in rows}
+
+
+# --- Incremental counters ---------------------------------------------------
+
+def test_recorded_events_land_in_both_rollups(make_db):
+    async def body():
+        db = make_db()
+        await db.init_guild(GUILD_ID)
+        await _record_activity(db)
+        snapshot = await _snapshot(db)
+        daily = await db.get_analytics_rollup(GUILD_ID, "message_channel")
+        await db.close()
+        return snapshot, daily
+
+    snapshot, daily = run(body())
+    assert _totals(snapshot["analytics_hourly"]) == _totals(snapshot["analytics_daily"]) == {
+        ("message_channel", "70"): 15,
+        ("message_channel", "71"): 15,
+        ("message_user", "0"): 10,
+        ("message_user", "1"): 10,
+        ("message_user", "2"): 10,
+        ("member_join", ""): 4,
+        ("member_leave", ""): 1,
+        ("automod", ""): 3,
+        ("case", "warn"): 2,
+        ("case", "ban"): 1,
+        ("case", "kick"): 1,
+    }
+    assert [row["count"] for row in daily] == [15, 15]
+    assert daily[0]["bucket_start"] == rollup_buckets()["day"]
+
+
+def test_increments_coalesce_into_one_upsert_per_key(make_db):
+    async def body():
+        db = make_db(buffer={"flush_rows": 10_000, "flush_interval": 3600})
+        await db.init_guild(GUILD_ID)
+        writes = []
+        writer = db._write_behind._writer
+
+        async def counting_writer(sql, rows):
+            writes.append((sql, len(rows)))
+            await writer(sql, rows)
+
+        db._write_behind._writer = counting_writer
+        for n in range(200):
+            await db.track_user_message(_message(n + 1, user_id=1, channel_id=70))
+        await db.flush_pending_writes()
+        await db.close()
+        return writes
+
+    writes = run(body())
+    rollup_writes = [count for sql, count in writes if "analytics_" in sql]
+    # Two tables x (one channel key + one user key), however many messages.
+    assert rollup_writes == [2, 2]
+    assert sum(count for sql, count in writes if "user_messages" in sql) == 200
+
+
+def test_unknown_metrics_are_rejected(make_db):
+    async def body():
+        db = make_db()
+        try:
+            await db.bump_analytics(GUILD_ID, "page_views")
+        finally:
+            await db.close()
+
+    with pytest.raises(ValueError):
+        run(body())
+
+
+# --- Rebuild ----------------------------------------------------------------
+
+def test_rebuild_reproduces_the_incremental_counters(make_db):
+    async def body():
+        db = make_db()
+        await db.init_guild(GUILD_ID)
+        await _record_activity(db)
+        incremental = await _snapshot(db)
+        other_before = await _snapshot(db, OTHER_GUILD_ID)
+        async with db.transaction() as conn:
+            await conn.execute("UPDATE analytics_daily SET count = count + 100")
+            await conn.execute("DELETE FROM analytics_hourly WHERE metric = 'case'")
+        written = await db.rebuild_analytics_rollups(GUILD_ID)
+        rebuilt = await _snapshot(db)
+        other_after = await _snapshot(db, OTHER_GUILD_ID)
+        await db.close()
+        return incremental, rebuilt, other_before, other_after, written
+
+    incremental, rebuilt, other_before, other_after, written = run(body())
+    assert rebuilt == incremental
+    assert written["case"] == 6  # three actions, hourly and daily
+    # Scoped to one guild: the other guild's (inflated) rollups are untouched.
+    assert _totals(other_after["analytics_daily"])[("message_channel", "80")] == 101
+    assert other_before["analytics_hourly"] == other_after["analytics_hourly"]
+
+
+def test_rebuild_keeps_buckets_older_than_the_surviving_raw_rows(make_db):
+    now = datetime.now(timezone.utc)
+    old = now - timedelta(days=90)
+
+    async def body():
+        db = make_db()
+        await db.init_guild(GUILD_ID)
+        # Rollups for events whose raw rows retention has already pruned.
+        await db.bump_analytics(GUILD_ID, "member_join", amount=7, at=old)
+        await db.record_member_event(GUILD_ID, 1, "join")
+        await db.rebuild_analytics_rollups()
+        rows = await db.get_analytics_rollup(GUILD_ID, "member_join")
+        await db.close()
+        return rows
+
+    rows = run(body())
+    assert [(row["bucket_start"], row["count"]) for row in rows] == [
+        (rollup_buckets(old)["day"], 7),
+        (rollup_buckets(now)["day"], 1),
+    ]
+
+
+
+def test_rebuild_keeps_message_buckets_the_per_user_cap_has_trimmed(make_db):
+    now = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
+    old = now - timedelta(days=2)
+    heavy, light, channel = 1, 2, 70
+
+    async def post(db, message_id, user_id, at):
+        async with db.transaction() as conn:
+            await conn.execute(
+                "INSERT INTO user_messages (message_id, guild_id, channel_id, user_id, content, timestamp)"
+                " VALUES (?, ?, ?, ?, 'hi', ?)",
+                (message_id, GUILD_ID, channel, user_id, at.strftime("%Y-%m-%d %H:%M:%S")),
+            )
+        await db.bump_analytics(GUILD_ID, "message_channel", channel, at=at)
+        await db.bump_analytics(GUILD_ID, "message_user", user_id, at=at)
+
+    async def body():
+        db = make_db()
+        await db.init_guild(GUILD_ID)
+        await db.update_settings(GUILD_ID, {"retention_user_messages_per_user": 5})
+        await post(db, 50, light, old - timedelta(hours=1))
+        for n in range(6):
+            await post(db, 100 + n, heavy, old + timedelta(minutes=n))
+        for n in range(4):
+            await post(db, 200 + n, heavy, now + timedelta(minutes=n))
+        pruned = await db.prune_telemetry(now=now + timedelta(hours=1))
+        before = await _snapshot(db)
+        await db.rebuild_analytics_rollups(GUILD_ID)
+        after = await _snapshot(db)
+        await db.close()
+        return pruned, before, after
+
+    pruned, before, after = run(body())
+    assert pruned["user_messages"] == 5
+    # The heavy author's old day lost raw rows; its rollups must not be recounted.
+    assert after == before
+    old_day = rollup_buckets(old)["day"]
+    daily = {(bucket, metric, dimension): int(count) for bucket, metric, dimension, count in after["analytics_daily"]}
+    assert daily[(old_day, "message_channel", str(channel))] == 7
+    assert daily[(old_day, "message_user", str(heavy))] == 6
+
+
+# --- Retention --------------------------------------------------------------
+
+def test_hourly_rollups_are_pruned_and_daily_rollups_kept(make_db):
+    now = datetime.now(timezone.utc)
+
+    async def body():
+        db = make_db()
+        await db.init_guild(GUILD_ID)
+        for days_ago in (1, 29, 31, 60):
+            await db.bump_analytics(GUILD_ID, "automod", at=now - timedelta(days=days_ago))
+        deleted = await db.prune_analytics_rollups(now=now, batch_buckets=1)
+        hourly = await db.get_analytics_rollup(GUILD_ID, "automod", bucket="hour")
+        daily = await db.get_analytics_rollup(GUILD_ID, "automod", bucket="day")
+        await db.close()
+        return deleted, hourly, daily
+
+    deleted, hourly, daily = run(body())
+    assert deleted == 2
+    assert len(hourly) == 2
+    assert len(daily) == 4
@@ -0,0 +1,260 @@
+"""Content-addressed store for deleted-message attachments.
+
+``save_deleted_message_attachments`` used to write image bytes as BLOBs into
+the main database. The bytes now live on disk under their SHA-256 digest and
+the rows hold references counted in ``attachment_blobs``. These tests pin that
+reposts share one blob, that garbage collection and the size cap only remove
+what nothing references, that old BLOB rows are migrated out, and that the
+delete log's "View image" button still gets the image back.
+"""
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import types as _types
+
+from cogs.logging_cog import DeletedMessageImageView
+from db.attachment_store import content_digest
+from conftest import run
+
+GUILD = 555555555555555551
+CHANNEL = 10
+MEME = b"\x89PNG meme" * 1000
+
+
+def image(data, name="meme.png"):
+    return {"filename": name, "content_type": "image/png", "url": f"https://cdn/{name}", "data": data}
+
+
+async def save(db, message_id, *images):
+    await db.save_deleted_message_attachments(
+        guild_id=GUILD,
+        channel_id=CHANNEL,
+        message_id=message_id,
+        attachments=list(images),
+    )
+
+
+async def blob_rows(db):
+    async with db.get_connection() as conn:
+        cursor = await conn.execute("SELECT sha256, size, ref_count FROM attachment_blobs ORDER BY sha256")
+        return [tuple(row) for row in await cursor.fetchall()]
+
+
+def blob_files(db):
+    return sorted(db._attachment_store().digests())
+
+
+# --- Dedup ------------------------------------------------------------------
+
+def test_reposts_share_one_blob_and_keep_no_bytes_in_the_database(make_db):
+    async def body(db):
+        await db.init_guild(GUILD)
+        for message_id in range(1, 51):
+            await save(db, message_id, image(MEME))
+        await save(db, 99, image(b"other"))
+        # Saving a message again replaces its rows rather than adding references.
+        await save(db, 1, image(MEME))
+        async with db.get_connection() as conn:
+            cursor = await conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM deleted_message_attachments")
+            stored_in_db = (await cursor.fetchone())[0]
+        return await blob_rows(db), stored_in_db, await db.get_deleted_message_attachments(GUILD, 7)
+
+    db = make_db()
+    try:
+        rows, stored_in_db, records = run(body(db))
+    finally:
+        run(db.close())
+
+    digest = content_digest(MEME)
+    assert (digest, len(MEME), 50) in rows and len(rows) == 2
+    assert stored_in_db == 0
+    assert blob_files(db) == sorted([digest, content_digest(b"other")])
+    assert records[0]["path"].endswith(digest) and "data" not in records[0]
+    with open(records[0]["path"], "rb") as handle:
+        assert handle.read() == MEME
+
+
+# --- Garbage collection -----------------------------------------------------
+
+def test_gc_removes_unreferenced_and_stray_blobs_only(make_db):
+    async def body(db):
+        await db.init_guild(GUILD)
+        await save(db, 1, image(MEME))
+        await save(db, 2, image(MEME))
+        await save(db, 3, image(b"solo"))
+        # Message 3 is re-saved with a different image, orphaning "solo".
+        await save(db, 3, image(b"replacement"))
+        store = db._attachment_store()
+        await asyncio.to_thread(store.write, content_digest(b"stray"), b"stray")
+        return await db.collect_attachment_garbage(), await blob_rows(db)
+
+    # No cap, so saves skip their inline collection and the periodic pass does it all.
+    db = make_db(env={"ATTACHMENT_STORE_MAX_MB": "0"})
+    try:
+        result, rows = run(body(db))
+    finally:
+        run(db.close())
+
+    assert result["removed_blobs"] == 1 and result["evicted_rows"] == 0
+    assert result["freed_bytes"] == len(b"solo") + len(b"stray")
+    assert [(sha, refs) for sha, _, refs in rows] == sorted(
+        [(content_digest(MEME), 2), (content_digest(b"replacement"), 1)]
+    )
+    assert blob_files(db) == sorted([content_digest(MEME), content_digest(b"replacement")])
+
+
+def test_gc_waits_for_writers_holding_the_database_lock(make_db):
+    async def body(db):
+        await db.init_guild(GUILD)
+        await save(db, 1, image(b"solo"))
+        await save(db, 1, image(b"replacement"))
+        async with db._lock:
+            collection = asyncio.create_task(db.collect_attachment_garbage())
+            await asyncio.sleep(0.05)
+            # The orphan is still on record while another writer holds the lock.
+            waiting = not collection.done() and len(await blob_rows(db)) == 2
+        return waiting, await collection
+
+    db = make_db(env={"ATTACHMENT_STORE_MAX_MB": "0"})
+    try:
+        waiting, result = run(body(db))
+    finally:
+        run(db.close())
+
+    assert waiting
+    assert result["removed_blobs"] == 1
+
+
+def test_size_cap_evicts_the_oldest_attachments(make_db):
+    mb = 1024 * 1024
+
+    async def body(db):
+        await db.init_guild(GUILD)
+        for message_id in range(1, 6):
+            await save(db, message_id, image(bytes([message_id]) * (mb // 2)))
+        remaining = []
+        for message_id in range(1, 6):
+            remaining.append(bool(await db.get_deleted_message_attachments(GUILD, message_id)))
+        return remaining, await db.get_attachment_store_stats()
+
+    db = make_db(env={"ATTACHMENT_STORE_MAX_MB": "2"})
+    try:
+        remaining, stats = run(body(db))
+    finally:
+        run(db.close())
+
+    assert remaining == [False, True, True, True, True]
+    assert stats == {"blobs": 4, "bytes": 2 * mb, "references": 4}
+    assert len(blob_files(db)) == 4
+
+
+# --- Migration --------------------------------------------------------------
+
+def test_blob_rows_are_moved_into_the_store(make_db, tmp_path):
+    path = str(tmp_path / "modbot.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("""
+            CREATE TABLE deleted_message_attachments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                content_type TEXT,
+                original_url TEXT,
+                data BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO deleted_message_attachments (guild_id, channel_id, message_id, filename, content_type, original_url, data) VALUES (?, ?, ?, 'meme.png', 'image/png', '', ?)",
+            [(GUILD, CHANNEL, message_id, MEME) for message_id in (1, 2, 3)],
+        )
+
+    async def body(db):
+        await db.init_guild(GUILD)
+        async with db.get_connection() as conn:
+            cursor = await conn.execute("SELECT COUNT(*) FROM deleted_message_attachments WHERE LENGTH(data) > 0")
+            left_in_db = (await cursor.fetchone())[0]
+        return left_in_db, await blob_rows(db), await db.get_deleted_message_attachments(GUILD, 2)
+
+    db = make_db()
+    try:
+        left_in_db, rows, records = run(body(db))
+    finally:
+        run(db.close())
+
+    assert left_in_db == 0
+    assert rows == [(content_digest(MEME), len(MEME), 3)]
+    assert records[0]["path"].endswith(content_digest(MEME))
+
+
+# --- Delete log view --------------------------------------------------------
+
+class FakeResponse:
+    def __init__(self):
+        self.sent = {}
+
+    async def send_message(self, *args, **kwargs):
+        self.sent = kwargs
+
+
+def _image_interaction(message_id):
+    return _types.SimpleNamespace(
+        guild_id=GUILD,
+        message=_types.SimpleNamespace(
+            embeds=[_types.SimpleNamespace(description=f"**Message ID:** [{message_id}](https://x)", fields=[])]
+        ),
+        response=FakeResponse(),
+    )
+
+
+def test_view_image_button_streams_the_stored_image(make_db):
+    async def body(db):
+        await db.init_guild(GUILD)
+        await save(db, 123456789012345678, image(MEME))
+        view = DeletedMessageImageView(_types.SimpleNamespace(db=db))
+        interaction = _image_interaction(123456789012345678)
+        await view._send_images(interaction)
+        return interaction.response.sent
+
+    db = make_db()
+    try:
+        sent = run(body(db))
+    finally:
+        run(db.close())
+
+    [file] = sent["files"]
+    assert file.filename == "1-meme.png"
+    assert file.fp.read() == MEME
+    assert sent["embeds"][0].image.url == "attachment://1-meme.png"
+    file.close()
+
+
+def test_view_image_button_falls_back_when_the_blob_was_collected(make_db):
+    async def body(db):
+        await db.init_guild(GUILD)
+        await save(db, 123456789012345678, image(MEME))
+        records = await db.get_deleted_message_attachments(GUILD, 123456789012345678)
+        # The collector removes the file between the lookup and the send.
+        await asyncio.to_thread(db._attachment_store().delete, content_digest(MEME))
+
+        async def stale_lookup(guild_id, message_id):
+            return records
+
+        view = DeletedMessageImageView(_types.SimpleNamespace(
+            db=_types.SimpleNamespace(get_deleted_message_attachments=stale_lookup)
+        ))
+        interaction = _image_interaction(123456789012345678)
+        await view._send_images(interaction)
+        return interaction.response.sent
+
+    db = make_db()
+    try:
+        sent = run(body(db))
+    finally:
+        run(db.close())
+
+    assert "files" not in sent
+    assert sent["embeds"][0].image.url == "https://cdn/meme.png"
@@ -0,0 +1,251 @@
+"""Retention and compaction for the per-message telemetry tables.
+
+``user_messages``, ``automod_events`` and ``guild_member_events`` only ever
+grew. ``Database.prune_telemetry`` now deletes rows past each guild's policy
+(read from its settings) in bounded batches, then returns the freed pages to
+the filesystem. These tests seed a temp-file SQLite database with synthetic
+old rows and pin which rows survive, that deletes stay batched, that the file
+actually shrinks, and that ``get_database_stats`` reports the pass.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from database import Database
+from db.retention_mixin import RETENTION_DEFAULTS, retention_policy
+from conftest import run
+
+GUILD_A = 444444444444444441
+GUILD_B = 444444444444444442
+NOW = datetime(2026, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _stamp(days_ago: float) -> str:
+    return (NOW - timedelta(days=days_ago)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+async def _seed(db, guild_id, *, days_ago, count, user_id=1, first_message_id=1, content="x"):
+    async with db.get_connection() as conn:
+        await conn.executemany(
+            "INSERT INTO user_messages (message_id, guild_id, channel_id, user_id, content, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (first_message_id + index, guild_id, 7, user_id, content, _stamp(days_ago))
+                for index in range(count)
+            ],
+        )
+        await conn.executemany(
+            "INSERT INTO automod_events (guild_id, user_id, rule, category, severity, action, created_at) VALUES (?, ?, 'spam', 'behavior', 'low', 'log', ?)",
+            [(guild_id, user_id, _stamp(days_ago)) for _ in range(count)],
+        )
+        await conn.executemany(
+            "INSERT INTO guild_member_events (guild_id, user_id, event_type, created_at) VALUES (?, ?, 'join', ?)",
+            [(guild_id, user_id, _stamp(days_ago)) for _ in range(count)],
+        )
+        await conn.commit()
+
+
+async def _count(db, table, guild_id):
+    async with db.get_connection() as conn:
+        cursor = await conn.execute(f"SELECT COUNT(*) FROM {table} WHERE guild_id = ?", (guild_id,))
+        return (await cursor.fetchone())[0]
+
+
+async def _pragma(db, name):
+    async with db.get_connection() as conn:
+        cursor = await conn.execute(f"PRAGMA {name}")
+        return (await cursor.fetchone())[0]
+
+
+# --- Policy -----------------------------------------------------------------
+
+def test_policy_falls_back_to_defaults_and_clamps():
+    policy = retention_policy({"retention_user_messages_days": "7", "retention_automod_events_days": "junk",
+                               "retention_member_events_days": -5})
+    assert policy["retention_user_messages_days"] == 7
+    assert policy["retention_automod_events_days"] == RETENTION_DEFAULTS["retention_automod_events_days"]
+    assert policy["retention_member_events_days"] == 0
+    assert policy["retention_user_messages_per_user"] == RETENTION_DEFAULTS["retention_user_messages_per_user"]
+
+
+# --- Pruning ----------------------------------------------------------------
+
+def test_rows_past_each_guilds_max_age_are_deleted(make_db):
+    async def body(db):
+        await db.init_guild(GUILD_A)
+        await db.init_guild(GUILD_B)
+        # Guild B keeps automod events for 10 days and never prunes messages.
+        await db.update_settings(GUILD_B, {"retention_automod_events_days": 10, "retention_user_messages_days": 0,
+                                           "retention_user_messages_per_user": 0})
+        for guild_id, base in ((GUILD_A, 1_000), (GUILD_B, 2_000)):
+            await _seed(db, guild_id, days_ago=400, count=3, first_message_id=base)
+            await _seed(db, guild_id, days_ago=60, count=4, first_message_id=base + 100)
+            await _seed(db, guild_id, days_ago=1, count=5, first_message_id=base + 200)
+
+        pruned = await db.prune_telemetry(now=NOW)
+        counts = {
+            guild_id: tuple([await _count(db, table, guild_id) for table in ("user_messages", "automod_events", "guild_member_events")])
+            for guild_id in (GUILD_A, GUILD_B)
+        }
+        return pruned, counts
+
+    db = make_db()
+    try:
+        pruned, counts = run(body(db))
+    finally:
+        run(db.close())
+
+    # A: messages 30d, events 180d, member events 365d.
+    assert counts[GUILD_A] == (5, 9, 9)
+    # B: messages kept, events 10d, member events 365d (default).
+    assert counts[GUILD_B] == (12, 5, 9)
+    assert pruned == {"user_messages": 7, "automod_events": 3 + 7, "guild_member_events": 6}
+
+
+def test_per_user_cap_keeps_the_newest_messages(make_db):
+    async def body(db):
+        await db.init_guild(GUILD_A)
+        await db.update_settings(GUILD_A, {"retention_user_messages_per_user": 5})
+        await _seed(db, GUILD_A, days_ago=1, count=12, user_id=9, first_message_id=500)
+        await _seed(db, GUILD_A, days_ago=1, count=3, user_id=8, first_message_id=900)
+        await db.prune_telemetry(now=NOW, batch_size=2)
+        async with db.get_connection() as conn:
+            cursor = await conn.execute(
+                "SELECT user_id, message_id FROM user_messages WHERE guild_id = ? ORDER BY message_id", (GUILD_A,)
+            )
+            return [tuple(row) for row in await cursor.fetchall()]
+
+    db = make_db()
+    try:
+        rows = run(body(db))
+    finally:
+        run(db.close())
+
+    assert [message_id for user_id, message_id in rows if user_id == 9] == list(range(507, 512))
+    assert [message_id for user_id, message_id in rows if user_id == 8] == [900, 901, 902]
+
+
+def test_deletes_run_in_bounded_batches_and_release_the_lock(make_db):
+    batches = []
+
+    async def body(db):
+        await db.init_guild(GUILD_A)
+        await _seed(db, GUILD_A, days_ago=90, count=95)
+        original = db._delete_batch
+
+        async def tracked(sql, params):
+            assert not db._lock.locked()
+            count = await original(sql, params)
+            batches.append(count)
+            return count
+
+        db._delete_batch = tracked
+        return await db.prune_telemetry(now=NOW, batch_size=10)
+
+    db = make_db()
+    try:
+        pruned = run(body(db))
+    finally:
+        run(db.close())
+
+    assert pruned["user_messages"] == 95
+    assert max(batches) <= 10
+    assert sum(batches) == sum(pruned.values())
+
+
+def test_buffered_rows_are_flushed_before_pruning(make_db):
+    async def body(db):
+        await db.init_guild(GUILD_A)
+        db._write_behind.flush_interval = 3600
+        await db.record_member_event(GUILD_A, 5, "join")
+        await db.prune_telemetry(now=NOW + timedelta(days=10_000))
+        return db._write_behind.pending, await _count(db, "guild_member_events", GUILD_A)
+
+    db = make_db()
+    try:
+        assert run(body(db)) == (0, 0)
+    finally:
+        run(db.close())
+
+
+# --- Compaction -------------------------------------------------------------
+
+def test_prune_returns_free_pages_to_the_filesystem(make_db, tmp_path):
+    path = str(tmp_path / "compact.db")
+
+    async def body(db):
+        await db.init_guild(GUILD_A)
+        await _seed(db, GUILD_A, days_ago=90, count=3000, content="y" * 400)
+        await db.init_pool()
+        before = await _pragma(db, "page_count")
+        await db.prune_telemetry(now=NOW)
+        return before, await _pragma(db, "page_count"), await _pragma(db, "auto_vacuum")
+
+    db = make_db(path)
+    try:
+        before, after, mode = run(body(db))
+    finally:
+        run(db.close())
+
+    assert mode == 2  # INCREMENTAL
+    assert after < before / 2
+    assert os.path.getsize(path) < before * 4096 / 2
+
+
+def test_legacy_file_is_only_switched_by_the_explicit_conversion(make_db, tmp_path, caplog):
+    path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE legacy_marker (id INTEGER)")
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+
+    async def body(db):
+        await db.init_guild(GUILD_A)
+        await _seed(db, GUILD_A, days_ago=90, count=500, content="z" * 400)
+        await db.prune_telemetry(now=NOW)
+        await _seed(db, GUILD_A, days_ago=90, count=500, content="z" * 400)
+        await db.prune_telemetry(now=NOW)
+        after_prune = (await _pragma(db, "auto_vacuum"), await _pragma(db, "freelist_count"))
+        converted = await db.convert_to_incremental_vacuum()
+        after_convert = (await _pragma(db, "auto_vacuum"), await _pragma(db, "freelist_count"))
+        return after_prune, converted, after_convert
+
+    db = make_db(path)
+    try:
+        with caplog.at_level("INFO", logger="ModBot.Database.retention"):
+            after_prune, converted, after_convert = run(body(db))
+    finally:
+        run(db.close())
+
+    # Retention never rewrites the file; it says so once.
+    mode, free_pages = after_prune
+    assert mode == 0 and free_pages > 0
+    assert caplog.text.count("auto_vacuum is not INCREMENTAL") == 1
+    assert after_convert == (2, 0)
+    assert converted["pages_after"] < converted["pages_before"]
+
+
+# --- Stats ------------------------------------------------------------------
+
+def test_database_stats_report_the_last_pass(make_db):
+    async def body(db):
+        await db.init_guild(GUILD_A)
+        await _seed(db, GUILD_A, days_ago=90, count=4)
+        await _seed(db, GUILD_A, days_ago=1, count=2, first_message_id=100)
+        await db.prune_telemetry(now=NOW)
+        await db.prune_telemetry(now=NOW)
+        return await db.get_database_stats()
+
+    db = make_db()
+    try:
+        stats = run(body(db))
+    finally:
+        run(db.close())
+
+    assert stats["user_messages_count"] == 2
+    assert stats["automod_events_count"] == 6
+    retention = stats["retention"]
+    assert retention["last_pruned"] == {"user_messages": 0, "automod_events": 0, "guild_member_events": 0}
+    assert retention["pruned_total"]["user_messages"] == 4
+    assert retention["last_run_at"] == NOW.isoformat()
@@ -0,0 +1,219 @@
+"""Per-guild settings cache on ``Database.get_settings``.
+
+``get_settings`` sits on the per-message path of automod, aimoderation and the
+logging cog, so it is served from an in-process cache. A cache on this path is
+only acceptable if it can never show a stale value after one of our own
+writes, and if no caller can edit the copy everyone else is reading. These
+tests pin both, and time the read path with and without the cache.
+
+Everything runs against a throwaway SQLite file; no network, no Discord.
+"""
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import time
+
+import pytest
+
+from database import Database, FrozenSettings
+from conftest import run
+
+GUILD_ID = 111111111111111111
+
+
+async def _with_db(db, body):
+    try:
+        await db.init_guild(GUILD_ID)
+        return await body(db)
+    finally:
+        await db.close()
+
+
+# --- Write-through visibility -----------------------------------------------
+
+def test_update_is_visible_on_the_very_next_read(make_db):
+    async def body(db):
+        await db.get_settings_view(GUILD_ID)  # warm the cache
+        await db.update_settings(GUILD_ID, {"prefix": "?"})
+        return await db.get_settings_view(GUILD_ID)
+
+    assert run(_with_db(make_db(), body))["prefix"] == "?"
+
+
+def test_set_setting_is_visible_on_the_very_next_read(make_db):
+    async def body(db):
+        await db.get_settings(GUILD_ID)
+        await db.set_setting(GUILD_ID, "antiraid_enabled", True)
+        first = await db.get_settings(GUILD_ID)
+        await db.set_setting(GUILD_ID, "antiraid_enabled", False)
+        second = await db.get_settings(GUILD_ID)
+        return first, second
+
+    first, second = run(_with_db(make_db(), body))
+    assert first["antiraid_enabled"] is True
+    assert second["antiraid_enabled"] is False
+
+
+def test_admin_reset_is_visible_on_the_very_next_read(make_db):
+    async def body(db):
+        await db.update_settings(GUILD_ID, {"prefix": "?"})
+        await db.get_settings_view(GUILD_ID)
+        await db.update_settings(GUILD_ID, {})
+        return await db.get_settings_view(GUILD_ID)
+
+    assert "prefix" not in run(_with_db(make_db(), body))
+
+
+def test_read_racing_a_write_does_not_cache_the_old_value(make_db):
+    """A read that fetched before a write landed must not be cached after it."""
+
+    async def body(db):
+        original_load = db._load_settings_row
+        release = asyncio.Event()
+
+        async def slow_load(guild_id):
+            row = await original_load(guild_id)
+            await release.wait()
+            return row
+
+        db._load_settings_row = slow_load
+        reader = asyncio.create_task(db.get_settings_view(GUILD_ID))
+        await asyncio.sleep(0.05)
+        db._load_settings_row = original_load
+        await db.update_settings(GUILD_ID, {"prefix": "?"})
+        release.set()
+        stale = await reader
+        return stale, await db.get_settings_view(GUILD_ID)
+
+    stale, fresh = run(_with_db(make_db(), body))
+    assert "prefix" not in stale
+    assert fresh["prefix"] == "?"
+
+
+def test_cache_wide_invalidation_covers_uncached_guilds_mid_read(make_db):
+    """A read for a guild that was not cached when everything was invalidated."""
+
+    async def body(db):
+        original_load = db._load_settings_row
+        release = asyncio.Event()
+
+        async def slow_load(guild_id):
+            row = await original_load(guild_id)
+            await release.wait()
+            return row
+
+        db._load_settings_row = slow_load
+        reader = asyncio.create_task(db.get_settings_view(GUILD_ID))
+        await asyncio.sleep(0.05)
+        db._load_settings_row = original_load
+        async with db.get_connection() as conn:
+            await conn.execute(
+                "UPDATE guild_settings SET settings = ? WHERE guild_id = ?",
+                (json.dumps({"prefix": "!"}), GUILD_ID),
+            )
+            await conn.commit()
+        db.invalidate_settings_cache()
+        release.set()
+        stale = await reader
+        return stale, await db.get_settings_view(GUILD_ID)
+
+    stale, fresh = run(_with_db(make_db(), body))
+    assert "prefix" not in stale
+    assert fresh["prefix"] == "!"
+
+
+def test_external_writes_surface_after_the_ttl(make_db):
+    """The dashboard writes guild_settings directly; the TTL bounds staleness."""
+
+    async def body(db):
+        await db.get_settings_view(GUILD_ID)
+        async with db.get_connection() as conn:
+            await conn.execute(
+                "UPDATE guild_settings SET settings = ? WHERE guild_id = ?",
+                (json.dumps({"prefix": "$"}), GUILD_ID),
+            )
+            await conn.commit()
+        cached = await db.get_settings_view(GUILD_ID)
+        await asyncio.sleep(0.06)
+        return cached, await db.get_settings_view(GUILD_ID)
+
+    cached, refreshed = run(_with_db(make_db(_settings_cache_ttl_seconds=0.05), body))
+    assert "prefix" not in cached
+    assert refreshed["prefix"] == "$"
+
+
+# --- Read-only sharing ------------------------------------------------------
+
+def test_view_is_shared_and_read_only(make_db):
+    async def body(db):
+        await db.update_settings(GUILD_ID, {"mod_roles": [1, 2], "modules": {"logging": {"enabled": True}}})
+        return await db.get_settings_view(GUILD_ID), await db.get_settings_view(GUILD_ID)
+
+    first, second = run(_with_db(make_db(), body))
+    assert first is second
+    assert isinstance(first, FrozenSettings) and isinstance(first, dict)
+    with pytest.raises(TypeError):
+        first["prefix"] = "!"
+    with pytest.raises(TypeError):
+        first.update(prefix="!")
+    with pytest.raises(TypeError):
+        first["mod_roles"].append(3)
+    with pytest.raises(TypeError):
+        first["modules"]["logging"]["enabled"] = False
+    assert json.loads(json.dumps(first))["mod_roles"] == [1, 2]
+
+
+def test_get_settings_returns_a_private_mutable_copy(make_db):
+    async def body(db):
+        await db.update_settings(GUILD_ID, {"mod_roles": [1, 2]})
+        mine = await db.get_settings(GUILD_ID)
+        mine["prefix"] = "!"
+        mine["mod_roles"].append(3)
+        return mine, await db.get_settings(GUILD_ID)
+
+    mine, theirs = run(_with_db(make_db(), body))
+    assert type(mine) is dict and type(mine["mod_roles"]) is list
+    assert "prefix" not in theirs
+    assert theirs["mod_roles"] == [1, 2]
+
+
+def test_copying_a_view_gives_plain_mutable_containers(make_db):
+    async def body(db):
+        await db.update_settings(GUILD_ID, {"mod_roles": [1]})
+        return await db.get_settings_view(GUILD_ID)
+
+    view = run(_with_db(make_db(), body))
+    clone = copy.deepcopy(view)
+    clone["mod_roles"].append(2)
+    assert type(clone) is dict
+    assert view["mod_roles"] == [1]
+
+
+# --- Throughput -------------------------------------------------------------
+
+def test_cached_reads_are_faster_than_uncached(make_db):
+    """Micro-benchmark: the old SELECT + decode + normalize path vs a cache hit."""
+    reads = 2000
+
+    async def measure(db, read):
+        await db.update_settings(GUILD_ID, {"prefix": "?", "mod_roles": list(range(20))})
+        started = time.perf_counter()
+        for _ in range(reads):
+            await read(db)(GUILD_ID)
+        return reads / (time.perf_counter() - started)
+
+    uncached = run(_with_db(
+        make_db(_settings_cache_ttl_seconds=0.0),
+        lambda db: measure(db, lambda d: d.get_settings),
+    ))
+    cached_copy = run(_with_db(make_db(), lambda db: measure(db, lambda d: d.get_settings)))
+    cached_view = run(_with_db(make_db(), lambda db: measure(db, lambda d: d.get_settings_view)))
+
+    print(
+        f"\nget_settings: uncached {uncached:,.0f}/s, cached copy {cached_copy:,.0f}/s, "
+        f"cached view {cached_view:,.0f}/s"
+    )
+    assert cached_copy > uncached
+    assert cached_view > cached_copy
@@ -0,0 +1,206 @@
+"""Per-key settings patches (``Database.patch_settings``).
+
+``update_settings`` reads the whole guild blob, merges in Python and writes it
+all back, so two cogs touching unrelated keys serialise on the global lock and
+rewrite kilobytes of JSON for a one-field change. ``patch_settings`` pushes the
+merge into a single ``UPDATE``. These tests pin that the merge rules did not
+change in the move, and that concurrent patches to different keys never lose
+each other's writes.
+
+SQLite runs for real against a temp file. The PostgreSQL statement cannot be
+executed here, so it is checked for shape: placeholder/parameter agreement and
+the jsonb functions it relies on.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+
+import pytest
+
+from database import (
+    Database,
+    _convert_sqlite_placeholders,
+    _postgres_settings_patch_sql,
+    _settings_patch_plan,
+)
+from conftest import run
+
+GUILD_ID = 222222222222222222
+
+
+async def _stored(db, guild_id=GUILD_ID):
+    async with db.get_connection() as conn:
+        cursor = await conn.execute(
+            "SELECT settings FROM guild_settings WHERE guild_id = ?", (guild_id,)
+        )
+        row = await cursor.fetchone()
+    return json.loads(row[0]) if row and row[0] else {}
+
+
+async def _closing(db, body):
+    try:
+        return await body(db)
+    finally:
+        await db.close()
+
+
+# --- Merge semantics --------------------------------------------------------
+
+BASE = {
+    "prefix": "!",
+    "mod_roles": [1, 2],
+    "welcome": {"channel": 5, "card": {"bg": "x", "font": "y"}},
+    "shape": "not-an-object",
+    "cleared": 9,
+}
+
+PATCHES = [
+    {"prefix": "?"},
+    {"welcome": {"card": {"bg": "z"}}},
+    {"welcome": {"card": {}}},
+    {"shape": {"now": "object"}},
+    {"cleared": None},
+    {"mod_roles": [3]},
+    {"brand_new": {"nested": {"deep": True}}},
+    {"antiraid_enabled": "on", "welcome": {"channel": None}},
+]
+
+
+@pytest.mark.parametrize("patch", PATCHES)
+def test_patch_matches_update_settings_merge(make_db, tmp_path, patch):
+    async def apply(method):
+        db = make_db(tmp_path / f"{method}.db")
+        try:
+            await db.init_guild(GUILD_ID)
+            await db.update_settings(GUILD_ID, BASE)
+            await getattr(db, method)(GUILD_ID, patch)
+            return await _stored(db), await db.get_settings(GUILD_ID)
+        finally:
+            await db.close()
+
+    merged_stored, merged_view = run(apply("update_settings"))
+    patched_stored, patched_view = run(apply("patch_settings"))
+    assert patched_stored == merged_stored
+    assert patched_view == merged_view
+
+
+def test_flat_toggle_is_mirrored_into_modules(make_db):
+    async def body(db):
+        await db.init_guild(GUILD_ID)
+        await db.patch_settings(GUILD_ID, {"aimod_enabled": True, "mod_log_channel": 77})
+        return await _stored(db)
+
+    db = make_db()
+    stored = run(_closing(db, body))
+    assert stored["modules"]["aimod"]["enabled"] is True
+    assert stored["log_channel_mod"] == 77
+    assert stored["modules"]["logging"]["settings"]["modChannel"] == 77
+
+
+def test_autoroles_patch_respects_stored_verification(make_db):
+    async def body(db):
+        await db.init_guild(GUILD_ID)
+        await db.set_setting(GUILD_ID, "verification_enabled", True)
+        await db.set_setting(GUILD_ID, "autoroles_enabled", True)
+        return await _stored(db)
+
+    stored = run(_closing(make_db(), body))
+    assert stored["verification_enabled"] is True
+    assert stored["autoroles_enabled"] is False
+    assert stored["modules"]["autoroles"]["enabled"] is False
+
+
+def test_module_patch_does_not_override_the_stored_flat_toggle(make_db, tmp_path):
+    async def apply(method):
+        db = make_db(tmp_path / f"{method}.db")
+        try:
+            await db.init_guild(GUILD_ID)
+            await db.update_settings(GUILD_ID, {"automod_enabled": False})
+            await getattr(db, method)(GUILD_ID, {"modules": {"automod": {"enabled": True}}})
+            return await _stored(db)
+        finally:
+            await db.close()
+
+    assert run(apply("patch_settings")) == run(apply("update_settings"))
+
+
+def test_patch_creates_a_missing_settings_row(make_db):
+    async def body(db):
+        await db.init_guild(GUILD_ID)
+        await db.patch_settings(GUILD_ID + 1, {"prefix": "?"})
+        return await _stored(db, GUILD_ID + 1)
+
+    assert run(_closing(make_db(), body)) == {"prefix": "?"}
+
+
+def test_set_setting_goes_through_the_patch_path(make_db):
+    async def body(db):
+        await db.init_guild(GUILD_ID)
+        await db.update_settings(GUILD_ID, {"prefix": "!"})
+        await db.set_setting(GUILD_ID, "raid_mode", True)
+        return await _stored(db)
+
+    stored = run(_closing(make_db(), body))
+    # Only the touched key was written; defaults were not baked into the row.
+    assert stored == {"prefix": "!", "raid_mode": True}
+
+
+def test_empty_patch_is_a_no_op(make_db):
+    async def body(db):
+        await db.init_guild(GUILD_ID)
+        await db.update_settings(GUILD_ID, {"prefix": "!"})
+        await db.patch_settings(GUILD_ID, {})
+        return await _stored(db)
+
+    assert run(_closing(make_db(), body)) == {"prefix": "!"}
+
+
+# --- Concurrency ------------------------------------------------------------
+
+def test_concurrent_patches_to_different_keys_lose_nothing(make_db):
+    tasks = 200
+
+    async def body(db):
+        await db.init_guild(GUILD_ID)
+        await db.update_settings(GUILD_ID, {"untouched": "yes"})
+        await asyncio.gather(*(
+            db.patch_settings(GUILD_ID, {f"key_{index}": index, "counters": {f"c_{index}": index}})
+            for index in range(tasks)
+        ))
+        return await _stored(db), await db.get_settings_view(GUILD_ID)
+
+    stored, view = run(_closing(make_db(), body))
+    assert stored["untouched"] == "yes"
+    assert all(stored[f"key_{index}"] == index for index in range(tasks))
+    assert stored["counters"] == {f"c_{index}": index for index in range(tasks)}
+    assert view["key_0"] == 0 and view[f"key_{tasks - 1}"] == tasks - 1
+
+
+# --- PostgreSQL statement shape ---------------------------------------------
+
+@pytest.mark.parametrize("patch", PATCHES)
+def test_postgres_patch_binds_every_placeholder(patch):
+    object_paths, leaves = _settings_patch_plan(patch)
+    sql, params = _postgres_settings_patch_sql(object_paths, leaves)
+    params.append(GUILD_ID)
+    converted = _convert_sqlite_placeholders(sql)
+
+    numbers = [int(n) for n in re.findall(r"\$(\d+)", converted)]
+    assert numbers == list(range(1, len(params) + 1))
+    assert converted.startswith("UPDATE guild_settings SET settings =")
+    assert "jsonb_set(" in converted
+
+    # Paths bind as text[], values as JSON text, the guild id last.
+    text_array_params = [p for p in params if isinstance(p, list)]
+    assert all(all(isinstance(key, str) for key in path) for path in text_array_params)
+    assert params[-1] == GUILD_ID
+    leaf_values = params[1:2 * len(leaves):2]
+    assert leaf_values == [json.dumps(value) for _, value in leaves]
+
+
+def test_patch_plan_orders_parent_objects_first():
+    object_paths, leaves = _settings_patch_plan({"a": {"b": {"c": 1}, "d": 2}, "e": 3})
+    assert object_paths == [("a",), ("a", "b")]
+    assert leaves == [(("a", "b", "c"), 1), (("a", "d"), 2), (("e",), 3)]
@@ -0,0 +1,323 @@
+"""Batched write-behind for per-message telemetry inserts.
+
+``track_user_message``, ``record_automod_event`` and ``record_member_event``
+used to INSERT and COMMIT one row at a time. They now queue rows on
+``Database._write_behind``, which writes each table's rows with one
+``executemany`` per flush. These tests pin that nothing queued is lost on
+shutdown, that rows keep their order within a table, that a full buffer makes
+callers wait instead of growing without bound, and time the batched path
+against the old per-row commits on an in-memory database.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import types as _types
+
+import pytest
+
+from database import Database
+from db.write_behind import WriteBehindBuffer
+from conftest import run
+
+GUILD_ID = 333333333333333333
+
+
+def _message(message_id, content="hello", user_id=42, channel_id=7):
+    return _types.SimpleNamespace(
+        id=message_id,
+        content=content,
+        guild=_types.SimpleNamespace(id=GUILD_ID),
+        channel=_types.SimpleNamespace(id=channel_id),
+        author=_types.SimpleNamespace(id=user_id, bot=False),
+    )
+
+
+async def _record_event(db, index):
+    await db.record_automod_event(GUILD_ID, 42, 7, "spam", "behavior", "low", "log", f"event {index}", False)
+
+
+async def _count(db, table):
+    async with db.get_connection() as conn:
+        cursor = await conn.execute(f"SELECT COUNT(*) FROM {table}")
+        row = await cursor.fetchone()
+    return row[0]
+
+
+# --- Shutdown drain ---------------------------------------------------------
+
+def test_close_drains_rows_that_never_reached_a_flush(make_db, tmp_path):
+    path = str(tmp_path / "drain.db")
+
+    async def write():
+        db = make_db(path, buffer={"flush_rows": 10_000, "flush_interval": 3600})
+        await db.init_guild(GUILD_ID)
+        for index in range(25):
+            await _record_event(db, index)
+            await db.track_user_message(_message(index))
+        await db.record_member_event(GUILD_ID, 42, "join")
+        assert db._write_behind.pending == 51
+        await db.close()
+        assert db._write_behind.pending == 0
+
+    async def read():
+        db = make_db(path)
+        try:
+            await db.init_guild(GUILD_ID)
+            return (
+                await _count(db, "automod_events"),
+                await _count(db, "user_messages"),
+                await _count(db, "guild_member_events"),
+            )
+        finally:
+            await db.close()
+
+    run(write())
+    assert run(read()) == (25, 25, 1)
+
+
+def test_close_waits_for_an_in_flight_flush(make_db):
+    async def body():
+        db = make_db(buffer={"flush_rows": 5, "flush_interval": 3600})
+        await db.init_guild(GUILD_ID)
+        original = db._write_rows
+        started = asyncio.Event()
+
+        async def slow_write(sql, rows):
+            started.set()
+            await asyncio.sleep(0.05)
+            await original(sql, rows)
+
+        db._write_behind._writer = slow_write
+        for index in range(5):
+            await _record_event(db, index)
+        await started.wait()
+        await db.close()
+        await db.init_pool()
+        try:
+            return await _count(db, "automod_events")
+        finally:
+            await db.close()
+
+    assert run(body()) == 5
+
+
+# --- Flush triggers and ordering ------------------------------------------------
+
+def test_rows_flush_on_count_and_on_interval(make_db):
+    async def body():
+        db = make_db(buffer={"flush_rows": 10, "flush_interval": 0.05})
+        try:
+            await db.init_guild(GUILD_ID)
+            for index in range(10):
+                await _record_event(db, index)
+            await asyncio.sleep(0.01)
+            after_count = await _count(db, "automod_events")
+
+            await _record_event(db, 10)
+            await asyncio.sleep(0.01)
+            before_interval = await _count(db, "automod_events")
+            await asyncio.sleep(0.1)
+            after_interval = await _count(db, "automod_events")
+            return after_count, before_interval, after_interval
+        finally:
+            await db.close()
+
+    assert run(body()) == (10, 10, 11)
+
+
+def test_rows_keep_their_order_within_a_table(make_db):
+    async def body():
+        db = make_db(buffer={"flush_rows": 37, "flush_interval": 0.01})
+        try:
+            await db.init_guild(GUILD_ID)
+            await asyncio.gather(*(_record_event(db, index) for index in range(500)))
+            await db.flush_pending_writes()
+            async with db.get_connection() as conn:
+                cursor = await conn.execute("SELECT reason FROM automod_events ORDER BY id")
+                return [row[0] for row in await cursor.fetchall()]
+        finally:
+            await db.close()
+
+    assert run(body()) == [f"event {index}" for index in range(500)]
+
+
+def test_readers_see_rows_that_are_still_buffered(make_db):
+    async def body():
+        db = make_db(buffer={"flush_rows": 10_000, "flush_interval": 3600})
+        try:
+            await db.init_guild(GUILD_ID)
+            for index in range(3):
+                await db.track_user_message(_message(index, content=f"msg {index}"))
+            by_user = await db.get_recent_user_messages(GUILD_ID, 42)
+            by_channel = await db.get_recent_channel_messages(7)
+            return [row["content"] for row in by_user], len(by_channel)
+        finally:
+            await db.close()
+
+    contents, channel_rows = run(body())
+    # Same-second timestamps tie, so only membership is stable here.
+    assert sorted(contents) == ["msg 0", "msg 1", "msg 2"]
+    assert channel_rows == 3
+
+
+def test_a_replayed_message_does_not_sink_its_batch(make_db):
+    async def body():
+        db = make_db(buffer={"flush_rows": 10_000, "flush_interval": 3600})
+        try:
+            await db.init_guild(GUILD_ID)
+            for message_id in (1, 2, 2, 3):
+                await db.track_user_message(_message(message_id))
+            await db.flush_pending_writes()
+            return await _count(db, "user_messages")
+        finally:
+            await db.close()
+
+    assert run(body()) == 3
+
+
+def test_a_failed_batch_is_rolled_back_not_committed_later(make_db):
+    async def body():
+        db = make_db(buffer={"flush_rows": 10_000, "flush_interval": 3600})
+        try:
+            await db.init_guild(GUILD_ID)
+            sql = "INSERT INTO guild_member_events (guild_id, user_id, event_type) VALUES (?, ?, ?)"
+            await db._write_behind.add(sql, (GUILD_ID, 1, "join"))
+            await db._write_behind.add(sql, (GUILD_ID, None, "join"))  # NOT NULL
+            await db.flush_pending_writes()
+            # An unrelated write commits whatever the connection still holds.
+            await db.init_guild(GUILD_ID + 1)
+            return await _count(db, "guild_member_events")
+        finally:
+            await db.close()
+
+    assert run(body()) == 0
+
+
+def test_a_flush_waits_for_an_open_transaction(make_db):
+    async def body():
+        db = make_db(buffer={"flush_rows": 10_000, "flush_interval": 3600})
+        try:
+            await db.init_guild(GUILD_ID)
+            await db.record_member_event(GUILD_ID, 1, "join")
+            with pytest.raises(RuntimeError):
+                async with db.transaction() as conn:
+                    await conn.execute(
+                        "INSERT INTO guild_member_events (guild_id, user_id, event_type) VALUES (?, ?, ?)",
+                        (GUILD_ID, 2, "leave"),
+                    )
+                    flush = asyncio.ensure_future(db.flush_pending_writes())
+                    await asyncio.sleep(0.05)
+                    flushed_inside = flush.done()
+                    raise RuntimeError("abort the transaction")
+            await flush
+            async with db.get_connection() as conn:
+                cursor = await conn.execute("SELECT user_id FROM guild_member_events")
+                users = [row[0] for row in await cursor.fetchall()]
+            return flushed_inside, users
+        finally:
+            await db.close()
+
+    flushed_inside, users = run(body())
+    # The buffered join lands; the aborted transaction's leave does not.
+    assert not flushed_inside
+    assert users == [1]
+
+
+def test_invalid_member_event_is_rejected_before_queueing(make_db):
+    db = make_db()
+    with pytest.raises(ValueError):
+        run(db.record_member_event(GUILD_ID, 42, "kick"))
+    assert db._write_behind.pending == 0
+
+
+# --- Backpressure -----------------------------------------------------------
+
+def test_full_buffer_makes_writers_wait():
+    written: list[int] = []
+    peak = 0
+
+    async def body():
+        nonlocal peak
+        gate = asyncio.Event()
+
+        async def writer(sql, rows):
+            await gate.wait()
+            written.extend(row[0] for row in rows)
+
+        buffer = WriteBehindBuffer(writer, flush_rows=1000, flush_interval=3600, max_rows=8)
+
+        async def producer():
+            nonlocal peak
+            for index in range(40):
+                await buffer.add("INSERT", (index,))
+                peak = max(peak, buffer.pending)
+
+        task = asyncio.create_task(producer())
+        await asyncio.sleep(0.02)
+        blocked = not task.done()
+        gate.set()
+        await task
+        await buffer.close()
+        return blocked
+
+    assert run(body()) is True
+    assert peak <= 8
+    assert written == list(range(40))
+
+
+
+def test_increments_waiting_on_a_full_buffer_do_not_overwrite_each_other():
+    written = []
+
+    async def body():
+        async def writer(sql, rows):
+            await asyncio.sleep(0.01)
+            written.extend(rows)
+
+        buffer = WriteBehindBuffer(writer, flush_rows=1000, flush_interval=3600, max_rows=2)
+        await buffer.increment("S", ("a",))
+        await buffer.increment("S", ("b",))
+        await asyncio.gather(buffer.increment("S", ("k",)), buffer.increment("S", ("k",)))
+        keys = buffer._counter_keys
+        await buffer.close()
+        return keys
+
+    assert run(body()) == 1
+    assert sorted(written) == [("a", 1), ("b", 1), ("k", 2)]
+
+
+# --- Throughput -------------------------------------------------------------
+
+def test_batched_inserts_beat_per_row_commits(make_db):
+    """Micro-benchmark on an in-memory SQLite database."""
+    rows = 2000
+    sql = "INSERT INTO guild_member_events (guild_id, user_id, event_type) VALUES (?, ?, ?)"
+
+    async def per_row(db):
+        async with db.get_connection() as conn:
+            for index in range(rows):
+                await conn.execute(sql, (GUILD_ID, index + 1, "join"))
+                await conn.commit()
+
+    async def batched(db):
+        for index in range(rows):
+            await db.record_member_event(GUILD_ID, index + 1, "join")
+        await db.flush_pending_writes()
+
+    async def measure(body):
+        db = make_db(":memory:")
+        try:
+            await db.init_guild(GUILD_ID)
+            started = time.perf_counter()
+            await body(db)
+            elapsed = time.perf_counter() - started
+            assert await _count(db, "guild_member_events") == rows
+            return rows / elapsed
+        finally:
+            await db.close()
+
+    old = run(measure(per_row))
+    new = run(measure(batched))
+    print(f"\nmember events: per-row commit {old:,.0f} rows/s, write-behind {new:,.0f} rows/s")
+    assert new > old
@@ -0,0 +1,192 @@
+"""Coalesced, per-channel delivery of log embeds.
+
+``safe_send_log`` used to make one API call per log embed, so a 500-message
+purge meant 500 sequential sends to the same log channel. ``LogBatcher`` now
+queues embeds per channel and sends up to ten per message (or folds a deep
+backlog into one summary with a text file), flushing on size or a short
+deadline, in order. Ban and kick logs skip the queue. These tests drive a
+fake channel and count its sends.
+"""
+from __future__ import annotations
+
+import asyncio
+import types as _types
+
+import discord
+
+from cogs.logging_cog import Logging
+from utils.log_batcher import LogBatcher, embed_to_text
+from conftest import run
+
+DELAY = 0.05
+
+
+class FakeChannel:
+    def __init__(self, channel_id=1):
+        self.id = channel_id
+        self.name = f"log-{channel_id}"
+        self.guild = _types.SimpleNamespace(id=99, name="guild")
+        self.calls: list[dict] = []
+
+    async def send(self, **kwargs):
+        await asyncio.sleep(0)
+        self.calls.append(kwargs)
+
+    def titles(self):
+        return [embed.title for call in self.calls for embed in call["embeds"]]
+
+
+def event(n, description="deleted"):
+    return discord.Embed(title=f"event {n}", description=description)
+
+
+async def burst(batcher, channel, count, start=0):
+    for n in range(start, start + count):
+        await batcher.submit(channel, event(n))
+
+
+def test_500_event_burst_is_packed_ten_per_message_in_order():
+    channel = FakeChannel()
+
+    async def body():
+        batcher = LogBatcher(flush_delay=DELAY, fold_threshold=0)
+        await burst(batcher, channel, 500)
+        await asyncio.sleep(DELAY * 4)
+        return batcher
+
+    batcher = run(body())
+    assert batcher.send_calls == len(channel.calls) == 50
+    assert all(len(call["embeds"]) == 10 for call in channel.calls)
+    assert channel.titles() == [f"event {n}" for n in range(500)]
+    assert batcher.pending(channel.id) == 0
+
+
+def test_deep_backlog_is_folded_into_a_summary_with_a_text_file():
+    channel = FakeChannel()
+
+    async def body():
+        batcher = LogBatcher(flush_delay=DELAY, fold_threshold=50, fold_max=200)
+        await burst(batcher, channel, 500)
+        await asyncio.sleep(DELAY * 4)
+        return batcher
+
+    batcher = run(body())
+    # 200 + 200 + 100 folded; nothing is left to pack ten at a time.
+    assert batcher.send_calls == 3
+    texts = []
+    for call in channel.calls:
+        [summary] = call["embeds"]
+        assert summary.footer.text.startswith("Burst folded")
+        texts.append(call["file"].fp.read().decode("utf-8"))
+    assert [summary["embeds"][0].title for summary in channel.calls] == ["200 log events", "200 log events", "100 log events"]
+    order = [line.split("] ", 1)[1] for text in texts for line in text.splitlines() if line.startswith("[")]
+    assert order == [f"event {n}" for n in range(500)]
+
+
+def test_partial_batches_wait_for_the_deadline_and_respect_the_char_budget():
+    channel = FakeChannel()
+
+    async def body():
+        batcher = LogBatcher(flush_delay=DELAY, fold_threshold=0)
+        await batcher.submit(channel, event(0))
+        await asyncio.sleep(DELAY / 5)
+        early = len(channel.calls)
+        await asyncio.sleep(DELAY * 2)
+        single = len(channel.calls)
+        # Seven small embeds, then 1,500-character ones: only three of those
+        # fit beside them under Discord's 6,000-character total.
+        await burst(batcher, channel, 7, start=1)
+        for n in range(8, 15):
+            await batcher.submit(channel, event(n, "x" * 1500))
+        await asyncio.sleep(DELAY * 4)
+        return early, single
+
+    early, single = run(body())
+    assert (early, single) == (0, 1)
+    assert [len(call["embeds"]) for call in channel.calls] == [1, 10, 3, 1]
+    assert channel.titles() == [f"event {n}" for n in range(15)]
+
+
+def test_views_go_out_alone_without_reordering():
+    channel = FakeChannel()
+    view = object()
+
+    async def body():
+        batcher = LogBatcher(flush_delay=DELAY, fold_threshold=0)
+        await burst(batcher, channel, 3)
+        await batcher.submit(channel, event(3), view=view)
+        await burst(batcher, channel, 2, start=4)
+        await batcher.close()
+
+    run(body())
+    assert [len(call["embeds"]) for call in channel.calls] == [3, 1, 2]
+    assert channel.calls[1]["view"] is view
+    assert channel.titles() == [f"event {n}" for n in range(6)]
+
+
+def test_priority_logs_bypass_the_queue():
+    channel = FakeChannel()
+
+    async def body():
+        batcher = LogBatcher(flush_delay=DELAY, fold_threshold=0)
+        await burst(batcher, channel, 25)
+        await batcher.submit(channel, discord.Embed(title="Member banned"), priority=True)
+        await asyncio.sleep(DELAY * 4)
+
+    run(body())
+    assert channel.calls[0]["embeds"][0].title == "Member banned"
+    assert channel.titles()[1:] == [f"event {n}" for n in range(25)]
+
+
+def test_ban_and_kick_titles_are_priority():
+    for title in ("Member banned", "Member unbanned", "Member softbanned", "Member kicked"):
+        assert Logging._is_priority_log(discord.Embed(title=title))
+    for title in ("Message deleted", "Bulk message delete", "Ban list exported"):
+        assert not Logging._is_priority_log(discord.Embed(title=title))
+
+
+def test_failed_sends_reach_the_failure_hook():
+    failures = []
+
+    class BrokenChannel(FakeChannel):
+        async def send(self, **kwargs):
+            raise RuntimeError("boom")
+
+    async def on_failure(channel, exc, log_types):
+        failures.append((channel.id, str(exc), log_types))
+
+    async def body():
+        batcher = LogBatcher(flush_delay=DELAY, on_failure=on_failure)
+        await batcher.submit(BrokenChannel(7), event(0))
+        await batcher.submit(BrokenChannel(8), event(1), log_type="audit")
+        await batcher.submit(BrokenChannel(9), event(2), log_type="audit", priority=True)
+        await batcher.close()
+
+    run(body())
+    assert sorted(failures) == [(7, "boom", (None,)), (8, "boom", ("audit",)), (9, "boom", ("audit",))]
+
+
+def test_a_deleted_audit_mirror_invalidates_the_audit_cache_entry():
+    invalidated = []
+    cog = Logging.__new__(Logging)
+    cog._channel_cache = _types.SimpleNamespace(
+        invalidate=lambda guild_id, log_type: _record(invalidated, (guild_id, log_type))
+    )
+    response = _types.SimpleNamespace(status=404, reason="Not Found")
+    gone = discord.NotFound(response, "Unknown Channel")
+
+    run(cog._on_log_send_failure(FakeChannel(3), gone, ("audit",)))
+    run(cog._on_log_send_failure(FakeChannel(4), gone, (None,)))
+    assert invalidated == [(99, "audit"), (99, "unknown")]
+
+
+async def _record(sink, value):
+    sink.append(value)
+
+
+def test_embed_text_rendering():
+    embed = discord.Embed(title="Message deleted", description="line one\nline two")
+    embed.add_field(name="Channel", value="#general")
+    embed.set_footer(text="ID: 5")
+    text = embed_to_text(embed)
+    assert "] Message deleted\n  line one\n  line two\n  Channel: #general\n  ID: 5" in text
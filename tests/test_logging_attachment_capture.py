@@ -0,0 +1,260 @@
+"""Lazy, size-capped attachment capture for deleted-message logs.
+
+The logging cog used to download every image attachment in full the moment a
+message was sent. It now captures per a guild policy (a media-proxy thumbnail
+by default, the full file, or nothing for trusted channels), keeps captures
+under a per-guild disk budget, and at delete time prefers the still-valid CDN
+URL over the capture. These tests serve attachments from a local aiohttp
+server that counts the bytes it sends, so bandwidth per 1,000 messages is
+measured rather than inferred.
+"""
+from __future__ import annotations
+
+import contextlib
+import time
+import types as _types
+
+import aiohttp
+from aiohttp import web
+
+from cogs.logging_cog import Logging
+from utils.attachment_cache import (
+    AttachmentCache,
+    cdn_url_expiry,
+    fetch_capped,
+    thumbnail_url,
+)
+from conftest import run
+
+GUILD = 1
+CHANNEL = 10
+TRUSTED = 11
+FULL_SIZE = 120_000
+THUMB_SIZE = 6_000
+
+
+class FakeCDN:
+    """Serves originals on /cdn and /media, and previews when ``width`` is given."""
+
+    def __init__(self):
+        self.bytes_sent = 0
+        self.requests = 0
+        self.deleted: set[str] = set()
+        self.base = ""
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        name = request.match_info["name"]
+        if name in self.deleted:
+            return web.Response(status=404)
+        body = b"t" * THUMB_SIZE if "width" in request.query else b"f" * FULL_SIZE
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="image/png")
+
+    def attachment(self, name: str, *, expires_in: float = 86400, image: bool = True):
+        signature = f"ex={int(time.time() + expires_in):x}&is=0&hm=abc"
+        filename = f"{name}.png" if image else f"{name}.txt"
+        return _types.SimpleNamespace(
+            filename=filename,
+            url=f"{self.base}/cdn/{name}?{signature}",
+            proxy_url=f"{self.base}/media/{name}?{signature}",
+            content_type="image/png" if image else "text/plain",
+            size=FULL_SIZE,
+            width=1920,
+            height=1080,
+        )
+
+
+@contextlib.asynccontextmanager
+async def fake_cdn():
+    cdn = FakeCDN()
+    app = web.Application()
+    app.router.add_get("/cdn/{name}", cdn.handle)
+    app.router.add_get("/media/{name}", cdn.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    cdn.base = f"http://127.0.0.1:{port}"
+    try:
+        yield cdn
+    finally:
+        await runner.cleanup()
+
+
+class FakeDB:
+    def __init__(self, **settings):
+        self.settings = {"message_log_channel": 99, **settings}
+
+    async def get_settings_view(self, guild_id):
+        return self.settings
+
+
+def make_cog(tmp_path, db, **budgets):
+    cog = Logging(_types.SimpleNamespace(db=db))
+    cog._attachment_cache = AttachmentCache(tmp_path, **budgets)
+    return cog
+
+
+def message(message_id, attachments, channel_id=CHANNEL):
+    return _types.SimpleNamespace(
+        id=message_id,
+        guild=_types.SimpleNamespace(id=GUILD),
+        channel=_types.SimpleNamespace(id=channel_id),
+        attachments=attachments,
+    )
+
+
+def traffic(cdn):
+    """1,000 messages: every fourth carries an image, every tenth a text file."""
+    messages = []
+    for n in range(1000):
+        attachments = []
+        if n % 4 == 0:
+            attachments.append(cdn.attachment(f"img{n}"))
+        if n % 10 == 0:
+            attachments.append(cdn.attachment(f"doc{n}", image=False))
+        messages.append(message(10_000 + n, attachments, TRUSTED if n % 8 == 0 else CHANNEL))
+    return messages
+
+
+# --- Capture policies -------------------------------------------------------
+
+def test_bytes_fetched_per_1000_messages_by_policy(tmp_path):
+    policies = {
+        "full": {"log_attachment_capture": "full"},
+        "thumbnail": {},
+        "thumbnail+trusted": {"log_attachment_trusted_channels": [str(TRUSTED)]},
+        "none": {"log_attachment_capture": "none"},
+    }
+
+    async def measure(name, settings):
+        async with fake_cdn() as cdn:
+            cog = make_cog(tmp_path / name, FakeDB(**settings), guild_budget_bytes=2_000_000)
+            messages = traffic(cdn)
+            for msg in messages:
+                await cog._process_message_attachments_on_send(msg)
+            await cog.cog_unload()
+            return cdn.bytes_sent, cdn.requests, cog._attachment_cache
+
+    results = {name: run(measure(name, settings)) for name, settings in policies.items()}
+    print()
+    for name, (sent, requests, cache) in results.items():
+        print(f"{name:>18}: {sent / 1e6:7.2f} MB in {requests:4d} requests, {cache.total_bytes / 1e6:5.2f} MB on disk")
+
+    images = 250
+    assert results["full"][:2] == (images * FULL_SIZE, images)
+    assert results["thumbnail"][:2] == (images * THUMB_SIZE, images)
+    # Every eighth message (half of the image-bearing ones) is in the trusted channel.
+    assert results["thumbnail+trusted"][:2] == (images // 2 * THUMB_SIZE, images // 2)
+    assert results["none"][:2] == (0, 0)
+    # The full policy overflows the budget and evicts; previews all fit.
+    full_cache = results["full"][2]
+    assert full_cache.usage(GUILD) <= 2_000_000 and full_cache.evictions > 0
+    assert results["thumbnail"][2].evictions == 0
+
+
+def test_nothing_is_captured_when_deletes_are_not_logged(tmp_path):
+    async def body():
+        async with fake_cdn() as cdn:
+            db = FakeDB(log_attachment_capture="full")
+            db.settings["message_log_channel"] = None
+            cog = make_cog(tmp_path, db)
+            await cog._process_message_attachments_on_send(message(1, [cdn.attachment("a")]))
+            await cog.cog_unload()
+            return cdn.requests
+
+    assert run(body()) == 0
+
+
+# --- Delete time ------------------------------------------------------------
+
+def test_delete_prefers_the_cdn_url_and_falls_back_to_the_capture(tmp_path):
+    async def body():
+        async with fake_cdn() as cdn:
+            cog = make_cog(tmp_path, FakeDB())
+            live = cdn.attachment("live")
+            expired = cdn.attachment("expired", expires_in=-60)
+            gone = cdn.attachment("gone")
+            for message_id, attachment in ((1, live), (2, expired), (3, gone)):
+                await cog._process_message_attachments_on_send(message(message_id, [attachment]))
+            cdn.deleted.add("gone")
+
+            recovered = {}
+            for message_id, attachment in ((1, live), (2, expired), (3, gone)):
+                records = cog._attachment_records([attachment])
+                assert await cog._recover_deleted_attachments(GUILD, message_id, records)
+                recovered[message_id] = len(records[0]["data"])
+            leftover = len(cog._attachment_cache)
+            await cog.cog_unload()
+            return recovered, leftover
+
+    recovered, leftover = run(body())
+    # Unexpired CDN URL: the original. Expired or already purged: the thumbnail.
+    assert recovered == {1: FULL_SIZE, 2: THUMB_SIZE, 3: THUMB_SIZE}
+    assert leftover == 0
+
+
+# --- Disk cache -------------------------------------------------------------
+
+def test_guild_budgets_evict_each_guilds_oldest_captures(tmp_path):
+    cache = AttachmentCache(tmp_path, guild_budget_bytes=300, total_budget_bytes=500)
+
+    async def body():
+        for n in range(4):
+            await cache.put(GUILD, n, 0, b"x" * 100)
+        await cache.put(2, 50, 0, b"y" * 150)
+        assert not await cache.put(2, 51, 0, b"z" * 301)
+        return await cache.take(GUILD, 0), await cache.take(GUILD, 3)
+
+    oldest, newest = run(body())
+    assert oldest == {} and newest == {0: b"x" * 100}
+    assert cache.usage(GUILD) == 200 and cache.usage(2) == 150
+    assert sorted(path.name for path in tmp_path.glob("*.bin")) == ["1_1_0.bin", "1_2_0.bin", "2_50_0.bin"]
+
+    # The total budget evicts the oldest capture across guilds.
+    run(cache.put(3, 60, 0, b"w" * 300))
+    assert cache.total_bytes == 450
+    assert sorted(path.name for path in tmp_path.glob("*.bin")) == ["2_50_0.bin", "3_60_0.bin"]
+
+
+def test_cache_reindexes_and_prunes_files_from_a_previous_run(tmp_path):
+    (tmp_path / "1_5_0.bin").write_bytes(b"a" * 10)
+    (tmp_path / "1_5_1.bin").write_bytes(b"b" * 20)
+    legacy = tmp_path / "123_0.bin"
+    legacy.write_bytes(b"old")
+    cache = AttachmentCache(tmp_path)
+    cache.load()
+    assert (len(cache), cache.usage(1)) == (2, 30)
+
+    cache.max_age = -1
+    assert run(cache.prune()) == 2
+    assert list(tmp_path.glob("*.bin")) == []
+
+
+# --- URLs -------------------------------------------------------------------
+
+def test_thumbnail_urls_keep_the_signature_and_aspect_ratio():
+    url = "https://media.discordapp.net/attachments/1/2/a.png?ex=6700aa00&is=66ff5880&hm=deadbeef"
+    preview = thumbnail_url(url, 1920, 1080)
+    assert preview.startswith("https://media.discordapp.net/attachments/1/2/a.png?")
+    assert "ex=6700aa00&is=66ff5880&hm=deadbeef" in preview
+    assert preview.endswith("width=320&height=180")
+    assert thumbnail_url(url, 100, 50).endswith("width=100&height=50")
+    assert cdn_url_expiry(url) == float(0x6700AA00)
+    assert cdn_url_expiry("https://cdn.discordapp.com/a.png") is None
+
+
+def test_fetches_stop_at_the_byte_cap():
+    async def body():
+        async with fake_cdn() as cdn:
+            async with aiohttp.ClientSession() as session:
+                attachment = cdn.attachment("big")
+                capped = await fetch_capped(session, attachment.url, FULL_SIZE - 1)
+                whole = await fetch_capped(session, attachment.url, FULL_SIZE)
+            return capped, whole
+
+    capped, whole = run(body())
+    assert capped is None
+    assert len(whole) == FULL_SIZE
@@ -0,0 +1,185 @@
+"""Bounded-concurrency executor for mass moderation actions.
+
+Raid cleanup, lockdown and voice mass-moves awaited one REST call per target.
+``MassActionExecutor`` runs them through a worker pool with a shared
+rate-limit bucket per route and uses ``guild.bulk_ban`` for bans. The fake
+guild here adds latency to every call and answers some calls with 429, so the
+tests can assert both wall time and that every target was applied exactly
+once.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import types as _types
+from collections import Counter
+
+import discord
+
+from utils.mass_actions import MassActionExecutor, retry_after
+from conftest import run
+
+LATENCY = 0.02
+
+
+def _http_error(cls, status, retry=None):
+    headers = {"Retry-After": str(retry)} if retry is not None else {}
+    response = _types.SimpleNamespace(status=status, reason="error", headers=headers)
+    return cls(response, "error")
+
+
+class FakeGuild:
+    """Applies actions with latency; every ``throttle_every``-th request gets a 429."""
+
+    def __init__(self, *, throttle_every=0, retry=0.05, forbidden=(), bulk=True, bulk_forbidden=False):
+        self.id = 1
+        self.applied = Counter()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.throttle_every = throttle_every
+        self.retry = retry
+        self.forbidden = set(forbidden)
+        self.bulk_calls: list[int] = []
+        self.bulk_forbidden = bulk_forbidden
+        if not bulk:
+            self.bulk_ban = None
+
+    async def request(self, target_id):
+        self.requests += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(LATENCY)
+            if self.throttle_every and self.requests % self.throttle_every == 0:
+                raise _http_error(discord.HTTPException, 429, self.retry)
+            if target_id in self.forbidden:
+                raise _http_error(discord.Forbidden, 403)
+            self.applied[target_id] += 1
+        finally:
+            self.in_flight -= 1
+
+    async def ban(self, user, *, reason=None, delete_message_seconds=0):
+        await self.request(user.id)
+
+    async def bulk_ban(self, users, *, reason=None, delete_message_seconds=0):
+        users = list(users)
+        self.bulk_calls.append(len(users))
+        await asyncio.sleep(LATENCY)
+        if self.bulk_forbidden:
+            raise _http_error(discord.Forbidden, 403)
+        banned, failed = [], []
+        for user in users:
+            if user.id in self.forbidden:
+                failed.append(discord.Object(user.id))
+            else:
+                self.applied[user.id] += 1
+                banned.append(discord.Object(user.id))
+        return _types.SimpleNamespace(banned=banned, failed=failed)
+
+
+def members(guild, count):
+    return [
+        _types.SimpleNamespace(id=member_id, kick=lambda reason=None, member_id=member_id: guild.request(member_id))
+        for member_id in range(1, count + 1)
+    ]
+
+
+def test_raid_sized_sweep_runs_concurrently_and_applies_each_target_once():
+    guild = FakeGuild()
+    targets = members(guild, 300)
+
+    started = time.monotonic()
+    result = run(MassActionExecutor(concurrency=10).run(targets, lambda m: m.kick(), route="kick"))
+    elapsed = time.monotonic() - started
+
+    # Serially this is 300 * LATENCY = 6s.
+    assert elapsed < 300 * LATENCY / 4
+    assert guild.peak == 10
+    assert [m.id for m in result.succeeded] == list(range(1, 301))
+    assert set(guild.applied.values()) == {1} and len(guild.applied) == 300
+    assert (result.failed, result.skipped, result.cancelled) == ([], [], False)
+
+
+def test_429s_pause_the_route_and_retry_without_double_applying():
+    guild = FakeGuild(throttle_every=25, retry=0.05)
+    targets = members(guild, 120)
+
+    result = run(MassActionExecutor(concurrency=6).run(targets, lambda m: m.kick(), route="kick"))
+
+    assert result.rate_limited >= 4
+    assert len(result.succeeded) == 120
+    assert len(guild.applied) == 120 and set(guild.applied.values()) == {1}
+    assert guild.requests == 120 + result.rate_limited
+
+
+def test_route_budget_paces_requests():
+    guild = FakeGuild()
+    targets = members(guild, 12)
+    executor = MassActionExecutor(concurrency=12, route_limits={"kick": (4, 0.1)})
+
+    result = run(executor.run(targets, lambda m: m.kick(), route="kick"))
+    # 12 requests at 4 per 100ms need at least two full windows.
+    assert result.elapsed >= 0.2
+    assert len(result.succeeded) == 12
+
+
+def test_per_target_failures_are_reported_in_order():
+    guild = FakeGuild(forbidden={3, 7})
+    targets = members(guild, 10)
+
+    result = run(MassActionExecutor().run(targets, lambda m: m.kick(), route="kick"))
+
+    assert [m.id for m, _ in result.failed] == [3, 7]
+    assert all(isinstance(exc, discord.Forbidden) for _, exc in result.failed)
+    assert len(result.succeeded) == 8
+
+
+def test_cancel_halfway_leaves_the_rest_untouched():
+    guild = FakeGuild()
+    targets = members(guild, 200)
+    executor = MassActionExecutor(concurrency=5)
+    progress = []
+
+    async def on_progress(result):
+        progress.append(result.processed)
+        if result.processed == 50:
+            executor.cancel()
+
+    result = run(executor.run(targets, lambda m: m.kick(), route="kick", on_progress=on_progress))
+
+    assert result.cancelled
+    # Requests already in flight when cancel() lands still finish.
+    assert 50 <= len(result.succeeded) < 60
+    assert len(result.succeeded) + len(result.skipped) == 200
+    assert set(guild.applied) == {m.id for m in result.succeeded}
+    assert set(guild.applied.values()) == {1}
+    assert progress == sorted(progress)
+
+
+def test_bans_use_bulk_ban_in_chunks_of_200():
+    guild = FakeGuild(forbidden={10})
+    users = [discord.Object(user_id) for user_id in range(1, 451)]
+
+    result = run(MassActionExecutor().ban(guild, users, reason="raid"))
+
+    assert guild.bulk_calls == [200, 200, 50]
+    assert guild.requests == 0
+    assert len(result.succeeded) == 449
+    assert [user.id for user, _ in result.failed] == [10]
+
+
+def test_bans_fall_back_to_single_requests():
+    for guild in (FakeGuild(bulk=False), FakeGuild(bulk_forbidden=True)):
+        users = [discord.Object(user_id) for user_id in range(1, 41)]
+        result = run(MassActionExecutor().ban(guild, users, reason="raid"))
+        assert len(result.succeeded) == 40
+        assert guild.requests == 40
+        assert set(guild.applied.values()) == {1}
+
+
+def test_retry_after_reads_rate_limit_errors():
+    assert retry_after(_http_error(discord.HTTPException, 429, 1.5)) == 1.5
+    assert retry_after(_http_error(discord.HTTPException, 429)) == 1.0
+    assert retry_after(discord.RateLimited(3.0)) == 3.0
+    assert retry_after(_http_error(discord.Forbidden, 403)) is None
@@ -0,0 +1,274 @@
+"""Cached SQLite-to-PostgreSQL translation in ``PostgresCompatConnection``.
+
+Every ``execute`` on PostgreSQL re-ran the schema, ``INSERT OR ...`` and
+placeholder regex passes over the statement text, and ``PostgresCompatRow``
+copied all of a row's values into a tuple for each positional lookup. The
+translation is now cached per distinct SQLite statement (which also keeps the
+text byte-stable for asyncpg's prepared statement cache) and rows capture
+their values once. These tests check the cached translation against the old
+uncached pipeline for every SQL literal in the bot, drive the connection with
+a recording fake asyncpg connection, and benchmark the per-query overhead.
+"""
+from __future__ import annotations
+
+import ast
+import pathlib
+import re
+import time
+
+import pytest
+
+pytest.importorskip("asyncpg")
+
+import database  # noqa: E402
+from database import (  # noqa: E402
+    PostgresCompatConnection,
+    PostgresCompatCursor,
+    PostgresCompatRow,
+    _convert_sqlite_insert_sql,
+    _convert_sqlite_placeholders,
+    _convert_sqlite_schema_sql,
+    _translate_postgres_executemany,
+    _translate_postgres_statement,
+)
+from conftest import run  # noqa: E402
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+_SQL_START = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|CREATE|ALTER|DROP|WITH|PRAGMA|BEGIN|VACUUM)\b", re.I)
+
+
+def legacy_translate(query):
+    """The translation ``execute`` used to redo on every call."""
+    stripped = (query or "").strip()
+    upper = stripped.upper()
+    if upper == "BEGIN":
+        return ("", "begin", False, False)
+    if upper.startswith("PRAGMA "):
+        pragma = upper[7:].strip()
+        if pragma.startswith("PAGE_COUNT"):
+            return ("", "page_count", False, False)
+        if pragma.startswith("PAGE_SIZE"):
+            return ("", "page_size", False, False)
+        return ("", "noop", False, False)
+    if upper.startswith("VACUUM INTO"):
+        return ("", "noop", False, False)
+    if upper.startswith("CREATE TABLE") or upper.startswith("ALTER TABLE") or upper.startswith("CREATE INDEX"):
+        stripped = _convert_sqlite_schema_sql(stripped)
+    stripped, has_returning_id = _convert_sqlite_insert_sql(stripped)
+    stripped = _convert_sqlite_placeholders(stripped)
+    upper = stripped.upper()
+    is_write = upper.startswith(("INSERT", "UPDATE", "DELETE", "CREATE", "ALTER", "DROP", "TRUNCATE"))
+    kind = "fetch" if upper.startswith("SELECT") or " RETURNING " in upper else "execute"
+    return (stripped, kind, has_returning_id, is_write)
+
+
+def legacy_translate_many(query):
+    stripped, has_returning_id = _convert_sqlite_insert_sql((query or "").strip())
+    if has_returning_id:
+        stripped = re.sub(r"(?is)\s+RETURNING\s+id\s*$", "", stripped)
+    return _convert_sqlite_placeholders(stripped)
+
+
+def sql_corpus():
+    """Every plain string literal in the bot that looks like a SQL statement."""
+    statements = set()
+    paths = [ROOT / "database.py", *(ROOT / "db").glob("*.py"), *(ROOT / "cogs").rglob("*.py")]
+    for path in paths:
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and _SQL_START.match(node.value):
+                statements.add(node.value)
+    statements.update({
+        "BEGIN",
+        "PRAGMA page_count",
+        "PRAGMA page_size",
+        "VACUUM INTO 'backup.db'",
+        "INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)",
+        "INSERT INTO cases (guild_id, user_id) VALUES (?, ?);",
+        "SELECT * FROM cases WHERE guild_id = ? AND user_id = ? AND note = '?'",
+    })
+    return sorted(statements)
+
+
+CORPUS = sql_corpus()
+
+
+# --- Translations -----------------------------------------------------------
+
+def test_the_corpus_covers_the_bot():
+    assert len(CORPUS) > 150
+
+
+def test_cached_translations_match_the_uncached_pipeline():
+    mismatches = []
+    for query in CORPUS:
+        try:
+            expected = legacy_translate(query)
+        except ValueError:
+            with pytest.raises(ValueError):
+                _translate_postgres_statement(query)
+            continue
+        # Twice: the miss and the cached hit must both agree.
+        for _ in range(2):
+            if tuple(_translate_postgres_statement(query)) != expected:
+                mismatches.append(query)
+    assert mismatches == []
+
+
+def test_cached_executemany_translations_match_the_uncached_pipeline():
+    for query in CORPUS:
+        if not query.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            continue
+        try:
+            expected = legacy_translate_many(query)
+        except ValueError:
+            continue
+        assert _translate_postgres_executemany(query) == expected
+
+
+def test_cache_hits_return_the_same_text_object():
+    query = "SELECT * FROM warnings WHERE guild_id = ? AND user_id = ?"
+    first = _translate_postgres_statement(query)
+    assert _translate_postgres_statement(query).sql is first.sql
+    info = database.postgres_statement_cache_info()["execute"]
+    assert info["hits"] >= 1 and info["size"] <= info["max_size"]
+
+
+# --- Connection -------------------------------------------------------------
+
+class FakeTransaction:
+    async def start(self):
+        pass
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+class FakeRecord:
+    """asyncpg.Record keeps repeated column names; a dict keeps the last."""
+
+    def __init__(self, columns):
+        self._columns = columns
+
+    def keys(self):
+        return [name for name, _ in self._columns]
+
+    def values(self):
+        return [value for _, value in self._columns]
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._columns[key][1]
+        return dict(self._columns)[key]
+
+
+class FakeAsyncpgConnection:
+    """Records the text sent to asyncpg, the key of its statement cache."""
+
+    def __init__(self):
+        self.calls = []
+
+    def transaction(self):
+        return FakeTransaction()
+
+    async def fetch(self, sql, *args):
+        self.calls.append(("fetch", sql, args))
+        if "RETURNING id" in sql:
+            return [FakeRecord([("id", 41)])]
+        return [FakeRecord([("id", 1), ("guild_id", 7)]), FakeRecord([("id", 2), ("guild_id", 7)])]
+
+    async def execute(self, sql, *args):
+        self.calls.append(("execute", sql, args))
+        return "UPDATE 3"
+
+    async def executemany(self, sql, args):
+        self.calls.append(("executemany", sql, args))
+
+
+def test_connection_sends_one_stable_text_per_statement():
+    async def body():
+        raw = FakeAsyncpgConnection()
+        conn = PostgresCompatConnection(raw)
+        for n in range(3):
+            cursor = await conn.execute("SELECT id, guild_id FROM cases WHERE guild_id = ?", (n,))
+        rows = await cursor.fetchall()
+        inserted = await conn.execute("INSERT INTO cases (guild_id, user_id) VALUES (?, ?)", (1, 2))
+        updated = await conn.execute("UPDATE cases SET active = 0 WHERE guild_id = ?", 1)
+        pragma = await conn.execute("PRAGMA page_size")
+        await conn.executemany("INSERT INTO cases (guild_id, user_id) VALUES (?, ?)", [(1, 2), (3, 4)])
+        await conn.commit()
+        return raw.calls, rows, inserted, updated, await pragma.fetchone()
+
+    calls, rows, inserted, updated, pragma = run(body())
+    selects = [sql for kind, sql, _ in calls if kind == "fetch" and sql.startswith("SELECT")]
+    assert len(selects) == 3 and len({id(sql) for sql in selects}) == 1
+    assert selects[0] == "SELECT id, guild_id FROM cases WHERE guild_id = $1"
+    assert [row[1] for row in rows] == [7, 7] and rows[1]["id"] == 2
+    assert inserted.lastrowid == 41 and inserted.rowcount == 1
+    assert updated.rowcount == 3
+    assert pragma == (8192,)
+    assert calls[-1] == ("executemany", "INSERT INTO cases (guild_id, user_id) VALUES ($1, $2)", [(1, 2), (3, 4)])
+
+
+# --- Rows -------------------------------------------------------------------
+
+def test_rows_index_by_position_and_by_name():
+    row = PostgresCompatRow({"id": 3, "reason": "spam", "active": 1})
+    assert (row[0], row[1], row[-1]) == (3, "spam", 1)
+    assert row["reason"] == "spam" and row.get("missing") is None
+    assert dict(row) == {"id": 3, "reason": "spam", "active": 1}
+    assert isinstance(row, dict)
+    with pytest.raises(IndexError):
+        row[3]
+    with pytest.raises(KeyError):
+        row["missing"]
+
+    joined = PostgresCompatCursor([FakeRecord([("id", 1), ("name", "a"), ("id", 2)])])._rows[0]
+    assert [joined[0], joined[1], joined[2]] == [1, "a", 2]
+
+
+# --- Benchmark --------------------------------------------------------------
+
+def _translatable(query):
+    try:
+        legacy_translate(query)
+    except ValueError:
+        return False
+    return True
+
+
+def per_call(fn, items, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            fn(item)
+    return (time.perf_counter() - start) / (rounds * len(items))
+
+
+def test_benchmark_per_query_translation_and_row_access():
+    queries = [query for query in CORPUS if _translatable(query)]
+    for query in queries:
+        _translate_postgres_statement(query)
+
+    legacy = per_call(legacy_translate, queries, rounds=20)
+    cached = per_call(_translate_postgres_statement, queries, rounds=20)
+    print(
+        f"\ntranslation per query over {len(queries)} statements: "
+        f"uncached {legacy * 1e6:.1f} us, cached {cached * 1e6:.2f} us"
+    )
+    assert cached < legacy / 5
+
+    columns = {f"column_{n}": n for n in range(20)}
+    row = PostgresCompatRow(columns)
+
+    def old_positional(key):
+        return tuple(row.values())[key]
+
+    positions = list(range(20)) * 50
+    old = per_call(old_positional, positions, rounds=100)
+    new = per_call(row.__getitem__, positions, rounds=100)
+    print(f"positional row access (20 columns): copy {old * 1e9:.0f} ns, cached {new * 1e9:.0f} ns")
+    assert new < old
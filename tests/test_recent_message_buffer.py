@@ -0,0 +1,190 @@
+"""Gateway-fed per-channel message buffer in front of ``channel.history``.
+
+Every AI turn in an active channel called ``fetch_recent_messages``, a
+``channel.history`` REST round trip, just to check for an implicit
+continuation, and again to assemble context; profiling paged up to 1,000
+messages per channel. ``utils.cache.RecentMessageBuffer`` keeps the latest
+messages per channel current from ``on_message``, edit and delete events, so
+REST only loads a channel's backlog once. These tests count history calls.
+"""
+from __future__ import annotations
+
+import asyncio
+import types as _types
+
+import discord
+
+from cogs.aimoderation.aimoderation import AIModeration
+from cogs.behavior_profiling import BehaviorProfiling
+from utils.cache import RecentMessageBuffer
+from conftest import run
+
+
+class FakeChannel:
+    """A channel whose REST history is a list and whose calls are counted."""
+
+    def __init__(self, channel_id, backlog=0):
+        self.id = channel_id
+        self.history_calls = 0
+        self.messages = [message(self, n, author_id=n % 3) for n in range(1, backlog + 1)]
+
+    def history(self, limit=100):
+        self.history_calls += 1
+        newest_first = list(reversed(self.messages))[:limit]
+
+        async def pages():
+            for item in newest_first:
+                yield item
+
+        return pages()
+
+
+def message(channel, message_id, author_id=1, content=None):
+    return _types.SimpleNamespace(
+        id=message_id,
+        channel=channel,
+        author=_types.SimpleNamespace(id=author_id, bot=False),
+        content=content or f"message {message_id} with enough words to profile",
+    )
+
+
+def post(buffer, channel, message_id, **kwargs):
+    """What ``on_message`` does: the gateway delivers and the buffer records."""
+    item = message(channel, message_id, **kwargs)
+    channel.messages.append(item)
+    buffer.add(item)
+    return item
+
+
+def ids(messages):
+    return [item.id for item in messages]
+
+
+# --- RecentMessageBuffer ----------------------------------------------------
+
+def test_cold_channels_miss_until_seeded_and_seed_keeps_gateway_arrivals():
+    buffer = RecentMessageBuffer(per_channel=5)
+    channel = FakeChannel(1, backlog=8)
+    assert buffer.recent(1, 3) is None
+
+    post(buffer, channel, 9)  # delivered while the backlog fetch was in flight
+    buffer.seed(1, channel.messages[:8], requested=5)
+
+    assert ids(buffer.recent(1, 3)) == [7, 8, 9]
+    # Deeper than the ring and not the whole channel: only REST can answer.
+    assert buffer.recent(1, 50) is None
+
+
+def test_edits_deletes_and_out_of_order_arrivals():
+    buffer = RecentMessageBuffer(per_channel=4)
+    channel = FakeChannel(1)
+    buffer.seed(1, [], requested=4)
+    for message_id in (10, 12, 11):
+        post(buffer, channel, message_id)
+    post(buffer, channel, 12)  # replayed event
+
+    edited = message(channel, 11, content="edited")
+    buffer.update(edited)
+    buffer.update(message(FakeChannel(2), 11))  # unknown channel is ignored
+    assert ids(buffer.recent(1, 10)) == [10, 11, 12]
+    assert buffer.recent(1, 10)[1].content == "edited"
+
+    buffer.remove(1, 10)
+    buffer.remove(1, [12, 999])
+    assert ids(buffer.recent(1, 10)) == [11]
+
+
+def test_small_channels_are_complete_until_the_ring_overflows():
+    buffer = RecentMessageBuffer(per_channel=3)
+    channel = FakeChannel(1, backlog=2)
+    buffer.seed(1, channel.messages, requested=3)
+    assert ids(buffer.recent(1, 100)) == [1, 2]
+
+    post(buffer, channel, 3)
+    post(buffer, channel, 4)
+    assert ids(buffer.recent(1, 3)) == [2, 3, 4]
+    assert buffer.recent(1, 100) is None
+
+
+def test_least_recently_active_channels_are_dropped():
+    buffer = RecentMessageBuffer(per_channel=3, max_channels=2)
+    channels = [FakeChannel(n) for n in range(1, 4)]
+    for channel in channels:
+        buffer.seed(channel.id, [], requested=3)
+        post(buffer, channel, channel.id * 10)
+    assert (buffer.is_warm(1), buffer.is_warm(2), buffer.is_warm(3)) == (False, True, True)
+
+
+# --- Readers ----------------------------------------------------------------
+
+def test_ai_context_reads_make_zero_history_calls_once_warm():
+    buffer = RecentMessageBuffer(per_channel=200)
+    cog = _types.SimpleNamespace(bot=_types.SimpleNamespace(recent_messages=buffer))
+    channel = FakeChannel(1, backlog=150)
+
+    async def body():
+        first = await AIModeration.fetch_recent_messages(cog, channel, limit=12)
+        calls_to_warm = channel.history_calls
+        reads = []
+        for message_id in range(151, 251):
+            post(buffer, channel, message_id)
+            reads.append(await AIModeration.fetch_recent_messages(cog, channel, limit=12))
+            reads.append(await AIModeration.fetch_recent_messages(cog, channel, limit=100))
+        return first, calls_to_warm, reads
+
+    first, calls_to_warm, reads = run(body())
+    assert ids(first) == list(range(139, 151))
+    assert calls_to_warm == 1
+    assert channel.history_calls == 1
+    assert ids(reads[-2]) == list(range(239, 251))
+    assert ids(reads[-1]) == list(range(151, 251))
+    assert buffer.get_stats()["hits"] == 200
+
+
+def test_a_failed_backlog_fetch_leaves_the_channel_cold():
+    buffer = RecentMessageBuffer()
+    cog = _types.SimpleNamespace(bot=_types.SimpleNamespace(recent_messages=buffer))
+    channel = FakeChannel(1, backlog=3)
+
+    def broken_history(limit=100):
+        raise discord.HTTPException(_types.SimpleNamespace(status=503, reason="down"), "down")
+
+    channel.history = broken_history
+    assert run(AIModeration.fetch_recent_messages(cog, channel, limit=5)) == []
+    assert not buffer.is_warm(1)
+
+
+def test_profiling_scans_warm_channels_from_the_buffer():
+    buffer = RecentMessageBuffer(per_channel=200)
+    profiler = _types.SimpleNamespace(bot=_types.SimpleNamespace(recent_messages=buffer))
+    channel = FakeChannel(1, backlog=30)
+
+    async def scan():
+        return await BehaviorProfiling._scan_channel_history(
+            profiler, channel, 2, asyncio.Semaphore(1)
+        )
+
+    cold = run(scan())
+    post(buffer, channel, 31, author_id=2)
+    warm = run(scan())
+
+    assert channel.history_calls == 1
+    assert len(warm) == len(cold) + 1
+    assert warm[0].message_id == 31
+
+
+def test_profiling_pages_history_when_the_ring_is_shallower_than_the_scan():
+    buffer = RecentMessageBuffer(per_channel=200)
+    profiler = _types.SimpleNamespace(bot=_types.SimpleNamespace(recent_messages=buffer))
+    channel = FakeChannel(1, backlog=900)
+    buffer.seed(1, channel.messages, requested=200)
+
+    async def scan():
+        return await BehaviorProfiling._scan_channel_history(
+            profiler, channel, 2, asyncio.Semaphore(1)
+        )
+
+    matches = run(scan())
+    assert channel.history_calls == 1
+    # Author 2 wrote every third message of all 900, not only of the last 200.
+    assert len(matches) == 300
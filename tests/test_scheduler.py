@@ -0,0 +1,380 @@
+"""Central heap scheduler for timed moderation items.
+
+Tempbans, quarantines, giveaways, AI scheduled tasks and weekly staff reports
+were found by per-cog polling loops that ran every 30 seconds to 5 minutes
+and fired up to one interval late. ``utils.scheduler.Scheduler`` keeps a
+min-heap of due times and sleeps exactly until the next one. These tests
+drive it with a fake clock whose ``sleep`` records the requested delay, so
+"exactly until the next job" is checked directly instead of by timing.
+"""
+from __future__ import annotations
+
+import asyncio
+import types as _types
+from datetime import datetime, timedelta, timezone
+
+from cogs.moderation import Moderation
+from cogs.staff_reports import StaffReports, next_report_time
+from utils.scheduler import Scheduler, due_timestamp
+from conftest import run
+
+T0 = 1_780_000_000.0
+GUILD = 555555555555555551
+
+
+class FakeClock:
+    """Wall clock that only moves when the scheduler sleeps on it."""
+
+    def __init__(self, now: float = T0):
+        self.now = now
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+        await asyncio.sleep(0)
+
+
+class BlockingClock(FakeClock):
+    """Sleeps never finish on their own; only a wakeup ends them."""
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        await asyncio.Event().wait()
+
+
+async def _settle(rounds: int = 20) -> None:
+    for _ in range(rounds):
+        await asyncio.sleep(0)
+
+
+# --- Heap -------------------------------------------------------------------
+
+def test_jobs_fire_in_due_order_once_due():
+    clock = FakeClock()
+    scheduler = Scheduler(clock=clock)
+    fired = []
+
+    async def handler(key, payload):
+        fired.append((key, payload, clock()))
+
+    scheduler.register("tempban", handler)
+    for key, offset in (("c", 30), ("a", 10), ("b", 20)):
+        scheduler.schedule("tempban", key, T0 + offset, payload=key.upper())
+
+    async def body():
+        assert await scheduler.run_due() == 0
+        clock.now = T0 + 20
+        assert await scheduler.run_due() == 2
+        clock.now = T0 + 60
+        assert await scheduler.run_due() == 1
+
+    run(body())
+    assert [key for key, _, _ in fired] == ["a", "b", "c"]
+    assert fired[0][1] == "A"
+    assert scheduler.pending() == 0
+
+
+def test_cancel_and_reschedule_skip_stale_heap_entries():
+    clock = FakeClock()
+    scheduler = Scheduler(clock=clock)
+    fired = []
+
+    async def handler(key, payload):
+        fired.append((key, payload))
+
+    scheduler.register("giveaway", handler)
+    scheduler.schedule("giveaway", 1, T0 + 10, payload="one")
+    scheduler.schedule("giveaway", 2, T0 + 20)
+    scheduler.schedule("giveaway", 3, T0 + 30)
+
+    assert scheduler.cancel("giveaway", 1)
+    assert not scheduler.cancel("giveaway", 1)
+    assert scheduler.reschedule("giveaway", 3, T0 + 5)
+    assert not scheduler.reschedule("giveaway", 99, T0)
+    assert scheduler.next_due() == T0 + 5
+    # Replacing an existing key keeps a single live job.
+    scheduler.schedule("giveaway", 2, T0 + 25, payload="two")
+    assert scheduler.pending("giveaway") == 2
+
+    clock.now = T0 + 100
+    run(scheduler.run_due())
+    assert fired == [(3, None), (2, "two")]
+
+
+def test_due_times_accept_datetimes_and_db_strings():
+    aware = datetime(2026, 6, 1, 12, 0, tzinfo=timezone.utc)
+    assert due_timestamp(aware) == aware.timestamp()
+    assert due_timestamp(aware.replace(tzinfo=None)) == aware.timestamp()
+    assert due_timestamp("2026-06-01 12:00:00") == aware.timestamp()
+    assert due_timestamp("2026-06-01T14:00:00+02:00") == aware.timestamp()
+    assert due_timestamp("2026-06-01T12:00:00Z") == aware.timestamp()
+    assert due_timestamp(None) is None
+    assert due_timestamp("soon") is None
+    assert not Scheduler().schedule("tempban", 1, "soon")
+
+
+# --- Loop -------------------------------------------------------------------
+
+def test_loop_sleeps_exactly_until_the_next_job():
+    clock = FakeClock()
+    scheduler = Scheduler(clock=clock, sleep=clock.sleep, resync_interval=0)
+    fired = []
+
+    async def handler(key, payload):
+        fired.append((key, clock()))
+
+    scheduler.register("quarantine", handler)
+    scheduler.schedule("quarantine", "late", T0 + 15)
+    scheduler.schedule("quarantine", "early", T0 + 10)
+
+    async def body():
+        scheduler.start()
+        await _settle()
+        await scheduler.stop()
+
+    run(body())
+    assert clock.sleeps == [10, 5]
+    assert fired == [("early", T0 + 10), ("late", T0 + 15)]
+
+
+def test_sooner_job_wakes_a_sleeping_loop():
+    clock = BlockingClock()
+    scheduler = Scheduler(clock=clock, sleep=clock.sleep, resync_interval=0)
+    fired = []
+
+    async def handler(key, payload):
+        fired.append(key)
+
+    scheduler.register("ai_task", handler)
+    scheduler.schedule("ai_task", "later", T0 + 100)
+
+    async def body():
+        scheduler.start()
+        await _settle()
+        scheduler.schedule("ai_task", "sooner", T0 + 5)
+        await _settle()
+        # Scheduling behind the head does not interrupt the sleep.
+        scheduler.schedule("ai_task", "last", T0 + 500)
+        await _settle()
+        clock.now = T0 + 5
+        scheduler.cancel("ai_task", "later")
+        scheduler.schedule("ai_task", "now", T0)
+        await _settle()
+        await scheduler.stop()
+
+    run(body())
+    assert clock.sleeps == [100, 5, 495]
+    assert fired == ["now", "sooner"]
+
+
+def test_loaders_rehydrate_at_start_and_on_resync():
+    clock = FakeClock()
+    scheduler = Scheduler(clock=clock, sleep=clock.sleep, resync_interval=60)
+    rows = [(1, T0 + 30, "first")]
+    fired = []
+    loads = []
+
+    async def loader():
+        loads.append(clock())
+        return list(rows)
+
+    async def handler(key, payload):
+        fired.append((key, payload, clock()))
+        rows[:] = [row for row in rows if row[0] != key]
+        if key == 1:
+            # A row written by a path that never called schedule().
+            rows.append((2, T0 + 90, "second"))
+
+    scheduler.register("tempban", handler, loader)
+
+    async def body():
+        scheduler.start()
+        while len(fired) < 2:
+            await asyncio.sleep(0)
+        await scheduler.stop()
+
+    run(body())
+    assert fired == [(1, "first", T0 + 30), (2, "second", T0 + 90)]
+    assert loads[:2] == [T0, T0 + 60]
+    assert clock.sleeps[:3] == [30, 30, 30]
+
+
+def test_handler_failures_are_logged_and_handlers_of_a_kind_never_overlap():
+    clock = FakeClock()
+    scheduler = Scheduler(clock=clock)
+    active = 0
+    peak = 0
+
+    async def handler(key, payload):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0)
+        active -= 1
+        if key == "bad":
+            raise RuntimeError("boom")
+
+    scheduler.register("giveaway", handler)
+    for key in ("a", "bad", "b", "c"):
+        scheduler.schedule("giveaway", key, T0)
+
+    assert run(scheduler.run_due()) == 4
+    assert peak == 1
+    assert (scheduler.fired, scheduler.failures) == (3, 1)
+
+
+def test_failed_jobs_are_retried_shortly_then_left_to_the_loader():
+    clock = FakeClock()
+    scheduler = Scheduler(clock=clock, retry_delay=60, max_retries=2)
+    attempts = []
+
+    async def handler(key, payload):
+        attempts.append(payload)
+        if key == "flaky" and len(attempts) < 2:
+            raise RuntimeError("503")
+        if key == "broken":
+            raise RuntimeError("always")
+
+    scheduler.register("giveaway", handler)
+
+    async def body():
+        scheduler.schedule("giveaway", "flaky", T0, payload="p")
+        await scheduler.run_due()
+        retry_at = scheduler.due_at("giveaway", "flaky")
+        clock.now = retry_at
+        await scheduler.run_due()
+        flaky_left = scheduler.pending()
+
+        attempts.clear()
+        scheduler.schedule("giveaway", "broken", clock.now)
+        dues = []
+        for _ in range(4):
+            await scheduler.run_due()
+            due = scheduler.due_at("giveaway", "broken")
+            dues.append(None if due is None else due - clock.now)
+            if due is not None:
+                clock.now = due
+        return retry_at, flaky_left, dues
+
+    retry_at, flaky_left, dues = run(body())
+    assert retry_at == T0 + 60
+    assert flaky_left == 0
+    # Two retries, backing off, then the job is dropped until the loader.
+    assert dues == [60, 120, None, None]
+    assert len(attempts) == 3
+
+
+def test_unregister_drops_pending_jobs():
+    scheduler = Scheduler(clock=FakeClock())
+
+    async def handler(key, payload):
+        raise AssertionError("unregistered kind fired")
+
+    scheduler.register("staff_report", handler)
+    scheduler.schedule("staff_report", GUILD, T0)
+    scheduler.unregister("staff_report")
+    assert scheduler.pending() == 0
+    assert run(scheduler.run_due()) == 0
+
+
+# --- Cogs -------------------------------------------------------------------
+
+def test_tempbans_are_rehydrated_from_the_database(make_db):
+    expires = datetime(2026, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+    async def body(db):
+        await db.init_guild(GUILD)
+        await db.add_tempban(GUILD, 7, 1, "spam", expires)
+        await db.add_tempban(GUILD, 8, 1, "spam", expires + timedelta(hours=1))
+        scheduler = Scheduler(clock=FakeClock(expires.timestamp() - 60))
+        cog = Moderation(_types.SimpleNamespace(db=db, scheduler=scheduler))
+        scheduler.register("tempban", cog._on_tempban_due, cog._load_tempban_jobs)
+        await scheduler.rehydrate()
+        return scheduler
+
+    db = make_db()
+    try:
+        scheduler = run(body(db))
+    finally:
+        run(db.close())
+
+    assert scheduler.due_at("tempban", (GUILD, 7)) == expires.timestamp()
+    assert scheduler.due_at("tempban", (GUILD, 8)) == expires.timestamp() + 3600
+    assert scheduler.next_due() == expires.timestamp()
+
+
+def test_next_report_time_honours_the_grace_window():
+    monday_noon = datetime(2026, 6, 1, 12, 0, tzinfo=timezone.utc)
+    assert monday_noon.weekday() == 0
+    assert next_report_time(monday_noon, 2, 9) == datetime(2026, 6, 3, 9, 0, tzinfo=timezone.utc)
+    assert next_report_time(monday_noon + timedelta(minutes=3), 0, 12) == monday_noon
+    assert next_report_time(monday_noon + timedelta(minutes=6), 0, 12) == monday_noon + timedelta(days=7)
+
+
+def test_staff_report_delivers_and_books_the_following_week():
+    sent = []
+    channel = _types.SimpleNamespace(send=lambda **kwargs: _record(sent, kwargs))
+    guild = _types.SimpleNamespace(id=GUILD, name="guild", get_channel=lambda channel_id: channel)
+    now = datetime.now(timezone.utc)
+    this_slot = now.replace(minute=0, second=0, microsecond=0)
+    config = {"staff_report": {"day": now.weekday(), "hour": now.hour, "channel_id": 99}}
+    scheduler = Scheduler()
+    bot = _types.SimpleNamespace(
+        scheduler=scheduler,
+        guilds=[guild],
+        get_guild=lambda guild_id: guild,
+        db=_types.SimpleNamespace(get_settings=lambda guild_id: _value(config)),
+    )
+    cog = StaffReports(bot)
+
+    async def build(guild, days):
+        return f"report:{days}"
+
+    cog._build_report_embed = build
+
+    async def body():
+        await cog._on_report_due(GUILD, None)
+        # A resync right after delivery must not book the same slot again.
+        return await cog._load_report_jobs()
+
+    jobs = run(body())
+    assert sent == [{"embed": "report:7"}]
+    next_week = this_slot + timedelta(days=7)
+    assert scheduler.due_at("staff_report", GUILD) == next_week.timestamp()
+    assert jobs == [(GUILD, next_week, None)]
+
+
+def test_one_broken_guild_does_not_stop_the_report_loader():
+    now = datetime.now(timezone.utc)
+    good = _types.SimpleNamespace(id=1)
+    bad_day = _types.SimpleNamespace(id=2)
+    failing = _types.SimpleNamespace(id=3)
+    configs = {
+        1: {"staff_report": {"day": 2, "hour": 9, "channel_id": 99}},
+        2: {"staff_report": {"day": "monday", "hour": 9, "channel_id": 99}},
+    }
+
+    async def get_settings(guild_id):
+        if guild_id == 3:
+            raise RuntimeError("database is locked")
+        return configs[guild_id]
+
+    bot = _types.SimpleNamespace(
+        scheduler=Scheduler(),
+        guilds=[bad_day, failing, good],
+        db=_types.SimpleNamespace(get_settings=get_settings),
+    )
+    jobs = run(StaffReports(bot)._load_report_jobs())
+    assert jobs == [(1, next_report_time(now, 2, 9), None)]
+
+
+async def _record(sink, value):
+    sink.append(value)
+
+
+async def _value(value):
+    return value
@@ -0,0 +1,245 @@
+"""Sticky pins that survive a restart.
+
+``cogs.pin.Pin`` kept its pins only in memory, so every restart or deploy
+dropped them, and the message the old process had posted stayed behind.
+Pins now live in ``sticky_pins`` with the id of the posted message and the
+last bump time, are loaded lazily when a channel next sees a message, and
+expire through the shared scheduler. These tests restart the cog on the same
+database file and count the sticky messages left in the channel.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+import types as _types
+from datetime import datetime, timedelta, timezone
+
+import discord
+import pytest
+
+import cogs.pin as pin_module
+from cogs.pin import Pin
+from utils.scheduler import Scheduler
+from conftest import run
+
+GUILD_ID = 666666666666666666
+CHANNEL_ID = 777777777777777777
+BOT_USER_ID = 1
+
+
+class FakeMessage:
+    def __init__(self, channel, message_id):
+        self.channel = channel
+        self.id = message_id
+
+    async def delete(self):
+        self.channel.live.pop(self.id, None)
+
+
+class FakeChannel(discord.TextChannel):
+    """Discord's side of a channel: it outlives every bot process."""
+
+    _ids = itertools.count(1000)
+
+    def __init__(self, channel_id=CHANNEL_ID, guild_id=GUILD_ID):
+        self.id = channel_id
+        self.guild = _types.SimpleNamespace(id=guild_id)
+        self.live = {}
+        self.sends = []
+
+    async def send(self, content=None, *, embed=None, **kwargs):
+        message = FakeMessage(self, next(self._ids))
+        self.live[message.id] = content if embed is None else embed.description
+        self.sends.append(time.monotonic())
+        return message
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(self, message_id)
+
+
+@pytest.fixture(autouse=True)
+def short_throttle(monkeypatch):
+    monkeypatch.setattr(pin_module, "_MIN_BUMP_INTERVAL_SECONDS", 0.3)
+
+
+async def open_db(make_db):
+    db = make_db()
+    await db.init_guild(GUILD_ID)
+    return db
+
+
+def boot(db, *channels):
+    """A fresh bot process: new cog, new scheduler, same database file."""
+    by_id = {channel.id: channel for channel in channels}
+    bot = _types.SimpleNamespace(
+        db=db,
+        user=_types.SimpleNamespace(id=BOT_USER_ID),
+        scheduler=Scheduler(),
+        get_channel=by_id.get,
+    )
+    return Pin(bot)
+
+
+def chat(channel, author_id=42):
+    return _types.SimpleNamespace(
+        guild=channel.guild,
+        channel=channel,
+        author=_types.SimpleNamespace(id=author_id),
+    )
+
+
+async def settle(cog):
+    tasks = [pin.bump_task for pin in cog._pins.values() if pin.bump_task is not None]
+    await asyncio.gather(*tasks)
+
+
+async def shutdown(cog, db):
+    cog.cog_unload()
+    await cog.bot.scheduler.stop()
+    await db.close()
+
+
+# --- Restart ----------------------------------------------------------------
+
+def test_a_restart_leaves_exactly_one_sticky_message(make_db):
+    channel = FakeChannel()
+
+    async def body():
+        db = await open_db(make_db)
+        cog = boot(db, channel)
+        await cog._start_pin(channel, "Read the rules", created_by=9, expires_at=None, as_embed=False)
+        await cog.on_message(chat(channel))
+        await settle(cog)
+        await shutdown(cog, db)
+        before_restart = dict(channel.live)
+        sends_before = len(channel.sends)
+
+        db = await open_db(make_db)
+        cog = boot(db, channel)
+        cog.bot.scheduler.start()
+        await asyncio.sleep(0.05)
+        sends_at_startup = len(channel.sends) - sends_before
+
+        lookups = []
+        real_get = db.get_sticky_pin
+
+        async def counting_get(channel_id):
+            lookups.append(channel_id)
+            return await real_get(channel_id)
+
+        db.get_sticky_pin = counting_get
+        # A burst of chat right after the restart.
+        await asyncio.gather(*(cog.on_message(chat(channel, author_id=n)) for n in range(20)))
+        await settle(cog)
+        row = await real_get(channel.id)
+        await shutdown(cog, db)
+        return before_restart, sends_at_startup, lookups, row
+
+    before_restart, sends_at_startup, lookups, row = run(body())
+    assert list(before_restart.values()) == ["Read the rules"]
+    assert sends_at_startup == 0
+    assert len(lookups) == 1
+    # The pre-restart sticky was deleted by id; only the new one remains.
+    assert list(channel.live.values()) == ["Read the rules"]
+    assert set(channel.live).isdisjoint(before_restart)
+    assert row["message_id"] == next(iter(channel.live))
+
+
+def test_the_bump_throttle_carries_over_a_restart(make_db):
+    channel = FakeChannel()
+
+    async def body():
+        db = await open_db(make_db)
+        cog = boot(db, channel)
+        await cog._start_pin(channel, "Sticky", created_by=9, expires_at=None, as_embed=True)
+        await shutdown(cog, db)
+
+        db = await open_db(make_db)
+        cog = boot(db, channel)
+        await cog.on_message(chat(channel))
+        await settle(cog)
+        await shutdown(cog, db)
+
+    run(body())
+    first, bump = channel.sends
+    assert bump - first >= 0.3 - 0.02
+    assert list(channel.live.values()) == ["Sticky"]
+
+
+def test_channels_without_a_pin_are_looked_up_once(make_db):
+    channel = FakeChannel()
+
+    async def body():
+        db = await open_db(make_db)
+        cog = boot(db, channel)
+        lookups = []
+        real_get = db.get_sticky_pin
+
+        async def counting_get(channel_id):
+            lookups.append(channel_id)
+            return await real_get(channel_id)
+
+        db.get_sticky_pin = counting_get
+        for n in range(50):
+            await cog.on_message(chat(channel, author_id=n))
+        await shutdown(cog, db)
+        return lookups
+
+    assert run(body()) == [CHANNEL_ID]
+    assert channel.sends == []
+
+
+# --- Expiry -----------------------------------------------------------------
+
+def test_expiry_runs_from_the_scheduler_after_a_restart(make_db):
+    channel = FakeChannel()
+
+    async def body():
+        db = await open_db(make_db)
+        cog = boot(db, channel)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=0.2)
+        await cog._start_pin(channel, "Flash sale", created_by=9, expires_at=expires_at, as_embed=False)
+        jobs_before = cog.bot.scheduler.pending("sticky_pin")
+        await shutdown(cog, db)
+
+        db = await open_db(make_db)
+        cog = boot(db, channel)
+        scheduler = cog.bot.scheduler
+        await scheduler.rehydrate()
+        jobs_after_restart = scheduler.pending("sticky_pin")
+        await asyncio.sleep(0.25)
+        fired = await scheduler.run_due()
+        row = await db.get_sticky_pin(channel.id)
+        # A late message does not resurrect it.
+        await cog.on_message(chat(channel))
+        await settle(cog)
+        await shutdown(cog, db)
+        return jobs_before, jobs_after_restart, fired, row
+
+    jobs_before, jobs_after_restart, fired, row = run(body())
+    assert (jobs_before, jobs_after_restart, fired) == (1, 1, 1)
+    assert row is None
+    assert channel.live == {}
+    assert len(channel.sends) == 1
+
+
+def test_a_replaced_pin_cancels_the_old_expiry(make_db):
+    channel = FakeChannel()
+
+    async def body():
+        db = await open_db(make_db)
+        cog = boot(db, channel)
+        soon = datetime.now(timezone.utc) + timedelta(seconds=0.1)
+        await cog._start_pin(channel, "Old", created_by=9, expires_at=soon, as_embed=False)
+        await cog._start_pin(channel, "New", created_by=9, expires_at=None, as_embed=False)
+        await asyncio.sleep(0.15)
+        fired = await cog.bot.scheduler.run_due()
+        row = await db.get_sticky_pin(channel.id)
+        await shutdown(cog, db)
+        return fired, row
+
+    fired, row = run(body())
+    assert fired == 0
+    assert row["content"] == "New" and row["expires_at"] is None
+    assert list(channel.live.values()) == ["New"]
@@ -0,0 +1,194 @@
+"""Bounded background-task lanes in ``utils.async_tasks``.
+
+``fire_and_forget`` and the bare ``create_task`` calls in the message
+listeners spawned one task per event with nothing capping how many were in
+flight, so a message flood became an unbounded pile of tasks and coroutines.
+``TaskSupervisor`` runs them in named lanes with a concurrency limit, a
+bounded queue and a drop or coalesce policy. These tests flood lanes with
+100k submissions and pin memory, counters, each policy's drop behavior and
+the shutdown drain.
+"""
+from __future__ import annotations
+
+import asyncio
+import gc
+import logging
+import tracemalloc
+
+import pytest
+
+from utils.async_tasks import COALESCE, DROP_NEWEST, DROP_OLDEST, TaskSupervisor
+from conftest import run
+
+FLOOD = 100_000
+
+
+class Gate:
+    """Jobs block on one event so the test decides when the lane moves."""
+
+    def __init__(self):
+        self.event = asyncio.Event()
+        self.finished = []
+
+    async def job(self, label, fail=False):
+        await self.event.wait()
+        if fail:
+            raise RuntimeError(label)
+        self.finished.append(label)
+
+
+# --- Flood ------------------------------------------------------------------
+
+@pytest.mark.parametrize("policy", [DROP_NEWEST, DROP_OLDEST, COALESCE])
+def test_a_flood_stays_bounded(policy, caplog):
+    # Every drop is logged; keep 100k warnings out of the memory measurement.
+    caplog.set_level(logging.CRITICAL, logger="ModBot.AsyncTasks")
+
+    async def body():
+        supervisor = TaskSupervisor()
+        supervisor.add_lane("flood", concurrency=4, max_queued=100, policy=policy)
+        gate = Gate()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        for n in range(FLOOD):
+            supervisor.submit("flood", gate.job(n), name=f"job-{n}", key=n % 1_000)
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        stats = supervisor.get_stats()["flood"]
+        gate.event.set()
+        assert await supervisor.drain(timeout=5)
+        return held, stats, supervisor.get_stats()["flood"], gate.finished
+
+    held, during, after, finished = run(body())
+    print(f"\n{policy}: {held / 1024:.0f} KiB held across {FLOOD:,} submissions")
+    # Only the 104 live coroutines are held, not 100k.
+    assert held < 1024 * 1024
+    assert (during["running"], during["queued"]) == (4, 100)
+    assert during["submitted"] == FLOOD
+    assert during["dropped"] + during["coalesced"] == FLOOD - 104
+    assert after["completed"] == len(finished) == 104
+    assert (after["queued"], after["running"], after["failed"]) == (0, 0, 0)
+
+
+def test_drop_newest_keeps_the_first_work_accepted():
+    async def body():
+        supervisor = TaskSupervisor()
+        supervisor.add_lane("lane", concurrency=2, max_queued=3, policy=DROP_NEWEST)
+        gate = Gate()
+        accepted = [supervisor.submit("lane", gate.job(n), name=str(n)) for n in range(10)]
+        gate.event.set()
+        await supervisor.drain()
+        return accepted, gate.finished
+
+    accepted, finished = run(body())
+    assert accepted == [True] * 5 + [False] * 5
+    assert sorted(finished) == [0, 1, 2, 3, 4]
+
+
+def test_every_drop_is_logged_with_the_task_name(caplog):
+    async def body():
+        supervisor = TaskSupervisor()
+        supervisor.add_lane("newest", concurrency=1, max_queued=1, policy=DROP_NEWEST)
+        supervisor.add_lane("oldest", concurrency=1, max_queued=1, policy=DROP_OLDEST)
+        gate = Gate()
+        for lane in ("newest", "oldest"):
+            for n in range(3):
+                supervisor.submit(lane, gate.job(n), name=f"{lane}-{n}")
+        gate.event.set()
+        await supervisor.drain()
+
+    with caplog.at_level(logging.WARNING, logger="ModBot.AsyncTasks"):
+        run(body())
+    dropped = [record.getMessage() for record in caplog.records if "Dropped" in record.getMessage()]
+    assert dropped == [
+        "Dropped background task 'newest-2' from lane 'newest' (queue full)",
+        "Dropped background task 'oldest-1' from lane 'oldest' (evicted by newer work)",
+    ]
+
+
+def test_drop_oldest_keeps_the_latest_waiting_work():
+    async def body():
+        supervisor = TaskSupervisor()
+        supervisor.add_lane("lane", concurrency=2, max_queued=3, policy=DROP_OLDEST)
+        gate = Gate()
+        accepted = [supervisor.submit("lane", gate.job(n), name=str(n)) for n in range(10)]
+        gate.event.set()
+        await supervisor.drain()
+        return accepted, gate.finished, supervisor.get_stats()["lane"]
+
+    accepted, finished, stats = run(body())
+    assert all(accepted)
+    # The two already running finish; the queue holds the newest three.
+    assert sorted(finished) == [0, 1, 7, 8, 9]
+    assert stats["dropped"] == 5
+
+
+def test_coalesce_replaces_waiting_work_with_the_same_key():
+    async def body():
+        supervisor = TaskSupervisor()
+        supervisor.add_lane("lane", concurrency=1, max_queued=2, policy=COALESCE)
+        gate = Gate()
+        results = [
+            supervisor.submit("lane", gate.job("a1"), name="a1", key="a"),  # runs
+            supervisor.submit("lane", gate.job("a2"), name="a2", key="a"),  # queued
+            supervisor.submit("lane", gate.job("b1"), name="b1", key="b"),  # queued
+            supervisor.submit("lane", gate.job("a3"), name="a3", key="a"),  # replaces a2
+            supervisor.submit("lane", gate.job("c1"), name="c1", key="c"),  # queue full
+        ]
+        gate.event.set()
+        await supervisor.drain()
+        return results, gate.finished, supervisor.get_stats()["lane"]
+
+    results, finished, stats = run(body())
+    assert results == [True, True, True, True, False]
+    # a3 kept a2's place in line, ahead of b1.
+    assert finished == ["a1", "a3", "b1"]
+    assert (stats["coalesced"], stats["dropped"]) == (1, 1)
+
+
+# --- Failures and shutdown --------------------------------------------------
+
+def test_failures_are_counted_and_do_not_stall_the_lane(caplog):
+    async def body():
+        supervisor = TaskSupervisor()
+        supervisor.add_lane("lane", concurrency=1, max_queued=10)
+        gate = Gate()
+        for n in range(4):
+            supervisor.submit("lane", gate.job(n, fail=n % 2 == 0), name=f"job-{n}")
+        gate.event.set()
+        await supervisor.drain()
+        return gate.finished, supervisor.get_stats()["lane"]
+
+    finished, stats = run(body())
+    assert finished == [1, 3]
+    assert (stats["completed"], stats["failed"]) == (2, 2)
+    assert "Background task 'job-0' failed" in caplog.text
+
+
+def test_drain_times_out_cancels_leftovers_and_refuses_new_work():
+    async def body():
+        supervisor = TaskSupervisor()
+        supervisor.add_lane("lane", concurrency=1, max_queued=5)
+        gate = Gate()
+        for n in range(3):
+            supervisor.submit("lane", gate.job(n), name=str(n))
+        drained = await supervisor.drain(timeout=0.05)
+        late = supervisor.submit("lane", gate.job("late"), name="late")
+        return drained, late, supervisor.get_stats()["lane"]
+
+    drained, late, stats = run(body())
+    assert not drained and not late
+    assert (stats["queued"], stats["running"], stats["dropped"]) == (0, 0, 4)
+
+
+def test_unknown_lanes_and_policies_are_rejected():
+    supervisor = TaskSupervisor()
+    with pytest.raises(ValueError):
+        supervisor.add_lane("lane", policy="drop_random")
+
+    async def orphan():
+        pass
+
+    with pytest.raises(ValueError):
+        supervisor.submit("missing", orphan(), name="orphan")
@@ -1,63 +1,206 @@
-"""Fire-and-forget helpers for non-critical background side-effects.
+"""Supervised background tasks for non-critical side-effects.
 
 Moderation commands (warn, quarantine, etc.) need to confirm to the moderator
 the moment the *authoritative* outcome lands — the warning is recorded, the
 quarantine role is applied, the case # is generated. The slower side-effects
 that follow (punishment DM, appeal-token DB transaction, jail-channel notice)
 must never block that confirmation, but they also must not fail silently.
+Message listeners have the same shape: image screening and attachment capture
+should not hold up ``on_message``.
 
-``fire_and_forget`` schedules a coroutine on the running loop and attaches a
-done-callback that logs any exception, mirroring the ad-hoc pattern already
-used in ``cogs/aimoderation/ai_client.py`` and ``cogs/logging_cog.py`` but
-centralizing the error reporting so a backgrounded step fails visibly in logs.
+Spawning a task per event has no upper bound, so a message flood turns into
+an unbounded pile of tasks. ``TaskSupervisor`` (one per bot, ``bot.tasks``)
+runs them in named lanes instead. Each lane has a concurrency limit and a
+bounded queue; when the queue is full the lane's policy decides what is
+dropped:
+
+``drop_newest``
+    The new submission is refused; accepted work runs in order.
+``drop_oldest``
+    The longest-waiting submission is discarded to make room.
+``coalesce``
+    A submission whose ``key`` is already waiting replaces it in place (the
+    newer coroutine wins, the queue position is kept). A full queue with no
+    matching key refuses the new submission.
+
+The supervisor holds a strong reference to every live task, logs failures and
+drops by name, keeps per-lane counters, and ``drain`` lets the queue finish (up to a
+timeout) at shutdown.
 """
 
 from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Awaitable, Optional
+from collections import OrderedDict
+from itertools import count
+from typing import Any, Coroutine, Dict, Hashable, Optional, Set, Tuple
 
 logger = logging.getLogger("ModBot.AsyncTasks")
 
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+_POLICIES = frozenset({DROP_NEWEST, DROP_OLDEST, COALESCE})
+
+_COUNTERS = ("submitted", "completed", "failed", "dropped", "coalesced")
+
+
+class _Lane:
+    __slots__ = ("name", "concurrency", "max_queued", "policy", "queue", "running", "counters")
+
+    def __init__(self, name: str, concurrency: int, max_queued: int, policy: str) -> None:
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.policy = policy
+        # Waiting jobs keyed by their coalesce key (or a unique sequence
+        # number), oldest first: coalescing and dropping the oldest are O(1).
+        self.queue: "OrderedDict[Hashable, Tuple[str, Coroutine[Any, Any, Any]]]" = OrderedDict()
+        self.running: Set["asyncio.Task[Any]"] = set()
+        self.counters: Dict[str, int] = dict.fromkeys(_COUNTERS, 0)
+
+
+class TaskSupervisor:
+    """Bounded, named lanes of background tasks."""
+
+    def __init__(self) -> None:
+        self._lanes: Dict[str, _Lane] = {}
+        self._sequence = count()
+        self._closing = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def add_lane(
+        self,
+        name: str,
+        *,
+        concurrency: int = 4,
+        max_queued: int = 100,
+        policy: str = DROP_NEWEST,
+    ) -> None:
+        """Define (or redefine) a lane; existing counters and work are kept."""
+        if policy not in _POLICIES:
+            raise ValueError(f"Unknown lane policy: {policy}")
+        concurrency = max(1, int(concurrency))
+        max_queued = max(0, int(max_queued))
+        lane = self._lanes.get(name)
+        if lane is None:
+            self._lanes[name] = _Lane(name, concurrency, max_queued, policy)
+            return
+        lane.concurrency, lane.max_queued, lane.policy = concurrency, max_queued, policy
+
+    def submit(
+        self,
+        lane_name: str,
+        coro: Coroutine[Any, Any, Any],
+        *,
+        name: str,
+        key: Optional[Hashable] = None,
+    ) -> bool:
+        """Run ``coro`` in a lane; returns False if the lane's policy dropped it.
+
+        A dropped coroutine is closed without running, so callers never leak
+        an un-awaited coroutine. ``key`` only matters on ``coalesce`` lanes.
+        """
+        lane = self._lanes.get(lane_name)
+        if lane is None:
+            coro.close()
+            raise ValueError(f"Unknown task lane: {lane_name}")
+        lane.counters["submitted"] += 1
+        if self._closing:
+            return self._drop(lane, name, coro, "shutting down")
+
+        if lane.policy == COALESCE and key is not None and key in lane.queue:
+            _, stale = lane.queue[key]
+            stale.close()
+            lane.queue[key] = (name, coro)
+            lane.counters["coalesced"] += 1
+            return True
+
+        if len(lane.running) < lane.concurrency and not lane.queue:
+            self._start(lane, name, coro)
+            return True
+
+        if len(lane.queue) >= lane.max_queued:
+            if lane.policy != DROP_OLDEST or not lane.queue:
+                return self._drop(lane, name, coro, "queue full")
+            _, (evicted_name, evicted) = lane.queue.popitem(last=False)
+            self._drop(lane, evicted_name, evicted, "evicted by newer work")
+
+        queue_key = key if lane.policy == COALESCE and key is not None else ("seq", next(self._sequence))
+        lane.queue[queue_key] = (name, coro)
+        self._idle.clear()
+        return True
+
+    async def drain(self, timeout: float = 30.0) -> bool:
+        """Stop accepting work and wait for queued and running tasks.
+
+        Whatever is still queued or running after ``timeout`` seconds is
+        dropped and cancelled. Returns True if everything finished in time.
+        """
+        self._closing = True
+        if not self._idle.is_set():
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        if self._idle.is_set():
+            return True
+
+        leftover = []
+        for lane in self._lanes.values():
+            while lane.queue:
+                _, (name, coro) = lane.queue.popitem(last=False)
+                self._drop(lane, name, coro, "drain timed out")
+            leftover.extend(lane.running)
+        for task in leftover:
+            task.cancel()
+        await asyncio.gather(*leftover, return_exceptions=True)
+        logger.warning("Task supervisor drain timed out; cancelled %d task(s)", len(leftover))
+        return False
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-lane gauges (queued, running) and lifetime counters."""
+        return {
+            name: {
+                "queued": len(lane.queue),
+                "running": len(lane.running),
+                **lane.counters,
+                "concurrency": lane.concurrency,
+                "max_queued": lane.max_queued,
+                "policy": lane.policy,
+            }
+            for name, lane in self._lanes.items()
+        }
+
+    def _drop(self, lane: _Lane, name: str, coro: Coroutine[Any, Any, Any], reason: str) -> bool:
+        coro.close()
+        lane.counters["dropped"] += 1
+        logger.warning("Dropped background task %r from lane %r (%s)", name, lane.name, reason)
+        return False
+
+    def _start(self, lane: _Lane, name: str, coro: Coroutine[Any, Any, Any]) -> None:
+        task = asyncio.get_running_loop().create_task(coro, name=name)
+        lane.running.add(task)
+        self._idle.clear()
+        task.add_done_callback(lambda done: self._finished(lane, name, done))
+
+    def _finished(self, lane: _Lane, name: str, task: "asyncio.Task[Any]") -> None:
+        lane.running.discard(task)
+        if task.cancelled():
+            lane.counters["dropped"] += 1
+        elif task.exception() is not None:
+            lane.counters["failed"] += 1
+            logger.error("Background task %r failed", name, exc_info=task.exception())
+        else:
+            lane.counters["completed"] += 1
+
+        while lane.queue and len(lane.running) < lane.concurrency:
+            _, (next_name, coro) = lane.queue.popitem(last=False)
+            self._start(lane, next_name, coro)
+        if not any(other.queue or other.running for other in self._lanes.values()):
+            self._idle.set()
+
 
-def _make_done_callback(name: str):
-    def _callback(task: "asyncio.Task[object]") -> None:
-        try:
-            task.result()
-        except asyncio.CancelledError:
-            pass
-        except Exception:
-            logger.exception("Background task %r failed", name)
-
-    return _callback
-
-
-def fire_and_forget(
-    coro: Awaitable[object],
-    *,
-    name: str,
-    log: Optional[logging.Logger] = None,
-) -> "asyncio.Task[object]":
-    """Schedule ``coro`` as a background task that logs its own failures.
-
-    The returned task holds a strong reference for as long as it runs, so the
-    caller does not need to keep a reference (unlike a bare
-    ``asyncio.create_task`` which can be garbage-collected mid-flight). Any
-    exception raised by ``coro`` is reported through the done-callback to
-    ``log`` (defaults to this module's logger) and never propagates to the
-    caller.
-    """
-
-    log = log or logger
-    task = asyncio.ensure_future(coro)
-    try:
-        task.set_name(name)
-    except Exception:
-        # Older Python versions or odd task types — naming is cosmetic only.
-        pass
-    task.add_done_callback(_make_done_callback(name))
-    return task
-
-
-__all__ = ["fire_and_forget"]
+__all__ = ["COALESCE", "DROP_NEWEST", "DROP_OLDEST", "TaskSupervisor"]
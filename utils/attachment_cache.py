@@ -0,0 +1,303 @@
+"""
+Size-capped capture of message attachments for deleted-message logs.
+
+The logging cog used to download every image attachment (up to 8 MB each) the
+moment a message was sent and write it to the temp directory, although only a
+tiny fraction of messages are ever deleted. Capture is now a per-guild policy:
+``thumbnail`` (the default) stores a small preview fetched through Discord's
+media proxy, ``full`` keeps the old behaviour, and ``none`` (also used for
+trusted channels) stores nothing. ``AttachmentCache`` holds the captured bytes
+on disk under a per-guild byte budget with least-recently-written eviction.
+
+At delete time the log first tries the signed CDN URL, which keeps serving the
+original for a while after the message is gone, and only falls back to the
+captured preview once that URL has expired or stopped answering.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_FULL = "full"
+CAPTURE_THUMBNAIL = "thumbnail"
+CAPTURE_NONE = "none"
+CAPTURE_POLICIES = (CAPTURE_FULL, CAPTURE_THUMBNAIL, CAPTURE_NONE)
+
+THUMBNAIL_SIZE = 320
+THUMBNAIL_MAX_BYTES = 256 * 1024
+FULL_MAX_BYTES = 8_000_000
+MAX_ATTACHMENTS = 10
+
+CacheKey = Tuple[int, int, int]
+
+
+def thumbnail_url(url: str, width: Optional[int] = None, height: Optional[int] = None,
+                  size: int = THUMBNAIL_SIZE) -> str:
+    """Media-proxy URL for a preview of at most ``size`` pixels on the long edge.
+
+    The proxy resizes on ``width``/``height`` query parameters and keeps the
+    signature parameters (``ex``/``is``/``hm``) valid. Images already smaller
+    than ``size``, or of unknown dimensions, are scaled by width alone.
+    """
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in ("width", "height")]
+    if width and height:
+        scale = min(1.0, size / max(width, height))
+        query += [("width", str(max(1, round(width * scale)))), ("height", str(max(1, round(height * scale))))]
+    else:
+        query.append(("width", str(size)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def cdn_url_expiry(url: str) -> Optional[float]:
+    """Epoch seconds at which a signed Discord CDN URL stops working.
+
+    Discord signs attachment URLs with a hex ``ex`` timestamp. Returns None
+    for unsigned URLs, which are treated as still valid.
+    """
+    for key, value in parse_qsl(urlsplit(url).query):
+        if key == "ex":
+            try:
+                return float(int(value, 16))
+            except ValueError:
+                return None
+    return None
+
+
+async def fetch_capped(session: aiohttp.ClientSession, url: str, max_bytes: int) -> Optional[bytes]:
+    """GET ``url``; None on any failure or once the body passes ``max_bytes``.
+
+    Oversized bodies are abandoned as soon as the declared length or the bytes
+    read so far exceed the cap, so a mislabelled 50 MB file costs at most
+    ``max_bytes`` of bandwidth.
+    """
+    try:
+        async with session.get(url) as response:
+            if response.status != 200:
+                return None
+            if response.content_length is not None and response.content_length > max_bytes:
+                return None
+            chunks: List[bytes] = []
+            received = 0
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                received += len(chunk)
+                if received > max_bytes:
+                    return None
+                chunks.append(chunk)
+            return b"".join(chunks)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        logger.debug("Attachment fetch failed for %s", url, exc_info=True)
+        return None
+
+
+class AttachmentCache:
+    """
+    On-disk store of captured attachment bytes with per-guild byte budgets.
+
+    Files are named ``{guild}_{message}_{index}.bin``. Each guild keeps its
+    own write-ordered index, so one busy image channel evicts only its own
+    oldest captures; ``total_budget_bytes`` caps the directory as a whole.
+    Bookkeeping happens on the event loop and file I/O in a worker thread.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        guild_budget_bytes: int = 32 * 1024 * 1024,
+        total_budget_bytes: int = 512 * 1024 * 1024,
+        max_age_seconds: float = 86400.0,
+    ):
+        """
+        Args:
+            root: Directory holding the cache files
+            guild_budget_bytes: Bytes kept per guild before its oldest files go
+            total_budget_bytes: Bytes kept across all guilds
+            max_age_seconds: Files older than this are dropped by ``prune``
+        """
+        self.root = Path(root)
+        self.guild_budget_bytes = max(0, int(guild_budget_bytes))
+        self.total_budget_bytes = max(0, int(total_budget_bytes))
+        self.max_age = float(max_age_seconds)
+        # key -> (size, stored_at); insertion order is write order.
+        self._files: "OrderedDict[CacheKey, Tuple[int, float]]" = OrderedDict()
+        self._guild_files: Dict[int, "OrderedDict[CacheKey, int]"] = {}
+        self._guild_usage: Dict[int, int] = {}
+        self._total = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def usage(self, guild_id: int) -> int:
+        return self._guild_usage.get(guild_id, 0)
+
+    def path_for(self, key: CacheKey) -> Path:
+        return self.root / "{}_{}_{}.bin".format(*key)
+
+    def load(self) -> None:
+        """Index files left by a previous run, oldest first (blocking; run in a thread)."""
+        found: List[Tuple[float, CacheKey, int]] = []
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            for path in self.root.glob("*.bin"):
+                parts = path.stem.split("_")
+                if len(parts) != 3 or not all(part.isdigit() for part in parts):
+                    continue
+                stat = path.stat()
+                found.append((stat.st_mtime, (int(parts[0]), int(parts[1]), int(parts[2])), stat.st_size))
+        except OSError:
+            logger.debug("Failed to index attachment cache %s", self.root, exc_info=True)
+        for stored_at, key, size in sorted(found):
+            self._add(key, size, stored_at)
+        self._unlink(self._evict(None))
+
+    async def put(self, guild_id: int, message_id: int, index: int, data: bytes) -> bool:
+        """Store one attachment; returns False if it could never fit the budget."""
+        size = len(data)
+        if not data or size > self.guild_budget_bytes or size > self.total_budget_bytes:
+            return False
+        key = (guild_id, message_id, index)
+        self._discard(key)
+        self._add(key, size, time.time())
+        evicted = self._evict(guild_id)
+        path = self.path_for(key)
+
+        def _write() -> None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            self._unlink(evicted)
+
+        try:
+            await asyncio.to_thread(_write)
+        except OSError:
+            logger.debug("Failed to write attachment cache file %s", path, exc_info=True)
+            self._discard(key)
+            return False
+        return True
+
+    async def take(self, guild_id: int, message_id: int) -> Dict[int, bytes]:
+        """Read and remove every capture for a message, keyed by attachment index."""
+        keys = [
+            (guild_id, message_id, index)
+            for index in range(MAX_ATTACHMENTS)
+            if (guild_id, message_id, index) in self._files
+        ]
+        if not keys:
+            return {}
+        for key in keys:
+            self._discard(key)
+        paths = [self.path_for(key) for key in keys]
+
+        def _read() -> Dict[int, bytes]:
+            captured: Dict[int, bytes] = {}
+            for key, path in zip(keys, paths):
+                try:
+                    captured[key[2]] = path.read_bytes()
+                except OSError:
+                    continue
+                finally:
+                    path.unlink(missing_ok=True)
+            return captured
+
+        return await asyncio.to_thread(_read)
+
+    async def prune(self) -> int:
+        """Drop captures older than ``max_age``, plus stray files nobody indexed."""
+        cutoff = time.time() - self.max_age
+        expired: List[Path] = []
+        while self._files:
+            key, (_, stored_at) = next(iter(self._files.items()))
+            if stored_at >= cutoff:
+                break
+            self._discard(key)
+            expired.append(self.path_for(key))
+        known = {self.path_for(key).name for key in self._files}
+
+        def _sweep() -> None:
+            self._unlink(expired)
+            try:
+                for path in self.root.glob("*.bin"):
+                    if path.name not in known and path.stat().st_mtime < cutoff:
+                        path.unlink(missing_ok=True)
+            except OSError:
+                logger.debug("Failed to sweep attachment cache %s", self.root, exc_info=True)
+
+        await asyncio.to_thread(_sweep)
+        return len(expired)
+
+    def _add(self, key: CacheKey, size: int, stored_at: float) -> None:
+        guild_id = key[0]
+        self._files[key] = (size, stored_at)
+        self._guild_files.setdefault(guild_id, OrderedDict())[key] = size
+        self._guild_usage[guild_id] = self._guild_usage.get(guild_id, 0) + size
+        self._total += size
+
+    def _discard(self, key: CacheKey) -> bool:
+        entry = self._files.pop(key, None)
+        if entry is None:
+            return False
+        guild_id = key[0]
+        size = entry[0]
+        guild_files = self._guild_files.get(guild_id)
+        if guild_files is not None:
+            guild_files.pop(key, None)
+            if not guild_files:
+                del self._guild_files[guild_id]
+        remaining = self._guild_usage.get(guild_id, 0) - size
+        if remaining > 0:
+            self._guild_usage[guild_id] = remaining
+        else:
+            self._guild_usage.pop(guild_id, None)
+        self._total -= size
+        return True
+
+    def _evict(self, guild_id: Optional[int]) -> List[Path]:
+        """Forget the oldest captures until the budgets hold; returns their paths."""
+        evicted: List[Path] = []
+        guild_ids = [guild_id] if guild_id is not None else list(self._guild_files)
+        for gid in guild_ids:
+            while self._guild_usage.get(gid, 0) > self.guild_budget_bytes:
+                key = next(iter(self._guild_files[gid]))
+                self._discard(key)
+                evicted.append(self.path_for(key))
+        while self._total > self.total_budget_bytes and self._files:
+            key = next(iter(self._files))
+            self._discard(key)
+            evicted.append(self.path_for(key))
+        self.evictions += len(evicted)
+        return evicted
+
+    @staticmethod
+    def _unlink(paths: List[Path]) -> None:
+        for path in paths:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                logger.debug("Failed to remove attachment cache file %s", path, exc_info=True)
+
+
+def capture_policy(settings: Dict[str, Any], channel_id: Optional[int]) -> str:
+    """Capture policy for a channel from a guild's settings.
+
+    ``log_attachment_capture`` picks the guild policy (default
+    ``thumbnail``); channels listed in ``log_attachment_trusted_channels``
+    never capture.
+    """
+    trusted = settings.get("log_attachment_trusted_channels") or []
+    if channel_id is not None and any(str(channel_id) == str(item) for item in trusted):
+        return CAPTURE_NONE
+    policy = str(settings.get("log_attachment_capture") or CAPTURE_THUMBNAIL).strip().lower()
+    return policy if policy in CAPTURE_POLICIES else CAPTURE_THUMBNAIL
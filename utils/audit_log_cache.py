@@ -0,0 +1,199 @@
+"""
+Per-guild cache of recent audit-log entries.
+
+Attribution (who deleted, kicked, banned, created a webhook) used to cost one
+``guild.audit_logs()`` REST call per event. During a raid or a nuke that burns
+the audit-log rate limit exactly when attribution matters most. The bot feeds
+every ``on_audit_log_entry_create`` into this cache, and lookups only fall
+back to REST when nothing recent matches.
+"""
+
+import asyncio
+import bisect
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+EntryPredicate = Callable[[Any], bool]
+
+
+def entry_target_id(entry: Any) -> Optional[int]:
+    """Target id of an entry, whether ``target`` resolved to a model or an Object."""
+    target_id = getattr(getattr(entry, "target", None), "id", None)
+    if target_id is None:
+        target_id = getattr(entry, "_target_id", None)
+    return target_id
+
+
+class AuditLogCache:
+    """
+    Bounded, time-ordered ring of audit-log entries per guild.
+
+    Entries are kept sorted by id (snowflakes are time-ordered), so scans run
+    newest first and stop at the first entry outside the requested window.
+    """
+
+    def __init__(self, max_entries: int = 200, max_age_seconds: float = 300.0):
+        """
+        Args:
+            max_entries: Entries kept per guild (oldest dropped first)
+            max_age_seconds: Entries older than this are dropped on insert
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.max_age = float(max_age_seconds)
+        self._entries: Dict[int, List[Any]] = {}
+        self._ids: Dict[int, List[int]] = {}
+        self._arrivals: Dict[int, asyncio.Event] = {}
+        self.hits = 0
+        self.misses = 0
+        self.rest_calls = 0
+
+    def record(self, entry: Any) -> bool:
+        """Add an entry; returns False if it was already cached."""
+        guild = getattr(entry, "guild", None)
+        entry_id = getattr(entry, "id", None)
+        if guild is None or not isinstance(entry_id, int):
+            return False
+        guild_id = guild.id
+        entries = self._entries.setdefault(guild_id, [])
+        ids = self._ids.setdefault(guild_id, [])
+
+        index = bisect.bisect_left(ids, entry_id)
+        if index < len(ids) and ids[index] == entry_id:
+            return False
+        ids.insert(index, entry_id)
+        entries.insert(index, entry)
+
+        cutoff = datetime.now(timezone.utc).timestamp() - self.max_age
+        stale = 0
+        while stale < len(entries) and entries[stale].created_at.timestamp() < cutoff:
+            stale += 1
+        overflow = max(stale, len(entries) - self.max_entries)
+        if overflow:
+            del entries[:overflow]
+            del ids[:overflow]
+
+        arrival = self._arrivals.pop(guild_id, None)
+        if arrival is not None:
+            arrival.set()
+        return True
+
+    def find(
+        self,
+        guild_id: int,
+        action: discord.AuditLogAction,
+        *,
+        target_id: Optional[int] = None,
+        within: Optional[float] = None,
+        predicate: Optional[EntryPredicate] = None,
+    ) -> Optional[Any]:
+        """Newest cached entry matching the filters, or None."""
+        now = datetime.now(timezone.utc)
+        for entry in reversed(self._entries.get(guild_id, ())):
+            if within is not None and (now - entry.created_at).total_seconds() > within:
+                break
+            if _matches(entry, action, target_id, predicate):
+                return entry
+        return None
+
+    async def wait_for(
+        self,
+        guild_id: int,
+        action: discord.AuditLogAction,
+        *,
+        timeout: float,
+        target_id: Optional[int] = None,
+        within: Optional[float] = None,
+        predicate: Optional[EntryPredicate] = None,
+    ) -> Optional[Any]:
+        """Like ``find``, but waits up to ``timeout`` seconds for the entry to arrive.
+
+        The gateway does not order audit-log entries against the events they
+        describe, so a ban can be dispatched before its entry.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max(0.0, timeout)
+        while True:
+            entry = self.find(guild_id, action, target_id=target_id, within=within, predicate=predicate)
+            remaining = deadline - loop.time()
+            if entry is not None or remaining <= 0:
+                return entry
+            arrival = self._arrivals.setdefault(guild_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(arrival.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def lookup(
+        self,
+        guild: discord.Guild,
+        action: discord.AuditLogAction,
+        *,
+        target_id: Optional[int] = None,
+        within: Optional[float] = None,
+        predicate: Optional[EntryPredicate] = None,
+        wait: float = 0.0,
+        rest_limit: int = 6,
+    ) -> Optional[Any]:
+        """
+        Resolve the newest matching entry, from the cache when possible.
+
+        On a miss, reads the latest ``rest_limit`` entries for ``action`` over
+        REST (caching them too). Returns None without the View Audit Log
+        permission; other HTTP errors propagate to the caller.
+        """
+        entry = await self.wait_for(
+            guild.id, action, timeout=wait, target_id=target_id, within=within, predicate=predicate
+        )
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+
+        self.rest_calls += 1
+        now = datetime.now(timezone.utc)
+        try:
+            async for candidate in guild.audit_logs(limit=rest_limit, action=action):
+                self.record(candidate)
+                if within is not None and (now - candidate.created_at).total_seconds() > within:
+                    break
+                if _matches(candidate, action, target_id, predicate):
+                    return candidate
+        except discord.Forbidden:
+            return None
+        return None
+
+    def clear(self, guild_id: Optional[int] = None) -> None:
+        """Drop cached entries for one guild, or for every guild."""
+        if guild_id is None:
+            self._entries.clear()
+            self._ids.clear()
+        else:
+            self._entries.pop(guild_id, None)
+            self._ids.pop(guild_id, None)
+
+
+def _matches(
+    entry: Any,
+    action: discord.AuditLogAction,
+    target_id: Optional[int],
+    predicate: Optional[EntryPredicate],
+) -> bool:
+    if entry.action != action:
+        return False
+    if target_id is not None and entry_target_id(entry) != target_id:
+        return False
+    return predicate is None or predicate(entry)
+
+
+def get_audit_log_cache(bot: Any) -> AuditLogCache:
+    """The bot's shared cache, attached on first use for bots built without one."""
+    cache = getattr(bot, "audit_log_cache", None)
+    if cache is None:
+        cache = AuditLogCache()
+        bot.audit_log_cache = cache
+    return cache
@@ -4,32 +4,38 @@ Prevents memory leaks and provides efficient data caching
 """
 
 import asyncio
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, TypeVar, Generic
+import heapq
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar, Generic
 from collections import OrderedDict
+from itertools import count, islice
 import logging
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
+K = TypeVar('K', bound=Hashable)
 
 
 class CachedItem(Generic[T]):
     """A cached item with expiration time"""
     
-    def __init__(self, value: T, ttl: int = 300):
+    __slots__ = ("value", "created_at", "expires_at")
+
+    def __init__(self, value: T, ttl: float = 300, *, now: Optional[float] = None):
         """
         Args:
             value: The value to cache
             ttl: Time to live in seconds (default: 5 minutes)
+            now: ``time.monotonic()`` reading to stamp the item with
         """
         self.value = value
-        self.created_at = datetime.now()
-        self.expires_at = self.created_at + timedelta(seconds=ttl)
+        self.created_at = time.monotonic() if now is None else now
+        self.expires_at = self.created_at + ttl
     
-    def is_expired(self) -> bool:
+    def is_expired(self, now: Optional[float] = None) -> bool:
         """Check if the cached item has expired"""
-        return datetime.now() > self.expires_at
+        return (time.monotonic() if now is None else now) > self.expires_at
     
     def get(self) -> Optional[T]:
         """Get the value if not expired, otherwise None"""
@@ -41,77 +47,102 @@ class CachedItem(Generic[T]):
 class TTLCache(Generic[T]):
     """
     Time-To-Live Cache with automatic expiration
-    Thread-safe and memory-efficient
+    Items sit in an OrderedDict in LRU order and their expiry times in a
+    min-heap, both on ``time.monotonic()``. Expired items are popped off the
+    heap top, so cleanup costs what has expired rather than a scan of the
+    whole cache. The async methods never await: on one event loop each call
+    runs to completion, so no lock is needed.
     """
     
-    def __init__(self, ttl: int = 300, max_size: int = 1000):
+    def __init__(
+        self,
+        ttl: int = 300,
+        max_size: int = 1000,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         """
         Args:
             ttl: Default time to live in seconds
             max_size: Maximum number of items to cache (LRU eviction)
+            clock: Monotonic time source, injectable for tests
         """
         self.ttl = ttl
         self.max_size = max_size
+        self._clock = clock
         self._cache: OrderedDict[Any, CachedItem[T]] = OrderedDict()
-        self._lock = asyncio.Lock()
+        # (expires_at, sequence, key); entries whose item was replaced or
+        # removed are skipped when they reach the top.
+        self._expiry: List[Tuple[float, int, Any]] = []
+        self._sequence = count()
         self._hits = 0
         self._misses = 0
     
     async def get(self, key: Any) -> Optional[T]:
         """Get a value from cache"""
-        async with self._lock:
-            if key not in self._cache:
-                self._misses += 1
-                return None
-            
-            item = self._cache[key]
-            if item.is_expired():
-                del self._cache[key]
-                self._misses += 1
-                return None
-            
-            # Move to end (LRU)
-            self._cache.move_to_end(key)
-            self._hits += 1
-            return item.value
+        item = self._cache.get(key)
+        if item is None:
+            self._misses += 1
+            return None
+        if item.is_expired(self._clock()):
+            del self._cache[key]
+            self._misses += 1
+            return None
+        # Move to end (LRU)
+        self._cache.move_to_end(key)
+        self._hits += 1
+        return item.value
     
     async def set(self, key: Any, value: T, ttl: Optional[int] = None) -> None:
         """Set a value in cache"""
-        async with self._lock:
-            # Evict oldest if at max size
-            if len(self._cache) >= self.max_size and key not in self._cache:
-                self._cache.popitem(last=False)
-            
-            # Use custom TTL or default
-            item_ttl = ttl if ttl is not None else self.ttl
-            self._cache[key] = CachedItem(value, item_ttl)
-            self._cache.move_to_end(key)
+        now = self._clock()
+        self._expire(now)
+        # Evict oldest if at max size
+        if len(self._cache) >= self.max_size and key not in self._cache:
+            self._cache.popitem(last=False)
+        
+        # Use custom TTL or default
+        item_ttl = ttl if ttl is not None else self.ttl
+        item = CachedItem(value, item_ttl, now=now)
+        self._cache[key] = item
+        self._cache.move_to_end(key)
+        heapq.heappush(self._expiry, (item.expires_at, next(self._sequence), key))
+        if len(self._expiry) > 2 * len(self._cache) + 64:
+            self._rebuild_expiry()
     
     async def delete(self, key: Any) -> bool:
         """Delete a key from cache"""
-        async with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-                return True
-            return False
+        return self._cache.pop(key, None) is not None
     
     async def clear(self) -> None:
         """Clear all cached items"""
-        async with self._lock:
-            self._cache.clear()
-            self._hits = 0
-            self._misses = 0
+        self._cache.clear()
+        self._expiry.clear()
+        self._hits = 0
+        self._misses = 0
     
     async def cleanup_expired(self) -> int:
         """Remove all expired items and return count removed"""
-        async with self._lock:
-            expired_keys = [
-                key for key, item in self._cache.items() 
-                if item.is_expired()
-            ]
-            for key in expired_keys:
+        return self._expire(self._clock())
+
+    def _expire(self, now: float) -> int:
+        removed = 0
+        expiry = self._expiry
+        while expiry and expiry[0][0] < now:
+            key = heapq.heappop(expiry)[2]
+            item = self._cache.get(key)
+            if item is not None and item.is_expired(now):
                 del self._cache[key]
-            return len(expired_keys)
+                removed += 1
+        return removed
+
+    def _rebuild_expiry(self) -> None:
+        # Overwrites and LRU evictions leave stale heap entries behind; once
+        # they outnumber the live ones, start over from the live items.
+        self._expiry = [
+            (item.expires_at, next(self._sequence), key) for key, item in self._cache.items()
+        ]
+        heapq.heapify(self._expiry)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
@@ -136,6 +167,190 @@ class TTLCache(Generic[T]):
                 logger.debug(f"Cache cleanup: removed {removed} expired items")
 
 
+class BoundedLRU(Generic[K, T]):
+    """
+    Size- and age-bounded mapping with O(1) insert, touch and evict
+    Entries sit in an OrderedDict in write order, stamped with
+    ``time.monotonic()``. Writes and touches move an entry to the back, so the
+    oldest entry is always at the front: overflow and expiry both pop from
+    there instead of scanning the whole mapping.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: Optional[float] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            max_size: Maximum number of entries; the oldest is evicted first
+            ttl: Seconds an entry lives after its last write or touch (None: forever)
+            clock: Monotonic time source, injectable for tests
+        """
+        self.max_size = max(1, int(max_size))
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[K, Tuple[float, T]]" = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._data.get(key)  # type: ignore[arg-type]
+        return entry is not None and not self._expired(entry[0], self._clock())
+
+    def _expired(self, stamped_at: float, now: float) -> bool:
+        return self.ttl is not None and now - stamped_at > self.ttl
+
+    def set(self, key: K, value: T) -> None:
+        """Insert or replace ``key`` as the newest entry."""
+        now = self._clock()
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (now, value)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+        self._prune_front(now)
+
+    def get(self, key: K, default: Optional[T] = None) -> Optional[T]:
+        """Value for ``key`` without refreshing it; expired entries are dropped."""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        if self._expired(entry[0], self._clock()):
+            del self._data[key]
+            return default
+        return entry[1]
+
+    def touch(self, key: K) -> bool:
+        """Mark ``key`` as just used; returns False if it is missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return False
+        now = self._clock()
+        if self._expired(entry[0], now):
+            del self._data[key]
+            return False
+        self._data[key] = (now, entry[1])
+        self._data.move_to_end(key)
+        return True
+
+    def pop(self, key: K, default: Optional[T] = None) -> Optional[T]:
+        """Remove ``key`` and return its value unless it had expired."""
+        entry = self._data.pop(key, None)
+        if entry is None or self._expired(entry[0], self._clock()):
+            return default
+        return entry[1]
+
+    def prune_expired(self) -> int:
+        """Drop every expired entry; returns how many went."""
+        return self._prune_front(self._clock())
+
+    def _prune_front(self, now: float) -> int:
+        removed = 0
+        if self.ttl is None:
+            return removed
+        while self._data:
+            stamped_at = next(iter(self._data.values()))[0]
+            if not self._expired(stamped_at, now):
+                break
+            self._data.popitem(last=False)
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class SingleFlightCache(Generic[K, T]):
+    """
+    Short-TTL result cache that coalesces concurrent identical calls
+    The first caller for a key runs the factory; callers arriving while it is
+    in flight await the same future instead of starting their own call, and
+    later callers read the stored result until it expires. Exceptions reach
+    every waiter and are never stored.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float = 30,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            max_size: Maximum number of stored results
+            ttl: Seconds a stored result stays fresh
+            clock: Monotonic time source, injectable for tests
+        """
+        self._results: BoundedLRU[K, T] = BoundedLRU(max_size, ttl=ttl, clock=clock)
+        self._inflight: Dict[K, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    async def get_or_call(
+        self,
+        key: K,
+        factory: Callable[[], Awaitable[T]],
+        *,
+        cacheable: Callable[[T], bool] = lambda value: value is not None,
+    ) -> T:
+        """Return the stored or in-flight result for ``key``, else run ``factory``."""
+        if key in self._results:
+            self.hits += 1
+            return self._results.get(key)  # type: ignore[return-value]
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an exception nobody else awaited is not logged.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if cacheable(value):
+                self._results.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit and coalescing counters; rates are shares of all lookups."""
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._results),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": f"{(self.hits / total * 100) if total else 0:.2f}%",
+            "coalesce_rate": f"{(self.coalesced / total * 100) if total else 0:.2f}%",
+        }
+
+
 class SnipeCache:
     """
     Specialized cache for deleted/edited messages
@@ -150,40 +365,147 @@ class SnipeCache:
         """
         self.max_age = max_age_seconds
         self.max_size = max_size
-        self._cache: Dict[int, CachedItem[Dict[str, Any]]] = {}
-        self._lock = asyncio.Lock()
+        self._cache: BoundedLRU[int, Dict[str, Any]] = BoundedLRU(max_size, ttl=max_age_seconds)
     
     async def add(self, channel_id: int, message_data: Dict[str, Any]) -> None:
         """Add a sniped message to cache"""
-        async with self._lock:
-            # Enforce max size (FIFO)
-            if len(self._cache) >= self.max_size:
-                # Remove oldest entry
-                oldest_key = min(
-                    self._cache.keys(),
-                    key=lambda k: self._cache[k].created_at
-                )
-                del self._cache[oldest_key]
-            
-            self._cache[channel_id] = CachedItem(message_data, self.max_age)
+        self._cache.set(channel_id, message_data)
     
     async def get(self, channel_id: int) -> Optional[Dict[str, Any]]:
         """Get a sniped message from cache"""
-        async with self._lock:
-            if channel_id not in self._cache:
-                return None
-            
-            item = self._cache[channel_id]
-            if item.is_expired():
-                del self._cache[channel_id]
-                return None
-            
-            return item.value
+        return self._cache.get(channel_id)
     
     async def clear(self) -> None:
         """Clear all cached messages"""
-        async with self._lock:
-            self._cache.clear()
+        self._cache.clear()
+
+
+class _ChannelRing:
+    __slots__ = ("messages", "warm", "complete")
+
+    def __init__(self) -> None:
+        self.messages: "OrderedDict[int, Any]" = OrderedDict()
+        self.warm = False
+        self.complete = False
+
+
+class RecentMessageBuffer:
+    """
+    Per-channel ring of the latest gateway messages, oldest first
+    The gateway events keep each ring current, so readers get the last N
+    messages of a channel without a ``channel.history`` call. Rings start
+    cold: until ``seed`` has loaded a channel's backlog once from REST, the
+    buffer cannot tell whether it is missing older messages, and ``recent``
+    returns None so the caller knows to fetch.
+    """
+
+    def __init__(self, per_channel: int = 200, max_channels: int = 256):
+        """
+        Args:
+            per_channel: Messages kept per channel; older ones drop off the front
+            max_channels: Channels kept; the least recently active is dropped
+        """
+        self.per_channel = max(1, int(per_channel))
+        self._channels: BoundedLRU[int, _ChannelRing] = BoundedLRU(max_channels)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def _ring(self, channel_id: int, *, create: bool = False) -> Optional[_ChannelRing]:
+        ring = self._channels.get(channel_id)
+        if ring is None and create:
+            ring = _ChannelRing()
+            self._channels.set(channel_id, ring)
+        elif ring is not None:
+            self._channels.touch(channel_id)
+        return ring
+
+    def is_warm(self, channel_id: int) -> bool:
+        ring = self._channels.get(channel_id)
+        return ring is not None and ring.warm
+
+    def add(self, message: Any) -> None:
+        """Record a message from ``on_message``; replaying one is harmless."""
+        ring = self._ring(message.channel.id, create=True)
+        messages = ring.messages
+        if message.id in messages:
+            messages[message.id] = message
+            return
+        newest = next(reversed(messages), None) if messages else None
+        messages[message.id] = message
+        if newest is not None and message.id < newest:
+            # Snowflakes sort by creation time; an out-of-order arrival is rare
+            # enough that re-sorting the ring is cheaper than bisecting it.
+            ordered = sorted(messages.items())
+            messages.clear()
+            messages.update(ordered)
+        self._trim(ring)
+
+    def update(self, message: Any) -> None:
+        """Swap in the edited copy of a buffered message."""
+        ring = self._channels.get(message.channel.id)
+        if ring is not None and message.id in ring.messages:
+            ring.messages[message.id] = message
+
+    def remove(self, channel_id: int, message_ids: Any) -> None:
+        """Drop deleted messages; accepts one id or an iterable of ids."""
+        ring = self._channels.get(channel_id)
+        if ring is None:
+            return
+        if isinstance(message_ids, int):
+            message_ids = (message_ids,)
+        for message_id in message_ids:
+            ring.messages.pop(message_id, None)
+
+    def seed(self, channel_id: int, messages: Any, *, requested: int) -> None:
+        """Load a channel's REST backlog and mark the ring warm.
+
+        ``requested`` is the history limit the backlog was fetched with; fewer
+        messages than that means the ring now holds the whole channel.
+        """
+        ring = self._ring(channel_id, create=True)
+        fetched = list(messages)
+        merged = {message.id: message for message in fetched}
+        # Anything the gateway delivered while the fetch was in flight is newer.
+        merged.update(ring.messages)
+        ring.messages.clear()
+        ring.messages.update(sorted(merged.items()))
+        ring.warm = True
+        ring.complete = len(fetched) < requested
+        self._trim(ring)
+
+    def recent(self, channel_id: int, limit: int) -> Optional[List[Any]]:
+        """The newest ``limit`` messages, oldest first, or None if a fetch is needed."""
+        ring = self._ring(channel_id)
+        limit = max(0, int(limit))
+        if ring is None or not ring.warm or (limit > self.per_channel and not ring.complete):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if limit >= len(ring.messages):
+            return list(ring.messages.values())
+        newest = list(islice(reversed(ring.messages.values()), limit))
+        newest.reverse()
+        return newest
+
+    def _trim(self, ring: _ChannelRing) -> None:
+        while len(ring.messages) > self.per_channel:
+            ring.messages.popitem(last=False)
+            ring.complete = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "channels": len(self._channels),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": f"{(self.hits / total * 100) if total else 0:.2f}%",
+        }
+
+    def clear(self) -> None:
+        self._channels.clear()
 
 
 class PrefixCache:
@@ -250,19 +572,34 @@ class ChannelCache:
 
 class RateLimiter:
     """
-    Rate limiter using sliding window algorithm
+    Rate limiter using the generic cell rate algorithm (GCRA)
+    Each key keeps one number, its theoretical arrival time (TAT): calls are
+    spaced ``window / max_calls`` apart, and up to ``max_calls`` may arrive
+    back to back. That is a sliding window without a per-key list of call
+    times to filter on every check. Keys sit in last-call order, so cleanup
+    pops drained keys off the front.
     """
     
-    def __init__(self, max_calls: int, window_seconds: int):
+    def __init__(
+        self,
+        max_calls: int,
+        window_seconds: int,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         """
         Args:
             max_calls: Maximum number of calls allowed in the window
             window_seconds: Time window in seconds
+            clock: Monotonic time source, injectable for tests
         """
         self.max_calls = max_calls
         self.window = window_seconds
-        self._calls: Dict[Any, list[float]] = {}
-        self._lock = asyncio.Lock()
+        self._clock = clock
+        self._interval = window_seconds / max(1, max_calls)
+        # A call is allowed while TAT - now stays within this tolerance.
+        self._burst = window_seconds - self._interval
+        self._tat: "OrderedDict[Any, float]" = OrderedDict()
     
     async def is_rate_limited(self, key: Any) -> tuple[bool, float]:
         """
@@ -271,50 +608,30 @@ class RateLimiter:
         Returns:
             (is_limited, retry_after_seconds)
         """
-        async with self._lock:
-            now = datetime.now().timestamp()
-            
-            # Initialize or clean old calls
-            if key not in self._calls:
-                self._calls[key] = []
-            else:
-                # Remove calls outside the window
-                self._calls[key] = [
-                    call_time for call_time in self._calls[key]
-                    if now - call_time < self.window
-                ]
-            
-            # Check if rate limited
-            if len(self._calls[key]) >= self.max_calls:
-                oldest_call = self._calls[key][0]
-                retry_after = self.window - (now - oldest_call)
-                return True, max(0, retry_after)
-            
+        tat = self._tat.get(key)
+        if tat is None:
             return False, 0
+        wait = tat - self._burst - self._clock()
+        if wait > 0:
+            return True, wait
+        return False, 0
     
     async def record_call(self, key: Any) -> None:
         """Record a call for rate limiting"""
-        async with self._lock:
-            now = datetime.now().timestamp()
-            if key not in self._calls:
-                self._calls[key] = []
-            self._calls[key].append(now)
+        now = self._clock()
+        tat = self._tat.pop(key, now)
+        self._tat[key] = max(tat, now) + self._interval
     
     async def reset(self, key: Any) -> None:
         """Reset rate limit for a key"""
-        async with self._lock:
-            if key in self._calls:
-                del self._calls[key]
+        self._tat.pop(key, None)
     
     async def cleanup(self) -> None:
         """Clean up old entries"""
-        async with self._lock:
-            now = datetime.now().timestamp()
-            for key in list(self._calls.keys()):
-                self._calls[key] = [
-                    call_time for call_time in self._calls[key]
-                    if now - call_time < self.window
-                ]
-                # Remove empty entries
-                if not self._calls[key]:
-                    del self._calls[key]
+        now = self._clock()
+        tats = self._tat
+        while tats:
+            key, tat = next(iter(tats.items()))
+            if tat > now:
+                break
+            del tats[key]
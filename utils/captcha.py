@@ -0,0 +1,239 @@
+"""Captcha codes and images, rendered off the event loop and pooled ahead.
+
+Rendering a captcha draws noise, text and a blur with Pillow and encodes a
+PNG: a few milliseconds of CPU that used to run on the event loop for every
+**Verify** click, together with a TrueType font load from disk. During a raid
+hundreds of members click at once and the loop stalled behind them.
+
+``CaptchaFactory`` renders on a small dedicated thread pool (Pillow does the
+heavy lifting in C), loads each font once, and keeps a refillable pool of
+pre-rendered ``(code, png)`` pairs per style so a click is usually answered
+without rendering at all. Every pair is handed out once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import random
+import secrets
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageDraw, ImageFilter, ImageFont
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+
+logger = logging.getLogger("ModBot.Captcha")
+
+CAPTCHA_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+CAPTCHA_LENGTH = 5
+
+_FONT_PATHS = ("arial.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf")
+
+CaptchaPair = Tuple[str, Optional[bytes]]
+
+
+@dataclass(frozen=True)
+class CaptchaStyle:
+    width: int = 200
+    height: int = 80
+    background: Tuple[int, int, int] = (45, 45, 55)
+    noise_dots: int = 150
+    noise_lines: int = 5
+    font_size: int = 40
+    glyph_step: int = 35
+    jitter: int = 5
+    blur_radius: float = 0.8
+    colors: Tuple[Tuple[int, int, int], ...] = (
+        (88, 101, 242),   # Blurple
+        (87, 242, 135),   # Green
+        (254, 231, 92),   # Yellow
+        (235, 69, 158),   # Pink
+        (237, 66, 69),    # Red
+    )
+
+
+CAPTCHA_STYLES: Dict[str, CaptchaStyle] = {"standard": CaptchaStyle()}
+
+_font_cache: Dict[int, Any] = {}
+
+
+def _load_font(size: int):
+    """The captcha font at ``size``, read from disk only the first time."""
+    font = _font_cache.get(size)
+    if font is None:
+        for path in _FONT_PATHS:
+            try:
+                font = ImageFont.truetype(path, size)
+                break
+            except Exception:
+                continue
+        else:
+            font = ImageFont.load_default()
+        _font_cache[size] = font
+    return font
+
+
+def generate_captcha_code() -> str:
+    return "".join(secrets.choice(CAPTCHA_ALPHABET) for _ in range(CAPTCHA_LENGTH))
+
+
+def render_captcha(code: str, style: CaptchaStyle = CAPTCHA_STYLES["standard"]) -> Optional[bytes]:
+    """Draw ``code`` as a distorted PNG; None when Pillow is unavailable."""
+    if not PILLOW_AVAILABLE:
+        return None
+
+    try:
+        width, height = style.width, style.height
+        img = Image.new("RGB", (width, height), style.background)
+        draw = ImageDraw.Draw(img)
+
+        for _ in range(style.noise_dots):
+            x = random.randint(0, width)
+            y = random.randint(0, height)
+            r = random.randint(60, 120)
+            g = random.randint(60, 120)
+            b = random.randint(80, 140)
+            draw.ellipse([x, y, x + 2, y + 2], fill=(r, g, b))
+
+        for _ in range(style.noise_lines):
+            x1 = random.randint(0, width)
+            y1 = random.randint(0, height)
+            x2 = random.randint(0, width)
+            y2 = random.randint(0, height)
+            draw.line([(x1, y1), (x2, y2)], fill=(80, 80, 100), width=1)
+
+        # Each character with a slight vertical offset
+        font = _load_font(style.font_size)
+        x_offset = 15
+        for i, char in enumerate(code):
+            color = style.colors[i % len(style.colors)]
+            y_offset = random.randint(-style.jitter, style.jitter)
+            draw.text((x_offset, 15 + y_offset), char, font=font, fill=color)
+            x_offset += style.glyph_step
+
+        # Slight blur for anti-OCR
+        if style.blur_radius:
+            img = img.filter(ImageFilter.GaussianBlur(radius=style.blur_radius))
+
+        # Fast zlib level: half the encode time for a ~15% larger file.
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG", compress_level=1)
+        return buffer.getvalue()
+    except Exception:
+        logger.debug("Captcha render failed", exc_info=True)
+        return None
+
+
+def _render_pairs(style: CaptchaStyle, count: int) -> List[CaptchaPair]:
+    pairs = []
+    for _ in range(count):
+        code = generate_captcha_code()
+        pairs.append((code, render_captcha(code, style)))
+    return pairs
+
+
+class CaptchaFactory:
+    """Pre-rendered captcha pairs per style, refilled in the background."""
+
+    def __init__(
+        self,
+        *,
+        pool_size: int = 32,
+        workers: int = 2,
+        refill_batch: int = 8,
+        styles: Optional[Dict[str, CaptchaStyle]] = None,
+    ) -> None:
+        self.pool_size = max(0, int(pool_size))
+        self.refill_batch = max(1, int(refill_batch))
+        self._styles = dict(styles or CAPTCHA_STYLES)
+        self._pools: Dict[str, Deque[CaptchaPair]] = {name: deque() for name in self._styles}
+        self._refills: Dict[str, asyncio.Task] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="captcha")
+        self._closed = False
+        self._hits = 0
+        self._misses = 0
+
+    def warm(self) -> None:
+        """Start filling every style's pool (needs a running loop)."""
+        for name in self._styles:
+            self._ensure_refill(name)
+
+    async def take(self, style: str = "standard") -> CaptchaPair:
+        """A fresh ``(code, png)`` pair; ``png`` is None without Pillow."""
+        if not PILLOW_AVAILABLE:
+            return generate_captcha_code(), None
+        config = self._styles[style]
+        pool = self._pools[style]
+        if pool:
+            self._hits += 1
+            pair = pool.popleft()
+        else:
+            # Drained by a burst: render this one now, still off the loop.
+            self._misses += 1
+            loop = asyncio.get_running_loop()
+            pair = (await loop.run_in_executor(self._executor, _render_pairs, config, 1))[0]
+        self._ensure_refill(style)
+        return pair
+
+    async def close(self) -> None:
+        self._closed = True
+        tasks = list(self._refills.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refills.clear()
+        for pool in self._pools.values():
+            pool.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": (self._hits / total * 100) if total else 0.0,
+            "pooled": {name: len(pool) for name, pool in self._pools.items()},
+        }
+
+    def _ensure_refill(self, style: str) -> None:
+        if self._closed or not PILLOW_AVAILABLE or len(self._pools[style]) >= self.pool_size:
+            return
+        task = self._refills.get(style)
+        if task is None or task.done():
+            self._refills[style] = asyncio.get_running_loop().create_task(
+                self._refill(style), name=f"captcha-refill-{style}"
+            )
+
+    async def _refill(self, style: str) -> None:
+        config = self._styles[style]
+        pool = self._pools[style]
+        loop = asyncio.get_running_loop()
+        while not self._closed and len(pool) < self.pool_size:
+            count = min(self.refill_batch, self.pool_size - len(pool))
+            try:
+                pairs = await loop.run_in_executor(self._executor, _render_pairs, config, count)
+            except Exception:
+                logger.warning("Captcha pool refill failed for style %r", style, exc_info=True)
+                return
+            pool.extend(pair for pair in pairs if pair[1] is not None)
+            if not any(pair[1] is not None for pair in pairs):
+                return
+
+
+__all__ = [
+    "CAPTCHA_ALPHABET",
+    "CAPTCHA_LENGTH",
+    "CAPTCHA_STYLES",
+    "CaptchaFactory",
+    "CaptchaStyle",
+    "PILLOW_AVAILABLE",
+    "generate_captcha_code",
+    "render_captcha",
+]
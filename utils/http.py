@@ -0,0 +1,75 @@
+"""
+Process-wide pooled aiohttp session
+
+Every AI call used to open its own ``ClientSession`` (``bot.session`` was
+never set), paying a fresh TCP and TLS handshake per request. One session per
+process now keeps connections alive and pools them per host. ``ModBot`` opens
+it in ``setup_hook`` as ``bot.session`` and closes it on shutdown; code that
+runs without a bot (scripts, tests) gets the same session from
+``shared_session()``.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+POOL_LIMIT = max(1, int(os.getenv("HTTP_POOL_LIMIT", "100")))
+POOL_LIMIT_PER_HOST = max(1, int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "16")))
+KEEPALIVE_SECONDS = max(1.0, float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60")))
+DNS_CACHE_SECONDS = 300
+DEFAULT_TIMEOUT_SECONDS = 60
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def create_pooled_session(
+    *,
+    limit: int = POOL_LIMIT,
+    limit_per_host: int = POOL_LIMIT_PER_HOST,
+    keepalive_timeout: float = KEEPALIVE_SECONDS,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+) -> aiohttp.ClientSession:
+    """
+    New keep-alive session with a bounded connection pool
+
+    Must be called from a running event loop. ``timeout`` is only the default;
+    callers pass their own ``timeout=`` per request.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=DNS_CACHE_SECONDS,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+    )
+
+
+def shared_session() -> aiohttp.ClientSession:
+    """The process-wide session, created on first use in the running loop."""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = create_pooled_session()
+        _session_loop = loop
+    return _session
+
+
+async def close_shared_session() -> None:
+    """Close the process-wide session if one is open in this loop."""
+    global _session, _session_loop
+    session, _session, _session_loop = _session, None, None
+    if session is None or session.closed:
+        return
+    try:
+        await session.close()
+    except Exception:
+        logger.debug("Failed to close the shared HTTP session", exc_info=True)
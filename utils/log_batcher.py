@@ -0,0 +1,244 @@
+"""
+Coalesced delivery of log embeds, one outbound queue per log channel.
+
+``Logging.safe_send_log`` used to send every embed as its own message, so a
+purge, bulk delete or raid became hundreds of sequential sends to one channel,
+spending its rate limit and holding up the logs that matter. Embeds now queue
+per channel and go out up to ten per message (within Discord's 6000-character
+total), once a batch is full or its oldest entry is ``flush_delay`` seconds
+old. A deep backlog is folded into one summary embed with the full text
+attached. Entries leave in the order they were queued; an entry with a view
+is sent on its own message. Priority entries (ban and kick logs) skip the
+queue and are sent at once.
+"""
+
+import asyncio
+import io
+import logging
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+FailureHook = Callable[[Any, Exception, Tuple[Optional[str], ...]], Awaitable[None]]
+
+
+@dataclass
+class _Entry:
+    embed: discord.Embed
+    view: Optional[discord.ui.View] = None
+    log_type: Optional[str] = None
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+def embed_to_text(embed: discord.Embed) -> str:
+    """Plain-text rendering of an embed for folded log files."""
+    lines: List[str] = []
+    timestamp = embed.timestamp or datetime.now(timezone.utc)
+    lines.append(f"[{timestamp.strftime('%Y-%m-%d %H:%M:%S')} UTC] {embed.title or 'Log'}")
+    author = getattr(embed.author, "name", None)
+    if author:
+        lines.append(f"  Author: {author}")
+    if embed.description:
+        lines.extend(f"  {line}" for line in str(embed.description).splitlines())
+    for embed_field in embed.fields:
+        lines.append(f"  {embed_field.name}: {embed_field.value}")
+    footer = getattr(embed.footer, "text", None)
+    if footer:
+        lines.append(f"  {footer}")
+    return "\n".join(lines)
+
+
+def _log_types(entries: Iterable[_Entry]) -> Tuple[Optional[str], ...]:
+    """Distinct log types of ``entries``, in first-seen order."""
+    return tuple(dict.fromkeys(entry.log_type for entry in entries))
+
+
+class _ChannelQueue:
+    def __init__(self) -> None:
+        self.entries: Deque[_Entry] = deque()
+        self.wakeup = asyncio.Event()
+        self.worker: Optional[asyncio.Task] = None
+
+
+class LogBatcher:
+    """
+    Per-channel outbound queues for log embeds.
+
+    A worker task per channel drains its queue and exits once the queue is
+    empty, so idle channels hold no task. ``send_calls`` counts API sends
+    made through the batcher.
+    """
+
+    def __init__(
+        self,
+        *,
+        flush_delay: float = 1.0,
+        fold_threshold: int = 50,
+        fold_max: int = 500,
+        on_failure: Optional[FailureHook] = None,
+    ):
+        """
+        Args:
+            flush_delay: Seconds a partial batch waits for more embeds
+            fold_threshold: Queue depth at which a backlog is folded into a
+                summary with a text file (0 disables folding)
+            fold_max: Most entries folded into one summary message
+            on_failure: Awaited with (channel, exception, log types) when a
+                send fails; the log types are the distinct ``log_type`` values
+                submitted with the embeds in that send
+        """
+        self.flush_delay = max(0.0, float(flush_delay))
+        self.fold_threshold = max(0, int(fold_threshold))
+        self.fold_max = max(1, int(fold_max))
+        self.on_failure = on_failure
+        self._queues: Dict[int, _ChannelQueue] = {}
+        self._channels: Dict[int, Any] = {}
+        self._flushing = False
+        self.send_calls = 0
+
+    def pending(self, channel_id: int) -> int:
+        queue = self._queues.get(channel_id)
+        return len(queue.entries) if queue else 0
+
+    async def submit(
+        self,
+        channel: Any,
+        embed: discord.Embed,
+        *,
+        view: Optional[discord.ui.View] = None,
+        priority: bool = False,
+        log_type: Optional[str] = None,
+    ) -> bool:
+        """Queue an embed for ``channel``; priority entries are sent immediately.
+
+        ``log_type`` is handed back to the failure hook so the caller knows
+        which configured log channel failed. Returns whether the embed was
+        accepted (for priority entries, whether it was delivered).
+        """
+        if priority:
+            return await self._send(channel, (log_type,), embeds=[embed], view=view)
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = _ChannelQueue()
+        self._channels[channel.id] = channel
+        queue.entries.append(_Entry(embed, view, log_type))
+        queue.wakeup.set()
+        if queue.worker is None or queue.worker.done():
+            queue.worker = asyncio.create_task(self._drain(channel.id, queue))
+        return True
+
+    async def flush(self) -> None:
+        """Send everything queued now, ignoring the flush delay."""
+        self._flushing = True
+        try:
+            workers = []
+            for queue in list(self._queues.values()):
+                queue.wakeup.set()
+                if queue.worker is not None and not queue.worker.done():
+                    workers.append(queue.worker)
+            await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            self._flushing = False
+
+    async def close(self) -> None:
+        await self.flush()
+        self._queues.clear()
+        self._channels.clear()
+
+    async def _drain(self, channel_id: int, queue: _ChannelQueue) -> None:
+        while queue.entries:
+            channel = self._channels[channel_id]
+            head = queue.entries[0]
+            if head.view is None and not self._flushing and not self._ready(queue):
+                queue.wakeup.clear()
+                wait = self.flush_delay - (time.monotonic() - head.queued_at)
+                try:
+                    await asyncio.wait_for(queue.wakeup.wait(), timeout=max(0.0, wait))
+                except asyncio.TimeoutError:
+                    pass
+                if (
+                    not self._flushing
+                    and not self._ready(queue)
+                    and time.monotonic() - head.queued_at < self.flush_delay
+                ):
+                    continue
+            await self._send_next(channel, queue)
+        if self._queues.get(channel_id) is queue:
+            del self._queues[channel_id]
+            self._channels.pop(channel_id, None)
+
+    def _ready(self, queue: _ChannelQueue) -> bool:
+        """Whether the queue already holds a full message's worth of embeds."""
+        count = 0
+        chars = 0
+        for entry in queue.entries:
+            if entry.view is not None:
+                return True
+            count += 1
+            chars += len(entry.embed)
+            if count >= MAX_EMBEDS_PER_MESSAGE or chars >= MAX_EMBED_CHARS_PER_MESSAGE:
+                return True
+        return False
+
+    async def _send_next(self, channel: Any, queue: _ChannelQueue) -> None:
+        entries = queue.entries
+        head = entries.popleft()
+        if head.view is not None:
+            await self._send(channel, (head.log_type,), embeds=[head.embed], view=head.view)
+            return
+        if self.fold_threshold and len(entries) + 1 >= self.fold_threshold:
+            folded = [head]
+            while entries and len(folded) < self.fold_max and entries[0].view is None:
+                folded.append(entries.popleft())
+            await self._send_folded(channel, folded)
+            return
+        batch = [head]
+        chars = len(head.embed)
+        while entries and len(batch) < MAX_EMBEDS_PER_MESSAGE and entries[0].view is None:
+            size = len(entries[0].embed)
+            if chars + size > MAX_EMBED_CHARS_PER_MESSAGE:
+                break
+            batch.append(entries.popleft())
+            chars += size
+        await self._send(channel, _log_types(batch), embeds=[entry.embed for entry in batch])
+
+    async def _send_folded(self, channel: Any, entries: List[_Entry]) -> None:
+        titles = Counter(entry.embed.title or "Log" for entry in entries)
+        summary = discord.Embed(
+            title=f"{len(entries)} log events",
+            description="\n".join(
+                f"**{title}** × {count}" for title, count in titles.most_common(15)
+            )[:4000],
+            color=entries[-1].embed.color,
+            timestamp=datetime.now(timezone.utc),
+        )
+        summary.set_footer(text="Burst folded into one message; full details attached")
+        text = "\n\n".join(embed_to_text(entry.embed) for entry in entries)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        file = discord.File(io.BytesIO(text.encode("utf-8")), filename=f"logs-{stamp}.txt")
+        await self._send(channel, _log_types(entries), embeds=[summary], file=file)
+
+    async def _send(self, channel: Any, log_types: Tuple[Optional[str], ...], **kwargs: Any) -> bool:
+        kwargs = {key: value for key, value in kwargs.items() if value is not None}
+        self.send_calls += 1
+        try:
+            await channel.send(allowed_mentions=discord.AllowedMentions.none(), use_v2=False, **kwargs)
+            return True
+        except Exception as exc:
+            if isinstance(exc, discord.HTTPException) and not isinstance(exc, (discord.Forbidden, discord.NotFound)):
+                logger.error("Failed to send log in channel %s: %s", getattr(channel, "id", "?"), exc)
+            if self.on_failure is not None:
+                try:
+                    await self.on_failure(channel, exc, log_types)
+                except Exception:
+                    logger.debug("Log failure hook raised", exc_info=True)
+            return False
@@ -0,0 +1,315 @@
+"""
+Central timer service for timed moderation items.
+
+Tempbans, quarantines, giveaways, AI scheduled tasks and weekly staff reports
+used to be found by per-cog ``tasks.loop`` polls that queried the database
+every 30 seconds to 5 minutes, whether or not anything was due, and fired up
+to one interval late. Cogs now register a handler (and a loader that
+rehydrates pending items from the database) per job kind, and call
+``schedule`` / ``cancel`` / ``reschedule`` when they create or change an item.
+The scheduler keeps one min-heap of due times and sleeps exactly until the
+next one. A handler that raises is retried a few times shortly after, as the
+old polls would have picked the item up again on their next pass.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("ModBot.Scheduler")
+
+JobHandler = Callable[[Hashable, Any], Awaitable[Any]]
+JobLoader = Callable[[], Awaitable[Iterable[Tuple[Hashable, Any, Any]]]]
+
+
+def due_timestamp(value: Any) -> Optional[float]:
+    """Epoch seconds for a due time given as a number, datetime or DB string.
+
+    Naive datetimes and strings are treated as UTC, which is how the bot
+    stores every expiry column. Returns None for empty or unparseable values.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except (TypeError, ValueError):
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class Scheduler:
+    """
+    Min-heap of ``(due, seq, kind, key)`` entries with lazy deletion.
+
+    ``_jobs`` maps ``(kind, key)`` to the live ``(due, seq, payload)``; heap
+    entries whose seq no longer matches were cancelled or rescheduled and are
+    skipped when popped. Handlers of one kind run one at a time, so a handler
+    that processes "everything due" never races itself.
+    """
+
+    def __init__(
+        self,
+        *,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+        resync_interval: float = 900.0,
+        retry_delay: float = 60.0,
+        max_retries: int = 3,
+    ):
+        """
+        Args:
+            clock: Wall-clock source in epoch seconds
+            sleep: Coroutine used to wait for the next due job
+            resync_interval: Seconds between loader re-runs (0 disables)
+            retry_delay: Seconds before a failed job runs again, times the attempt
+            max_retries: Retries of a failed job before it is left to the loader
+        """
+        self._clock = clock
+        self._sleep = sleep
+        self.resync_interval = max(0.0, float(resync_interval))
+        self.retry_delay = max(0.0, float(retry_delay))
+        self.max_retries = max(0, int(max_retries))
+        self._heap: List[Tuple[float, int, str, Hashable]] = []
+        self._jobs: Dict[Tuple[str, Hashable], Tuple[float, int, Any]] = {}
+        self._handlers: Dict[str, JobHandler] = {}
+        self._loaders: Dict[str, JobLoader] = {}
+        self._kind_locks: Dict[str, asyncio.Lock] = {}
+        self._retries: Dict[Tuple[str, Hashable], int] = {}
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: set[asyncio.Task] = set()
+        self._next_resync = float("inf")
+        self.fired = 0
+        self.failures = 0
+
+    # --- Registration ---------------------------------------------------------
+
+    def register(self, kind: str, handler: JobHandler, loader: Optional[JobLoader] = None) -> None:
+        """Route jobs of ``kind`` to ``handler(key, payload)``.
+
+        ``loader`` returns ``(key, due, payload)`` rows for every pending item
+        of that kind. It runs when the scheduler starts (immediately if it is
+        already running) and again every ``resync_interval``, which picks up
+        rows written by paths that never called ``schedule``.
+        """
+        self._handlers[kind] = handler
+        if loader is None:
+            self._loaders.pop(kind, None)
+            return
+        self._loaders[kind] = loader
+        if self.running:
+            self._track(asyncio.ensure_future(self._load(kind)))
+
+    def unregister(self, kind: str) -> None:
+        """Drop a kind's handler, loader and pending jobs (on cog unload)."""
+        self._handlers.pop(kind, None)
+        self._loaders.pop(kind, None)
+        for job_key in [job_key for job_key in self._jobs if job_key[0] == kind]:
+            del self._jobs[job_key]
+        for job_key in [job_key for job_key in self._retries if job_key[0] == kind]:
+            del self._retries[job_key]
+
+    # --- Jobs -----------------------------------------------------------------
+
+    def schedule(self, kind: str, key: Hashable, due: Any, payload: Any = None) -> bool:
+        """Add or replace the job ``(kind, key)``; returns False if ``due`` is invalid."""
+        when = due_timestamp(due)
+        if when is None:
+            return False
+        seq = next(self._seq)
+        self._jobs[(kind, key)] = (when, seq, payload)
+        heapq.heappush(self._heap, (when, seq, kind, key))
+        if self._heap[0][1] == seq:
+            self._wake()
+        return True
+
+    def cancel(self, kind: str, key: Hashable) -> bool:
+        """Forget a pending job; returns whether one existed."""
+        return self._jobs.pop((kind, key), None) is not None
+
+    def reschedule(self, kind: str, key: Hashable, due: Any) -> bool:
+        """Move a pending job, keeping its payload; returns False if none existed."""
+        job = self._jobs.get((kind, key))
+        if job is None:
+            return False
+        return self.schedule(kind, key, due, job[2])
+
+    def due_at(self, kind: str, key: Hashable) -> Optional[float]:
+        job = self._jobs.get((kind, key))
+        return job[0] if job else None
+
+    def pending(self, kind: Optional[str] = None) -> int:
+        if kind is None:
+            return len(self._jobs)
+        return sum(1 for job_kind, _ in self._jobs if job_kind == kind)
+
+    def next_due(self) -> Optional[float]:
+        """Due time of the earliest live job, discarding stale heap entries."""
+        heap = self._heap
+        while heap:
+            when, seq, kind, key = heap[0]
+            job = self._jobs.get((kind, key))
+            if job is not None and job[1] == seq:
+                return when
+            heapq.heappop(heap)
+        return None
+
+    # --- Running --------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the timer loop on the running event loop (idempotent)."""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="modbot-scheduler")
+
+    async def stop(self) -> None:
+        """Stop the loop and cancel handlers still in flight."""
+        task, self._task = self._task, None
+        pending = [t for t in (task, *self._running) if t is not None and not t.done()]
+        for t in pending:
+            t.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._running.clear()
+
+    async def rehydrate(self, kind: Optional[str] = None) -> None:
+        """Re-run loaders (all kinds, or one) and merge their rows into the heap."""
+        kinds = [kind] if kind is not None else list(self._loaders)
+        await asyncio.gather(*(self._load(k) for k in kinds))
+
+    async def run_due(self) -> int:
+        """Start handlers for every job due now and wait for them; returns the count."""
+        started = self._fire_due()
+        if started:
+            await asyncio.gather(*started, return_exceptions=True)
+        return len(started)
+
+    def _fire_due(self) -> List[asyncio.Task]:
+        now = self._clock()
+        started: List[asyncio.Task] = []
+        while True:
+            when = self.next_due()
+            if when is None or when > now:
+                return started
+            _, seq, kind, key = heapq.heappop(self._heap)
+            _, _, payload = self._jobs.pop((kind, key))
+            handler = self._handlers.get(kind)
+            if handler is None:
+                continue
+            task = asyncio.ensure_future(self._invoke(kind, handler, key, payload))
+            self._track(task)
+            started.append(task)
+
+    async def _invoke(self, kind: str, handler: JobHandler, key: Hashable, payload: Any) -> None:
+        lock = self._kind_locks.setdefault(kind, asyncio.Lock())
+        async with lock:
+            try:
+                await handler(key, payload)
+                self.fired += 1
+                self._retries.pop((kind, key), None)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                logger.exception("Scheduled %s job %r failed", kind, key)
+                self._retry(kind, key, payload)
+
+    def _retry(self, kind: str, key: Hashable, payload: Any) -> None:
+        job_key = (kind, key)
+        # The handler (or a cog) already booked the next run, or the kind is gone.
+        if job_key in self._jobs or kind not in self._handlers:
+            self._retries.pop(job_key, None)
+            return
+        attempt = self._retries.get(job_key, 0) + 1
+        if attempt > self.max_retries:
+            self._retries.pop(job_key, None)
+            logger.error("Giving up on %s job %r after %d retries", kind, key, self.max_retries)
+            return
+        self._retries[job_key] = attempt
+        self.schedule(kind, key, self._clock() + self.retry_delay * attempt, payload)
+
+    async def _load(self, kind: str) -> None:
+        loader = self._loaders.get(kind)
+        if loader is None:
+            return
+        try:
+            rows = await loader()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Loading %s jobs failed", kind)
+            return
+        for key, due, payload in rows or ():
+            current = self._jobs.get((kind, key))
+            when = due_timestamp(due)
+            if when is None or (current is not None and current[0] == when):
+                continue
+            self.schedule(kind, key, when, payload)
+
+    async def _run(self) -> None:
+        await self.rehydrate()
+        self._next_resync = self._resync_deadline()
+        while True:
+            if self._clock() >= self._next_resync:
+                await self.rehydrate()
+                self._next_resync = self._resync_deadline()
+
+            self._fire_due()
+
+            deadline = self._next_resync
+            next_due = self.next_due()
+            if next_due is not None:
+                deadline = min(deadline, next_due)
+            await self._wait(max(0.0, deadline - self._clock()))
+
+    def _resync_deadline(self) -> float:
+        if not self.resync_interval:
+            return float("inf")
+        return self._clock() + self.resync_interval
+
+    async def _wait(self, delay: float) -> None:
+        """Sleep for ``delay`` unless a sooner job is scheduled meanwhile."""
+        wakeup = self._wakeup
+        wakeup.clear()
+        if delay == float("inf"):
+            await wakeup.wait()
+            return
+        sleeper = asyncio.ensure_future(self._sleep(delay))
+        waker = asyncio.ensure_future(wakeup.wait())
+        try:
+            await asyncio.wait({sleeper, waker}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in (sleeper, waker):
+                waiter.cancel()
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _track(self, task: asyncio.Task) -> None:
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+
+def get_scheduler(bot: Any) -> Scheduler:
+    """The bot's shared scheduler, attached on first use for bots built without one."""
+    scheduler = getattr(bot, "scheduler", None)
+    if scheduler is None:
+        scheduler = Scheduler()
+        bot.scheduler = scheduler
+    return scheduler
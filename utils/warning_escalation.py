@@ -249,7 +249,7 @@ def build_escalation_dm_embed(
     guild: Any,
     rule: WarningEscalationResult,
 ) -> Optional[str]:
-    """Return the plain-text escalation DM body for ``fire_and_forget`` senders."""
+    """Return the plain-text escalation DM body for background senders."""
     action_label = {
         "timeout": "timed out",
         "kick": "kicked",